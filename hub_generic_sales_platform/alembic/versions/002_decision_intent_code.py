@@ -0,0 +1,30 @@
+"""Add intent_code to runtime_decision_event (local intent classifier training data)
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('runtime_decision_event', sa.Column('intent_code', sa.String(), nullable=True))
+    op.create_index(
+        'ix_runtime_decision_event_intent_code',
+        'runtime_decision_event',
+        ['intent_code', 'created_at'],
+        postgresql_where=sa.text('intent_code IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_runtime_decision_event_intent_code', table_name='runtime_decision_event')
+    op.drop_column('runtime_decision_event', 'intent_code')
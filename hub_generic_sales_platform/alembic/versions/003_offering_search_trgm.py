@@ -0,0 +1,32 @@
+"""Trigram indexes for catalog substring search (search_offerings ILIKE)
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tenant_offering_code_trgm "
+        "ON tenant_offering USING gin (code gin_trgm_ops)"
+    )
+    # Biểu thức phải khớp OfferingRepository.search_catalog: name || ' ' || coalesce(description, '')
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tenant_offering_version_search_trgm "
+        "ON tenant_offering_version USING gin ((name || ' ' || coalesce(description, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tenant_offering_version_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tenant_offering_code_trgm")
@@ -0,0 +1,44 @@
+"""Add tenant_offering_read_model (materialized offering x channel documents)
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tenant_offering_read_model',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('tenant_id', sa.String(), nullable=False),
+        sa.Column('offering_id', sa.String(), nullable=False),
+        sa.Column('channel_code', sa.String(), nullable=False),
+        sa.Column('offering_code', sa.String(), nullable=False),
+        sa.Column('domain_id', sa.String(), nullable=True),
+        sa.Column('document', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['offering_id'], ['tenant_offering.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tenant_id', 'offering_id', 'channel_code', name='uq_offering_read_model')
+    )
+    op.create_index(
+        'idx_offering_read_model_code',
+        'tenant_offering_read_model',
+        ['tenant_id', 'channel_code', 'offering_code']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_offering_read_model_code', table_name='tenant_offering_read_model')
+    op.drop_table('tenant_offering_read_model')
@@ -0,0 +1,45 @@
+"""Indexed exact / trigram lookup for tenant_semantic_cache
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tenant_semantic_cache', sa.Column('query_hash', sa.String(length=64), nullable=True))
+    # Biểu thức phải khớp cache_repo.normalize_query: lowercase, gộp khoảng trắng, tối đa 500 ký tự
+    op.execute(
+        "UPDATE tenant_semantic_cache SET query_hash = encode(sha256(convert_to("
+        "left(btrim(regexp_replace(lower(query_text), '\\s+', ' ', 'g')), 500), 'UTF8')), 'hex')"
+    )
+    # Câu hỏi trùng trong cùng tenant: giữ entry có nhiều hit nhất
+    op.execute(
+        "DELETE FROM tenant_semantic_cache a USING tenant_semantic_cache b "
+        "WHERE a.tenant_id = b.tenant_id AND a.query_hash = b.query_hash AND ("
+        "coalesce(a.hit_count, 0) < coalesce(b.hit_count, 0) "
+        "OR (coalesce(a.hit_count, 0) = coalesce(b.hit_count, 0) AND a.id > b.id))"
+    )
+    op.create_unique_constraint(
+        'uq_semantic_cache_query_hash', 'tenant_semantic_cache', ['tenant_id', 'query_hash']
+    )
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tenant_semantic_cache_query_trgm "
+        "ON tenant_semantic_cache USING gin (query_text gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tenant_semantic_cache_query_trgm")
+    op.drop_constraint('uq_semantic_cache_query_hash', 'tenant_semantic_cache', type_='unique')
+    op.drop_column('tenant_semantic_cache', 'query_hash')
@@ -0,0 +1,24 @@
+"""Add intent_source to runtime_decision_event (only LLM labels train the local intent classifier)
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Dòng cũ không rõ nguồn (có thể do chính classifier local gán) -> để NULL, không dùng để train
+    op.add_column('runtime_decision_event', sa.Column('intent_source', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('runtime_decision_event', 'intent_source')
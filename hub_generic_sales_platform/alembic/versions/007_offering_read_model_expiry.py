@@ -0,0 +1,27 @@
+"""Add built_at / expires_at to tenant_offering_read_model (price validity expiry, stale-write guard)
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Document cũ không có mốc hết hạn -> xóa để build lại với expires_at đúng
+    op.execute("DELETE FROM tenant_offering_read_model")
+    op.add_column('tenant_offering_read_model', sa.Column('built_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tenant_offering_read_model', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tenant_offering_read_model', 'expires_at')
+    op.drop_column('tenant_offering_read_model', 'built_at')
@@ -1,6 +1,9 @@
+import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Any, Iterator, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.application.services.agent_tool_registry import agent_tools
 from app.application.services.catalog_state_handler import CatalogStateHandler
@@ -15,6 +18,10 @@ from app.core.domain.state_machine import StateMachine
 from app.core.services.tool_executor import ToolExecutor
 from app.application.services.intent_handler import IntentHandler
 from app.core.shared.db_utils import transaction_scope
+from app.infrastructure.database.write_behind import get_write_behind_journal
+
+# Callback nhận từng token khi streaming (SSE / WebSocket)
+TokenCallback = Callable[[str], Awaitable[None]]
 
 
 class AgentOrchestrator:
@@ -56,56 +63,110 @@ class AgentOrchestrator:
         self.tool_executor = ToolExecutor(db, self.tool_handlers)
         self.logger = logging.getLogger(__name__)
 
-    async def run(self, message: str, session_id: str, state_code: Any, tenant_id: str) -> Dict[str, Any]:
-        """EntryPoint Agentic Workflow (Async) - Wrapped in Transaction to ensure Atomicity"""
+    async def run(
+        self,
+        message: str,
+        session_id: str,
+        state_code: Any,
+        tenant_id: str,
+        on_token: Optional[TokenCallback] = None,
+        slots: Optional[List[Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        EntryPoint Agentic Workflow (Async) - Wrapped in Transaction to ensure Atomicity.
+        `on_token`: nếu có, câu trả lời của LLM được stream từng token qua callback.
+        `slots`: context slot caller đã load (bỏ qua query slot); kết quả có `context_slots` -
+        slot active sau lượt (chỉ đọc lại DB khi tool có ghi slot của session).
+        """
         async with transaction_scope(self.db):
             # 1. Save User Message
-            await self.turn_repo.create({
+            user_turn_id = await self._log_turn({
                 "session_id": session_id,
                 "speaker": domain.Speaker.USER,
                 "message": message
-            }, tenant_id=tenant_id)
+            }, tenant_id)
 
             # 2. Execute Orchestration
-            result = await self._execute_orchestration(message, session_id, state_code, tenant_id)
+            result = await self._execute_orchestration(
+                message, session_id, state_code, tenant_id, on_token=on_token, slots=slots
+            )
             
             # 3. Save Bot Response
-            await self.turn_repo.create({
+            await self._log_turn({
                 "session_id": session_id,
                 "speaker": domain.Speaker.BOT,
                 "message": result.get("response", "Tôi không thể xử lý yêu cầu này."),
                 "ui_metadata": result.get("g_ui_data")
-            }, tenant_id=tenant_id)
+            }, tenant_id)
             
+            result["input_turn_id"] = user_turn_id
             return result
 
-    async def _execute_orchestration(self, message: str, session_id: str, state_code: Any, tenant_id: str) -> Dict[str, Any]:
+    async def _log_turn(self, data: Dict[str, Any], tenant_id: str) -> Optional[str]:
+        """Ghi turn qua write-behind journal (nếu bật) hoặc INSERT trong transaction hiện tại"""
+        journal = get_write_behind_journal()
+        if journal:
+            return await journal.log_turn(data)
+        turn = await self.turn_repo.create(data, tenant_id=tenant_id)
+        return getattr(turn, "id", None)
+
+    async def _execute_orchestration(
+        self,
+        message: str,
+        session_id: str,
+        state_code: Any,
+        tenant_id: str,
+        on_token: Optional[TokenCallback] = None,
+        slots: Optional[List[Any]] = None
+    ) -> Dict[str, Any]:
         """Core Orchestration Logic without independent transaction management"""
-        # 2. Context Snapshotting (Slots)
-        slots = await self.slots_repo.get_by_session(session_id, tenant_id=tenant_id)
+        timings: Dict[str, float] = {}
+        state_str = state_code.value if hasattr(state_code, 'value') else str(state_code)
+        current_state = domain.LifecycleState(state_str)
+
+        # 2. Context Snapshotting (Slots) - dùng lại slot caller đã load nếu có
+        self.slots_repo.pop_written(session_id)
+        if slots is None:
+            with self._stage(timings, "slots"):
+                slots = await self.slots_repo.get_by_session(session_id, tenant_id=tenant_id)
         context_snapshot = {s.key: s.value for s in slots if s.is_active()}
-        
-        # 3. Conversation History
-        recent_turns = await self.turn_repo.get_by_session(session_id, tenant_id=tenant_id, limit=10)
-        
-        history = [
-            {"role": "user" if t.speaker == domain.Speaker.USER else "assistant", "content": t.message}
-            for t in recent_turns
-        ]
-        
-        # 3. Bot Context
-        session = await self.session_repo.get(session_id, tenant_id=tenant_id)
-        if not session:
-             return {"response": "Lỗi: Không tìm thấy session.", "usage": {}}
 
-        from app.infrastructure.database.repositories import BotRepository
-        bot_repo = BotRepository(self.db)
-        bot = await bot_repo.get(session.bot_id, tenant_id=tenant_id)
+        # Intent extraction là một LLM round-trip riêng -> chạy như task song song với phần còn lại:
+        # các bước đọc DB (chỉ vài ms, tuần tự vì dùng chung AsyncSession/transaction) và main reasoning call.
+        intent_task = asyncio.create_task(self._timed(timings, "intent", self.intent_handler.extract_intent_with_source(
+            message=message,
+            current_state=current_state,
+            context=context_snapshot,
+            tenant_id=tenant_id
+        )))
+        try:
+            # 3. Conversation History
+            with self._stage(timings, "turns"):
+                recent_turns = await self.turn_repo.get_by_session(session_id, tenant_id=tenant_id, limit=10)
+
+            history = [
+                {"role": "user" if t.speaker == domain.Speaker.USER else "assistant", "content": t.message}
+                for t in recent_turns
+            ]
+
+            # 3. Bot Context
+            with self._stage(timings, "session"):
+                session = await self.session_repo.get(session_id, tenant_id=tenant_id)
+            if not session:
+                intent_task.cancel()
+                return {"response": "Lỗi: Không tìm thấy session.", "usage": {}}
+
+            from app.infrastructure.database.repositories import BotRepository
+            bot_repo = BotRepository(self.db)
+            with self._stage(timings, "bot"):
+                bot = await bot_repo.get(session.bot_id, tenant_id=tenant_id)
+        except BaseException:
+            intent_task.cancel()
+            raise
         bot_name = bot.name if bot else "IRIS Hub Assistant"
         domain_name = bot.domain.name if bot and bot.domain else "General"
 
         # 4. Filter Tools
-        state_str = state_code.value if hasattr(state_code, 'value') else str(state_code)
         self.logger.info("Agent orchestration started", extra={"session_id": session_id, "bot": bot_name, "state": state_str})
 
         state_allowed_tools = StateMachine.get_allowed_tools(state_str)
@@ -120,55 +181,86 @@ class AgentOrchestrator:
         available_tools = [t for t in all_possible_tools if t["name"] in state_allowed_tools]
         allowed_tool_names = [t["name"] for t in available_tools]
         
-        # 5. Extract Intent (Sprint 2 - Enforcement Layer)
-        current_state = domain.LifecycleState(state_str)
-        intent = await self.intent_handler.extract_intent(
-            message=message,
-            current_state=current_state,
-            context=context_snapshot
-        )
-        intent_str = intent.value if intent else "UNKNOWN"
-        self.logger.debug("Intent extracted", extra={"intent": intent_str})
+        # 5. Intent (Enforcement Layer): classifier local trả về ngay -> có mặt trong prompt.
+        # Nếu intent còn chờ LLM thì không chặn main reasoning call: hai LLM round-trip chạy song song,
+        # intent chỉ được await khi cần kiểm tra tool (FlowDecisionService) và trước khi trả kết quả.
+        prompt_intent = None
+        if intent_task.done():
+            intent, _ = intent_task.result()
+            prompt_intent = intent.value if intent else "UNKNOWN"
 
         # 6. Build System Prompt
-        # Inject Context Slots and Intent
-        context_str = "\n".join([f"- {k}: {v}" for k, v in context_snapshot.items()]) if context_snapshot else "Chưa có thông tin."
-        
+        # Prefix ổn định (persona, quy tắc, tool schema - chỉ đổi theo bot/state) đặt trước,
+        # phần thay đổi mỗi lượt (slots, state, intent) đặt sau để provider prompt caching trúng prefix.
         system_prompt = (
-            f"Bạn là '{bot_name}', chuyên gia trong lĩnh vực '{domain_name}'.\n"
-            "Nhiệm vụ: Hỗ trợ người dùng tìm kiếm, so sánh và chọn mua sản phẩm phù hợp nhất.\n\n"
-            f"HỒ SƠ KHÁCH HÀNG (CONTEXT SLOTS):\n{context_str}\n\n"
-            f"Trạng thái hiện tại: {state_str}\n"
-            f"Ý định người dùng (Detected Intent): {intent_str}\n\n"
-            f"Lưu ý QUAN TRỌNG:\n"
-            "- 'Context Slots' là những gì khách đã chọn. LUÔN sử dụng thông tin này để trả lời mà không cần hỏi lại.\n"
-            "- 'State dictate all': Trạng thái quyết định hành động của bạn. AI không tự ý nhảy luồng.\n"
-            "- 'Intent-First': Luôn bám sát ý định người dùng đã được xác định.\n"
-            "\nQUY TẮC SỬ DỤNG CÔNG CỤ:\n"
-            "1. Xác báo ý định (Dùng `submit_intent`): Cho các ý định: GREETING, CONFIRM (chốt mua), CANCEL (hủy), PROVIDE_INFO (cung cấp info).\n"
-            "2. Tra cứu sản phẩm: Dùng `search_offerings` khi khách hỏi chung chung.\n"
-            "3. Chi tiết sản phẩm: Dùng `get_offering_details`.\n"
-            f"\nCông cụ ĐƯỢC PHÉP: {json.dumps(available_tools, ensure_ascii=False)}\n"
+            self._build_prompt_prefix(bot_name, domain_name, available_tools)
+            + self._build_prompt_context(context_snapshot, state_str, prompt_intent)
         )
-        
+
+        try:
+            result = await self._reasoning_loop(
+                message, system_prompt, history, available_tools, allowed_tool_names,
+                session, slots, state_code, current_state, intent_task, on_token
+            )
+        except BaseException:
+            intent_task.cancel()
+            raise
+
+        # Intent phải có trước khi trả kết quả (log decision + dữ liệu train classifier local)
+        intent, intent_source = await intent_task
+        self._record_timings(timings, session_id)
+        intent_str = intent.value if intent else "UNKNOWN"
+        self.logger.debug("Intent extracted", extra={"intent": intent_str})
+        if self.slots_repo.pop_written(session_id):
+            context_snapshot = {
+                s.key: s.value
+                for s in await self.slots_repo.get_by_session(session_id, tenant_id=tenant_id)
+                if s.is_active()
+            }
+        return {
+            "intent": intent_str,
+            "intent_source": intent_source,
+            "context_slots": context_snapshot,
+            **result
+        }
+
+    async def _reasoning_loop(
+        self,
+        message: str,
+        system_prompt: str,
+        history: List[Dict[str, Any]],
+        available_tools: List[Dict[str, Any]],
+        allowed_tool_names: List[str],
+        session: Any,
+        slots: List[Any],
+        state_code: Any,
+        current_state: domain.LifecycleState,
+        intent_task: "asyncio.Task",
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """Think -> Act -> Observe (tối đa 3 vòng). Intent lấy từ intent_task khi cần kiểm tra tool."""
         # 6. Reasoning Loop
         max_turns = 3
-        current_message = message
-        total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        # Observation đi vào dưới dạng tool message nối sau hội thoại (system prompt giữ nguyên)
+        messages: List[Dict[str, Any]] = history + [{"role": "user", "content": message}]
+        total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0}
         g_ui_data = None 
         final_new_state = None
+        tools_used: List[str] = []
         
         for i in range(max_turns):
-            llm_result = await self.llm_service.generate_response(
-                system_prompt, 
-                current_message, 
+            llm_result = await self._call_llm(
+                system_prompt,
+                None,
                 tools=available_tools if available_tools else None,
-                messages_history=history
+                history=messages,
+                on_token=on_token
             )
             
             if llm_result.get("usage"):
                 for k in total_usage:
-                    total_usage[k] += llm_result["usage"].get(k, 0)
+                    total_usage[k] += llm_result["usage"].get(k) or 0
+                self._record_usage(llm_result["usage"])
 
             tool_calls = llm_result.get("tool_calls", [])
             if not tool_calls:
@@ -176,7 +268,8 @@ class AgentOrchestrator:
                     "response": llm_result.get("response") or "Tôi không thể xử lý yêu cầu này.",
                     "usage": total_usage,
                     "g_ui_data": g_ui_data,
-                    "new_state": final_new_state
+                    "new_state": final_new_state,
+                    "tools_used": tools_used
                 }
             
             tool_call = tool_calls[0]
@@ -192,6 +285,7 @@ class AgentOrchestrator:
             # Validate Tool Execution with FlowDecisionService
             from app.core.services.flow_decision_service import FlowDecisionService
             
+            intent, _ = await intent_task
             can_execute, rejection_reason = FlowDecisionService.can_execute_tool(
                 intent=intent if intent else domain.Intent.UNKNOWN,
                 current_state=current_state,
@@ -227,6 +321,7 @@ class AgentOrchestrator:
                     }
                 
                 observation = executor_result.data
+                tools_used.append(tool_name)
                 if executor_result.ui_data:
                     g_ui_data = executor_result.ui_data
             
@@ -251,8 +346,22 @@ class AgentOrchestrator:
                     self.logger.warning("Invalid state transition rejected", extra={"from": str(state_code), "to": str(decided_state)})
 
             self.logger.debug("Tool completed", extra={"tool": tool_name, "new_state": str(final_new_state or "Unchanged")})
-            system_prompt += f"\n[Observation from {tool_name}]: {json.dumps(observation, ensure_ascii=False)}"
-            current_message = f"Dựa trên kết quả từ {tool_name}, hãy hoàn tất câu trả lời cho người dùng."
+            messages += [
+                {
+                    "role": "assistant",
+                    "content": llm_result.get("response") or None,
+                    "tool_calls": [{
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {"name": tool_name, "arguments": tool_call.function.arguments}
+                    }]
+                },
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": json.dumps(observation, ensure_ascii=False)
+                }
+            ]
                 
         return {
             "response": "Xin lỗi, tôi cần quá nhiều bước để xử lý yêu cầu này.", 
@@ -261,6 +370,107 @@ class AgentOrchestrator:
             "new_state": final_new_state
         }
 
+    @staticmethod
+    def _build_prompt_prefix(bot_name: str, domain_name: str, available_tools: List[Dict[str, Any]]) -> str:
+        """Phần system prompt không đổi giữa các lượt của cùng bot + state (cacheable prefix)."""
+        return (
+            f"Bạn là '{bot_name}', chuyên gia trong lĩnh vực '{domain_name}'.\n"
+            "Nhiệm vụ: Hỗ trợ người dùng tìm kiếm, so sánh và chọn mua sản phẩm phù hợp nhất.\n\n"
+            "Lưu ý QUAN TRỌNG:\n"
+            "- 'Context Slots' là những gì khách đã chọn. LUÔN sử dụng thông tin này để trả lời mà không cần hỏi lại.\n"
+            "- 'State dictate all': Trạng thái quyết định hành động của bạn. AI không tự ý nhảy luồng.\n"
+            "- 'Intent-First': Luôn bám sát ý định người dùng đã được xác định.\n"
+            "\nQUY TẮC SỬ DỤNG CÔNG CỤ:\n"
+            "1. Xác báo ý định (Dùng `submit_intent`): Cho các ý định: GREETING, CONFIRM (chốt mua), CANCEL (hủy), PROVIDE_INFO (cung cấp info).\n"
+            "2. Tra cứu sản phẩm: Dùng `search_offerings` khi khách hỏi chung chung.\n"
+            "3. Chi tiết sản phẩm: Dùng `get_offering_details`.\n"
+            "4. Sau khi nhận kết quả công cụ, hãy hoàn tất câu trả lời cho người dùng.\n"
+            f"\nCông cụ ĐƯỢC PHÉP: {json.dumps(available_tools, ensure_ascii=False, sort_keys=True)}\n"
+        )
+
+    @staticmethod
+    def _build_prompt_context(context_snapshot: Dict[str, Any], state_str: str, intent_str: Optional[str]) -> str:
+        """Phần system prompt thay đổi theo từng lượt (đặt cuối prompt). intent_str=None: intent chưa có."""
+        context_str = "\n".join([f"- {k}: {v}" for k, v in context_snapshot.items()]) if context_snapshot else "Chưa có thông tin."
+        prompt = (
+            f"\nHỒ SƠ KHÁCH HÀNG (CONTEXT SLOTS):\n{context_str}\n\n"
+            f"Trạng thái hiện tại: {state_str}\n"
+        )
+        if intent_str is not None:
+            prompt += f"Ý định người dùng (Detected Intent): {intent_str}\n"
+        return prompt
+
+    @contextmanager
+    def _stage(self, timings: Dict[str, float], name: str) -> Iterator[None]:
+        """Đo thời gian (ms) một stage đồng bộ trong pipeline."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def _timed(self, timings: Dict[str, float], name: str, awaitable: Awaitable[Any]) -> Any:
+        """Đo thời gian (ms) một stage chạy như task song song."""
+        with self._stage(timings, name):
+            return await awaitable
+
+    def _record_timings(self, timings: Dict[str, float], session_id: str) -> None:
+        self.logger.info("Agent context assembled", extra={"session_id": session_id, "stage_timings_ms": timings})
+        try:
+            from app.infrastructure.metrics import record_agent_stage
+            for stage, ms in timings.items():
+                record_agent_stage(stage, ms / 1000.0)
+        except Exception:
+            pass
+
+    def _record_usage(self, usage: Dict[str, Any]) -> None:
+        try:
+            from app.infrastructure.metrics import record_llm_tokens
+            record_llm_tokens(usage)
+        except Exception:
+            pass
+
+    async def _call_llm(
+        self,
+        system_prompt: str,
+        message: Optional[str],
+        tools: Optional[List[Dict[str, Any]]],
+        history: List[Dict[str, Any]],
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Gọi LLM; khi có on_token thì dùng stream_response và forward từng delta.
+        Lượt có tools: delta được giữ lại tới hết lượt và chỉ gửi khi lượt không gọi tool -
+        nội dung của lượt trung gian (trước tool_calls) không lọt ra client.
+        """
+        if on_token is None:
+            return await self.llm_service.generate_response(
+                system_prompt, 
+                message, 
+                tools=tools,
+                messages_history=history
+            )
+
+        llm_result: Dict[str, Any] = {}
+        buffered: List[str] = []
+        async for event in self.llm_service.stream_response(
+            system_prompt,
+            message,
+            tools=tools,
+            messages_history=history
+        ):
+            if event.get("type") == "delta":
+                if tools:
+                    buffered.append(event["content"])
+                else:
+                    await on_token(event["content"])
+            elif event.get("type") == "final":
+                llm_result = {k: v for k, v in event.items() if k != "type"}
+        if not llm_result.get("tool_calls"):
+            for content in buffered:
+                await on_token(content)
+        return llm_result
+
     async def close(self):
         """Cleanup handlers"""
         await self.integration_handler.close()
@@ -1,22 +1,32 @@
-import re
+import asyncio
 import time
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 import traceback
 
-from app.application.orchestrators.agent_orchestrator import AgentOrchestrator
+from app.application.orchestrators.agent_orchestrator import AgentOrchestrator, TokenCallback
 from app.application.services.session_service import SessionService
 from app.core.shared.db_utils import transaction_scope
 from app.application.services.semantic_cache_service import SemanticCacheService
+from app.application.services.semantic_cache_governance import get_cache_admission_filter
+from app.application.services.knowledge_lookup_service import KnowledgeLookupService, SOURCE_SEMANTIC_CACHE
 from app.infrastructure.database.repositories import FAQRepository
 from app.infrastructure.database.repositories import DecisionRepository
+from app.infrastructure.database.repositories import BotVersionRepository
+from app.infrastructure.database.repositories import ContextSlotRepository
+from app.infrastructure.cache.response_cache import get_response_cache, is_cacheable, slot_fingerprint
 from app.infrastructure.database.engine import get_session_maker
+from app.infrastructure.database.write_behind import get_write_behind_journal
 from app.core import domain
 from app.infrastructure.llm.factory import get_llm_provider
 from app.core.config.settings import get_settings
 from app.application.services.session_state import SessionStateHandler
+from app.application.services.fast_path_matcher import get_fast_path_matcher
+
+# Response có các cụm này không được cache (semantic cache / response cache)
+_ERROR_MARKERS = ("lỗi", "xin lỗi", "không thể", "sự cố")
 
 
 class HybridOrchestrator:
@@ -36,7 +46,11 @@ class HybridOrchestrator:
         
         self.semantic_cache_service = SemanticCacheService(db)
         self.faq_repo = FAQRepository(db)
+        self.knowledge_lookup = KnowledgeLookupService(db, self.semantic_cache_service, self.faq_repo)
         self.decision_repo = DecisionRepository(db)
+        self.bot_version_repo = BotVersionRepository(db)
+        self.slots_repo = ContextSlotRepository(db)
+        self.fast_path_matcher = get_fast_path_matcher()
         self.logger = logging.getLogger(__name__)
 
     async def handle_message(
@@ -47,10 +61,12 @@ class HybridOrchestrator:
         session_id: Optional[str] = None,
         background_tasks: Optional[BackgroundTasks] = None,
         channel_code: str = "webchat",
-        ext_metadata: Optional[Dict[str, Any]] = None
+        ext_metadata: Optional[Dict[str, Any]] = None,
+        on_token: Optional[TokenCallback] = None
     ) -> Dict[str, Any]:
         """EntryPoint điều phối 3 tầng xử lý.
-        ext_metadata: Channel-specific user mapping (zalo_user_id, messenger_id, ...) for runtime_session."""
+        ext_metadata: Channel-specific user mapping (zalo_user_id, messenger_id, ...) for runtime_session.
+        on_token: callback streaming token của Tier 3 (Tier 1/2 trả lời trọn vẹn trong payload)."""
         try:
             start_time = time.time()
         
@@ -84,7 +100,10 @@ class HybridOrchestrator:
 
             # --- TIER 1: FAST PATH (Cost: $0) ---
             if current_state not in ["purchasing"]:
-                social_response = self._check_social_patterns(message)
+                bot_rules = await self.fast_path_matcher.get_bot_rules(
+                    bot_version_id, self.bot_version_repo.get_fast_path_rules
+                )
+                social_response = self._check_social_patterns(message, bot_rules, bot_version_id)
                 if social_response:
                     async with transaction_scope(self.db):
                         await self.session_service.log_user_message(session_id, message)
@@ -102,85 +121,88 @@ class HybridOrchestrator:
             SKIP_TIER2_STATES = {"viewing", "comparing", "purchasing", "searching"}
             current_state_lower = (current_state or "").lower()
             skip_tier2 = current_state_lower in SKIP_TIER2_STATES
+            query_vector = None
 
             if not skip_tier2:
                 llm = get_llm_provider()
                 query_vector = await llm.get_embedding(message)
-                msg_lower = message.lower().strip()
-                
-                # Check Semantic Cache via Service
+
+                # Semantic cache + FAQ (FAQ chỉ ở IDLE/BROWSING) trong một lookup hợp nhất
                 threshold_cache = self.settings.semantic_cache_threshold
-                cached = await self.semantic_cache_service.find_match(
-                    tenant_id=tenant_id,
-                    message=message,
-                    query_vector=query_vector,
-                    threshold=threshold_cache
+                match = await self.knowledge_lookup.lookup(
+                    tenant_id, message, query_vector,
+                    bot_id=bot_id,
+                    include_faq=current_state_lower in ["idle", "browsing"],
+                    cache_threshold=threshold_cache,
+                    faq_threshold=0.85,
                 )
-                
-                if cached:
+
+                if match:
                     async with transaction_scope(self.db):
                         await self.session_service.log_user_message(session_id, message)
-                        if background_tasks:
-                            background_tasks.add_task(self.semantic_cache_service.track_hit, cached.id)
+                        if match.source == SOURCE_SEMANTIC_CACHE:
+                            if background_tasks:
+                                background_tasks.add_task(self.semantic_cache_service.track_hit, match.entry_id)
+                            else:
+                                await self.semantic_cache_service.track_hit(match.entry_id)
+                            reason = f"Semantic Cache hit (threshold={threshold_cache}, match={match.match_type}, State: {current_state})"
                         else:
-                            await self.semantic_cache_service.track_hit(cached.id)
-                            
+                            reason = f"FAQ semantic match (similarity={match.score:.4f}, State: {current_state})"
+
                         return await self._finalize_response(
-                            session_id, bot_version_id, cached.response_text, "knowledge_path", 
-                            decision_type=domain.DecisionType.PROCEED, 
-                            cost=self.settings.cost_knowledge_base, 
+                            session_id, bot_version_id, match.answer, "knowledge_path",
+                            decision_type=domain.DecisionType.PROCEED,
+                            cost=self.settings.cost_knowledge_base,
                             start_time=start_time,
-                            reason=f"Semantic Cache hit (threshold={threshold_cache}, State: {current_state})",
-                            background_tasks=background_tasks
+                            reason=reason,
+                            background_tasks=background_tasks,
+                            provenance=match.provenance()
                         )
 
-                # Check FAQ
-                if current_state_lower in ["idle", "browsing"]:
-                    if query_vector:
-                        threshold_faq = 0.85 
-                        semantic_faqs = await self.faq_repo.semantic_search(tenant_id, query_vector, threshold=threshold_faq, bot_id=bot_id)
-                        if semantic_faqs:
-                            best_faq, similarity = semantic_faqs[0]
-                            async with transaction_scope(self.db):
-                                await self.session_service.log_user_message(session_id, message)
-                                return await self._finalize_response(
-                                    session_id, bot_version_id, best_faq.answer, "knowledge_path", 
-                                    decision_type=domain.DecisionType.PROCEED, 
-                                    cost=self.settings.cost_knowledge_base, 
-                                    start_time=start_time,
-                                    reason=f"FAQ semantic match (similarity={similarity:.4f}, State: {current_state})",
-                                    background_tasks=background_tasks
-                                )
+            # --- TIER 3 CACHE: câu hỏi lặp lại trong cùng state + slot -> bỏ qua agentic loop ---
+            response_cache = get_response_cache()
+            cache_key = None
+            slot_list = None
+            slots: Dict[str, Any] = {}
+            if response_cache and current_state_lower != "purchasing":
+                # Agent dùng lại slot đã load ở đây (không query lại khi cache miss)
+                slot_list = await self.slots_repo.get_by_session(session_id, tenant_id=tenant_id)
+                slots = {s.key: s.value for s in slot_list if s.is_active()}
+                cache_key = response_cache.make_key(tenant_id, bot_version_id, current_state, message, slots)
+                cached_response = response_cache.get(cache_key)
+                if cached_response:
+                    async with transaction_scope(self.db):
+                        await self.session_service.log_user_message(session_id, message)
+                        await self._apply_agent_state(
+                            cached_response.get("new_state"), current_state, session_id, tenant_id, background_tasks
+                        )
+                        return await self._finalize_response(
+                            session_id, bot_version_id, cached_response["response"], "response_cache",
+                            decision_type=domain.DecisionType.PROCEED,
+                            cost=self.settings.cost_fast_path,
+                            start_time=start_time,
+                            reason=f"Response cache hit (State: {current_state})",
+                            g_ui_data=cached_response.get("g_ui_data"),
+                            background_tasks=background_tasks,
+                            intent_code=cached_response.get("intent")
+                        )
 
             # --- TIER 3: AGENTIC PATH (Cost: High) ---
             # Agent reasoning now constrained by State
-            agent_result = await self.agent_orchestrator.run(message, session_id, current_state, tenant_id)
+            agent_result = await self.agent_orchestrator.run(
+                message, session_id, current_state, tenant_id, on_token=on_token, slots=slot_list
+            )
             bot_response = agent_result.get("response", "Xin lỗi, tôi gặp sự cố khi xử lý.")
             usage = agent_result.get("usage")
             g_ui_data = agent_result.get("g_ui_data")
             new_state = agent_result.get("new_state")
 
+            if cache_key is not None:
+                self._store_response(response_cache, cache_key, agent_result, slots)
+
             # Update State if recommended by Agent (and validated by logic)
             async with transaction_scope(self.db):
-                if new_state:
-                    # Handle both Enum and string
-                    target_state = new_state if isinstance(new_state, domain.LifecycleState) else domain.LifecycleState(new_state)
-                    if target_state != current_state:
-                        try:
-                            if background_tasks:
-                                # Define wrapper to catch background errors
-                                async def _safe_update_state(handler, sid, state, tid):
-                                    try:
-                                        await handler.update_lifecycle_state(sid, state, tid)
-                                    except ValueError as e:
-                                        logging.getLogger(__name__).warning(f"Invalid state transition requested by Agent: {str(e)}")
-                                        
-                                background_tasks.add_task(_safe_update_state, self.session_state_handler, session_id, target_state, tenant_id)
-                            else:
-                                await self.session_state_handler.update_lifecycle_state(session_id, target_state, tenant_id)
-                        except ValueError as e:
-                            self.logger.warning(f"Invalid state transition requested by Agent (Sync): {str(e)}")
-                            # Continue processing, just don't update state
+                await self._apply_agent_state(new_state, current_state, session_id, tenant_id, background_tasks)
                 
                 if usage and usage.get("total_tokens"):
                     estimated_cost = self.settings.cost_agentic_base + (usage["total_tokens"] / 1000.0 * 0.01)
@@ -198,7 +220,11 @@ class HybridOrchestrator:
                     background_tasks=background_tasks,
                     skip_turns=True,
                     tenant_id=tenant_id,
-                    user_message=message
+                    user_message=message,
+                    intent_code=agent_result.get("intent"),
+                    intent_source=agent_result.get("intent_source"),
+                    input_turn_id=agent_result.get("input_turn_id"),
+                    query_vector=query_vector
                 )
         except Exception as e:
             self.logger.error(f"Error in HybridOrchestrator.handle_message: {str(e)}")
@@ -206,10 +232,122 @@ class HybridOrchestrator:
             # Re-raise to let API handler catch it or return a safer error response
             raise e
 
+    async def handle_message_stream(
+        self,
+        tenant_id: str,
+        bot_id: str,
+        message: str,
+        session_id: Optional[str] = None,
+        background_tasks: Optional[BackgroundTasks] = None,
+        channel_code: str = "webchat",
+        ext_metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant của handle_message cho SSE / WebSocket.
+        Yield {"type": "token", "content"} trong lúc Agent sinh câu trả lời,
+        sau đó {"type": "final", "data": payload} (hoặc {"type": "error", "message"}).
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def _on_token(token: str) -> None:
+            await queue.put({"type": "token", "content": token})
+
+        async def _run() -> None:
+            try:
+                payload = await self.handle_message(
+                    tenant_id, bot_id, message, session_id,
+                    background_tasks=background_tasks,
+                    channel_code=channel_code,
+                    ext_metadata=ext_metadata,
+                    on_token=_on_token
+                )
+                await queue.put({"type": "final", "data": payload})
+            except Exception as e:
+                await queue.put({"type": "error", "message": str(e)})
+
+        task = asyncio.create_task(_run())
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in ("final", "error"):
+                    break
+        finally:
+            if not task.done():
+                # Client ngắt kết nối giữa chừng
+                task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _apply_agent_state(
+        self,
+        new_state: Any,
+        current_state: Any,
+        session_id: str,
+        tenant_id: str,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> None:
+        """Chuyển lifecycle state theo đề xuất của Agent (đã được FlowDecisionService validate)."""
+        if not new_state:
+            return
+        # Handle both Enum and string
+        target_state = new_state if isinstance(new_state, domain.LifecycleState) else domain.LifecycleState(new_state)
+        if target_state == current_state:
+            return
+        try:
+            if background_tasks:
+                # Define wrapper to catch background errors
+                async def _safe_update_state(handler, sid, state, tid):
+                    try:
+                        await handler.update_lifecycle_state(sid, state, tid)
+                    except ValueError as e:
+                        logging.getLogger(__name__).warning(f"Invalid state transition requested by Agent: {str(e)}")
+
+                background_tasks.add_task(_safe_update_state, self.session_state_handler, session_id, target_state, tenant_id)
+            else:
+                await self.session_state_handler.update_lifecycle_state(session_id, target_state, tenant_id)
+        except ValueError as e:
+            self.logger.warning(f"Invalid state transition requested by Agent (Sync): {str(e)}")
+            # Continue processing, just don't update state
+
+    def _store_response(
+        self,
+        response_cache: Any,
+        cache_key: Any,
+        agent_result: Dict[str, Any],
+        slots: Dict[str, Any]
+    ) -> None:
+        """
+        Ghi kết quả Agent vào response cache khi replay được: chỉ dùng tool chỉ đọc, không lỗi,
+        và tool không đổi các slot thuộc key (nếu đổi, lần sau key đã khác và hit sẽ bỏ sót slot update).
+        Slot sau lượt lấy từ `context_slots` Agent trả về (không query lại).
+        """
+        response = agent_result.get("response") or ""
+        if not response.strip() or any(x in response.lower() for x in _ERROR_MARKERS):
+            return
+        if not is_cacheable(agent_result, slots):
+            return
+        after = agent_result.get("context_slots")
+        if after is None or slot_fingerprint(after) != slot_fingerprint(slots):
+            return
+        new_state = agent_result.get("new_state")
+        response_cache.set(cache_key, {
+            "response": response,
+            "g_ui_data": agent_result.get("g_ui_data"),
+            "new_state": new_state.value if hasattr(new_state, "value") else new_state,
+            "intent": agent_result.get("intent"),
+        })
+
     async def _cache_agentic_response(
-        self, tenant_id: str, user_message: str, response: str
+        self, tenant_id: str, user_message: str, response: str,
+        query_vector: Optional[List[float]] = None
     ) -> None:
-        """Ghi response Agentic vào semantic cache (background, tạo session riêng vì request session đã đóng)."""
+        """
+        Ghi response Agentic vào semantic cache (background, tạo session riêng vì request session đã đóng).
+        query_vector: embedding Tier 2 đã tính cho request này -> entry match được theo vector, không gọi embedding lại.
+        """
         try:
             session_maker = get_session_maker()
             async with session_maker() as db:
@@ -218,18 +356,25 @@ class HybridOrchestrator:
                     tenant_id=tenant_id,
                     query_text=user_message,
                     response_text=response,
+                    embedding=query_vector,
                 )
                 await db.commit()
         except Exception as e:
             self.logger.debug(f"Auto-cache skip: {e}")
 
-    def _check_social_patterns(self, message: str) -> Optional[str]:
-        """Kiểm tra các mẫu câu xã giao từ cấu hình"""
-        msg_lower = message.lower().strip()
-        for pattern, response in self.settings.social_patterns.items():
-            if re.search(pattern, msg_lower):
-                return response
-        return None
+    def _check_social_patterns(
+        self,
+        message: str,
+        bot_rules: Optional[Dict[str, str]] = None,
+        bot_version_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Kiểm tra các mẫu câu xã giao (rule của bot version + cấu hình global) bằng regex đã compile sẵn"""
+        return self.fast_path_matcher.match(
+            message,
+            self.settings.social_patterns,
+            bot_rules=bot_rules,
+            key=bot_version_id or "__global__"
+        )
 
     async def _finalize_response(
         self, 
@@ -246,7 +391,12 @@ class HybridOrchestrator:
         background_tasks: Optional[BackgroundTasks] = None,
         skip_turns: bool = False,
         tenant_id: Optional[str] = None,
-        user_message: Optional[str] = None
+        user_message: Optional[str] = None,
+        intent_code: Optional[str] = None,
+        intent_source: Optional[str] = None,
+        input_turn_id: Optional[str] = None,
+        query_vector: Optional[List[float]] = None,
+        provenance: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Tối ưu hóa phản hồi - Chuyển việc ghi log sang background task"""
         try:
@@ -263,6 +413,9 @@ class HybridOrchestrator:
             # Add generative UI metadata if available
             if g_ui_data:
                 metadata["g_ui"] = g_ui_data
+            # Tier 2: nguồn của câu trả lời (semantic_cache / faq, id, kiểu match, score)
+            if provenance:
+                metadata["knowledge_source"] = provenance
             
             # Payload trả về ngay
             payload = {
@@ -282,6 +435,13 @@ class HybridOrchestrator:
                 "decision_reason": reason or f"Processed via {tier}",
                 "token_usage": usage
             }
+            # Intent + turn gốc: dữ liệu train cho local intent classifier
+            if intent_code:
+                log_data["intent_code"] = intent_code
+            if intent_source:
+                log_data["intent_source"] = getattr(intent_source, "value", intent_source)
+            if input_turn_id:
+                log_data["input_turn_id"] = input_turn_id
 
             # Ghi log Turn + Decision (Async/Background)
             if not skip_turns:
@@ -290,7 +450,10 @@ class HybridOrchestrator:
                 else:
                     await self.session_service.log_bot_response(session_id, response)
             
-            if background_tasks:
+            journal = get_write_behind_journal()
+            if journal:
+                await journal.log_decision(log_data)
+            elif background_tasks:
                 background_tasks.add_task(self.decision_repo.create, log_data)
             else:
                 await self.decision_repo.create(log_data)
@@ -303,14 +466,16 @@ class HybridOrchestrator:
                 pass
             
             # Auto-write semantic cache: Agentic response tốt → cache cho lần sau
+            # (chỉ khi câu hỏi đã miss đủ số lần - admission filter, tránh cache câu hỏi một lần)
             if tier == "agentic_path" and tenant_id and user_message and len(response.strip()) > 30:
-                if not any(x in response.lower() for x in ["lỗi", "xin lỗi", "không thể", "sự cố"]):
+                if not any(x in response.lower() for x in _ERROR_MARKERS) \
+                        and await get_cache_admission_filter().record_miss(tenant_id, user_message):
                     if background_tasks:
                         background_tasks.add_task(
-                            self._cache_agentic_response, tenant_id, user_message, response
+                            self._cache_agentic_response, tenant_id, user_message, response, query_vector
                         )
                     else:
-                        await self._cache_agentic_response(tenant_id, user_message, response)
+                        await self._cache_agentic_response(tenant_id, user_message, response, query_vector)
             
             return payload
         except Exception as e:
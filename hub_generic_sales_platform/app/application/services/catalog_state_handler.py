@@ -12,6 +12,7 @@ from app.infrastructure.database.repositories import ComparisonRepository
 from app.application.services.agent_tool_registry import agent_tools
 from app.core.services.catalog_service import CatalogService
 from app.infrastructure.llm.factory import get_llm_provider
+from app.core.config.settings import get_settings
 import re
 
 class CatalogStateHandler:
@@ -28,6 +29,8 @@ class CatalogStateHandler:
         self.comparison_repo = ComparisonRepository(db)
         self.offering_repo = OfferingRepository(db)
         self.attr_repo = OfferingAttributeRepository(db)
+        # Memo dữ liệu so sánh trong phạm vi request (handler sống theo db session của request)
+        self._comparison_memo: Dict[tuple, List[Dict[str, Any]]] = {}
     
     @agent_tools.register_tool(
         name="search_offerings",
@@ -56,59 +59,20 @@ class CatalogStateHandler:
             query = resolved_query
         
         tenant_id = session.tenant_id
-        offerings = await self.catalog_service.offering_repo.get_active_offerings(tenant_id)
-        
-        if not offerings:
-            return {
-                "success": True, 
-                "offerings": [], 
-                "message": "Xin lỗi, hiện không có sản phẩm hoặc dịch vụ nào đang kinh doanh."
-            }
-            
-        result = []
+        offering_repo = self.catalog_service.offering_repo
         query_text = query.lower().strip() if query else ""
-        
-        # 1. Substring search (nhanh)
-        for o in offerings:
-            version = await self.catalog_service.version_repo.get_active_version(o.id, tenant_id=tenant_id)
-            if version:
-                match = True
-                if query_text:
-                    text_to_search = f"{o.code} {version.name} {version.description}".lower()
-                    if query_text not in text_to_search:
-                        match = False
-                
-                if match:
-                    result.append({
-                        "id": o.id,
-                        "code": o.code,
-                        "type": o.type,
-                        "name": version.name,
-                        "summary": version.description[:100] + "..." if version.description else ""
-                    })
-        
-        # 2. Semantic search fallback: khi không có kết quả và query nhiều từ (ý đồ tìm kiếm phức tạp)
-        if not result and query_text and len(query_text.split()) >= 2:
-            try:
-                llm = get_llm_provider()
-                query_vector = await llm.get_embedding(query or "")
-                sem_versions = await self.catalog_service.version_repo.semantic_search(
-                    tenant_id, query_vector, threshold=0.75, limit=10
-                )
-                seen_ids = set()
-                for ver, _ in sem_versions:
-                    off = await self.catalog_service.offering_repo.get(ver.offering_id, tenant_id=tenant_id)
-                    if off and off.id not in seen_ids:
-                        seen_ids.add(off.id)
-                        result.append({
-                            "id": off.id,
-                            "code": off.code,
-                            "type": off.type,
-                            "name": ver.name,
-                            "summary": (ver.description or "")[:100] + "..."
-                        })
-            except Exception as e:
-                print(f"[AGENT-LOG] Semantic search fallback error: {e}")
+
+        if not query_text:
+            # Không có từ khóa: liệt kê catalog (một query join, không N+1)
+            result = [self._to_search_item(r) for r in await offering_repo.search_catalog(tenant_id)]
+            if not result:
+                return {
+                    "success": True, 
+                    "offerings": [], 
+                    "message": "Xin lỗi, hiện không có sản phẩm hoặc dịch vụ nào đang kinh doanh."
+                }
+        else:
+            result = await self._ranked_search(tenant_id, query_text)
             
         print(f"[AGENT-LOG] Search Query: '{query or '(empty)'}' | Found: {len(result)} items")
         
@@ -119,7 +83,7 @@ class CatalogStateHandler:
                 "message": f"Không tìm thấy sản phẩm nào phù hợp với từ khóa '{query}'."
              }
 
-        # 3. Ghi slots từ kết quả search (giúp "nó", "cái này" map đúng)
+        # Ghi slots từ kết quả search (giúp "nó", "cái này" map đúng)
         session_id = str(getattr(session, "id", "") or "")
         if session_id and result:
             try:
@@ -238,11 +202,15 @@ class CatalogStateHandler:
         
         offering_ids = [s.get(SlotKey.OFFERING_ID) for s in offering_slots if s.get(SlotKey.OFFERING_ID)]
         tenant_id = session.tenant_id
+        channel_code = session.ext_metadata.get("channel", "WEB") if session.ext_metadata else "WEB"
+        
+        # Một lần load cho cả text diff lẫn bento_grid
+        offerings_data = await self._load_comparison_data(tenant_id, offering_ids, channel_code)
+        offerings_for_ui = [self._to_ui_item(o) for o in offerings_data]
         
         comparisons = await self.comparison_repo.get_by_offerings(tenant_id, offering_ids)
         if comparisons:
             comp = comparisons[0]
-            offerings_for_ui = await self._get_offerings_for_ui(tenant_id, offering_ids)
             return {
                 "success": True,
                 "decision_type": DecisionType.PROCEED,
@@ -256,38 +224,8 @@ class CatalogStateHandler:
                 } if offerings_for_ui else None
             }
         
-        offerings_data = []
-        for o_id in offering_ids:
-            o = await self.offering_repo.get(o_id, tenant_id)
-            if o:
-                version = await self.catalog_service.version_repo.get_active_version(o.id, tenant_id=tenant_id)
-                if version:
-                    attrs = await self.attr_repo.get_by_version(version.id, tenant_id=tenant_id)
-                    attr_dict = {
-                        a.definition.key if a.definition else "unknown": 
-                        a.value_text or str(a.value_number) or str(a.value_bool) or "N/A" 
-                        for a in attrs
-                    }
-                    offerings_data.append({
-                        "id": o.id,
-                        "name": version.name,
-                        "code": o.code,
-                        "description": version.description,
-                        "attributes": attr_dict
-                    })
-        
         if len(offerings_data) < 2:
             return {"success": False, "response": "Không đủ thông tin để so sánh."}
-        
-        offerings_for_ui = []
-        for o in offerings_data:
-            price = o["attributes"].get("price", "N/A")
-            offerings_for_ui.append({
-                "id": o["id"],
-                "name": o["name"],
-                "price": str(price),
-                "tags": [k for k in o["attributes"].keys() if k != "price"][:3] 
-            })
             
         return {
             "success": True,
@@ -302,6 +240,60 @@ class CatalogStateHandler:
             } if offerings_for_ui else None
         }
     
+    async def _ranked_search(self, tenant_id: str, query_text: str) -> List[Dict[str, Any]]:
+        """
+        1. Keyword: BM25 trên text index (không dấu, prefix) - fallback ILIKE khi index tắt.
+        2. Semantic: query nhiều từ -> vector search, điểm trộn với BM25 đã chuẩn hóa.
+        Hydrate tất cả ứng viên bằng một query (search_catalog kiểm tra lại status active).
+        """
+        settings = get_settings()
+        offering_repo = self.catalog_service.offering_repo
+        limit = settings.catalog_search_limit
+
+        keyword_hits = await offering_repo.text_search(tenant_id, query_text, limit=limit)
+        if keyword_hits is None:
+            rows = await offering_repo.search_catalog(tenant_id, query=query_text, limit=limit)
+            keyword_scores = {r["id"]: 1.0 for r in rows}
+        else:
+            top = keyword_hits[0][1] if keyword_hits else 0.0
+            keyword_scores = {offering_id: score / top for offering_id, score in keyword_hits} if top else {}
+
+        vector_scores: Dict[str, float] = {}
+        # Index tắt: giữ hành vi cũ (chỉ semantic khi keyword không có kết quả)
+        use_vector = len(query_text.split()) >= 2 and (keyword_hits is not None or not keyword_scores)
+        if use_vector:
+            try:
+                llm = get_llm_provider()
+                query_vector = await llm.get_embedding(query_text)
+                sem_versions = await self.catalog_service.version_repo.semantic_search(
+                    tenant_id, query_vector, threshold=0.75, limit=10
+                )
+                for ver, similarity in sem_versions:
+                    vector_scores[ver.offering_id] = max(similarity, vector_scores.get(ver.offering_id, 0.0))
+            except Exception as e:
+                print(f"[AGENT-LOG] Semantic search error: {e}")
+
+        weight = settings.catalog_search_keyword_weight if vector_scores else 1.0
+        scores = {
+            offering_id: weight * keyword_scores.get(offering_id, 0.0) + (1.0 - weight) * vector_scores.get(offering_id, 0.0)
+            for offering_id in set(keyword_scores) | set(vector_scores)
+        }
+        ranked = sorted(scores, key=lambda offering_id: scores[offering_id], reverse=True)[:limit]
+        if not ranked:
+            return []
+        rows = {r["id"]: r for r in await offering_repo.search_catalog(tenant_id, offering_ids=ranked)}
+        return [self._to_search_item(rows[offering_id]) for offering_id in ranked if offering_id in rows]
+
+    @staticmethod
+    def _to_search_item(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "code": row["code"],
+            "type": row["type"],
+            "name": row["name"],
+            "summary": row["description"][:100] + "..." if row["description"] else ""
+        }
+
     async def _upsert_search_slots(
         self, session_id: str, tenant_id: str, result: List[Dict]
     ) -> None:
@@ -331,29 +323,48 @@ class CatalogStateHandler:
                 res.append(f"- {k}: {p1['attributes'][k]} vs {p2['attributes'][k]}")
         return "\n".join(res)
     
-    async def _get_offerings_for_ui(self, tenant_id: str, offering_ids: List[str]) -> List[Dict[str, Any]]:
-        """Lấy thông tin offering để hiển thị trong BentoGrid"""
-        offerings_for_ui = []
-        for o_id in offering_ids:
-            o = await self.offering_repo.get(o_id, tenant_id)
-            if o:
-                version = await self.catalog_service.version_repo.get_active_version(o.id, tenant_id=tenant_id)
-                if version:
-                    attrs = await self.attr_repo.get_by_version(version.id, tenant_id=tenant_id)
-                    attr_dict = {
-                        a.definition.key if a.definition else "unknown": 
-                        a.value_text or str(a.value_number) or str(a.value_bool) or "N/A" 
-                        for a in attrs
-                    }
-                    price = attr_dict.get("price", "N/A")
-                    offerings_for_ui.append({
-                        "id": o.id,
-                        "name": version.name,
-                        "price": str(price),
-                        "tags": [k for k in attr_dict.keys() if k != "price"][:3] 
-                    })
+    async def _load_comparison_data(
+        self, tenant_id: str, offering_ids: List[str], channel_code: str = "WEB"
+    ) -> List[Dict[str, Any]]:
+        """
+        Offering (active version + thuộc tính dạng text + giá) cho so sánh, giữ thứ tự `offering_ids`.
+        Load theo lô qua read model (get_offerings_for_bot_by_ids), memo theo request.
+        """
+        key = (tenant_id, channel_code, tuple(offering_ids))
+        if key not in self._comparison_memo:
+            offerings = await self.catalog_service.get_offerings_for_bot_by_ids(tenant_id, offering_ids, channel_code)
+            self._comparison_memo[key] = [
+                {
+                    "id": o["id"],
+                    "name": o["name"],
+                    "code": o["code"],
+                    "description": o["description"],
+                    "price": o["price"],
+                    "attributes": self._display_attributes(o)
+                }
+                for o in offerings
+            ]
+        return self._comparison_memo[key]
 
-        return offerings_for_ui
+    @staticmethod
+    def _display_attributes(offering: Dict[str, Any]) -> Dict[str, str]:
+        """Giá trị thuộc tính dạng text để so sánh / hiển thị"""
+        return {
+            key: "N/A" if value is None else str(value)
+            for key, value in (offering.get("attributes") or {}).items()
+        }
+
+    @staticmethod
+    def _to_ui_item(offering: Dict[str, Any]) -> Dict[str, Any]:
+        """Item BentoGrid: giá theo channel, fallback thuộc tính 'price'"""
+        attributes = offering["attributes"]
+        price = offering["price"]["amount"] if offering.get("price") else attributes.get("price", "N/A")
+        return {
+            "id": offering["id"],
+            "name": offering["name"],
+            "price": str(price),
+            "tags": [k for k in attributes.keys() if k != "price"][:3]
+        }
 
     def _resolve_ordinal_reference(self, query: str, history: List[Dict]) -> Optional[str]:
         """
@@ -0,0 +1,165 @@
+"""
+Fast Path Matcher (Tier 1)
+
+Gộp toàn bộ pattern (rule riêng của bot version + social_patterns global) thành
+regex đã compile sẵn thay vì re.search từng pattern.
+
+- Message được chuẩn hóa NFC + lowercase + gộp khoảng trắng (giữ dấu): input NFD vẫn khớp,
+  nhưng "chảo" / "cháo" / "cấm" KHÔNG khớp rule "chào" / "cám ơn" (tiếng Việt khác nghĩa khi khác dấu).
+- Pattern viết không dấu (VD: "gio mo cua") được match trên text đã bỏ dấu -> khớp cả input có / không dấu.
+  FAST_PATH_FOLD_DIACRITICS=true: bỏ dấu cho mọi pattern (opt-in).
+- Rule của bot: `bot_version.flow_config["fast_path_rules"]` = {pattern: response}.
+- Hot reload: mỗi bộ rule được fingerprint, đổi nội dung -> compile lại.
+  Rule của bot version được cache `rules_ttl_seconds` rồi load lại từ DB.
+- Nhiều rule cùng khớp: rule khai báo trước thắng (rule của bot trước rule global), như vòng
+  re.search tuần tự trước đây.
+"""
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.config.settings import get_settings
+from app.core.shared.unicode_normalizer import fold_diacritics, normalize_unicode
+
+logger = logging.getLogger(__name__)
+
+Rules = Sequence[Tuple[str, str]]
+RulesLoader = Callable[[str], Awaitable[Optional[Mapping[str, str]]]]
+
+
+def normalize_message(message: str) -> str:
+    """NFC + lowercase + gộp khoảng trắng (giữ dấu)."""
+    return " ".join((normalize_unicode(message) or "").lower().split())
+
+
+class CompiledPatternSet:
+    """
+    Mỗi nhóm rule (match trên text giữ dấu / text bỏ dấu) là MỘT regex neo ở đầu chuỗi:
+    `^(?:(?=.*?(?:p0))(?P<r0>)|(?=.*?(?:p1))(?P<r1>)|...)` - alternation thử theo thứ tự khai báo,
+    nên rule đầu tiên khớp (ở bất kỳ vị trí nào, như re.search) thắng.
+    """
+
+    def __init__(self, rules: Rules, fold_all: Optional[bool] = None):
+        if fold_all is None:
+            fold_all = get_settings().fast_path_fold_diacritics
+        self.responses: List[str] = []
+        alternatives: Dict[bool, List[str]] = {False: [], True: []}
+        self._fallback: List[Tuple[int, re.Pattern, bool]] = []
+        for pattern, response in rules:
+            pattern = normalize_unicode(pattern) or ""
+            folded = fold_diacritics(pattern, lower=False)
+            use_folded = fold_all or folded == pattern
+            source = folded if use_folded else pattern
+            try:
+                compiled = re.compile(source, re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"FastPath: invalid pattern {pattern!r}: {e}")
+                continue
+            index = len(self.responses)
+            self.responses.append(response)
+            if compiled.groupindex or re.search(r"\\\d", source):
+                # Named group / backreference không gộp được vào alternation
+                self._fallback.append((index, compiled, use_folded))
+                continue
+            alternatives[use_folded].append(f"(?=.*?(?:{source}))(?P<r{index}>)")
+
+        self._combined: List[Tuple[re.Pattern, bool]] = []
+        for use_folded, alts in alternatives.items():
+            if not alts:
+                continue
+            try:
+                self._combined.append((re.compile("^(?:" + "|".join(alts) + ")", re.IGNORECASE | re.DOTALL), use_folded))
+            except re.error as e:
+                # VD: inline flag giữa pattern -> compile riêng từng rule
+                logger.warning(f"FastPath: cannot combine patterns ({e}), matching individually")
+                for alt in alts:
+                    index = int(alt[alt.rindex("(?P<r") + 5:-2])
+                    self._fallback.append((index, re.compile(alt, re.IGNORECASE | re.DOTALL), use_folded))
+        self._fallback.sort(key=lambda item: item[0])
+
+    def match(self, normalized_message: str) -> Optional[str]:
+        """`normalized_message` phải đi qua normalize_message()."""
+        texts = {False: normalized_message}
+
+        def _text(use_folded: bool) -> str:
+            if use_folded not in texts:
+                texts[use_folded] = fold_diacritics(normalized_message)
+            return texts[use_folded]
+
+        best: Optional[int] = None
+        for combined, use_folded in self._combined:
+            m = combined.match(_text(use_folded))
+            if m is not None:
+                index = int(m.lastgroup[1:])
+                best = index if best is None else min(best, index)
+        for index, compiled, use_folded in self._fallback:
+            if best is not None and index > best:
+                break
+            if compiled.search(_text(use_folded)):
+                best = index
+                break
+        return self.responses[best] if best is not None else None
+
+
+class FastPathMatcher:
+    """Cache CompiledPatternSet theo bot version (LRU) + cache rule của bot version."""
+
+    def __init__(self, rules_ttl_seconds: int = 60, max_entries: int = 1024):
+        self.rules_ttl_seconds = rules_ttl_seconds
+        self.max_entries = max_entries
+        self._compiled: "OrderedDict[str, Tuple[Tuple[Tuple[str, str], ...], CompiledPatternSet]]" = OrderedDict()
+        self._bot_rules: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+    def match(
+        self,
+        message: str,
+        global_rules: Mapping[str, str],
+        bot_rules: Optional[Mapping[str, str]] = None,
+        key: str = "__global__",
+    ) -> Optional[str]:
+        rules = tuple((bot_rules or {}).items()) + tuple(global_rules.items())
+        if not rules:
+            return None
+        entry = self._compiled.get(key)
+        if entry is None or entry[0] != rules:
+            entry = (rules, CompiledPatternSet(rules))
+            self._compiled[key] = entry
+            while len(self._compiled) > self.max_entries:
+                self._compiled.popitem(last=False)
+        self._compiled.move_to_end(key)
+        return entry[1].match(normalize_message(message))
+
+    async def get_bot_rules(self, bot_version_id: Optional[str], loader: RulesLoader) -> Dict[str, str]:
+        """Rule riêng của bot version (cache TTL). Lỗi load -> coi như không có rule."""
+        if not bot_version_id:
+            return {}
+        cached = self._bot_rules.get(bot_version_id)
+        if cached and time.monotonic() - cached[0] <= self.rules_ttl_seconds:
+            return cached[1]
+        try:
+            rules = dict(await loader(bot_version_id) or {})
+        except Exception as e:
+            logger.debug(f"FastPath: load rules failed for {bot_version_id}: {e}")
+            rules = {}
+        self._bot_rules[bot_version_id] = (time.monotonic(), rules)
+        return rules
+
+    def invalidate(self, bot_version_id: Optional[str] = None) -> None:
+        if bot_version_id is None:
+            self._bot_rules.clear()
+            self._compiled.clear()
+        else:
+            self._bot_rules.pop(bot_version_id, None)
+            self._compiled.pop(bot_version_id, None)
+
+
+_matcher: Optional[FastPathMatcher] = None
+
+
+def get_fast_path_matcher() -> FastPathMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = FastPathMatcher()
+    return _matcher
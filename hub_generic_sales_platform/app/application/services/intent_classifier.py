@@ -0,0 +1,270 @@
+"""
+Local Intent Classifier (per tenant)
+
+Thay thế LLM call trong IntentHandler.extract_intent cho các câu đã "quen":
+- Feature: TF-IDF trên char n-gram (2-4) + word unigram của text đã bỏ dấu,
+  hash vào không gian cố định (không cần lưu vocabulary).
+- Model: nearest-centroid (cosine). Chỉ trả kết quả khi score và margin đủ cao,
+  ngược lại caller fallback sang LLM.
+- Dữ liệu train: intent đã log trong runtime_decision_event (join runtime_turn),
+  cộng với nhãn LLM mới sinh trong process (online learning).
+- Train (fit) tốn CPU (~1s với 5000 câu) -> chạy trong thread pool, không bao giờ trên đường request:
+  nhãn mới được gom lại (debounce INTENT_CLASSIFIER_REFIT_DELAY) rồi refit nền; trong lúc đó predict
+  vẫn dùng centroid hiện tại, model mới được thay nguyên khối khi train xong.
+"""
+import asyncio
+import logging
+import math
+import time
+import zlib
+from collections import Counter, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config.settings import get_settings
+from app.core.domain.runtime import Intent
+from app.core.shared.unicode_normalizer import fold_diacritics
+
+logger = logging.getLogger(__name__)
+
+TrainingLoader = Callable[[str], Awaitable[Sequence[Tuple[str, str]]]]
+
+_NGRAM_RANGE = (2, 4)
+
+
+def _features(text: str, n_features: int) -> Dict[int, float]:
+    """Hash char n-gram + word unigram -> {feature_idx: sublinear tf}."""
+    folded = " ".join(fold_diacritics(text).split())
+    if not folded:
+        return {}
+    counts: Counter = Counter()
+    padded = f" {folded} "
+    for n in range(_NGRAM_RANGE[0], _NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            counts[zlib.crc32(padded[i:i + n].encode()) % n_features] += 1
+    for word in folded.split():
+        counts[zlib.crc32(b"w:" + word.encode()) % n_features] += 1
+    return {idx: 1.0 + math.log(tf) for idx, tf in counts.items()}
+
+
+class IntentClassifier:
+    """Nearest-centroid TF-IDF classifier cho một tenant."""
+
+    def __init__(self, n_features: int = 2 ** 15, max_examples: int = 5000):
+        self.n_features = n_features
+        self._examples: Deque[Tuple[str, str]] = deque(maxlen=max_examples)
+        # (labels, centroids, idf) - thay nguyên tuple khi train xong để predict không thấy model dở dang
+        self._model: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    @property
+    def dirty(self) -> bool:
+        """Có example mới chưa được train."""
+        return self._dirty
+
+    def add_examples(self, examples: Sequence[Tuple[str, str]]) -> None:
+        """Thêm (text, intent_code). Bỏ qua UNKNOWN / nhãn không hợp lệ."""
+        for text, label in examples:
+            if text and label in Intent._value2member_map_ and label != Intent.UNKNOWN.value:
+                self._examples.append((text, label))
+                self._dirty = True
+
+    def fit(self) -> None:
+        """Train đồng bộ (script / test). Trong app dùng fit_async."""
+        self._dirty = False
+        self._model = self._train(list(self._examples))
+
+    async def fit_async(self) -> None:
+        """Train trong thread pool trên snapshot example hiện tại rồi thay model."""
+        self._dirty = False
+        snapshot = list(self._examples)
+        self._model = await asyncio.get_running_loop().run_in_executor(None, self._train, snapshot)
+
+    def _train(self, examples: List[Tuple[str, str]]) -> Optional[Tuple[List[str], np.ndarray, np.ndarray]]:
+        if not examples:
+            return None
+        docs = [(_features(text, self.n_features), label) for text, label in examples]
+        df = np.zeros(self.n_features, dtype=np.float32)
+        for feats, _ in docs:
+            df[list(feats)] += 1
+        idf = np.log((1.0 + len(docs)) / (1.0 + df)) + 1.0
+
+        labels = sorted({label for _, label in docs})
+        label_pos = {label: i for i, label in enumerate(labels)}
+        centroids = np.zeros((len(labels), self.n_features), dtype=np.float32)
+        for feats, label in docs:
+            vec = self._weight(feats, idf)
+            if vec is not None:
+                idx, weights = vec
+                centroids[label_pos[label], idx] += weights
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return labels, centroids / norms, idf
+
+    def predict(self, text: str) -> Optional[Tuple[Intent, float, float]]:
+        """Trả (intent, score, margin so với nhãn thứ 2) hoặc None nếu chưa có model. Không train."""
+        model = self._model
+        if model is None:
+            return None
+        labels, centroids, idf = model
+        vec = self._weight(_features(text, self.n_features), idf)
+        if vec is None:
+            return None
+        idx, weights = vec
+        scores = centroids[:, idx] @ weights
+        order = np.argsort(-scores)
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+        return Intent(labels[order[0]]), best, best - runner_up
+
+    @staticmethod
+    def _weight(feats: Dict[int, float], idf: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Sparse TF-IDF vector đã chuẩn hóa L2 dạng (indices, weights)."""
+        if not feats:
+            return None
+        idx = np.fromiter(feats.keys(), dtype=np.int64, count=len(feats))
+        weights = np.fromiter(feats.values(), dtype=np.float32, count=len(feats)) * idf[idx]
+        norm = float(np.linalg.norm(weights))
+        if norm == 0.0:
+            return None
+        return idx, weights / norm
+
+
+class IntentClassifierRegistry:
+    """
+    Classifier theo tenant. Lần đầu gặp tenant (hoặc hết TTL) sẽ load dữ liệu train
+    ở background - request hiện tại không chờ mà fallback LLM.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[TrainingLoader] = None,
+        min_examples: int = 30,
+        min_score: float = 0.35,
+        min_margin: float = 0.08,
+        ttl_seconds: int = 3600,
+        refit_delay: float = 30.0,
+    ):
+        self.loader = loader or load_training_examples
+        self.min_examples = min_examples
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.ttl_seconds = ttl_seconds
+        self._models: Dict[str, Tuple[IntentClassifier, float]] = {}
+        self.refit_delay = refit_delay
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._refitting: Dict[str, asyncio.Task] = {}
+
+    def classify(self, tenant_id: str, message: str) -> Optional[Intent]:
+        """Intent nếu đủ tự tin, None nếu cần hỏi LLM."""
+        model = self._get_model(tenant_id)
+        if model is None or len(model) < self.min_examples:
+            return None
+        prediction = model.predict(message)
+        if prediction is None:
+            return None
+        intent, score, margin = prediction
+        if score < self.min_score or margin < self.min_margin:
+            return None
+        logger.debug(f"Local intent {intent.value} (score={score:.3f}, margin={margin:.3f})")
+        return intent
+
+    def learn(self, tenant_id: str, message: str, intent: Intent) -> None:
+        """Online learning từ nhãn LLM (chỉ khi model của tenant đã được load). Refit chạy nền, có debounce."""
+        entry = self._models.get(tenant_id)
+        if entry is not None:
+            entry[0].add_examples([(message, intent.value)])
+            self._schedule_refit(tenant_id)
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        if tenant_id is None:
+            self._models.clear()
+        else:
+            self._models.pop(tenant_id, None)
+
+    def _get_model(self, tenant_id: str) -> Optional[IntentClassifier]:
+        entry = self._models.get(tenant_id)
+        if entry is not None:
+            model, loaded_at = entry
+            if not self.ttl_seconds or time.monotonic() - loaded_at <= self.ttl_seconds:
+                return model
+        self._schedule_load(tenant_id)
+        return entry[0] if entry is not None else None
+
+    def _schedule_load(self, tenant_id: str) -> None:
+        task = self._loading.get(tenant_id)
+        if task is not None and not task.done():
+            return
+        try:
+            self._loading[tenant_id] = asyncio.get_running_loop().create_task(self._load(tenant_id))
+        except RuntimeError:
+            pass
+
+    def _schedule_refit(self, tenant_id: str) -> None:
+        task = self._refitting.get(tenant_id)
+        if task is not None and not task.done():
+            return
+        try:
+            self._refitting[tenant_id] = asyncio.get_running_loop().create_task(self._refit(tenant_id))
+        except RuntimeError:
+            pass
+
+    async def _refit(self, tenant_id: str) -> None:
+        try:
+            # Gom các nhãn đến trong cửa sổ debounce vào một lần train
+            await asyncio.sleep(self.refit_delay)
+            entry = self._models.get(tenant_id)
+            if entry is not None and entry[0].dirty:
+                await entry[0].fit_async()
+        except Exception as e:
+            logger.warning(f"IntentClassifier: refit failed for tenant {tenant_id}: {e}")
+        finally:
+            self._refitting.pop(tenant_id, None)
+
+    async def _load(self, tenant_id: str) -> None:
+        try:
+            examples = await self.loader(tenant_id)
+            model = IntentClassifier()
+            model.add_examples(examples)
+            await model.fit_async()
+            self._models[tenant_id] = (model, time.monotonic())
+            logger.info(f"IntentClassifier: tenant {tenant_id} trained on {len(model)} examples")
+        except Exception as e:
+            logger.warning(f"IntentClassifier: load failed for tenant {tenant_id}: {e}")
+            # Ghi model rỗng để không retry liên tục cho tới hết TTL
+            self._models[tenant_id] = (IntentClassifier(), time.monotonic())
+        finally:
+            self._loading.pop(tenant_id, None)
+
+
+async def load_training_examples(tenant_id: str) -> Sequence[Tuple[str, str]]:
+    """Load (message, intent_code) đã log từ DB (session riêng, không dùng session của request)."""
+    from app.infrastructure.database.engine import get_session_maker
+    from app.infrastructure.database.repositories import DecisionRepository
+
+    async with get_session_maker()() as db:
+        return await DecisionRepository(db).get_intent_training_examples(tenant_id)
+
+
+_registry: Optional[IntentClassifierRegistry] = None
+
+
+def get_intent_classifier_registry() -> Optional[IntentClassifierRegistry]:
+    """Singleton registry. Trả None khi tắt qua INTENT_CLASSIFIER_ENABLED=false."""
+    global _registry
+    settings = get_settings()
+    if not settings.intent_classifier_enabled:
+        return None
+    if _registry is None:
+        _registry = IntentClassifierRegistry(
+            min_examples=settings.intent_classifier_min_examples,
+            min_score=settings.intent_classifier_min_score,
+            min_margin=settings.intent_classifier_min_margin,
+            ttl_seconds=settings.intent_classifier_ttl_seconds,
+            refit_delay=settings.intent_classifier_refit_delay,
+        )
+    return _registry
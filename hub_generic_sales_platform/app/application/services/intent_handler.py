@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from app.application.services.agent_tool_registry import agent_tools
-from app.core.domain.runtime import Intent, LifecycleState
+from app.application.services.intent_classifier import get_intent_classifier_registry
+from app.core.domain.runtime import Intent, IntentSource, LifecycleState
 from app.infrastructure.llm.factory import get_llm_provider
 import logging
 
@@ -8,30 +9,50 @@ logger = logging.getLogger(__name__)
 
 class IntentHandler:
     """
-    Extracts Intent from user messages using LLM.
+    Extracts Intent from user messages.
+    Local classifier (per tenant) trước, chỉ gọi LLM khi classifier không đủ tự tin.
     Maps natural language to Intent enum for flow validation.
     """
     
     def __init__(self):
         self.llm_provider = get_llm_provider()
+        self.classifier = get_intent_classifier_registry()
     
     async def extract_intent(
         self,
         message: str,
         current_state: LifecycleState,
-        context: dict = None
+        context: dict = None,
+        tenant_id: Optional[str] = None
     ) -> Optional[Intent]:
+        """Classify user message into Intent enum (xem extract_intent_with_source)."""
+        intent, _ = await self.extract_intent_with_source(message, current_state, context, tenant_id)
+        return intent
+
+    async def extract_intent_with_source(
+        self,
+        message: str,
+        current_state: LifecycleState,
+        context: dict = None,
+        tenant_id: Optional[str] = None
+    ) -> Tuple[Optional[Intent], Optional[IntentSource]]:
         """
-        Uses LLM to classify user message into Intent enum.
+        Classify user message into Intent enum (local classifier, fallback LLM).
         
         Args:
             message: User's input message
             current_state: Current conversation state
             context: Optional context from slots
+            tenant_id: Tenant của classifier local (None = luôn dùng LLM)
         
         Returns:
-            Intent enum or None if unrecognized
+            (Intent enum or None if unrecognized, IntentSource hoặc None)
         """
+        if self.classifier and tenant_id:
+            local_intent = self.classifier.classify(tenant_id, message)
+            if local_intent is not None:
+                return local_intent, IntentSource.LOCAL
+
         intent_list = [intent.value for intent in Intent]
         
         system_prompt = f"""
@@ -56,13 +77,16 @@ class IntentHandler:
             
             # Try to map to Intent enum
             try:
-                return Intent(intent_value)
+                intent = Intent(intent_value)
             except ValueError:
                 logger.debug(f"Unrecognized intent: {intent_value} from message: {message[:50]}")
-                return None
+                return None, None
+            if self.classifier and tenant_id and intent != Intent.UNKNOWN:
+                self.classifier.learn(tenant_id, message, intent)
+            return intent, IntentSource.LLM
         except Exception as e:
             logger.error(f"Error extracting intent: {e}")
-            return None
+            return None, None
     
     @agent_tools.register_tool(
         name="submit_intent",
@@ -0,0 +1,141 @@
+"""
+Knowledge Lookup Service (Tier 2: semantic cache + FAQ)
+
+Trước đây Tier 2 chạy tuần tự: Redis GET -> cache exact -> cache vector -> FAQ vector, mỗi bước một round-trip.
+Service này:
+- Tìm ứng viên vector của cache và FAQ trong in-process vector index (không round-trip).
+- Hydrate mọi ứng viên (exact query_hash, trigram, cache vector, FAQ vector) bằng MỘT query UNION ALL,
+  chạy song song với Redis L1 GET.
+- Chọn câu trả lời theo thứ tự ưu tiên cũ: Redis -> cache exact -> trigram -> cache vector -> FAQ,
+  trả về kèm provenance (source, id, match_type, score).
+Khi vector index tắt (VECTOR_INDEX_ENABLED=false) quay về đường cũ: SemanticCacheService.find_match
+rồi FAQRepository.semantic_search.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.application.services.semantic_cache_service import SemanticCacheService
+from app.infrastructure.database.repositories import FAQRepository, KnowledgeLookupRepository
+from app.infrastructure.database.repositories.knowledge_lookup_repo import SOURCE_FAQ, SOURCE_SEMANTIC_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Thứ tự ưu tiên khi nhiều nguồn cùng match (giữ đúng thứ tự của luồng tuần tự cũ)
+_PRIORITY = {
+    (SOURCE_SEMANTIC_CACHE, "exact"): 0,
+    (SOURCE_SEMANTIC_CACHE, "trigram"): 1,
+    (SOURCE_SEMANTIC_CACHE, "vector"): 2,
+    (SOURCE_FAQ, "vector"): 3,
+}
+
+
+@dataclass
+class KnowledgeMatch:
+    source: str  # "semantic_cache" | "faq"
+    entry_id: str
+    answer: str
+    match_type: str  # "redis" | "exact" | "trigram" | "vector"
+    score: float = 1.0
+    query_text: Optional[str] = None
+
+    def provenance(self) -> Dict[str, Any]:
+        return {"source": self.source, "id": self.entry_id, "match": self.match_type, "score": round(self.score, 4)}
+
+
+class KnowledgeLookupService:
+    """Tier-2 lookup hợp nhất semantic cache + FAQ."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache_service: Optional[SemanticCacheService] = None,
+        faq_repo: Optional[FAQRepository] = None,
+    ):
+        self.db = db
+        self.cache_service = cache_service or SemanticCacheService(db)
+        self.faq_repo = faq_repo or FAQRepository(db)
+        self.lookup_repo = KnowledgeLookupRepository(db)
+
+    async def lookup(
+        self,
+        tenant_id: str,
+        message: str,
+        query_vector: Optional[List[float]],
+        bot_id: Optional[str] = None,
+        include_faq: bool = True,
+        cache_threshold: float = 0.95,
+        faq_threshold: float = 0.85,
+    ) -> Optional[KnowledgeMatch]:
+        """Câu trả lời tốt nhất từ semantic cache hoặc FAQ (None = miss, đi tiếp Tier 3)."""
+        cache_hits = await self.cache_service.cache_repo.vector_candidates(
+            tenant_id, query_vector, cache_threshold
+        ) if query_vector else []
+        faq_hits = await self.faq_repo.vector_candidates(
+            tenant_id, query_vector, faq_threshold, bot_id=bot_id
+        ) if query_vector and include_faq else []
+        if cache_hits is None or faq_hits is None:
+            return await self._sequential_lookup(
+                tenant_id, message, query_vector, bot_id, include_faq, cache_threshold, faq_threshold
+            )
+
+        redis_entry, rows = await asyncio.gather(
+            self.cache_service.redis_cache.get(tenant_id, message),
+            self.lookup_repo.get_candidates(
+                tenant_id, message,
+                cache_ids=[cache_id for cache_id, _ in cache_hits],
+                faq_ids=[faq_id for faq_id, _ in faq_hits],
+                bot_id=bot_id,
+            ),
+        )
+        if redis_entry:
+            return KnowledgeMatch(
+                SOURCE_SEMANTIC_CACHE, redis_entry.get("cache_id") or "",
+                redis_entry.get("response_text", ""), "redis",
+            )
+
+        vector_scores = {SOURCE_SEMANTIC_CACHE: dict(cache_hits), SOURCE_FAQ: dict(faq_hits)}
+        best: Optional[KnowledgeMatch] = None
+        best_rank = None
+        for row in rows:
+            score = vector_scores[row.source].get(row.id, 0.0) if row.match_type == "vector" else float(row.score)
+            rank = (_PRIORITY[(row.source, row.match_type)], -score)
+            if best_rank is None or rank < best_rank:
+                best_rank = rank
+                best = KnowledgeMatch(row.source, row.id, row.answer, row.match_type, score, row.query_text)
+
+        if best and best.source == SOURCE_SEMANTIC_CACHE:
+            # Populate Redis cho lần sau (exact match)
+            await self.cache_service.redis_cache.set(
+                tenant_id, best.query_text, best.answer, cache_id=best.entry_id
+            )
+        return best
+
+    async def _sequential_lookup(
+        self,
+        tenant_id: str,
+        message: str,
+        query_vector: Optional[List[float]],
+        bot_id: Optional[str],
+        include_faq: bool,
+        cache_threshold: float,
+        faq_threshold: float,
+    ) -> Optional[KnowledgeMatch]:
+        """Không có in-process vector index: semantic cache rồi FAQ, tuần tự như trước."""
+        cached = await self.cache_service.find_match(
+            tenant_id=tenant_id, message=message, query_vector=query_vector, threshold=cache_threshold
+        )
+        if cached:
+            return KnowledgeMatch(
+                SOURCE_SEMANTIC_CACHE, cached.id, cached.response_text, "cache",
+                query_text=getattr(cached, "query_text", None),
+            )
+        if include_faq and query_vector:
+            faqs = await self.faq_repo.semantic_search(tenant_id, query_vector, threshold=faq_threshold, bot_id=bot_id)
+            if faqs:
+                faq, similarity = faqs[0]
+                return KnowledgeMatch(SOURCE_FAQ, faq.id, faq.answer, "vector", similarity, faq.question)
+        return None
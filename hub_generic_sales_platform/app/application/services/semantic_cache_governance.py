@@ -0,0 +1,316 @@
+"""
+Semantic Cache Governance (admission + eviction cho tenant_semantic_cache)
+
+- Admission: response Agentic chỉ được ghi vào cache sau N lần miss của cùng câu hỏi
+  (normalize như query_hash) trong một cửa sổ thời gian -> câu hỏi chỉ gặp một lần không làm phình bảng.
+  Bộ đếm nằm trong Redis khi có REDIS_URL (dùng chung mọi worker), không thì trong RAM từng process.
+- Job định kỳ (SemanticCacheGovernor.run), theo từng tenant - mỗi lượt chỉ một worker chạy (governance_lock):
+  0. Backfill embedding cho entry cũ chưa có vector (batch, một request embedding / chunk).
+  1. Expire entry nhắc tới offering vừa thay đổi (code / tên version) và entry không dùng quá lâu.
+  2. Merge near-duplicate theo cosine similarity của embedding: giữ entry nhiều hit nhất, cộng dồn hit.
+  3. Evict theo điểm LFU có decay theo tuổi (hit_count * 0.5^(idle_days / half_life)) khi vượt quota.
+  Entry bị xóa cũng được gỡ khỏi vector index; Redis L1 được dọn SAU khi caller commit (flush_l1_deletes).
+"""
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.core.shared.db_utils import transaction_scope
+from app.core.shared.vector_similarity import SimilarityMatrix
+from app.infrastructure.cache import BoundedTTLCache, get_redis_semantic_cache
+from app.infrastructure.database.repositories import OfferingRepository
+from app.infrastructure.database.repositories.cache_repo import SemanticCacheRepository, query_hash
+from app.infrastructure.llm.factory import get_llm_provider
+
+logger = logging.getLogger(__name__)
+
+
+ADMISSION_PREFIX = "semantic_cache_admission"
+GOVERNANCE_LOCK_KEY = "semantic_cache_governance:lock"
+_GOVERNANCE_PG_LOCK_ID = 0x53434756  # pg advisory lock id ("SCGV")
+
+
+class CacheAdmissionFilter:
+    """
+    Đếm miss theo (tenant_id, query_hash); admit khi đạt `admit_after` lần trong `window` giây
+    (cửa sổ trượt: mỗi miss gia hạn TTL).
+    Có Redis: INCR + EXPIRE, bộ đếm dùng chung mọi worker. Không có Redis (hoặc Redis lỗi): đếm trong RAM
+    của process -> với nhiều worker, mỗi worker phải tự thấy đủ `admit_after` miss.
+    """
+
+    def __init__(
+        self,
+        admit_after: Optional[int] = None,
+        window: Optional[float] = None,
+        max_entries: int = 100000,
+        redis_url: Optional[str] = None,
+    ):
+        settings = get_settings()
+        self.admit_after = admit_after if admit_after is not None else settings.semantic_cache_admit_after
+        self.window = window if window is not None else settings.semantic_cache_admission_window
+        self._misses = BoundedTTLCache(max_entries=max_entries, default_ttl=self.window, name="semantic_cache_admission")
+        self.redis = None
+        redis_url = redis_url if redis_url is not None else settings.redis_url
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self.redis = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"CacheAdmissionFilter: Redis unavailable, counting per process: {e}")
+
+    async def record_miss(self, tenant_id: str, query_text: str) -> bool:
+        """Ghi nhận một miss, True nếu câu hỏi đủ điều kiện vào cache."""
+        if self.admit_after <= 1:
+            return True
+        key = f"{tenant_id}:{query_hash(query_text)}"
+        if self.redis:
+            redis_key = f"{ADMISSION_PREFIX}:{key}"
+            try:
+                count = await self.redis.incr(redis_key)
+                await self.redis.expire(redis_key, max(int(self.window), 1))
+                if count >= self.admit_after:
+                    await self.redis.delete(redis_key)
+                    return True
+                return False
+            except Exception as e:
+                logger.debug(f"Redis admission counter error: {e}")
+
+        count = (self._misses.get(key) or 0) + 1
+        if count >= self.admit_after:
+            self._misses.pop(key)
+            return True
+        self._misses.set(key, count)
+        return False
+
+
+_admission_filter: Optional[CacheAdmissionFilter] = None
+
+
+def get_cache_admission_filter() -> CacheAdmissionFilter:
+    global _admission_filter
+    if _admission_filter is None:
+        _admission_filter = CacheAdmissionFilter()
+    return _admission_filter
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class SemanticCacheGovernor:
+    """Một lượt governance cho tenant_semantic_cache (chạy trong session của caller)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.settings = get_settings()
+        self.cache_repo = SemanticCacheRepository(db)
+        self.offering_repo = OfferingRepository(db)
+        self.redis_cache = get_redis_semantic_cache()
+        # (tenant_id, query_text) của entry đã xóa trong DB, chờ dọn khỏi L1 sau commit
+        self._l1_deletes: List["tuple[str, str]"] = []
+
+    async def run(
+        self,
+        tenant_id: Optional[str] = None,
+        changed_since: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """
+        Chạy governance cho một tenant (None = mọi tenant có cache). Trả số entry expired / merged / evicted.
+        Caller commit session rồi gọi flush_l1_deletes() để gỡ các entry đã xóa khỏi Redis L1.
+        """
+        now = now or datetime.now(timezone.utc)
+        totals = {"embedded": 0, "expired": 0, "merged": 0, "evicted": 0}
+        tenant_ids = [tenant_id] if tenant_id else await self.cache_repo.get_tenant_ids()
+        for tid in tenant_ids:
+            stats = await self._govern_tenant(tid, changed_since, now)
+            for key, value in stats.items():
+                totals[key] += value
+        return totals
+
+    async def _govern_tenant(self, tenant_id: str, changed_since: Optional[datetime], now: datetime) -> Dict[str, int]:
+        embedded = await self._backfill_embeddings(tenant_id)
+        rows = await self.cache_repo.get_governance_rows(tenant_id)
+        if not rows:
+            return {"embedded": embedded, "expired": 0, "merged": 0, "evicted": 0}
+
+        expired = self._idle_ids(rows, now) | await self._changed_offering_ids(tenant_id, rows, changed_since)
+        live = [r for r in rows if r.id not in expired]
+        merged, extra_hits = self._near_duplicates(live)
+        live = [r for r in live if r.id not in merged]
+        evicted = self._over_quota(live, extra_hits, now)
+
+        removed = expired | merged | evicted
+        async with transaction_scope(self.db):
+            await self.cache_repo.add_hits({k: v for k, v in extra_hits.items() if k not in removed})
+            await self.cache_repo.delete_many(tenant_id, list(removed))
+        self._l1_deletes.extend((tenant_id, row.query_text) for row in rows if row.id in removed)
+
+        stats = {"embedded": embedded, "expired": len(expired), "merged": len(merged), "evicted": len(evicted)}
+        if removed or embedded:
+            logger.info("Semantic cache governance", extra={"tenant_id": tenant_id, **stats})
+        return stats
+
+    async def flush_l1_deletes(self) -> None:
+        """Gỡ entry đã xóa khỏi Redis L1 (gọi sau commit). Lỗi chỉ được log: L1 tự hết hạn theo TTL."""
+        pending, self._l1_deletes = self._l1_deletes, []
+        for tenant_id, query_text in pending:
+            try:
+                await self.redis_cache.delete(tenant_id, query_text)
+            except Exception as e:
+                logger.warning(f"Semantic cache governance: L1 delete failed for tenant {tenant_id}: {e}")
+
+    async def _backfill_embeddings(self, tenant_id: str) -> int:
+        """Embedding cho entry chưa có vector (tối đa SEMANTIC_CACHE_EMBEDDING_BACKFILL_BATCH / lượt)."""
+        limit = self.settings.semantic_cache_embedding_backfill_batch
+        if not limit:
+            return 0
+        missing = await self.cache_repo.get_missing_embeddings(tenant_id, limit)
+        if not missing:
+            return 0
+        try:
+            vectors = await get_llm_provider().get_embeddings([row.query_text for row in missing])
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding backfill failed: {e}")
+            return 0
+        embeddings = {row.id: vector for row, vector in zip(missing, vectors) if vector}
+        async with transaction_scope(self.db):
+            await self.cache_repo.set_embeddings(tenant_id, embeddings)
+        return len(embeddings)
+
+    def _last_used(self, row: Any) -> datetime:
+        return _as_utc(row.last_hit_at) or _as_utc(row.created_at)
+
+    def _idle_ids(self, rows: List[Any], now: datetime) -> Set[str]:
+        max_idle = self.settings.semantic_cache_max_idle_days
+        if not max_idle:
+            return set()
+        cutoff = now - timedelta(days=max_idle)
+        return {r.id for r in rows if self._last_used(r) and self._last_used(r) < cutoff}
+
+    async def _changed_offering_ids(self, tenant_id: str, rows: List[Any], since: Optional[datetime]) -> Set[str]:
+        """Entry có query / response nhắc tới offering thay đổi từ `since`."""
+        if since is None:
+            return set()
+        changed = await self.offering_repo.get_changed_offering_terms(tenant_id, since)
+        terms = {t.lower() for offering_terms in changed.values() for t in offering_terms if t and len(t) >= 3}
+        if not terms:
+            return set()
+        return {
+            r.id for r in rows
+            if any(t in f"{r.query_text}\n{r.response_text}".lower() for t in terms)
+        }
+
+    def _near_duplicates(self, rows: List[Any]) -> "tuple[Set[str], Dict[str, int]]":
+        """Entry trùng gần (cosine >= ngưỡng) -> gộp vào entry nhiều hit nhất."""
+        threshold = self.settings.semantic_cache_merge_threshold
+        with_vectors = [r for r in rows if r.embedding is not None]
+        if len(with_vectors) < 2 or threshold <= 0:
+            return set(), {}
+        # Ưu tiên giữ entry nhiều hit, rồi entry cũ hơn
+        with_vectors.sort(key=lambda r: (-(r.hit_count or 0), _as_utc(r.created_at) or datetime.min.replace(tzinfo=timezone.utc)))
+        matrix = SimilarityMatrix([r.embedding for r in with_vectors])
+        merged: Set[str] = set()
+        extra_hits: Dict[str, int] = {}
+        for pos, keeper in enumerate(with_vectors):
+            if keeper.id in merged:
+                continue
+            for other_pos, _ in matrix.top_k(keeper.embedding, k=len(with_vectors), threshold=threshold):
+                other = with_vectors[other_pos]
+                if other_pos <= pos or other.id in merged:
+                    continue
+                merged.add(other.id)
+                extra_hits[keeper.id] = extra_hits.get(keeper.id, 0) + (other.hit_count or 0)
+        return merged, extra_hits
+
+    def _over_quota(self, rows: List[Any], extra_hits: Dict[str, int], now: datetime) -> Set[str]:
+        quota = self.settings.semantic_cache_tenant_quota
+        if not quota or len(rows) <= quota:
+            return set()
+        half_life = max(self.settings.semantic_cache_hit_half_life_days, 0.001)
+
+        def score(row: Any) -> float:
+            hits = (row.hit_count or 0) + extra_hits.get(row.id, 0) + 1
+            idle_days = max((now - self._last_used(row)).total_seconds() / 86400.0, 0.0)
+            return hits * 0.5 ** (idle_days / half_life)
+
+        ranked = sorted(rows, key=score)
+        return {r.id for r in ranked[:len(rows) - quota]}
+
+
+@asynccontextmanager
+async def governance_lock(ttl_seconds: float) -> AsyncIterator[bool]:
+    """
+    Lock cho một lượt governance (mọi worker đều chạy loop, chỉ một worker làm việc mỗi lượt).
+    Redis: SET NX EX (hết hạn sau ttl nếu worker chết giữa chừng). Không có Redis: Postgres session
+    advisory lock trên connection riêng (không phụ thuộc các commit của session governance).
+    Dialect khác (SQLite dev/test, một process): không lock. yield True nếu được chạy.
+    """
+    redis = get_redis_semantic_cache().redis
+    if redis:
+        token = uuid.uuid4().hex
+        try:
+            acquired = bool(await redis.set(GOVERNANCE_LOCK_KEY, token, nx=True, ex=max(int(ttl_seconds), 1)))
+        except Exception as e:
+            logger.warning(f"Semantic cache governance: Redis lock failed, falling back to DB lock: {e}")
+        else:
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    try:
+                        # Chỉ xóa lock của chính mình (lock có thể đã hết hạn và worker khác đang giữ)
+                        if await redis.get(GOVERNANCE_LOCK_KEY) in (token, token.encode()):
+                            await redis.delete(GOVERNANCE_LOCK_KEY)
+                    except Exception as e:
+                        logger.debug(f"Semantic cache governance: Redis unlock failed: {e}")
+            return
+
+    from app.infrastructure.database.engine import get_engine
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    async with engine.connect() as conn:
+        acquired = bool(await conn.scalar(select(func.pg_try_advisory_lock(_GOVERNANCE_PG_LOCK_ID))))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(select(func.pg_advisory_unlock(_GOVERNANCE_PG_LOCK_ID)))
+
+
+async def run_semantic_cache_governance_loop(interval_seconds: float) -> None:
+    """
+    Chạy governance định kỳ trong process (lifespan). changed_since = thời điểm bắt đầu lượt trước
+    của worker này; lượt bị worker khác giữ lock thì không tiến changed_since (không bỏ sót thay đổi).
+    """
+    from app.infrastructure.database.engine import get_session_maker
+
+    changed_since = datetime.now(timezone.utc)
+    while True:
+        await asyncio.sleep(interval_seconds)
+        started = datetime.now(timezone.utc)
+        try:
+            async with governance_lock(interval_seconds) as acquired:
+                if not acquired:
+                    logger.debug("Semantic cache governance: another worker holds the lock")
+                    continue
+                async with get_session_maker()() as db:
+                    governor = SemanticCacheGovernor(db)
+                    await governor.run(changed_since=changed_since)
+                    await db.commit()
+                await governor.flush_l1_deletes()
+            changed_since = started
+        except Exception as e:
+            logger.error(f"Semantic cache governance failed: {e}")
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.repositories.cache_repo import SemanticCacheRepository
 from app.infrastructure.llm.factory import get_llm_provider
 from app.infrastructure.cache import get_redis_semantic_cache
+from app.infrastructure.database.write_behind import get_write_behind_journal
 from app.core import domain
 
 logger = logging.getLogger(__name__)
@@ -81,6 +82,10 @@ class SemanticCacheService:
         """Chỉ track khi hit từ DB (Redis hit không cần)."""
         if not cache_id:
             return
+        journal = get_write_behind_journal()
+        if journal:
+            await journal.track_hit(cache_id)
+            return
         await self.cache_repo.track_hit(cache_id)
 
     async def create_entry(
@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.repositories import SessionRepository, ConversationTurnRepository
 from app.infrastructure.database.repositories import BotVersionRepository
+from app.infrastructure.database.write_behind import get_write_behind_journal
 from app.core.shared.exceptions import EntityNotFoundError
 from app.core.shared.db_utils import transaction_scope
 
@@ -16,6 +17,7 @@ class SessionService:
         self.session_repo = SessionRepository(db)
         self.turn_repo = ConversationTurnRepository(db)
         self.version_repo = BotVersionRepository(db)
+        self.journal = get_write_behind_journal()
 
     async def get_or_create_session(
         self, 
@@ -73,18 +75,20 @@ class SessionService:
 
     async def log_user_message(self, session_id: str, message: str):
         """Record user input turn"""
-        async with transaction_scope(self.db):
-            await self.turn_repo.create({
-                "session_id": session_id,
-                "speaker": "user",
-                "message": message
-            })
+        await self._log_turn(session_id, "user", message)
 
     async def log_bot_response(self, session_id: str, response: str):
         """Record bot response turn"""
+        await self._log_turn(session_id, "bot", response)
+
+    async def _log_turn(self, session_id: str, speaker: str, message: str):
+        data = {
+            "session_id": session_id,
+            "speaker": speaker,
+            "message": message
+        }
+        if self.journal:
+            await self.journal.log_turn(data)
+            return
         async with transaction_scope(self.db):
-            await self.turn_repo.create({
-                "session_id": session_id,
-                "speaker": "bot",
-                "message": response
-            })
+            await self.turn_repo.create(data)
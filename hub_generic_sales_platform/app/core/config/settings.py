@@ -65,6 +65,17 @@ class Settings(BaseSettings):
     openai_chat_model: str = Field(default="gpt-4-turbo-preview", alias="OPENAI_CHAT_MODEL")
     openai_embedding_model: str = Field(default="text-embedding-3-small", alias="OPENAI_EMBEDDING_MODEL")
 
+    # Embedding Cache (LRU in-process + Redis)
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_size: int = Field(default=10000, alias="EMBEDDING_CACHE_SIZE")
+    embedding_cache_ttl: int = Field(default=86400, alias="EMBEDDING_CACHE_TTL")  # 24 hours
+
+    # Embedding micro-batching (gom request đồng thời) & bulk API
+    embedding_batch_enabled: bool = Field(default=True, alias="EMBEDDING_BATCH_ENABLED")
+    embedding_batch_max_size: int = Field(default=64, alias="EMBEDDING_BATCH_MAX_SIZE")
+    embedding_batch_max_wait_ms: float = Field(default=5.0, alias="EMBEDDING_BATCH_MAX_WAIT_MS")
+    embedding_bulk_chunk_size: int = Field(default=512, alias="EMBEDDING_BULK_CHUNK_SIZE")
+
     # Logging
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
     log_format: str = Field(default="console", alias="LOG_FORMAT")
@@ -82,6 +93,8 @@ class Settings(BaseSettings):
         },
         alias="SOCIAL_PATTERNS"
     )
+    # Tier 1: bỏ dấu cho mọi pattern (mặc định chỉ pattern viết không dấu mới match bất kể dấu)
+    fast_path_fold_diacritics: bool = Field(default=False, alias="FAST_PATH_FOLD_DIACRITICS")
     
     cost_fast_path: float = Field(default=0.0, alias="COST_FAST_PATH")
     cost_knowledge_base: float = Field(default=0.0001, alias="COST_KNOWLEDGE_BASE")
@@ -90,6 +103,78 @@ class Settings(BaseSettings):
     
     # Cache Configuration
     semantic_cache_threshold: float = Field(default=0.95, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_trgm_enabled: bool = Field(default=True, alias="SEMANTIC_CACHE_TRGM_ENABLED")  # chỉ Postgres (pg_trgm)
+    semantic_cache_trgm_threshold: float = Field(default=0.8, alias="SEMANTIC_CACHE_TRGM_THRESHOLD")
+    # Tier in-process (khi không có Redis): giới hạn số entry + dung lượng ước lượng (bytes)
+    semantic_cache_memory_size: int = Field(default=10000, alias="SEMANTIC_CACHE_MEMORY_SIZE")
+    semantic_cache_memory_max_bytes: int = Field(default=64 * 1024 * 1024, alias="SEMANTIC_CACHE_MEMORY_MAX_BYTES")
+    idempotency_memory_size: int = Field(default=10000, alias="IDEMPOTENCY_MEMORY_SIZE")
+    idempotency_memory_max_bytes: int = Field(default=32 * 1024 * 1024, alias="IDEMPOTENCY_MEMORY_MAX_BYTES")
+    # Governance tenant_semantic_cache: admission sau N miss, merge near-duplicate, quota/tenant, expire
+    semantic_cache_admit_after: int = Field(default=2, alias="SEMANTIC_CACHE_ADMIT_AFTER")
+    semantic_cache_admission_window: int = Field(default=86400, alias="SEMANTIC_CACHE_ADMISSION_WINDOW")  # giây
+    semantic_cache_tenant_quota: int = Field(default=2000, alias="SEMANTIC_CACHE_TENANT_QUOTA")  # 0 = không giới hạn
+    semantic_cache_merge_threshold: float = Field(default=0.98, alias="SEMANTIC_CACHE_MERGE_THRESHOLD")
+    semantic_cache_max_idle_days: int = Field(default=30, alias="SEMANTIC_CACHE_MAX_IDLE_DAYS")  # 0 = không expire
+    semantic_cache_hit_half_life_days: float = Field(default=7.0, alias="SEMANTIC_CACHE_HIT_HALF_LIFE_DAYS")
+    semantic_cache_governance_interval: int = Field(default=3600, alias="SEMANTIC_CACHE_GOVERNANCE_INTERVAL")  # giây, 0 = tắt
+    semantic_cache_embedding_backfill_batch: int = Field(default=200, alias="SEMANTIC_CACHE_EMBEDDING_BACKFILL_BATCH")  # entry / tenant / lượt, 0 = tắt
+
+    # In-process Vector Index (FAQ / Semantic Cache / Offering search)
+    vector_index_enabled: bool = Field(default=True, alias="VECTOR_INDEX_ENABLED")
+    vector_index_ttl_seconds: int = Field(default=300, alias="VECTOR_INDEX_TTL_SECONDS")
+    vector_index_ivf_min_size: int = Field(default=5000, alias="VECTOR_INDEX_IVF_MIN_SIZE")
+    vector_index_nprobe: int = Field(default=8, alias="VECTOR_INDEX_NPROBE")
+
+    # In-process full-text index (BM25) cho search_offerings
+    text_index_enabled: bool = Field(default=True, alias="TEXT_INDEX_ENABLED")
+    text_index_ttl_seconds: int = Field(default=300, alias="TEXT_INDEX_TTL_SECONDS")
+    catalog_search_limit: int = Field(default=20, alias="CATALOG_SEARCH_LIMIT")
+    catalog_search_keyword_weight: float = Field(default=0.6, alias="CATALOG_SEARCH_KEYWORD_WEIGHT")  # phần còn lại cho vector score
+
+    # Offering read model (document precompute cho get_offering_for_bot / catalog list / compare)
+    offering_read_model_enabled: bool = Field(default=True, alias="OFFERING_READ_MODEL_ENABLED")
+
+    # Local Intent Classifier (thay LLM call khi đủ tự tin)
+    intent_classifier_enabled: bool = Field(default=True, alias="INTENT_CLASSIFIER_ENABLED")
+    intent_classifier_min_examples: int = Field(default=30, alias="INTENT_CLASSIFIER_MIN_EXAMPLES")
+    intent_classifier_min_score: float = Field(default=0.35, alias="INTENT_CLASSIFIER_MIN_SCORE")
+    intent_classifier_min_margin: float = Field(default=0.08, alias="INTENT_CLASSIFIER_MIN_MARGIN")
+    intent_classifier_ttl_seconds: int = Field(default=3600, alias="INTENT_CLASSIFIER_TTL_SECONDS")
+    intent_classifier_refit_delay: float = Field(default=30.0, alias="INTENT_CLASSIFIER_REFIT_DELAY")  # giây, gom nhãn LLM mới rồi refit nền
+
+    # Session hot-state cache (runtime_session snapshot: L1 LRU + Redis)
+    session_cache_enabled: bool = Field(default=True, alias="SESSION_CACHE_ENABLED")
+    session_cache_size: int = Field(default=10000, alias="SESSION_CACHE_SIZE")
+    session_cache_ttl: int = Field(default=30, alias="SESSION_CACHE_TTL")  # L1, giây
+    session_cache_redis_ttl: int = Field(default=1800, alias="SESSION_CACHE_REDIS_TTL")
+
+    # Tenant attribute config cache (AttributeResolverService)
+    attribute_config_cache_enabled: bool = Field(default=True, alias="ATTRIBUTE_CONFIG_CACHE_ENABLED")
+    attribute_config_cache_size: int = Field(default=1000, alias="ATTRIBUTE_CONFIG_CACHE_SIZE")  # số tenant
+    attribute_config_cache_ttl: int = Field(default=60, alias="ATTRIBUTE_CONFIG_CACHE_TTL")  # giây
+    attribute_config_cache_max_bytes: int = Field(default=16 * 1024 * 1024, alias="ATTRIBUTE_CONFIG_CACHE_MAX_BYTES")
+
+    # Inventory summary cache (tồn kho tổng hợp theo offering)
+    inventory_cache_enabled: bool = Field(default=True, alias="INVENTORY_CACHE_ENABLED")
+    inventory_cache_size: int = Field(default=10000, alias="INVENTORY_CACHE_SIZE")
+    inventory_cache_ttl: float = Field(default=10.0, alias="INVENTORY_CACHE_TTL")  # giây
+    inventory_cache_max_bytes: int = Field(default=32 * 1024 * 1024, alias="INVENTORY_CACHE_MAX_BYTES")
+
+    # Tier-3 response cache (theo state + slot mà tool đọc)
+    response_cache_enabled: bool = Field(default=True, alias="RESPONSE_CACHE_ENABLED")
+    response_cache_size: int = Field(default=5000, alias="RESPONSE_CACHE_SIZE")
+    response_cache_ttl: float = Field(default=300.0, alias="RESPONSE_CACHE_TTL")  # giây
+    response_cache_max_bytes: int = Field(default=64 * 1024 * 1024, alias="RESPONSE_CACHE_MAX_BYTES")
+
+    # Domain mapping: dựng domain entity bằng model_construct (bỏ re-validation dữ liệu từ DB)
+    domain_trusted_mapping: bool = Field(default=True, alias="DOMAIN_TRUSTED_MAPPING")
+
+    # Write-behind journal cho turns / decision events / cache hit counters (opt-in)
+    write_behind_enabled: bool = Field(default=False, alias="WRITE_BEHIND_ENABLED")
+    write_behind_max_queue: int = Field(default=10000, alias="WRITE_BEHIND_MAX_QUEUE")
+    write_behind_flush_size: int = Field(default=200, alias="WRITE_BEHIND_FLUSH_SIZE")
+    write_behind_flush_interval_ms: float = Field(default=50.0, alias="WRITE_BEHIND_FLUSH_INTERVAL_MS")
 
 
 # Singleton instance
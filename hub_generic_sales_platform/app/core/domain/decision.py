@@ -30,6 +30,8 @@ class RuntimeDecisionEvent(BaseModel):
     estimated_cost: Optional[Decimal] = None
     token_usage: Optional[Dict[str, Any]] = None
     latency_ms: Optional[int] = None
+    intent_code: Optional[str] = None
+    intent_source: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -27,6 +27,11 @@ class Intent(str, Enum):
     CANCEL = "CANCEL"
     UNKNOWN = "UNKNOWN"
 
+class IntentSource(str, Enum):
+    """Ai gán intent cho input turn - chỉ nhãn LLM được dùng để train classifier local"""
+    LLM = "llm"
+    LOCAL = "local"
+
 class LifecycleState(str, Enum):
     """
     Lifecycle states for conversation flow.
@@ -25,6 +25,17 @@ class IOfferingRepository(IRepository[TenantOffering]):
         """Lấy danh sách offering đang hoạt động"""
         pass
 
+    @abstractmethod
+    async def search_catalog(
+        self,
+        tenant_id: str,
+        query: Optional[str] = None,
+        offering_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """Tìm offering active (id, code, type, name, description) trong một round-trip"""
+        pass
+
 
 class IOfferingVersionRepository(IRepository[TenantOfferingVersion]):
     """Interface cho Offering Version Repository"""
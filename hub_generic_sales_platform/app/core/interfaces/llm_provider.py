@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 class ILLMProvider(ABC):
     """
@@ -11,17 +11,41 @@ class ILLMProvider(ABC):
     async def generate_response(
         self, 
         system_prompt: str, 
-        user_message: str,
+        user_message: Optional[str],
         tools: Optional[List[Dict[str, Any]]] = None,
-        messages_history: Optional[List[Dict[str, str]]] = None
+        messages_history: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        """General reasoning with tool support"""
+        """
+        General reasoning with tool support.
+        messages_history có thể chứa assistant tool_calls + tool message (vòng reasoning trước);
+        user_message rỗng = tiếp tục sau tool message. usage gồm cả cached_tokens (prompt cache).
+        """
         pass
 
+    async def stream_response(
+        self,
+        system_prompt: str,
+        user_message: Optional[str],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        messages_history: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming reasoning: yield {"type": "delta", "content"} rồi một {"type": "final", ...}
+        (cùng format generate_response). Mặc định: một delta duy nhất từ generate_response.
+        """
+        result = await self.generate_response(system_prompt, user_message, tools=tools, messages_history=messages_history)
+        if result.get("response") and not result.get("tool_calls"):
+            yield {"type": "delta", "content": result["response"]}
+        yield {"type": "final", **result}
+
     @abstractmethod
     async def get_embedding(self, text: str) -> List[float]:
         """Generate vector embedding for text"""
         pass
+
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many texts (adapters nên override bằng batch API)"""
+        return [await self.get_embedding(text) for text in texts]
         
     @abstractmethod
     def get_model_info(self) -> Dict[str, Any]:
@@ -3,6 +3,7 @@ Attribute Resolver Service - Resolves attribute definitions with tenant-specific
 """
 from typing import List, Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.infrastructure.cache import get_attribute_config_cache
 from app.infrastructure.database.repositories import TenantAttributeConfigRepository
 from app.infrastructure.database.models.offering import TenantOfferingAttributeValue
 from app.infrastructure.database.models.knowledge import DomainAttributeDefinition, TenantAttributeConfig
@@ -19,7 +20,8 @@ class AttributeResolverService:
         self,
         tenant_id: str,
         attribute_values: List[TenantOfferingAttributeValue],
-        filter_display_only: bool = True
+        filter_display_only: bool = True,
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Resolve attribute values với tenant-specific configs.
@@ -28,6 +30,7 @@ class AttributeResolverService:
             tenant_id: Tenant ID
             attribute_values: List of TenantProductAttributeValue
             filter_display_only: Nếu True, chỉ trả về attributes có is_display=True
+            use_cache: False -> đọc config thẳng từ DB (xem load_configs)
         
         Returns:
             List of resolved attributes với format:
@@ -45,16 +48,58 @@ class AttributeResolverService:
         if not attribute_values:
             return []
         
-        # Lấy tất cả configs cho tenant (batch load)
+        # Lấy configs cho tenant (batch load)
         attr_def_ids = [av.attribute_def_id for av in attribute_values if av.definition]
-        configs_map = {}
-        if attr_def_ids:
-            # Load configs theo batch
-            for attr_def_id in attr_def_ids:
-                config = await self.config_repo.get_config(tenant_id, attr_def_id)
-                if config:
-                    configs_map[attr_def_id] = config
+        configs_map = await self.load_configs(tenant_id, attr_def_ids, use_cache=use_cache)
         
+        return self.resolve_with_configs(attribute_values, configs_map, filter_display_only)
+
+    async def resolve_attributes_bulk(
+        self,
+        tenant_id: str,
+        attribute_values_by_version: Dict[str, List[TenantOfferingAttributeValue]],
+        filter_display_only: bool = True,
+        use_cache: bool = True
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """resolve_attributes cho nhiều version: load config của mọi attribute trong MỘT query."""
+        attr_def_ids = [
+            av.attribute_def_id
+            for values in attribute_values_by_version.values()
+            for av in values if av.definition
+        ]
+        configs_map = await self.load_configs(tenant_id, attr_def_ids, use_cache=use_cache)
+        return {
+            version_id: self.resolve_with_configs(values, configs_map, filter_display_only)
+            for version_id, values in attribute_values_by_version.items()
+        }
+
+    async def load_configs(
+        self, tenant_id: str, attribute_def_ids: List[str], use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        {attribute_def_id: config} cho các attribute. Cache bật: lần đầu load toàn bộ config
+        của tenant (một query) rồi phục vụ từ cache; tắt: một query IN theo danh sách id.
+        use_cache=False: luôn đọc DB (vẫn làm mới cache) - dùng khi kết quả được lưu bền (read model).
+        """
+        if not attribute_def_ids:
+            return {}
+        cache = get_attribute_config_cache()
+        if not cache:
+            return await self.config_repo.get_configs(tenant_id, attribute_def_ids)
+        configs = cache.get(tenant_id, attribute_def_ids) if use_cache else None
+        if configs is None:
+            all_configs = {c.attribute_def_id: c for c in await self.config_repo.get_all_for_tenant(tenant_id)}
+            cache.set(tenant_id, all_configs)
+            configs = {def_id: all_configs[def_id] for def_id in attribute_def_ids if def_id in all_configs}
+        return configs
+
+    @staticmethod
+    def resolve_with_configs(
+        attribute_values: List[TenantOfferingAttributeValue],
+        configs_map: Dict[str, Any],
+        filter_display_only: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Ghép attribute values với configs đã load sẵn ({attribute_def_id: config})."""
         resolved = []
         for av in attribute_values:
             if not av.definition:
@@ -1,22 +1,44 @@
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+import enum
+import logging
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Sequence
+from datetime import date, datetime
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config.settings import get_settings
 from app.core.shared.db_utils import transaction_scope
 from app.infrastructure.database.repositories import (
     OfferingRepository, OfferingVersionRepository, OfferingVariantRepository,
-    OfferingAttributeRepository
+    OfferingAttributeRepository, OfferingReadModelRepository
 )
 from app.infrastructure.database.repositories import InventoryRepository, InventoryLocationRepository
 from app.infrastructure.database.repositories import TenantPriceListRepository, TenantSalesChannelRepository, VariantPriceRepository
 from app.core.services.attribute_resolver import AttributeResolverService
 from app.core.services.inventory_extension import InventoryExtension
+from app.infrastructure.cache import get_response_cache
 from app.infrastructure.database.models.offering import (
     TenantOffering, TenantOfferingVersion, TenantOfferingAttributeValue, TenantOfferingVariant, TenantInventoryItem, 
     TenantVariantPrice,
     OfferingStatus
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _json_safe(value: Any) -> Any:
+    """Chuẩn hóa document về kiểu JSON (Enum, Decimal, datetime) để lưu read model."""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
 
 class CatalogService:
     """Service xử lý nghiệp vụ Catalog tập trung (Domain Logic)"""
@@ -34,6 +56,7 @@ class CatalogService:
         self.loc_repo = InventoryLocationRepository(db)
         self.attr_resolver = AttributeResolverService(db)
         self.inventory_ext = InventoryExtension(db)
+        self.read_model_repo = OfferingReadModelRepository(db)
 
     async def get_offering_for_bot(
         self, 
@@ -46,7 +69,15 @@ class CatalogService:
         """
         Lấy toàn bộ thông tin 'thực' của offering.
         Kết hợp: Nội dung Active Version + Giá theo Channel + Tồn kho tổng hợp.
+        Đọc từ read model (document đã precompute theo channel); miss thì build rồi lưu lại.
         """
+        include_inventory = "inventory" in kwargs.get("enabled_capabilities", [])
+        if self._read_model_enabled():
+            cached = await self.read_model_repo.get_by_codes(tenant_id, channel_code, [offering_code], domain_id=domain_id)
+            if offering_code in cached:
+                return self._project(cached[offering_code], include_inventory)
+        built_at = datetime.now()
+
         # 1. Lấy Offering
         offering = await self.offering_repo.get_by_code(offering_code, tenant_id, domain_id=domain_id)
         if not offering or offering.status != OfferingStatus.ACTIVE:
@@ -58,30 +89,210 @@ class CatalogService:
             return None
 
         # 3. Lấy Giá từ VARIANT via offering_id (không cần eager load)
-        current_price = None
         prices = await self.price_repo.get_prices_for_offering(tenant_id, channel_code, offering.id)
-        if prices:
-            # Lấy giá thấp nhất (min price cho offering)
-            min_price = prices[0]  # Already sorted by amount ASC
-            current_price = {
-                "amount": float(min_price.amount),
-                "currency": min_price.currency,
-                "compare_at": float(min_price.compare_at) if min_price.compare_at else None
-            }
 
-        # 4. Lấy Tồn kho
+        # 4. Lấy Tồn kho (read model luôn lưu tồn kho, trả về theo capability)
+        # Document được lưu bền vào read model -> đọc tồn kho thẳng từ DB, không qua inventory cache
         inventory_summary = []
-        enabled_capabilities = kwargs.get("enabled_capabilities", [])
-        if "inventory" in enabled_capabilities:
-            inventory_summary = await self.inventory_ext.get_offering_inventory(tenant_id, offering.id)
+        if include_inventory or self._read_model_enabled():
+            inventory_summary = await self.inventory_ext.get_offering_inventory(
+                tenant_id, offering.id, use_cache=not self._read_model_enabled()
+            )
 
-        # 5. Lấy các thuộc tính mở rộng
+        # 5. Lấy các thuộc tính mở rộng (config thuộc tính cũng đọc thẳng DB khi lưu read model)
         attributes = await self.attr_val_repo.get_by_version(version.id, tenant_id=tenant_id)
         resolved_attrs = await self.attr_resolver.resolve_attributes(
             tenant_id, 
             attributes, 
-            filter_display_only=False
+            filter_display_only=False,
+            use_cache=not self._read_model_enabled()
         )
+
+        document = _json_safe(self._assemble_offering(offering, version, prices, inventory_summary, resolved_attrs))
+        await self._save_documents(tenant_id, channel_code, [document], built_at)
+        return self._project(document, include_inventory)
+
+    async def get_offerings_for_bot_bulk(
+        self,
+        tenant_id: str,
+        codes: Optional[List[str]] = None,
+        channel_code: str = "WEB",
+        domain_id: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Bản batch của get_offering_for_bot cho danh sách (theo `codes` hoặc toàn bộ offering active
+        của tenant/domain). Document có sẵn trong read model được dùng trực tiếp; phần còn thiếu
+        build bằng các query set-based (xem _build_documents) rồi lưu lại.
+        """
+        include_inventory = "inventory" in kwargs.get("enabled_capabilities", [])
+        if codes is not None:
+            cached: Dict[str, Dict[str, Any]] = {}
+            if self._read_model_enabled():
+                cached = await self.read_model_repo.get_by_codes(tenant_id, channel_code, codes, domain_id=domain_id)
+            missing = [
+                o for o in await self.offering_repo.get_by_codes(
+                    [c for c in codes if c not in cached], tenant_id, domain_id=domain_id
+                )
+                if o.status == OfferingStatus.ACTIVE
+            ]
+            built = await self._build_documents(tenant_id, channel_code, missing, include_inventory)
+            by_code = {**cached, **{d["code"]: d for d in built}}
+            documents = [by_code[c] for c in dict.fromkeys(codes) if c in by_code]
+        else:
+            offerings = await self.offering_repo.get_active_offerings(tenant_id, domain_id=domain_id)
+            documents = await self._documents_for(tenant_id, channel_code, offerings, include_inventory)
+
+        return [self._project(d, include_inventory) for d in documents]
+
+    async def get_offerings_for_bot_by_ids(
+        self,
+        tenant_id: str,
+        offering_ids: Sequence[str],
+        channel_code: str = "WEB",
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Như get_offerings_for_bot_bulk nhưng theo offering id (giữ thứ tự) - dùng cho compare."""
+        include_inventory = "inventory" in kwargs.get("enabled_capabilities", [])
+        offerings = [
+            o for o in await self.offering_repo.get_by_ids(offering_ids, tenant_id)
+            if o.status == OfferingStatus.ACTIVE
+        ]
+        documents = await self._documents_for(tenant_id, channel_code, offerings, include_inventory)
+        return [self._project(d, include_inventory) for d in documents]
+
+    async def refresh_read_model(self, tenant_id: str, offering_ids: Sequence[str]) -> None:
+        """
+        Build lại document của các offering cho những channel đã được materialize
+        (gọi sau publish_version / set_variant_price / update_inventory, cùng transaction).
+        Response cache Tier-3 của tenant cũng bị invalidate vì câu trả lời có thể chứa giá / tồn kho cũ.
+        """
+        response_cache = get_response_cache()
+        if response_cache:
+            response_cache.invalidate(tenant_id)
+        if not offering_ids or not self._read_model_enabled():
+            return
+        # Session không autoflush: đẩy thay đổi đang chờ trước khi đọc lại
+        await self.db.flush()
+        channels = await self.read_model_repo.get_channels(offering_ids)
+        await self.read_model_repo.invalidate(offering_ids)
+        if not channels:
+            return
+        offerings = [
+            o for o in await self.offering_repo.get_by_ids(offering_ids, tenant_id)
+            if o.status == OfferingStatus.ACTIVE
+        ]
+        for channel_code in channels:
+            await self._build_documents(tenant_id, channel_code, offerings, include_inventory=True)
+
+    async def _documents_for(
+        self, tenant_id: str, channel_code: str, offerings: List[Any], include_inventory: bool
+    ) -> List[Dict[str, Any]]:
+        """Document của `offerings` (giữ thứ tự): lấy từ read model, build phần còn thiếu."""
+        if not offerings:
+            return []
+        cached: Dict[str, Dict[str, Any]] = {}
+        if self._read_model_enabled():
+            cached = await self.read_model_repo.get_by_offering_ids(tenant_id, channel_code, [o.id for o in offerings])
+        built = await self._build_documents(
+            tenant_id, channel_code, [o for o in offerings if o.id not in cached], include_inventory
+        )
+        by_id = {**cached, **{d["id"]: d for d in built}}
+        return [by_id[o.id] for o in offerings if o.id in by_id]
+
+    async def _build_documents(
+        self, tenant_id: str, channel_code: str, offerings: List[Any], include_inventory: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Build document cho nhiều offering: mỗi loại dữ liệu (version, giá, tồn kho, thuộc tính, config)
+        chỉ tốn MỘT query set-based, ghép kết quả trong bộ nhớ - số query không phụ thuộc số offering.
+        Document được lưu bền nên đọc thẳng DB, không qua inventory / attribute config cache.
+        """
+        if not offerings:
+            return []
+        # Lấy trước mọi lần đọc nguồn: save không ghi đè document build sau thời điểm này
+        built_at = datetime.now()
+        offering_ids = [o.id for o in offerings]
+        versions = await self.version_repo.get_active_versions(offering_ids, tenant_id=tenant_id)
+        offerings = [o for o in offerings if o.id in versions]
+        if not offerings:
+            return []
+        offering_ids = [o.id for o in offerings]
+
+        prices = await self.price_repo.get_prices_for_offerings(tenant_id, channel_code, offering_ids)
+
+        inventory: Dict[str, List[Dict[str, Any]]] = {}
+        if include_inventory or self._read_model_enabled():
+            inventory = await self.inventory_ext.get_offerings_inventory(
+                tenant_id, offering_ids, use_cache=not self._read_model_enabled()
+            )
+
+        version_ids = [versions[o.id].id for o in offerings]
+        attributes = await self.attr_val_repo.get_by_versions(version_ids, tenant_id=tenant_id)
+        resolved = await self.attr_resolver.resolve_attributes_bulk(
+            tenant_id,
+            {version_id: attributes.get(version_id, []) for version_id in version_ids},
+            filter_display_only=False,
+            use_cache=not self._read_model_enabled()
+        )
+
+        documents = [
+            _json_safe(self._assemble_offering(
+                o,
+                versions[o.id],
+                prices.get(o.id, []),
+                inventory.get(o.id, []),
+                resolved.get(versions[o.id].id, [])
+            ))
+            for o in offerings
+        ]
+        await self._save_documents(tenant_id, channel_code, documents, built_at)
+        return documents
+
+    async def _save_documents(
+        self, tenant_id: str, channel_code: str, documents: List[Dict[str, Any]], built_at: datetime
+    ) -> None:
+        """
+        Lưu document vào read model, hết hạn ở mốc valid_from / valid_to kế tiếp của giá.
+        Lỗi ghi không làm hỏng request đọc (lần sau build lại).
+        """
+        if not documents or not self._read_model_enabled():
+            return
+        try:
+            expires_at = await self.price_repo.get_next_price_boundaries(
+                tenant_id, channel_code, [d["id"] for d in documents]
+            )
+            await self.read_model_repo.save(tenant_id, channel_code, documents, built_at, expires_at)
+        except Exception as e:
+            logger.warning(f"Offering read model: save failed for tenant {tenant_id}/{channel_code}: {e}")
+
+    @staticmethod
+    def _read_model_enabled() -> bool:
+        return get_settings().offering_read_model_enabled
+
+    @staticmethod
+    def _project(document: Dict[str, Any], include_inventory: bool) -> Dict[str, Any]:
+        """Document read model luôn có tồn kho; chỉ trả ra khi capability 'inventory' được bật."""
+        return document if include_inventory else {**document, "inventory": []}
+
+    @staticmethod
+    def _assemble_offering(
+        offering,
+        version,
+        prices: List[Any],
+        inventory_summary: List[Dict[str, Any]],
+        resolved_attrs: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Ghép offering + version + giá (đã sort ASC) + tồn kho + thuộc tính đã resolve."""
+        current_price = None
+        if prices:
+            # Lấy giá thấp nhất (min price cho offering)
+            min_price = prices[0]  # Already sorted by amount ASC
+            current_price = {
+                "amount": float(min_price.amount),
+                "currency": min_price.currency,
+                "compare_at": float(min_price.compare_at) if min_price.compare_at else None
+            }
         
         attr_data = {
             attr["key"]: attr["value"] 
@@ -147,7 +358,9 @@ class CatalogService:
                     stock_qty=new_qty
                 )
                 self.db.add(item)
-                
+
+            self.inventory_ext.invalidate(tenant_id, [variant.offering_id])
+            await self.refresh_read_model(tenant_id, [variant.offering_id])
             return True
 
     async def publish_version(self, offering_id: str, version_number: int, tenant_id: str) -> bool:
@@ -181,6 +394,11 @@ class CatalogService:
             # 4. Activate offering if not already
             if offering.status != OfferingStatus.ACTIVE:
                 offering.status = OfferingStatus.ACTIVE
+
+            # 5. Re-index catalog search document + vector index + read model (version active mới)
+            await self.offering_repo.sync_text_index(offering_id, tenant_id)
+            await self.version_repo.sync_vector_index(offering_id, tenant_id)
+            await self.refresh_read_model(tenant_id, [offering_id])
                 
             return True
 
@@ -249,6 +467,8 @@ class CatalogService:
             self.db.add(new_variant)
             await self.db.flush()
             await self.db.refresh(new_variant)
+            self.inventory_ext.invalidate(tenant_id, [offering_id])
+            await self.read_model_repo.invalidate([offering_id])
             return new_variant
 
     async def update_variant(self, variant_id: str, tenant_id: str, name: Optional[str] = None, status: Optional[str] = None) -> Optional[TenantOfferingVariant]:
@@ -262,11 +482,17 @@ class CatalogService:
                 variant.name = name
             if status:
                 variant.status = status
-                
+
+            self.inventory_ext.invalidate(tenant_id, [variant.offering_id])
+            await self.read_model_repo.invalidate([variant.offering_id])
             return variant
 
     async def delete_variant(self, variant_id: str, tenant_id: str) -> bool:
         """Xóa biến thể với tenant isolation"""
+        variant = await self.variant_repo.get(variant_id, tenant_id=tenant_id)
+        if variant:
+            self.inventory_ext.invalidate(tenant_id, [variant.offering_id])
+            await self.read_model_repo.invalidate([variant.offering_id])
         return await self.variant_repo.delete(variant_id, tenant_id=tenant_id)
 
     async def set_variant_price(
@@ -317,4 +543,5 @@ class CatalogService:
                 await self.db.flush()  # ✅ Explicit flush for insert
                 
             await self.db.refresh(existing_price)
+            await self.refresh_read_model(tenant_id, [variant.offering_id])
             return existing_price
@@ -2,18 +2,23 @@ import json
 import logging
 from typing import Any, Optional
 from app.core.config.settings import get_settings
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache
 
 logger = logging.getLogger(__name__)
 
 class IdempotencyService:
     """
     Service to ensure tool calls are idempotent.
-    Uses Redis as primary store, falls back to in-memory for dev.
+    Uses Redis as primary store, falls back to a bounded in-memory LRU (TTL per entry) for dev.
     """
-    _memory_cache = {}
 
     def __init__(self):
         settings = get_settings()
+        self._memory_cache = BoundedTTLCache(
+            max_entries=settings.idempotency_memory_size,
+            max_bytes=settings.idempotency_memory_max_bytes,
+            name="idempotency",
+        )
         self.redis_url = settings.redis_url
         self.redis = None
         
@@ -55,7 +60,7 @@ class IdempotencyService:
             except Exception as e:
                 logger.error(f"Redis set error: {e}")
         
-        self._memory_cache[key] = result
+        self._memory_cache.set(key, result, ttl=ttl)
 
     async def clear_cache(self):
         """Clear memory cache (for tests)"""
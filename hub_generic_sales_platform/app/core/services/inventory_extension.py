@@ -1,7 +1,8 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.infrastructure.database.repositories import InventoryRepository, InventoryLocationRepository
+from app.infrastructure.cache import get_inventory_cache, get_response_cache
+from app.infrastructure.database.repositories import InventoryRepository, InventoryLocationRepository, OfferingReadModelRepository
 from app.infrastructure.database.models.offering import TenantInventoryItem, TenantOfferingVariant
 
 class InventoryExtension:
@@ -12,18 +13,38 @@ class InventoryExtension:
         self.inventory_repo = InventoryRepository(db)
         self.loc_repo = InventoryLocationRepository(db)
 
-    async def get_offering_inventory(self, tenant_id: str, offering_id: str) -> List[Dict[str, Any]]:
+    async def get_offering_inventory(self, tenant_id: str, offering_id: str, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Lấy tồn kho cho tất cả các variant của một offering"""
-        stmt = select(TenantOfferingVariant).where(TenantOfferingVariant.offering_id == offering_id)
-        variants = await self.db.execute(stmt)
-        variant_list = variants.scalars().all()
-        
-        inventory_summary = []
-        for var in variant_list:
-            stock = await self.inventory_repo.get_stock_status(tenant_id, var.sku)
-            if stock:
-                inventory_summary.append(stock)
-        return inventory_summary
+        return (await self.get_offerings_inventory(tenant_id, [offering_id], use_cache=use_cache)).get(offering_id, [])
+
+    async def get_offerings_inventory(
+        self, tenant_id: str, offering_ids: Sequence[str], use_cache: bool = True
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Tồn kho tổng hợp theo variant cho nhiều offering: {offering_id: [stock_status]}.
+        Đọc từ inventory cache, phần thiếu lấy bằng MỘT query GROUP BY rồi ghi lại cache.
+        use_cache=False: luôn đọc DB (vẫn làm mới cache) - dùng khi kết quả được lưu bền (read model),
+        để tồn kho cũ trong TTL của cache không bị materialize lâu hơn TTL đó.
+        """
+        if not offering_ids:
+            return {}
+        cache = get_inventory_cache()
+        stock = cache.get_many(tenant_id, offering_ids) if cache and use_cache else {}
+        missing = [o_id for o_id in dict.fromkeys(offering_ids) if o_id not in stock]
+        if missing:
+            loaded = await self.inventory_repo.get_stock_status_for_offerings(tenant_id, missing)
+            # Offering không có variant cũng được cache (list rỗng)
+            loaded = {o_id: loaded.get(o_id, []) for o_id in missing}
+            if cache:
+                cache.set_many(tenant_id, loaded)
+            stock.update(loaded)
+        return stock
+
+    def invalidate(self, tenant_id: str, offering_ids: Sequence[str]) -> None:
+        """Xóa tồn kho đã cache của các offering (gọi khi ghi tồn kho)."""
+        cache = get_inventory_cache()
+        if cache:
+            cache.invalidate(tenant_id, offering_ids)
 
     async def update_stock(self, tenant_id: str, sku: str, location_code: str, new_qty: int) -> bool:
         """Cập nhật tồn kho"""
@@ -57,6 +78,12 @@ class InventoryExtension:
                 stock_qty=new_qty
             )
             self.db.add(item)
-            
+
+        # Document read model và response cache Tier-3 chứa tồn kho -> build lại ở lần đọc sau
+        self.invalidate(tenant_id, [v_obj.offering_id])
+        await OfferingReadModelRepository(self.db).invalidate([v_obj.offering_id])
+        response_cache = get_response_cache()
+        if response_cache:
+            response_cache.invalidate(tenant_id)
         await self.db.commit()
         return True
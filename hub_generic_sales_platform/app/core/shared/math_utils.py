@@ -1,16 +1,20 @@
-import math
 from typing import List
 
+import numpy as np
+
+from app.core.shared.vector_similarity import to_float32_vector
+
+
 def cosine_similarity(v1: List[float], v2: List[float]) -> float:
-    """Calculate cosine similarity between two vectors"""
-    if v1 is None or v2 is None or len(v1) == 0 or len(v2) == 0 or len(v1) != len(v2):
+    """Calculate cosine similarity between two vectors.
+    Cho nhiều vector, dùng vector_similarity.cosine_top_k / SimilarityMatrix (batched)."""
+    a = to_float32_vector(v1)
+    b = to_float32_vector(v2)
+    if a is None or b is None or a.size != b.size:
         return 0.0
-    
-    dot_product = sum(a * b for a, b in zip(v1, v2))
-    magnitude1 = math.sqrt(sum(a * a for a in v1))
-    magnitude2 = math.sqrt(sum(b * b for b in v2))
-    
-    if magnitude1 == 0 or magnitude2 == 0:
+
+    magnitude = float(np.linalg.norm(a)) * float(np.linalg.norm(b))
+    if magnitude == 0:
         return 0.0
-        
-    return dot_product / (magnitude1 * magnitude2)
+
+    return float(np.dot(a, b)) / magnitude
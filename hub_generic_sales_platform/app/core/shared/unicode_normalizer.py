@@ -111,3 +111,17 @@ def normalize_and_escape_sql(value: str, null_if_empty: bool = False) -> str:
     # Escape single quotes cho SQL
     escaped = normalized.replace("'", "''")
     return escaped
+
+
+def fold_diacritics(text: Optional[str], lower: bool = True) -> str:
+    """
+    Bỏ dấu tiếng Việt (accent folding) + lowercase: "Điện thoại" -> "dien thoai".
+    Dùng cho matching/search không phân biệt dấu (user hay gõ không dấu).
+    lower=False giữ nguyên hoa/thường (VD: fold regex pattern có \\S, \\W).
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize('NFD', text)
+    stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != 'Mn')
+    stripped = stripped.replace('đ', 'd').replace('Đ', 'D')
+    return stripped.lower() if lower else stripped
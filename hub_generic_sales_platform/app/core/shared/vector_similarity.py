@@ -0,0 +1,89 @@
+"""
+Vectorized cosine similarity (batched) - thay thế vòng lặp math_utils.cosine_similarity.
+
+Một query được so với cả ma trận float32 liên tục trong một phép nhân ma trận;
+norm của từng dòng được tính một lần và cache lại.
+"""
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def to_float32_vector(vector: Any) -> Optional[np.ndarray]:
+    """Chuyển vector (list / numpy / pgvector) sang float32 1-D. None nếu rỗng."""
+    if vector is None:
+        return None
+    arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    return arr if arr.size else None
+
+
+def cosine_top_k(
+    query: Any,
+    matrix: np.ndarray,
+    k: int,
+    threshold: float = -1.0,
+    norms: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tính cosine similarity giữa `query` và mọi dòng của `matrix` (float32, C-contiguous),
+    trả về (row_indices, scores) của top-k có score >= threshold, sắp xếp giảm dần.
+
+    `norms`: norm từng dòng đã cache (bỏ qua để tính tại chỗ). Dòng có norm 0 có score 0.
+    """
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+    q = to_float32_vector(query)
+    if q is None or k <= 0 or matrix.ndim != 2 or matrix.shape[0] == 0 or matrix.shape[1] != q.size:
+        return empty
+    q_norm = float(np.linalg.norm(q))
+    if q_norm == 0.0:
+        return empty
+    if norms is None:
+        norms = np.linalg.norm(matrix, axis=1)
+
+    dots = matrix @ q
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(norms > 0, dots / (norms * q_norm), 0.0).astype(np.float32)
+
+    rows = np.nonzero(scores >= threshold)[0]
+    if rows.size == 0:
+        return empty
+    selected = scores[rows]
+    if rows.size > k:
+        top = np.argpartition(-selected, k - 1)[:k]
+        rows, selected = rows[top], selected[top]
+    order = np.argsort(-selected, kind="stable")
+    return rows[order], selected[order]
+
+
+class SimilarityMatrix:
+    """
+    Ma trận embedding float32 liên tục + norm cache, build một lần từ danh sách vector.
+    Các vector rỗng hoặc sai chiều (so với vector hợp lệ đầu tiên) bị bỏ qua;
+    `positions` ánh xạ dòng của ma trận về vị trí trong danh sách đầu vào.
+    """
+
+    def __init__(self, vectors: Sequence[Any], dim: Optional[int] = None):
+        rows: List[np.ndarray] = []
+        positions: List[int] = []
+        for pos, vector in enumerate(vectors):
+            arr = to_float32_vector(vector)
+            if arr is None:
+                continue
+            if dim is None:
+                dim = arr.size
+            if arr.size != dim:
+                continue
+            rows.append(arr)
+            positions.append(pos)
+        self.dim = dim
+        self.matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32) if rows else np.zeros((0, dim or 0), dtype=np.float32)
+        self.norms = np.linalg.norm(self.matrix, axis=1) if rows else np.zeros(0, dtype=np.float32)
+        self.positions = np.asarray(positions, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def top_k(self, query: Any, k: int, threshold: float = -1.0) -> List[Tuple[int, float]]:
+        """Top-k (vị trí đầu vào, score) theo cosine similarity, giảm dần."""
+        rows, scores = cosine_top_k(query, self.matrix, k, threshold=threshold, norms=self.norms)
+        return [(int(self.positions[r]), float(s)) for r, s in zip(rows, scores)]
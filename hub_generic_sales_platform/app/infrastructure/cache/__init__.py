@@ -1,8 +1,35 @@
 """Caching infrastructure - Redis, Semantic Cache L1"""
 
+from app.infrastructure.cache.attribute_config_cache import (
+    AttributeConfigCache,
+    get_attribute_config_cache,
+)
+from app.infrastructure.cache.bounded_cache import (
+    BoundedTTLCache,
+    get_cache_stats,
+)
+from app.infrastructure.cache.inventory_cache import (
+    InventoryCache,
+    get_inventory_cache,
+)
 from app.infrastructure.cache.redis_semantic_cache import (
     RedisSemanticCache,
     get_redis_semantic_cache,
 )
+from app.infrastructure.cache.response_cache import (
+    ResponseCache,
+    get_response_cache,
+)
+from app.infrastructure.cache.session_state_cache import (
+    SessionStateCache,
+    get_session_state_cache,
+)
 
-__all__ = ["RedisSemanticCache", "get_redis_semantic_cache"]
+__all__ = [
+    "AttributeConfigCache", "get_attribute_config_cache",
+    "BoundedTTLCache", "get_cache_stats",
+    "InventoryCache", "get_inventory_cache",
+    "RedisSemanticCache", "get_redis_semantic_cache",
+    "ResponseCache", "get_response_cache",
+    "SessionStateCache", "get_session_state_cache",
+]
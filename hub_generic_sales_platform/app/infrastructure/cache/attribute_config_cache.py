@@ -0,0 +1,80 @@
+"""
+Tenant Attribute Config Cache
+
+AttributeResolverService cần config (label, is_display, display_order, is_searchable) của mọi
+attribute trong offering. Config ít thay đổi và số lượng mỗi tenant nhỏ, nên cache TOÀN BỘ
+config của tenant ({attribute_def_id: config}) sau một query, phục vụ mọi lookup sau đó.
+
+- LRU theo tenant (BoundedTTLCache: giới hạn số tenant + dung lượng ước lượng, export /metrics),
+  TTL ngắn (giới hạn độ trễ đồng bộ giữa các worker).
+- TenantAttributeConfigRepository.create/update (API /attribute-definitions/{id}/config)
+  invalidate tenant tương ứng.
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from app.core import domain
+from app.core.config.settings import get_settings
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache
+
+logger = logging.getLogger(__name__)
+
+ConfigMap = Dict[str, domain.TenantAttributeConfig]
+
+
+class AttributeConfigCache:
+    """LRU {tenant_id: {attribute_def_id: config}} có TTL."""
+
+    def __init__(
+        self,
+        max_tenants: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.max_tenants = max_tenants if max_tenants is not None else settings.attribute_config_cache_size
+        self.ttl = ttl if ttl is not None else settings.attribute_config_cache_ttl
+        self._tenants = BoundedTTLCache(
+            max_entries=self.max_tenants,
+            max_bytes=max_bytes if max_bytes is not None else settings.attribute_config_cache_max_bytes,
+            default_ttl=self.ttl,
+            name="attribute_config_cache",
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._tenants.hits
+
+    @property
+    def misses(self) -> int:
+        return self._tenants.misses
+
+    def get(self, tenant_id: str, attribute_def_ids: Iterable[str]) -> Optional[ConfigMap]:
+        """Config của các attribute (chỉ những attribute có config), None nếu tenant chưa được cache."""
+        configs = self._tenants.get(tenant_id)
+        if configs is None:
+            return None
+        return {def_id: configs[def_id] for def_id in attribute_def_ids if def_id in configs}
+
+    def set(self, tenant_id: str, configs: ConfigMap) -> None:
+        """Ghi toàn bộ config của tenant."""
+        self._tenants.set(tenant_id, dict(configs))
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        if tenant_id is None:
+            self._tenants.clear()
+        else:
+            self._tenants.pop(tenant_id)
+
+
+_config_cache: Optional[AttributeConfigCache] = None
+
+
+def get_attribute_config_cache() -> Optional[AttributeConfigCache]:
+    """Singleton. Trả None khi tắt qua ATTRIBUTE_CONFIG_CACHE_ENABLED=false."""
+    global _config_cache
+    if not get_settings().attribute_config_cache_enabled:
+        return None
+    if _config_cache is None:
+        _config_cache = AttributeConfigCache()
+    return _config_cache
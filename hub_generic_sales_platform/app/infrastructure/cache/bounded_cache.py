@@ -0,0 +1,110 @@
+"""
+Bounded In-process Cache Tier
+
+LRU trong RAM có giới hạn số entry VÀ dung lượng ước lượng (bytes), TTL theo từng entry.
+Dùng cho các tier in-memory trước đây là dict tăng mãi (RedisSemanticCache, IdempotencyService).
+
+- Dung lượng entry ước lượng bằng độ dài JSON (value của các cache này đều JSON-serializable).
+- Counter hits / misses / evictions / expirations và `memory_bytes` được export qua
+  /metrics (xem app/infrastructure/metrics.py) cho mọi cache đã đăng ký tên.
+"""
+import json
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_registry: Dict[str, "BoundedTTLCache"] = {}
+
+
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class BoundedTTLCache:
+    """LRU {key: value} giới hạn theo max_entries và max_bytes, TTL theo entry."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int = 0,
+        default_ttl: Optional[float] = None,
+        name: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 = không giới hạn dung lượng
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name:
+            _registry[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() > entry[0]:
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        size = _estimate_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            # Entry lớn hơn cả tier: không cache (tránh đẩy hết entry khác ra)
+            self.pop(key)
+            return
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else float("inf")
+        self._remove(key)
+        self._entries[key] = (expires_at, size, value)
+        self.memory_bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self.memory_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key: str, default: Any = None) -> Optional[Any]:
+        entry = self._remove(key)
+        return entry[2] if entry is not None else default
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": self.memory_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: str) -> Optional[Tuple[float, int, Any]]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= entry[1]
+        return entry
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Stats của các BoundedTTLCache đã đăng ký tên (cho /metrics)."""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,76 @@
+"""
+Inventory Summary Cache
+
+Tồn kho tổng hợp theo variant của một offering (kết quả GROUP BY của InventoryRepository)
+được đọc ở mọi product detail / list view. Cache theo (tenant_id, offering_id):
+- LRU trong RAM (BoundedTTLCache: giới hạn số entry + dung lượng ước lượng, export /metrics),
+  TTL ngắn: tồn kho thay đổi thường xuyên, TTL giới hạn độ trễ giữa các worker.
+- CatalogService.update_inventory / InventoryExtension.update_stock invalidate offering tương ứng.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config.settings import get_settings
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache
+
+StockRows = List[Dict[str, Any]]
+
+
+class InventoryCache:
+    """LRU {(tenant_id, offering_id): [stock_status]} có TTL (trả về bản copy)."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.inventory_cache_size
+        self.ttl = ttl if ttl is not None else settings.inventory_cache_ttl
+        self._entries = BoundedTTLCache(
+            max_entries=self.max_entries,
+            max_bytes=max_bytes if max_bytes is not None else settings.inventory_cache_max_bytes,
+            default_ttl=self.ttl,
+            name="inventory_cache",
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def get_many(self, tenant_id: str, offering_ids: Iterable[str]) -> Dict[str, StockRows]:
+        """{offering_id: rows} cho các offering còn trong cache; offering thiếu trong kết quả = miss."""
+        found: Dict[str, StockRows] = {}
+        for offering_id in offering_ids:
+            rows = self._entries.get((tenant_id, offering_id))
+            if rows is not None:
+                found[offering_id] = [dict(row) for row in rows]
+        return found
+
+    def set_many(self, tenant_id: str, stock: Dict[str, StockRows]) -> None:
+        for offering_id, rows in stock.items():
+            self._entries.set((tenant_id, offering_id), [dict(row) for row in rows])
+
+    def invalidate(self, tenant_id: str, offering_ids: Iterable[str]) -> None:
+        for offering_id in offering_ids:
+            self._entries.pop((tenant_id, offering_id))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_inventory_cache: Optional[InventoryCache] = None
+
+
+def get_inventory_cache() -> Optional[InventoryCache]:
+    """Singleton. Trả None khi tắt qua INVENTORY_CACHE_ENABLED=false."""
+    global _inventory_cache
+    if not get_settings().inventory_cache_enabled:
+        return None
+    if _inventory_cache is None:
+        _inventory_cache = InventoryCache()
+    return _inventory_cache
@@ -3,6 +3,8 @@ Redis L1 Cache cho Semantic Cache (Tier 2 - Knowledge Path)
 
 Tối ưu: Exact match được cache trong Redis (~1ms) thay vì query DB (~10-50ms).
 Vector search vẫn qua DB (pgvector) vì Redis không lưu vector similarity.
+Không có Redis (hoặc Redis lỗi): fallback tier in-process có giới hạn (BoundedTTLCache), cùng TTL.
+Khi Redis hoạt động, Redis là nguồn duy nhất -> entry hết hạn ở Redis không còn được trả từ RAM.
 """
 import hashlib
 import json
@@ -10,6 +12,7 @@ import logging
 from typing import Optional, Any
 
 from app.core.config.settings import get_settings
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +37,14 @@ class RedisSemanticCache:
     """
 
     def __init__(self):
-        self._memory: dict = {}
-        self.redis = None
         settings = get_settings()
+        self._memory = BoundedTTLCache(
+            max_entries=settings.semantic_cache_memory_size,
+            max_bytes=settings.semantic_cache_memory_max_bytes,
+            default_ttl=DEFAULT_TTL,
+            name="semantic_cache",
+        )
+        self.redis = None
         if settings.redis_url:
             try:
                 import redis.asyncio as redis
@@ -53,8 +61,7 @@ class RedisSemanticCache:
         if self.redis:
             try:
                 raw = await self.redis.get(key)
-                if raw:
-                    return json.loads(raw)
+                return json.loads(raw) if raw else None
             except Exception as e:
                 logger.debug(f"Redis get error: {e}")
 
@@ -68,7 +75,7 @@ class RedisSemanticCache:
         cache_id: Optional[str] = None,
         ttl: int = DEFAULT_TTL,
     ) -> None:
-        """Lưu vào Redis (và memory fallback)."""
+        """Lưu vào Redis (memory tier chỉ khi Redis không dùng được)."""
         key = _cache_key(tenant_id, message)
         payload = {"response_text": response_text, "cache_id": cache_id}
 
@@ -79,10 +86,11 @@ class RedisSemanticCache:
                     ttl,
                     json.dumps(payload, ensure_ascii=False),
                 )
+                return
             except Exception as e:
                 logger.debug(f"Redis set error: {e}")
 
-        self._memory[key] = payload
+        self._memory.set(key, payload, ttl=ttl)
 
     async def delete(self, tenant_id: str, message: str) -> None:
         """Xóa entry (khi invalidate)."""
@@ -92,7 +100,7 @@ class RedisSemanticCache:
                 await self.redis.delete(key)
             except Exception as e:
                 logger.debug(f"Redis delete error: {e}")
-        self._memory.pop(key, None)
+        self._memory.pop(key)
 
 
 _redis_cache: Optional[RedisSemanticCache] = None
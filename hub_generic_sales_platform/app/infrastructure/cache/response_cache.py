@@ -0,0 +1,141 @@
+"""
+Tier-3 Response Cache
+
+Semantic cache (Tier 2) chỉ so khớp theo nội dung câu hỏi nên không dùng được cho câu trả lời
+phụ thuộc ngữ cảnh ("giá xe này bao nhiêu" ở VIEWING phụ thuộc offering đang xem). Cache này
+lưu kết quả agentic loop theo key xác định:
+
+    (tenant_id, bot_version_id, lifecycle_state, normalize_message(message), hash(slot subset))
+
+- Message chỉ chuẩn hóa NFC + lowercase + gộp khoảng trắng, KHÔNG bỏ dấu: "giá bàn" / "giá bán",
+  "cháo" / "chào" là câu hỏi khác nhau.
+
+- Slot subset = các slot mà tool đọc khi thiếu argument (PARAM_SLOT_MAP của ToolExecutor).
+- LRU trong RAM (BoundedTTLCache: giới hạn số entry + dung lượng ước lượng, export /metrics),
+  TTL giới hạn độ trễ giữa các worker.
+- Catalog thay đổi (publish version / giá / tồn kho) -> `invalidate(tenant_id)` tăng generation
+  của tenant, entry cũ không còn được đọc (bị đẩy ra dần theo LRU/TTL).
+"""
+import hashlib
+import json
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.config.settings import get_settings
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache
+from app.core.shared.unicode_normalizer import fold_diacritics, normalize_unicode
+
+# Slot mà tool đọc (xem PARAM_SLOT_MAP trong app/core/services/tool_executor.py)
+TOOL_SLOT_KEYS = frozenset({
+    "offering_id", "offering_code", "product_id", "product_code", "last_search_query",
+})
+
+# Tool chỉ đọc: response tạo ra từ các tool này replay được mà không bỏ sót side effect
+CACHEABLE_TOOLS = frozenset({
+    "search_offerings", "get_offering_details", "compare_offerings",
+    "get_market_data", "get_strategic_analysis",
+})
+
+CachedResponse = Dict[str, Any]
+
+
+def _state_value(state: Any) -> str:
+    return str(state.value if hasattr(state, "value") else state or "").lower()
+
+
+def slot_fingerprint(slots: Mapping[str, Any]) -> str:
+    """Hash ổn định của các slot tool đọc (bỏ slot khác và slot rỗng)."""
+    subset = sorted((key, str(value)) for key, value in slots.items() if key in TOOL_SLOT_KEYS and value)
+    return hashlib.sha1(json.dumps(subset, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result: Mapping[str, Any], slots: Mapping[str, Any]) -> bool:
+    """
+    Kết quả agent có replay được không:
+    - Agent báo danh sách tool đã chạy (`tools_used`) và tất cả đều chỉ đọc.
+    - Response không chứa giá trị của slot ngoài subset (VD: customer_name) vì key không phân biệt chúng.
+    """
+    tools_used = result.get("tools_used")
+    if tools_used is None or any(tool not in CACHEABLE_TOOLS for tool in tools_used):
+        return False
+    response = fold_diacritics(result.get("response") or "")
+    for key, value in slots.items():
+        if key in TOOL_SLOT_KEYS or not value:
+            continue
+        text = fold_diacritics(str(value)).strip()
+        if len(text) >= 2 and text in response:
+            return False
+    return True
+
+
+class ResponseCache:
+    """LRU {key: response payload} có TTL, invalidate theo generation của tenant."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.response_cache_size
+        self.ttl = ttl if ttl is not None else settings.response_cache_ttl
+        self._entries = BoundedTTLCache(
+            max_entries=self.max_entries,
+            max_bytes=max_bytes if max_bytes is not None else settings.response_cache_max_bytes,
+            default_ttl=self.ttl,
+            name="response_cache",
+        )
+        self._generations: Dict[str, int] = {}
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def make_key(
+        self,
+        tenant_id: str,
+        bot_version_id: Optional[str],
+        state: Any,
+        message: str,
+        slots: Mapping[str, Any],
+    ) -> Tuple[Any, ...]:
+        normalized = " ".join((normalize_unicode(message) or "").lower().split())
+        return (
+            tenant_id, self._generations.get(tenant_id, 0), bot_version_id or "",
+            _state_value(state), normalized, slot_fingerprint(slots),
+        )
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[CachedResponse]:
+        value = self._entries.get(key)
+        return dict(value) if value is not None else None
+
+    def set(self, key: Tuple[Any, ...], value: CachedResponse) -> None:
+        if key[1] != self._generations.get(key[0], 0):
+            # Catalog đã thay đổi trong lúc agent chạy: kết quả có thể đã cũ
+            return
+        self._entries.set(key, dict(value))
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Bỏ toàn bộ response của tenant (None = tất cả)."""
+        if tenant_id is None:
+            self._entries.clear()
+            self._generations.clear()
+            return
+        self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Singleton. Trả None khi tắt qua RESPONSE_CACHE_ENABLED=false."""
+    global _response_cache
+    if not get_settings().response_cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,162 @@
+"""
+Session Hot-State Cache (runtime_session)
+
+Mỗi message đọc runtime_session nhiều lần (get_or_create_session, read_session_state,
+AgentOrchestrator, update_lifecycle_state). Cache snapshot domain.RuntimeSession theo session_id:
+- L1: LRU trong RAM, TTL ngắn (giới hạn độ trễ đồng bộ giữa các worker).
+- L2: Redis (JSON), chia sẻ giữa các worker.
+
+Write-through từ SessionRepository: update/create ghi snapshot mới (version tăng) sau khi
+transaction commit; rollback hoặc ConcurrentUpdateError (lệch version) thì invalidate.
+
+Có Redis: mỗi lần ghi cập nhật thêm key version ({PREFIX}:v:{id}); L1 chỉ được dùng khi version
+của nó khớp version trong Redis (một GET số nguyên) - worker khác vừa ghi thì L1 bị bỏ, đọc lại L2.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core import domain
+from app.core.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "session_state"
+
+
+def _cache_key(session_id: str) -> str:
+    return f"{PREFIX}:{session_id}"
+
+
+def _version_key(session_id: str) -> str:
+    return f"{PREFIX}:v:{session_id}"
+
+
+class SessionStateCache:
+    """LRU + Redis cache cho domain.RuntimeSession (trả về bản copy, caller sửa thoải mái)."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        redis_ttl: Optional[int] = None,
+        redis_url: Optional[str] = None,
+    ):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.session_cache_size
+        self.ttl = ttl if ttl is not None else settings.session_cache_ttl
+        self.redis_ttl = redis_ttl if redis_ttl is not None else settings.session_cache_redis_ttl
+        self._memory: "OrderedDict[str, Tuple[float, domain.RuntimeSession]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.redis = None
+        redis_url = redis_url if redis_url is not None else settings.redis_url
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self.redis = redis.from_url(redis_url)
+                logger.info("SessionStateCache: Connected to Redis")
+            except Exception as e:
+                logger.warning(f"SessionStateCache: Redis unavailable: {e}")
+
+    async def get(self, session_id: str, tenant_id: str) -> Optional[domain.RuntimeSession]:
+        """Snapshot còn hạn của session (đúng tenant), None nếu miss."""
+        session = self._get_memory(session_id)
+        if session is not None and self.redis and not await self._is_current(session):
+            self._memory.pop(session_id, None)
+            session = None
+        if session is None and self.redis:
+            try:
+                raw = await self.redis.get(_cache_key(session_id))
+                if raw:
+                    session = domain.RuntimeSession.model_validate_json(raw)
+                    self._set_memory(session)
+            except Exception as e:
+                logger.debug(f"Redis get error: {e}")
+        if session is None or session.tenant_id != tenant_id:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return session.model_copy(deep=True)
+
+    async def set(self, session: domain.RuntimeSession) -> None:
+        self.set_local(session)
+        await self._set_redis(session)
+
+    def set_local(self, session: domain.RuntimeSession) -> None:
+        """Ghi L1 (đồng bộ) và lên lịch ghi Redis - dùng trong SQLAlchemy after_commit hook."""
+        self._set_memory(session)
+        if self.redis:
+            try:
+                asyncio.get_running_loop().create_task(self._set_redis(session))
+            except RuntimeError:
+                pass
+
+    async def invalidate(self, session_id: str) -> None:
+        self._memory.pop(session_id, None)
+        if self.redis:
+            try:
+                await self.redis.delete(_cache_key(session_id), _version_key(session_id))
+            except Exception as e:
+                logger.debug(f"Redis delete error: {e}")
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    async def _is_current(self, session: domain.RuntimeSession) -> bool:
+        """L1 còn khớp version mới nhất trong Redis? Redis lỗi -> dùng L1 (giới hạn bởi TTL)."""
+        try:
+            latest = await self.redis.get(_version_key(session.id))
+        except Exception as e:
+            logger.debug(f"Redis get error: {e}")
+            return True
+        return latest is not None and int(latest) == session.version
+
+    def _get_memory(self, session_id: str) -> Optional[domain.RuntimeSession]:
+        entry = self._memory.get(session_id)
+        if entry is None:
+            return None
+        expires_at, session = entry
+        if self.ttl and time.monotonic() > expires_at:
+            self._memory.pop(session_id, None)
+            return None
+        self._memory.move_to_end(session_id)
+        return session
+
+    def _set_memory(self, session: domain.RuntimeSession) -> None:
+        if self.max_entries <= 0:
+            return
+        current = self._memory.get(session.id)
+        if current is not None and current[1].version > session.version:
+            # Không ghi đè snapshot mới hơn bằng snapshot cũ (VD: Redis trả bản cũ)
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        self._memory[session.id] = (expires_at, session.model_copy(deep=True))
+        self._memory.move_to_end(session.id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _set_redis(self, session: domain.RuntimeSession) -> None:
+        if not self.redis:
+            return
+        try:
+            # Snapshot trước, version sau: worker thấy version mới luôn đọc được snapshot tương ứng
+            await self.redis.setex(_cache_key(session.id), self.redis_ttl, session.model_dump_json())
+            await self.redis.setex(_version_key(session.id), self.redis_ttl, session.version)
+        except Exception as e:
+            logger.debug(f"Redis set error: {e}")
+
+
+_session_cache: Optional[SessionStateCache] = None
+
+
+def get_session_state_cache() -> Optional[SessionStateCache]:
+    """Singleton. Trả None khi tắt qua SESSION_CACHE_ENABLED=false."""
+    global _session_cache
+    if not get_settings().session_cache_enabled:
+        return None
+    if _session_cache is None:
+        _session_cache = SessionStateCache()
+    return _session_cache
@@ -3,6 +3,7 @@ from sqlalchemy import and_, select, update, delete, Column, DateTime, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 from app.core.interfaces.repository import IRepository
+from app.infrastructure.database.mapping import to_domain
 
 
 class TimestampMixin:
@@ -35,7 +36,7 @@ class BaseRepository(Generic[ModelType], IRepository[ModelType]):
         if db_obj is None:
             return None
         if self.domain_container:
-            return self.domain_container.model_validate(db_obj)
+            return to_domain(self.domain_container, db_obj)
         return db_obj
 
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Any:
@@ -0,0 +1,168 @@
+"""
+Domain Mapping (ORM row -> domain entity)
+
+`domain.X.model_validate(db_obj)` chạy full Pydantic validation cho từng row, trong khi dữ liệu
+đọc từ DB đã đúng schema. Mapper "trusted" dựng domain entity bằng `model_construct`:
+- Mỗi domain class được compile một lần: danh sách field + converter tối thiểu cho các kiểu
+  mà model_validate vẫn coerce (str -> Enum, Decimal <-> float, Enum -> str, nested model).
+- Attribute chưa load (relationship lazy, cột deferred/expired) được bỏ qua -> giá trị default,
+  không kích hoạt lazy load (MissingGreenlet trong async).
+- Domain class có validator riêng luôn đi qua model_validate.
+- Projection query: `domain_columns(Model, domain.X)` chỉ select các cột domain cần
+  (VD: bỏ cột embedding), `row_to_domain` map Row -> domain entity.
+
+Tắt qua DOMAIN_TRUSTED_MAPPING=false (mọi mapping quay về model_validate).
+"""
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import ColumnProperty
+
+from app.core.config.settings import get_settings
+
+DomainT = TypeVar("DomainT", bound=BaseModel)
+Converter = Callable[[Any], Any]
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _to_float(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _to_decimal(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return Decimal(str(value))
+    return value
+
+
+def _to_str(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _converter(annotation: Any) -> Optional[Converter]:
+    """Converter cho field (None = gán thẳng giá trị từ DB)."""
+    annotation = _unwrap_optional(annotation)
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        args = get_args(annotation)
+        item = _converter(args[0]) if args else None
+        if item is None:
+            return None
+        return lambda value: [item(v) for v in value] if value is not None else None
+    if not isinstance(annotation, type):
+        return None
+    if issubclass(annotation, BaseModel):
+        return lambda value: value if value is None or isinstance(value, annotation) else to_domain(annotation, value)
+    if issubclass(annotation, Enum):
+        return lambda value: value if value is None or isinstance(value, annotation) else annotation(value)
+    if annotation is float:
+        return _to_float
+    if annotation is Decimal:
+        return _to_decimal
+    if annotation is str:
+        return _to_str
+    return None
+
+
+class DomainMapper:
+    """Mapper đã compile cho một domain class."""
+
+    def __init__(self, domain_cls: Type[BaseModel]):
+        self.domain_cls = domain_cls
+        decorators = domain_cls.__pydantic_decorators__
+        self.trusted = not (
+            decorators.validators or decorators.field_validators
+            or decorators.root_validators or decorators.model_validators
+        )
+        self.fields: Tuple[Tuple[str, Optional[Converter]], ...] = tuple(
+            (name, _converter(field.annotation)) for name, field in domain_cls.model_fields.items()
+        )
+
+    def from_orm(self, obj: Any) -> BaseModel:
+        if not self.trusted:
+            return self.domain_cls.model_validate(obj)
+        state = sa_inspect(obj, raiseerr=False)
+        unloaded = state.unloaded if state is not None else ()
+        values: Dict[str, Any] = {}
+        for name, convert in self.fields:
+            if name in unloaded:
+                continue
+            try:
+                value = getattr(obj, name)
+            except AttributeError:
+                continue
+            values[name] = convert(value) if convert is not None and value is not None else value
+        return self.domain_cls.model_construct(**values)
+
+    def from_mapping(self, data: Any) -> BaseModel:
+        if not self.trusted:
+            return self.domain_cls.model_validate(dict(data))
+        values: Dict[str, Any] = {}
+        for name, convert in self.fields:
+            if name in data:
+                value = data[name]
+                values[name] = convert(value) if convert is not None and value is not None else value
+        return self.domain_cls.model_construct(**values)
+
+
+_mappers: Dict[type, DomainMapper] = {}
+
+
+def get_mapper(domain_cls: Type[BaseModel]) -> DomainMapper:
+    mapper = _mappers.get(domain_cls)
+    if mapper is None:
+        mapper = _mappers[domain_cls] = DomainMapper(domain_cls)
+    return mapper
+
+
+def to_domain(domain_cls: Type[DomainT], obj: Any) -> Optional[DomainT]:
+    """ORM object -> domain entity (None giữ nguyên)."""
+    if obj is None:
+        return None
+    if not get_settings().domain_trusted_mapping:
+        return domain_cls.model_validate(obj)
+    return get_mapper(domain_cls).from_orm(obj)
+
+
+def to_domain_list(domain_cls: Type[DomainT], objs: Iterable[Any]) -> List[DomainT]:
+    if not get_settings().domain_trusted_mapping:
+        return [domain_cls.model_validate(obj) for obj in objs]
+    mapper = get_mapper(domain_cls)
+    return [mapper.from_orm(obj) for obj in objs]
+
+
+def row_to_domain(domain_cls: Type[DomainT], row: Any) -> Optional[DomainT]:
+    """Row của projection query (select(*domain_columns(...))) -> domain entity."""
+    if row is None:
+        return None
+    data = row._mapping if hasattr(row, "_mapping") else row
+    if not get_settings().domain_trusted_mapping:
+        return domain_cls.model_validate(dict(data))
+    return get_mapper(domain_cls).from_mapping(data)
+
+
+def rows_to_domain(domain_cls: Type[DomainT], rows: Iterable[Any]) -> List[DomainT]:
+    return [row_to_domain(domain_cls, row) for row in rows]
+
+
+_columns: Dict[Tuple[type, type], list] = {}
+
+
+def domain_columns(model: type, domain_cls: Type[BaseModel]) -> list:
+    """Các cột của ORM model mà domain class cần (bỏ relationship và cột thừa như embedding)."""
+    key = (model, domain_cls)
+    columns = _columns.get(key)
+    if columns is None:
+        props = {prop.key for prop in sa_inspect(model).attrs if isinstance(prop, ColumnProperty)}
+        columns = _columns[key] = [getattr(model, name) for name in domain_cls.model_fields if name in props]
+    return columns
@@ -3,7 +3,7 @@
 from app.infrastructure.database.models.offering import (
     TenantOffering, OfferingType, OfferingStatus, TenantOfferingVersion, TenantOfferingAttributeValue,
     TenantOfferingVariant, TenantVariantPrice, TenantInventoryLocation, TenantInventoryItem,
-    TenantSalesChannel, TenantPriceList
+    TenantSalesChannel, TenantPriceList, TenantOfferingReadModel
 )
 from app.infrastructure.database.models.tenant import (
     Tenant, UserAccount, TenantStatus, TenantPlan, UserRole, UserStatus
@@ -32,6 +32,7 @@ from app.infrastructure.database.models.cache import TenantSemanticCache
 __all__ = [
     "TenantOffering", "OfferingType", "OfferingStatus", "TenantOfferingVersion", "TenantOfferingAttributeValue",
     "TenantOfferingVariant", "TenantVariantPrice", "TenantInventoryLocation", "TenantInventoryItem",
+    "TenantOfferingReadModel",
     "Tenant", "UserAccount", "TenantStatus", "TenantPlan", "UserRole", "UserStatus",
     "Bot", "BotVersion", "SystemCapability", "BotCapability", "BotChannelConfig", "BotStatus",
     "DomainAttributeDefinition", "BotUseCase", "BotFAQ", "BotComparison", "KnowledgeDomain",
@@ -1,7 +1,7 @@
 """Cache entities for Tier 2 performance"""
 
 import uuid
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, JSON, DateTime, func
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, JSON, DateTime, UniqueConstraint, func
 from pgvector.sqlalchemy import Vector
 from app.infrastructure.database.base import Base, TimestampMixin
 
@@ -14,7 +14,12 @@ class TenantSemanticCache(Base, TimestampMixin):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String, ForeignKey("tenant.id", ondelete="CASCADE"), nullable=False)
     query_text = Column(Text, nullable=False)
+    query_hash = Column(String(64), nullable=True)  # sha256 của query_text đã normalize (exact match)
     response_text = Column(Text, nullable=False)
     embedding = Column(Vector(1536), nullable=True)  # Vector embedding for semantic matching
     hit_count = Column(Integer, default=0)
     last_hit_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'query_hash', name='uq_semantic_cache_query_hash'),
+    )
@@ -38,6 +38,8 @@ class RuntimeDecisionEvent(Base, TimestampMixin):
     estimated_cost = Column(Numeric(10, 5), nullable=True) 
     token_usage = Column(JSON, nullable=True)
     latency_ms = Column(Integer, nullable=True)
+    intent_code = Column(String, nullable=True)  # Intent detected for input turn (training data for local classifier)
+    intent_source = Column(String, nullable=True)  # "llm" | "local" - chỉ nhãn LLM được dùng để train
 
     # Relationships
     session = relationship("RuntimeSession", back_populates="decision_events")
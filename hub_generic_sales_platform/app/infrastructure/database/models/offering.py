@@ -227,3 +227,29 @@ class TenantInventoryItem(Base, TimestampMixin):
         UniqueConstraint('tenant_id', 'variant_id', 'location_id', name='uq_offering_inventory_item_unique'),
         CheckConstraint('stock_qty >= 0', name='check_offering_inventory_item_qty'),
     )
+
+
+class TenantOfferingReadModel(Base, TimestampMixin):
+    """
+    Denormalized read model: document hợp nhất (version active + giá theo channel + tồn kho
+    + thuộc tính đã resolve) của một offering x channel. Dữ liệu dẫn xuất - có thể xóa và
+    build lại bất kỳ lúc nào từ các bảng catalog.
+    """
+    __tablename__ = "tenant_offering_read_model"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id = Column(String, ForeignKey("tenant.id", ondelete="CASCADE"), nullable=False)
+    offering_id = Column(String, ForeignKey("tenant_offering.id", ondelete="CASCADE"), nullable=False)
+    channel_code = Column(String, nullable=False)
+    offering_code = Column(String, nullable=False)
+    domain_id = Column(String, nullable=True)
+    document = Column(JSON, nullable=False)
+    # Thời điểm bắt đầu build (trước khi đọc dữ liệu nguồn): upsert chỉ ghi đè khi document mới hơn
+    built_at = Column(DateTime(timezone=True), nullable=True)
+    # Mốc valid_from / valid_to kế tiếp của giá: quá mốc thì document coi như không có (build lại)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'offering_id', 'channel_code', name='uq_offering_read_model'),
+        Index('idx_offering_read_model_code', 'tenant_id', 'channel_code', 'offering_code'),
+    )
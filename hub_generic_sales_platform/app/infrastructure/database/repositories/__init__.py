@@ -1,6 +1,9 @@
 from .bot_repo import BotRepository, BotVersionRepository, CapabilityRepository, ChannelConfigurationRepository
 from .tenant_repo import TenantRepository, UserAccountRepository
-from .offering_repo import OfferingRepository, OfferingVersionRepository, OfferingAttributeRepository, OfferingVariantRepository
+from .offering_repo import (
+    OfferingRepository, OfferingVersionRepository, OfferingAttributeRepository, OfferingVariantRepository,
+    OfferingReadModelRepository
+)
 from .knowledge_domain_repo import KnowledgeDomainRepository
 from .faq_repo import FAQRepository
 from .usecase_repo import UseCaseRepository
@@ -11,6 +14,7 @@ from .guardrail_repo import GuardrailRepository
 from .inventory_repo import InventoryRepository, InventoryLocationRepository
 from .price_repo import TenantSalesChannelRepository, TenantPriceListRepository, VariantPriceRepository
 from .cache_repo import SemanticCacheRepository
+from .knowledge_lookup_repo import KnowledgeLookupRepository
 from .ontology_repo import DomainAttributeDefinitionRepository, TenantAttributeConfigRepository
 from .migration_repo import MigrationJobRepository
 
@@ -18,6 +22,7 @@ __all__ = [
     "BotRepository", "BotVersionRepository", "CapabilityRepository", "ChannelConfigurationRepository",
     "TenantRepository", "UserAccountRepository",
     "OfferingRepository", "OfferingVersionRepository", "OfferingAttributeRepository", "OfferingVariantRepository",
+    "OfferingReadModelRepository",
     "KnowledgeDomainRepository",
     "FAQRepository",
     "UseCaseRepository",
@@ -28,6 +33,7 @@ __all__ = [
     "InventoryRepository", "InventoryLocationRepository",
     "TenantSalesChannelRepository", "TenantPriceListRepository", "VariantPriceRepository",
     "SemanticCacheRepository",
+    "KnowledgeLookupRepository",
     "DomainAttributeDefinitionRepository", "TenantAttributeConfigRepository",
     "MigrationJobRepository"
 ]
@@ -1,8 +1,9 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Import Infrastructure Models
 from app.infrastructure.database.models.bot import Bot as BotModel
@@ -63,7 +64,7 @@ class BotRepository(BaseRepository[BotModel], IBotRepository):
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
         
-        return domain.Bot.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.Bot, db_obj) if db_obj else None
     
     async def get_active_bots(self, tenant_id: str) -> List[domain.Bot]:
         """Lấy tất cả bot đang hoạt động với mapping domain (giống get_multi)"""
@@ -85,7 +86,7 @@ class BotRepository(BaseRepository[BotModel], IBotRepository):
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
         
-        return domain.Bot.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.Bot, db_obj) if db_obj else None
 
 
 class BotVersionRepository(BaseRepository[BotVersionModel], IBotVersionRepository):
@@ -99,7 +100,7 @@ class BotVersionRepository(BaseRepository[BotVersionModel], IBotVersionRepositor
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
         
-        return domain.BotVersion.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotVersion, db_obj) if db_obj else None
     
     async def get_active_version(self, bot_id: str, tenant_id: Optional[str] = None) -> Optional[domain.BotVersion]:
         stmt = select(BotVersionModel).join(BotModel).where(
@@ -113,7 +114,7 @@ class BotVersionRepository(BaseRepository[BotVersionModel], IBotVersionRepositor
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
         
-        return domain.BotVersion.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotVersion, db_obj) if db_obj else None
     
     async def get_by_bot(self, bot_id: str, tenant_id: Optional[str] = None) -> List[domain.BotVersion]:
         stmt = select(BotVersionModel).join(BotModel).where(
@@ -129,7 +130,17 @@ class BotVersionRepository(BaseRepository[BotVersionModel], IBotVersionRepositor
         
         result = await self.db.execute(stmt)
         
-        return [domain.BotVersion.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotVersion, obj) for obj in result.scalars().all()]
+
+    async def get_fast_path_rules(self, version_id: str) -> Dict[str, str]:
+        """Rule Tier 1 riêng của bot version: flow_config["fast_path_rules"] = {pattern: response}"""
+        stmt = select(BotVersionModel.flow_config).where(BotVersionModel.id == version_id)
+        result = await self.db.execute(stmt)
+        flow_config = result.scalar_one_or_none() or {}
+        rules = flow_config.get("fast_path_rules") if isinstance(flow_config, dict) else None
+        if not isinstance(rules, dict):
+            return {}
+        return {str(pattern): str(response) for pattern, response in rules.items() if pattern and response}
 
 
 class CapabilityRepository(BaseRepository[SystemCapabilityModel]):
@@ -140,14 +151,14 @@ class CapabilityRepository(BaseRepository[SystemCapabilityModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.SystemCapability]:
         db_obj = await super().get(id, tenant_id)
-        return domain.SystemCapability.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.SystemCapability, db_obj) if db_obj else None
 
     async def get_by_code(self, code: str) -> Optional[domain.SystemCapability]:
         """Get capability by code"""
         stmt = select(SystemCapabilityModel).where(SystemCapabilityModel.code == code)
         result = await self.db.execute(stmt)
         db_obj = result.scalars().first()
-        return domain.SystemCapability.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.SystemCapability, db_obj) if db_obj else None
 
 
 class ChannelConfigurationRepository(BaseRepository[BotChannelConfigModel]):
@@ -158,7 +169,7 @@ class ChannelConfigurationRepository(BaseRepository[BotChannelConfigModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.BotChannelConfig]:
         db_obj = await super().get(id, tenant_id)
-        return domain.BotChannelConfig.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotChannelConfig, db_obj) if db_obj else None
 
     async def get_by_bot_version_and_channel(
         self,
@@ -172,7 +183,7 @@ class ChannelConfigurationRepository(BaseRepository[BotChannelConfigModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalars().first()
-        return domain.BotChannelConfig.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotChannelConfig, db_obj) if db_obj else None
     
     async def get_by_bot_version(self, bot_version_id: str, active_only: bool = False) -> List[domain.BotChannelConfig]:
         """Get all channel configs for a bot version"""
@@ -182,4 +193,4 @@ class ChannelConfigurationRepository(BaseRepository[BotChannelConfigModel]):
         if active_only:
             stmt = stmt.where(BotChannelConfigModel.is_active == True)
         result = await self.db.execute(stmt)
-        return [domain.BotChannelConfig.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotChannelConfig, obj) for obj in result.scalars().all()]
@@ -1,5 +1,6 @@
-from typing import Optional, List
-from sqlalchemy import select
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
 
@@ -8,6 +9,19 @@ from app.infrastructure.database.models.cache import TenantSemanticCache as Cach
 
 # Domain Entities
 from app.core import domain
+from app.core.config.settings import get_settings
+from app.core.shared.vector_similarity import SimilarityMatrix
+from app.infrastructure.search import VectorIndex, get_vector_index_registry, SEMANTIC_CACHE_NAMESPACE
+
+def normalize_query(text: Optional[str]) -> str:
+    """Normalize câu hỏi cho exact match: lowercase, gộp khoảng trắng, tối đa 500 ký tự (giữ dấu)."""
+    return " ".join((text or "").lower().split())[:500]
+
+
+def query_hash(text: Optional[str]) -> str:
+    """Hash của câu hỏi đã normalize (cột query_hash, unique theo tenant)."""
+    return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
 
 class SemanticCacheRepository(BaseRepository[CacheModel]):
     """Semantic cache repository (Async Implementation) with Domain Mapping"""
@@ -15,7 +29,90 @@ class SemanticCacheRepository(BaseRepository[CacheModel]):
     
     def __init__(self, db: AsyncSession):
         super().__init__(CacheModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None) -> domain.TenantSemanticCache:
+        """
+        Create cache entry và cập nhật vector index (incremental).
+        Câu hỏi đã có trong cache của tenant (cùng query_hash) -> cập nhật entry cũ thay vì tạo bản trùng.
+        """
+        embedding = obj_in.get("embedding")
+        obj_in = {**obj_in, "query_hash": query_hash(obj_in.get("query_text"))}
+        existing = await self._get_by_hash(tenant_id or obj_in.get("tenant_id"), obj_in["query_hash"])
+        if existing is not None:
+            changes = {k: v for k, v in obj_in.items() if k in ("response_text", "embedding")}
+            return await self.update(existing, changes, tenant_id=tenant_id)
+        entry = await super().create(obj_in, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry and embedding is not None:
+            registry.upsert(SEMANTIC_CACHE_NAMESPACE, entry.tenant_id, entry.id, embedding)
+        return entry
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None) -> domain.TenantSemanticCache:
+        """Update cache entry và đồng bộ vector index"""
+        if "query_text" in obj_in:
+            obj_in = {**obj_in, "query_hash": query_hash(obj_in["query_text"])}
+        entry = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry and "embedding" in obj_in:
+            registry.upsert(SEMANTIC_CACHE_NAMESPACE, entry.tenant_id, entry.id, obj_in["embedding"])
+        return entry
+
+    async def delete(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantSemanticCache]:
+        """Delete cache entry và xóa khỏi vector index"""
+        entry = await super().delete(id, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry and entry:
+            registry.remove(SEMANTIC_CACHE_NAMESPACE, entry.tenant_id, entry.id)
+        return entry
+
+    async def _vector_index(self, tenant_id: str) -> Optional[VectorIndex]:
+        """Lấy (hoặc build lazily từ DB) vector index semantic cache của tenant"""
+        registry = get_vector_index_registry()
+        if not registry:
+            return None
+        index = registry.get(SEMANTIC_CACHE_NAMESPACE, tenant_id)
+        if index is None:
+            stmt = select(CacheModel.id, CacheModel.embedding).where(
+                CacheModel.tenant_id == tenant_id,
+                CacheModel.embedding != None
+            )
+            rows = (await self.db.execute(stmt)).all()
+            index = registry.build(
+                SEMANTIC_CACHE_NAMESPACE, tenant_id,
+                [(r.id, r.embedding, None) for r in rows]
+            )
+        return index
     
+    async def _get_by_hash(self, tenant_id: Optional[str], hash_value: str) -> Optional[CacheModel]:
+        stmt = select(CacheModel).where(
+            CacheModel.tenant_id == tenant_id,
+            CacheModel.query_hash == hash_value
+        )
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def _get_by_trigram(self, tenant_id: str, message: str) -> Optional[CacheModel]:
+        """Fuzzy lexical match qua pg_trgm (GIN index ix_tenant_semantic_cache_query_trgm)."""
+        settings = get_settings()
+        if not settings.semantic_cache_trgm_enabled or self.db.bind.dialect.name != "postgresql":
+            return None
+        text = normalize_query(message)
+        similarity = func.similarity(CacheModel.query_text, text)
+        stmt = select(CacheModel).where(
+            CacheModel.tenant_id == tenant_id,
+            CacheModel.query_text.op("%")(text),  # operator dùng được GIN index
+            similarity >= settings.semantic_cache_trgm_threshold
+        ).order_by(similarity.desc()).limit(1)
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def vector_candidates(
+        self, tenant_id: str, query_vector: List[float], threshold: float, k: int = 3
+    ) -> Optional[List[Tuple[str, float]]]:
+        """(cache_id, score) từ in-process vector index. None khi index tắt."""
+        index = await self._vector_index(tenant_id)
+        if index is None:
+            return None
+        return index.search(query_vector, k=k, threshold=threshold)
+
     async def get_by_message(
         self,
         tenant_id: str,
@@ -24,20 +121,35 @@ class SemanticCacheRepository(BaseRepository[CacheModel]):
         threshold: float = 0.9  # Threshold for semantic match
     ) -> Optional[domain.TenantSemanticCache]:
         """
-        Tìm kiếm câu trả lời trong cache (Keyword Match + Vector Fallback)
+        Tìm kiếm câu trả lời trong cache:
+        exact match (unique index tenant_id + query_hash) -> trigram (Postgres) -> vector fallback.
         """
-        # 1. Thử keyword match trước (Fastest)
-        stmt = select(CacheModel).where(
-            CacheModel.tenant_id == tenant_id,
-            CacheModel.query_text.ilike(f"%{message}%")
-        )
-        result = await self.db.execute(stmt)
-        db_obj = result.scalars().first()
+        # 1. Exact match theo hash của câu hỏi đã normalize (index lookup)
+        db_obj = await self._get_by_hash(tenant_id, query_hash(message))
+        if db_obj:
+            return self._to_domain(db_obj)
+
+        # 2. Fuzzy lexical match (pg_trgm) với ngưỡng riêng
+        db_obj = await self._get_by_trigram(tenant_id, message)
         if db_obj:
             return self._to_domain(db_obj)
             
-        # 2. Thử vector match nếu có query_vector
+        # 3. Thử vector match nếu có query_vector (in-process index trước, DB sau)
         if query_vector:
+            hits = await self.vector_candidates(tenant_id, query_vector, threshold)
+            if hits is not None:
+                if not hits:
+                    return None
+                stmt = select(CacheModel).where(
+                    CacheModel.id.in_([h[0] for h in hits]),
+                    CacheModel.tenant_id == tenant_id
+                )
+                found = {c.id: c for c in (await self.db.execute(stmt)).scalars().all()}
+                for cache_id, _ in hits:
+                    if cache_id in found:
+                        return self._to_domain(found[cache_id])
+                return None
+
             if self.db.bind.dialect.name == "postgresql":
                 distance_limit = 1.0 - threshold
                 stmt = select(CacheModel).where(
@@ -49,31 +161,77 @@ class SemanticCacheRepository(BaseRepository[CacheModel]):
                 db_obj = result.scalars().first()
                 return self._to_domain(db_obj)
             else:
-                from app.core.shared.math_utils import cosine_similarity
                 stmt = select(CacheModel).where(
                     CacheModel.tenant_id == tenant_id,
                     CacheModel.embedding != None
                 )
                 result = await self.db.execute(stmt)
                 caches = result.scalars().all()
-                
-                best_match = None
-                max_sim = -1.0
-                
-                for c in caches:
-                    sim = cosine_similarity(query_vector, c.embedding)
-                    if sim >= threshold and sim > max_sim:
-                        max_sim = sim
-                        best_match = c
-                return self._to_domain(best_match)
+
+                best = SimilarityMatrix([c.embedding for c in caches]).top_k(
+                    query_vector, k=1, threshold=threshold
+                )
+                return self._to_domain(caches[best[0][0]]) if best else None
             
         return None
     
     async def track_hit(self, cache_id: str):
         """Tăng số lần hit cho cache item"""
-        from sqlalchemy import update, func
         stmt = update(CacheModel).where(CacheModel.id == cache_id).values(
             hit_count=CacheModel.hit_count + 1,
             last_hit_at=func.now()
         )
         await self.db.execute(stmt)
+
+    # ---------- Governance (SemanticCacheGovernor) ----------
+
+    async def get_tenant_ids(self) -> List[str]:
+        stmt = select(CacheModel.tenant_id).distinct()
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def get_governance_rows(self, tenant_id: str) -> List[Any]:
+        """Các cột cần cho admission / merge / eviction (không map sang domain)."""
+        stmt = select(
+            CacheModel.id, CacheModel.query_text, CacheModel.response_text, CacheModel.embedding,
+            CacheModel.hit_count, CacheModel.last_hit_at, CacheModel.created_at
+        ).where(CacheModel.tenant_id == tenant_id)
+        return list((await self.db.execute(stmt)).all())
+
+    async def get_missing_embeddings(self, tenant_id: str, limit: int) -> List[Any]:
+        """(id, query_text) của entry chưa có embedding (entry auto-cache cũ) để backfill."""
+        stmt = select(CacheModel.id, CacheModel.query_text).where(
+            CacheModel.tenant_id == tenant_id,
+            CacheModel.embedding == None
+        ).order_by(CacheModel.hit_count.desc()).limit(limit)
+        return list((await self.db.execute(stmt)).all())
+
+    async def set_embeddings(self, tenant_id: str, embeddings: Dict[str, List[float]]) -> None:
+        """Ghi embedding cho nhiều entry và đồng bộ vector index."""
+        registry = get_vector_index_registry()
+        for cache_id, vector in embeddings.items():
+            stmt = update(CacheModel).where(
+                CacheModel.tenant_id == tenant_id, CacheModel.id == cache_id
+            ).values(embedding=vector)
+            await self.db.execute(stmt)
+            if registry:
+                registry.upsert(SEMANTIC_CACHE_NAMESPACE, tenant_id, cache_id, vector)
+
+    async def add_hits(self, hits: Dict[str, int]) -> None:
+        """Cộng dồn hit_count (entry giữ lại sau khi merge near-duplicate)."""
+        for cache_id, n in hits.items():
+            stmt = update(CacheModel).where(CacheModel.id == cache_id).values(
+                hit_count=func.coalesce(CacheModel.hit_count, 0) + n
+            )
+            await self.db.execute(stmt)
+
+    async def delete_many(self, tenant_id: str, ids: Sequence[str]) -> int:
+        """Xóa nhiều entry của tenant và gỡ khỏi vector index."""
+        if not ids:
+            return 0
+        stmt = delete(CacheModel).where(CacheModel.tenant_id == tenant_id, CacheModel.id.in_(list(ids)))
+        result = await self.db.execute(stmt)
+        registry = get_vector_index_registry()
+        if registry:
+            for cache_id in ids:
+                registry.remove(SEMANTIC_CACHE_NAMESPACE, tenant_id, cache_id)
+        return result.rowcount or 0
@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.knowledge import BotComparison as ComparisonModel
@@ -18,7 +19,7 @@ class ComparisonRepository(BaseRepository[ComparisonModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.BotComparison]:
         db_obj = await super().get(id, tenant_id)
-        return domain.BotComparison.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotComparison, db_obj) if db_obj else None
 
     async def get_active(self, tenant_id: str, bot_id: Optional[str] = None) -> List[domain.BotComparison]:
         """Get all active comparisons for a tenant/bot"""
@@ -29,7 +30,7 @@ class ComparisonRepository(BaseRepository[ComparisonModel]):
         if bot_id:
             stmt = stmt.where(ComparisonModel.bot_id == bot_id)
         result = await self.db.execute(stmt)
-        return [domain.BotComparison.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotComparison, obj) for obj in result.scalars().all()]
     
     async def get_by_offerings(
         self,
@@ -43,4 +44,4 @@ class ComparisonRepository(BaseRepository[ComparisonModel]):
             ComparisonModel.offering_ids.contains(offering_ids)
         )
         result = await self.db.execute(stmt)
-        return [domain.BotComparison.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotComparison, obj) for obj in result.scalars().all()]
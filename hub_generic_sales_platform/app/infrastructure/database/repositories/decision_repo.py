@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.decision import RuntimeDecisionEvent as DecisionModel
@@ -21,7 +22,7 @@ class DecisionRepository(BaseRepository[DecisionModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.RuntimeDecisionEvent]:
         db_obj = await super().get(id, tenant_id)
-        return domain.RuntimeDecisionEvent.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.RuntimeDecisionEvent, db_obj) if db_obj else None
 
     async def get_by_session(
         self,
@@ -41,13 +42,39 @@ class DecisionRepository(BaseRepository[DecisionModel]):
         domain_objs = []
         for obj in objs:
             try:
-                domain_objs.append(domain.RuntimeDecisionEvent.model_validate(obj))
+                domain_objs.append(to_domain(domain.RuntimeDecisionEvent, obj))
             except Exception as e:
                 self.logger.error(f"Validation error for DecisionEvent {obj.id}: {str(e)}")
                 # Continue and return what we can
                 
         return domain_objs
 
+    async def get_intent_training_examples(
+        self,
+        tenant_id: str,
+        limit: int = 5000
+    ) -> List[Tuple[str, str]]:
+        """
+        (user message, intent_code) gần nhất của tenant - dữ liệu train cho local intent classifier.
+        Chỉ lấy nhãn do LLM gán: nhãn của chính classifier local sẽ tự khuếch đại lỗi của nó.
+        """
+        from app.infrastructure.database.models.runtime import RuntimeSession, RuntimeTurn
+        stmt = (
+            select(RuntimeTurn.message, DecisionModel.intent_code)
+            .join(RuntimeTurn, DecisionModel.input_turn_id == RuntimeTurn.id)
+            .join(RuntimeSession, DecisionModel.session_id == RuntimeSession.id)
+            .where(
+                RuntimeSession.tenant_id == tenant_id,
+                DecisionModel.intent_code.isnot(None),
+                DecisionModel.intent_source == domain.IntentSource.LLM.value,
+                DecisionModel.intent_code != domain.Intent.UNKNOWN.value
+            )
+            .order_by(DecisionModel.created_at.desc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [(message, intent_code) for message, intent_code in result.all()]
+
 
 class DecisionGuardrailCheckedRepository(BaseRepository[GuardrailCheckModel]):
     """Decision guardrail check repository (Async Implementation) with Domain Mapping"""
@@ -57,4 +84,4 @@ class DecisionGuardrailCheckedRepository(BaseRepository[GuardrailCheckModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.RuntimeGuardrailCheck]:
         db_obj = await super().get(id, tenant_id)
-        return domain.RuntimeGuardrailCheck.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.RuntimeGuardrailCheck, db_obj) if db_obj else None
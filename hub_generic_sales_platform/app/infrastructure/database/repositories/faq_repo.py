@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
@@ -9,6 +9,8 @@ from app.infrastructure.database.models.knowledge import BotFAQ as FAQModel
 # Domain Entities
 from app.core import domain
 from app.core.interfaces.knowledge_repo import IFAQRepository
+from app.core.shared.vector_similarity import SimilarityMatrix
+from app.infrastructure.search import VectorIndex, get_vector_index_registry, FAQ_NAMESPACE
 
 
 class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
@@ -17,6 +19,56 @@ class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
     
     def __init__(self, db: AsyncSession):
         super().__init__(FAQModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None) -> domain.BotFAQ:
+        """Create FAQ và cập nhật vector index (incremental)"""
+        embedding = obj_in.get("embedding")
+        faq = await super().create(obj_in, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry and embedding is not None:
+            registry.upsert(FAQ_NAMESPACE, faq.tenant_id, faq.id, embedding, self._index_attrs(faq))
+        return faq
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None) -> domain.BotFAQ:
+        """Update FAQ và đồng bộ vector index"""
+        faq = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry:
+            if "embedding" in obj_in:
+                registry.upsert(FAQ_NAMESPACE, faq.tenant_id, faq.id, obj_in["embedding"], self._index_attrs(faq))
+            elif "bot_id" in obj_in or "domain_id" in obj_in:
+                registry.invalidate(FAQ_NAMESPACE, faq.tenant_id)
+        return faq
+
+    async def delete(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.BotFAQ]:
+        """Delete FAQ và xóa khỏi vector index"""
+        faq = await super().delete(id, tenant_id=tenant_id)
+        registry = get_vector_index_registry()
+        if registry and faq:
+            registry.remove(FAQ_NAMESPACE, faq.tenant_id, faq.id)
+        return faq
+
+    @staticmethod
+    def _index_attrs(faq: Any) -> dict:
+        return {"bot_id": faq.bot_id, "domain_id": faq.domain_id}
+
+    async def _vector_index(self, tenant_id: str) -> Optional[VectorIndex]:
+        """Lấy (hoặc build lazily từ DB) vector index FAQ của tenant"""
+        registry = get_vector_index_registry()
+        if not registry:
+            return None
+        index = registry.get(FAQ_NAMESPACE, tenant_id)
+        if index is None:
+            stmt = select(FAQModel.id, FAQModel.embedding, FAQModel.bot_id, FAQModel.domain_id).where(
+                FAQModel.tenant_id == tenant_id,
+                FAQModel.embedding != None
+            )
+            rows = (await self.db.execute(stmt)).all()
+            index = registry.build(
+                FAQ_NAMESPACE, tenant_id,
+                [(r.id, r.embedding, {"bot_id": r.bot_id, "domain_id": r.domain_id}) for r in rows]
+            )
+        return index
     
     async def get_by_offering(self, offering_id: str, tenant_id: str) -> List[domain.BotFAQ]:
         """Get all FAQs for an offering"""
@@ -71,6 +123,24 @@ class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
         result = await self.db.execute(stmt)
         return [self._to_domain(obj) for obj in result.scalars().all()]
 
+    async def vector_candidates(
+        self,
+        tenant_id: str,
+        query_vector: List[float],
+        threshold: float = 0.8,
+        limit: int = 5,
+        bot_id: Optional[str] = None,
+        domain_id: Optional[str] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """(faq_id, score) từ in-process vector index (chưa lọc is_active). None khi index tắt."""
+        index = await self._vector_index(tenant_id)
+        if index is None:
+            return None
+        return index.search(
+            query_vector, k=limit * 2, threshold=threshold,
+            where={"bot_id": bot_id, "domain_id": domain_id}
+        )
+
     async def semantic_search(
         self,
         tenant_id: str,
@@ -81,9 +151,28 @@ class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
         domain_id: Optional[str] = None
     ) -> List[tuple[domain.BotFAQ, float]]:
         """
-        Tìm kiếm FAQ bằng vector similarity
+        Tìm kiếm FAQ bằng vector similarity.
+        Ưu tiên in-process vector index, hydrate lại từ DB (is_active, tenant) theo thứ tự score.
         """
         distance_limit = 1.0 - threshold
+
+        hits = await self.vector_candidates(tenant_id, query_vector, threshold, limit, bot_id, domain_id)
+        if hits is not None:
+            if not hits:
+                return []
+            scores = dict(hits)
+            stmt = select(FAQModel).where(
+                FAQModel.id.in_(list(scores)),
+                FAQModel.tenant_id == tenant_id,
+                FAQModel.is_active == True
+            )
+            if bot_id:
+                stmt = stmt.where(FAQModel.bot_id == bot_id)
+            if domain_id:
+                stmt = stmt.where(FAQModel.domain_id == domain_id)
+            result = await self.db.execute(stmt)
+            faqs = sorted(result.scalars().all(), key=lambda f: scores[f.id], reverse=True)
+            return [(self._to_domain(f), scores[f.id]) for f in faqs[:limit]]
         
         if self.db.bind.dialect.name == "postgresql":
             stmt = select(
@@ -103,7 +192,6 @@ class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
             result = await self.db.execute(stmt)
             return [(self._to_domain(r[0]), float(r[1])) for r in result.all()]
         else:
-            from app.core.shared.math_utils import cosine_similarity
             stmt = select(FAQModel).where(
                 FAQModel.tenant_id == tenant_id,
                 FAQModel.is_active == True,
@@ -115,15 +203,12 @@ class FAQRepository(BaseRepository[FAQModel], IFAQRepository):
                 stmt = stmt.where(FAQModel.domain_id == domain_id)
             result = await self.db.execute(stmt)
             faqs = result.scalars().all()
-            
-            scored_faqs = []
-            for faq in faqs:
-                sim = cosine_similarity(query_vector, faq.embedding)
-                if sim >= threshold:
-                    scored_faqs.append((self._to_domain(faq), sim))
-            
-            scored_faqs.sort(key=lambda x: x[1], reverse=True)
-            return scored_faqs[:limit]
+
+            matrix = SimilarityMatrix([faq.embedding for faq in faqs])
+            return [
+                (self._to_domain(faqs[pos]), score)
+                for pos, score in matrix.top_k(query_vector, k=limit, threshold=threshold)
+            ]
 
     async def get_active(
         self,
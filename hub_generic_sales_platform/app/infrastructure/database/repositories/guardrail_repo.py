@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.policy import TenantGuardrail as GuardrailModel
@@ -18,7 +19,7 @@ class GuardrailRepository(BaseRepository[GuardrailModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantGuardrail]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantGuardrail.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantGuardrail, db_obj) if db_obj else None
 
     async def get_active_for_tenant(self, tenant_id: str) -> List[domain.TenantGuardrail]:
         """Get all active guardrails for a tenant, ordered by priority"""
@@ -27,4 +28,4 @@ class GuardrailRepository(BaseRepository[GuardrailModel]):
             GuardrailModel.is_active == True
         ).order_by(GuardrailModel.priority.desc())
         result = await self.db.execute(stmt)
-        return [domain.TenantGuardrail.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.TenantGuardrail, obj) for obj in result.scalars().all()]
@@ -1,7 +1,8 @@
 from typing import Optional, List, Dict, Any
-from sqlalchemy import select, text
+from sqlalchemy import bindparam, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.offering import (
@@ -22,7 +23,7 @@ class InventoryRepository(BaseRepository[InventoryItemModel], IInventoryReposito
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantInventoryItem]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantInventoryItem.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantInventoryItem, db_obj) if db_obj else None
 
     async def get_stock_status(self, tenant_id: str, sku: str) -> Optional[Dict[str, Any]]:
         """Lấy trạng thái tồn kho của SKU bằng truy vấn trực tiếp (Báo cáo tổng hợp)"""
@@ -49,6 +50,38 @@ class InventoryRepository(BaseRepository[InventoryItemModel], IInventoryReposito
         row = result.mappings().first()
         return dict(row) if row else None
 
+    async def get_stock_status_for_offerings(self, tenant_id: str, offering_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Tồn kho tổng hợp theo variant cho nhiều offering trong MỘT query: {offering_id: [stock_status]}"""
+        if not offering_ids:
+            return {}
+        stmt = text("""
+            SELECT 
+                ov.offering_id,
+                ov.id,
+                ov.tenant_id,
+                ov.sku,
+                ov.name as variant_name,
+                COALESCE(SUM(ii.stock_qty), 0) as aggregate_qty,
+                COALESCE(SUM(ii.safety_stock), 0) as aggregate_safety_stock,
+                CASE 
+                    WHEN COALESCE(SUM(ii.stock_qty), 0) > COALESCE(SUM(ii.safety_stock), 0) THEN 'in_stock'
+                    WHEN COALESCE(SUM(ii.stock_qty), 0) > 0 THEN 'low_stock'
+                    ELSE 'out_of_stock'
+                END as stock_status
+            FROM tenant_offering_variant ov
+            LEFT JOIN tenant_inventory_item ii ON ov.id = ii.variant_id
+            WHERE ov.tenant_id = :tenant_id AND ov.offering_id IN :offering_ids
+            GROUP BY ov.offering_id, ov.id, ov.tenant_id, ov.sku, ov.name
+            ORDER BY ov.sku
+        """).bindparams(bindparam("offering_ids", expanding=True))
+
+        result = await self.db.execute(stmt, {"tenant_id": tenant_id, "offering_ids": list(offering_ids)})
+        stock: Dict[str, List[Dict[str, Any]]] = {}
+        for row in result.mappings().all():
+            data = dict(row)
+            stock.setdefault(data.pop("offering_id"), []).append(data)
+        return stock
+
     async def get_all_stock_status(self, tenant_id: str, bot_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Lấy trạng thái tồn kho của tất cả offering trong tenant/bot"""
         query = """
@@ -88,7 +121,7 @@ class InventoryLocationRepository(BaseRepository[LocationModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantInventoryLocation]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantInventoryLocation.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantInventoryLocation, db_obj) if db_obj else None
 
     async def get_by_code(self, code: str, tenant_id: str) -> Optional[domain.TenantInventoryLocation]:
         stmt = select(LocationModel).where(
@@ -97,4 +130,4 @@ class InventoryLocationRepository(BaseRepository[LocationModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantInventoryLocation.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantInventoryLocation, db_obj) if db_obj else None
@@ -2,6 +2,7 @@ from typing import Optional, List
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.knowledge import KnowledgeDomain as DomainModel
@@ -27,4 +28,4 @@ class KnowledgeDomainRepository(BaseRepository[DomainModel]):
         stmt = select(DomainModel).where(DomainModel.code == code)
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.KnowledgeDomain.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.KnowledgeDomain, db_obj) if db_obj else None
@@ -0,0 +1,80 @@
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import String, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Infrastructure Models
+from app.infrastructure.database.models.cache import TenantSemanticCache as CacheModel
+from app.infrastructure.database.models.knowledge import BotFAQ as FAQModel
+
+from app.core.config.settings import get_settings
+from app.infrastructure.database.repositories.cache_repo import normalize_query, query_hash
+
+SOURCE_SEMANTIC_CACHE = "semantic_cache"
+SOURCE_FAQ = "faq"
+
+
+def _tag(value: str):
+    return literal(value, type_=String)
+
+
+class KnowledgeLookupRepository:
+    """
+    Tier-2 lookup trong MỘT round-trip: UNION ALL các ứng viên của semantic cache và FAQ,
+    mỗi dòng gắn nhãn (source, match_type) để service chọn câu trả lời tốt nhất.
+    Ứng viên vector lấy từ in-process vector index trước đó (không tính similarity trong DB).
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_candidates(
+        self,
+        tenant_id: str,
+        message: str,
+        cache_ids: Sequence[str] = (),
+        faq_ids: Sequence[str] = (),
+        bot_id: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Các dòng (source, match_type, id, answer, query_text, score) cho:
+        exact match cache theo query_hash, trigram cache (Postgres), cache/FAQ theo id ứng viên vector.
+        score chỉ có nghĩa với trigram (similarity trong DB); vector score do caller giữ từ index.
+        """
+        def _cache_branch(match_type: str, condition, score=None):
+            return select(
+                _tag(SOURCE_SEMANTIC_CACHE).label("source"), _tag(match_type).label("match_type"),
+                CacheModel.id.label("id"), CacheModel.response_text.label("answer"),
+                CacheModel.query_text.label("query_text"),
+                (score if score is not None else literal(1.0)).label("score"),
+            ).where(CacheModel.tenant_id == tenant_id, condition)
+
+        branches = [_cache_branch("exact", CacheModel.query_hash == query_hash(message))]
+
+        settings = get_settings()
+        if settings.semantic_cache_trgm_enabled and self.db.bind.dialect.name == "postgresql":
+            text = normalize_query(message)
+            similarity = func.similarity(CacheModel.query_text, text)
+            best = _cache_branch(
+                "trigram", CacheModel.query_text.op("%")(text), score=similarity
+            ).where(similarity >= settings.semantic_cache_trgm_threshold).order_by(similarity.desc()).limit(1)
+            branches.append(select(best.subquery()))
+
+        if cache_ids:
+            branches.append(_cache_branch("vector", CacheModel.id.in_(list(cache_ids))))
+
+        if faq_ids:
+            faq_branch = select(
+                _tag(SOURCE_FAQ).label("source"), _tag("vector").label("match_type"),
+                FAQModel.id.label("id"), FAQModel.answer.label("answer"),
+                FAQModel.question.label("query_text"), literal(1.0).label("score"),
+            ).where(
+                FAQModel.tenant_id == tenant_id,
+                FAQModel.is_active == True,
+                FAQModel.id.in_(list(faq_ids))
+            )
+            if bot_id:
+                faq_branch = faq_branch.where(FAQModel.bot_id == bot_id)
+            branches.append(faq_branch)
+
+        stmt = union_all(*branches) if len(branches) > 1 else branches[0]
+        return list((await self.db.execute(stmt)).all())
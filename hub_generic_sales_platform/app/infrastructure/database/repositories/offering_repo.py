@@ -1,8 +1,12 @@
-from typing import Optional, List
-from sqlalchemy import select, and_
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from sqlalchemy import select, and_, func, literal, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain, domain_columns, row_to_domain, rows_to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.offering import (
@@ -10,6 +14,8 @@ from app.infrastructure.database.models.offering import (
     TenantOfferingVersion as VersionModel,
     TenantOfferingAttributeValue as AttributeValueModel,
     TenantOfferingVariant as VariantModel,
+    TenantOfferingReadModel as ReadModel,
+    TenantVariantPrice as VariantPriceModel,
     OfferingStatus
 )
 from app.infrastructure.database.models.knowledge import (
@@ -19,7 +25,21 @@ from app.infrastructure.database.models.knowledge import (
 
 # Domain Entities
 from app.core import domain
+from app.core.shared.db_utils import transaction_scope
+from app.core.shared.vector_similarity import SimilarityMatrix
 from app.core.interfaces.knowledge_repo import IOfferingRepository, IOfferingVersionRepository
+from app.infrastructure.search import VectorIndex, get_vector_index_registry, OFFERING_VERSION_NAMESPACE
+from app.infrastructure.search import TextIndex, get_text_index_registry, CATALOG_NAMESPACE
+from app.infrastructure.cache import get_response_cache
+
+
+def _attribute_text(value_text: Optional[str], value_number: Any) -> Optional[str]:
+    """Giá trị attribute dạng text để index (2022.00 -> '2022')."""
+    if value_text:
+        return value_text
+    if value_number is None:
+        return None
+    return str(int(value_number)) if value_number == int(value_number) else str(value_number)
 
 
 class OfferingRepository(BaseRepository[OfferingModel], IOfferingRepository):
@@ -38,7 +58,7 @@ class OfferingRepository(BaseRepository[OfferingModel], IOfferingRepository):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantOffering.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOffering, db_obj) if db_obj else None
 
     async def get_by_code(self, code: str, tenant_id: str, domain_id: Optional[str] = None) -> Optional[domain.TenantOffering]:
         """Lấy offering theo code, tenant"""
@@ -51,11 +71,66 @@ class OfferingRepository(BaseRepository[OfferingModel], IOfferingRepository):
             
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantOffering.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOffering, db_obj) if db_obj else None
     
+    async def get_by_codes(
+        self, codes: Sequence[str], tenant_id: str, domain_id: Optional[str] = None
+    ) -> List[domain.TenantOffering]:
+        """Lấy nhiều offering theo code trong một query (giữ thứ tự `codes`, bỏ code không tồn tại)"""
+        if not codes:
+            return []
+        stmt = select(OfferingModel).where(
+            OfferingModel.code.in_(list(codes)),
+            OfferingModel.tenant_id == tenant_id
+        )
+        if domain_id:
+            stmt = stmt.where(OfferingModel.domain_id == domain_id)
+        by_code = {obj.code: obj for obj in (await self.db.execute(stmt)).scalars().all()}
+        return [to_domain(domain.TenantOffering, by_code[c]) for c in dict.fromkeys(codes) if c in by_code]
+
+    async def get_by_ids(self, ids: Sequence[str], tenant_id: str) -> List[domain.TenantOffering]:
+        """Lấy nhiều offering theo id trong một query (giữ thứ tự `ids`, bỏ id không tồn tại)"""
+        if not ids:
+            return []
+        stmt = select(OfferingModel).where(
+            OfferingModel.id.in_(list(ids)),
+            OfferingModel.tenant_id == tenant_id
+        )
+        by_id = {obj.id: obj for obj in (await self.db.execute(stmt)).scalars().all()}
+        return [to_domain(domain.TenantOffering, by_id[i]) for i in dict.fromkeys(ids) if i in by_id]
+
+    async def get_changed_offering_terms(self, tenant_id: str, since: datetime) -> Dict[str, List[str]]:
+        """
+        {offering_id: [code, tên các version]} của offering có thay đổi từ `since`
+        (offering, version hoặc giá variant được tạo / cập nhật).
+        """
+        def _changed(model):
+            return func.coalesce(model.updated_at, model.created_at) >= since
+
+        changed_ids = (
+            select(OfferingModel.id).where(OfferingModel.tenant_id == tenant_id, _changed(OfferingModel))
+            .union(
+                select(VersionModel.offering_id).join(OfferingModel).where(
+                    OfferingModel.tenant_id == tenant_id, _changed(VersionModel)
+                ),
+                select(VariantModel.offering_id).join(VariantPriceModel).where(
+                    VariantModel.tenant_id == tenant_id, _changed(VariantPriceModel)
+                ),
+            )
+        )
+        stmt = select(OfferingModel.id, OfferingModel.code, VersionModel.name).outerjoin(
+            VersionModel, VersionModel.offering_id == OfferingModel.id
+        ).where(OfferingModel.id.in_(changed_ids))
+        terms: Dict[str, List[str]] = {}
+        for offering_id, code, name in (await self.db.execute(stmt)).all():
+            offering_terms = terms.setdefault(offering_id, [code])
+            if name and name not in offering_terms:
+                offering_terms.append(name)
+        return terms
+
     async def get_active_offerings(self, tenant_id: str, domain_id: Optional[str] = None) -> List[domain.TenantOffering]:
         """Lấy tất cả offering đang hoạt động của thiết bị"""
-        stmt = select(OfferingModel).where(
+        stmt = select(*domain_columns(OfferingModel, domain.TenantOffering)).where(
             OfferingModel.tenant_id == tenant_id, 
             OfferingModel.status == OfferingStatus.ACTIVE
         )
@@ -63,7 +138,166 @@ class OfferingRepository(BaseRepository[OfferingModel], IOfferingRepository):
             stmt = stmt.where(OfferingModel.domain_id == domain_id)
             
         result = await self.db.execute(stmt)
-        return [domain.TenantOffering.model_validate(obj) for obj in result.scalars().all()]
+        return rows_to_domain(domain.TenantOffering, result.all())
+
+    async def search_catalog(
+        self,
+        tenant_id: str,
+        query: Optional[str] = None,
+        offering_ids: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Projection (id, code, type, name, description) của offering active + version active
+        trong MỘT query join. Lọc substring (ILIKE) chạy trong SQL trên code và name/description;
+        Postgres dùng trigram index (migration 003).
+        """
+        stmt = select(
+            OfferingModel.id,
+            OfferingModel.code,
+            OfferingModel.type,
+            VersionModel.name,
+            VersionModel.description
+        ).join(
+            VersionModel, VersionModel.offering_id == OfferingModel.id
+        ).where(
+            OfferingModel.tenant_id == tenant_id,
+            OfferingModel.status == OfferingStatus.ACTIVE,
+            VersionModel.status == OfferingStatus.ACTIVE
+        ).order_by(OfferingModel.code, VersionModel.version.desc())
+
+        if offering_ids is not None:
+            if not offering_ids:
+                return []
+            stmt = stmt.where(OfferingModel.id.in_(list(offering_ids)))
+        text = (query or "").strip()
+        if text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            stmt = stmt.where(
+                OfferingModel.code.ilike(pattern, escape="\\")
+                | (VersionModel.name + literal(" ") + func.coalesce(VersionModel.description, "")).ilike(pattern, escape="\\")
+            )
+
+        rows: List[Dict[str, Any]] = []
+        seen = set()
+        for row in (await self.db.execute(stmt)).all():
+            # Nhiều version active (dữ liệu lỗi) -> chỉ lấy version cao nhất
+            if row.id in seen:
+                continue
+            seen.add(row.id)
+            rows.append(dict(row._mapping))
+            if limit and len(rows) >= limit:
+                break
+        return rows
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None):
+        """Update offering và đồng bộ read model / text index (code/status thay đổi)"""
+        offering = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        await self.notify_changed(offering.id, offering.tenant_id)
+        return offering
+
+    async def delete(self, id: str, tenant_id: Optional[str] = None):
+        deleted = await super().delete(id, tenant_id=tenant_id)
+        registry = get_text_index_registry()
+        if deleted and registry:
+            registry.remove(CATALOG_NAMESPACE, tenant_id, id)
+        return deleted
+
+    async def text_search(self, tenant_id: str, query: str, limit: int = 20) -> Optional[List[Tuple[str, float]]]:
+        """
+        BM25 search trên text index của tenant: [(offering_id, score)] giảm dần.
+        Trả None khi text index bị tắt (caller dùng search_catalog ILIKE).
+        """
+        index = await self._text_index(tenant_id)
+        if index is None:
+            return None
+        return index.search(query, k=limit)
+
+    async def notify_changed(self, offering_id: str, tenant_id: Optional[str] = None) -> None:
+        """
+        Dữ liệu catalog của offering đã đổi: xóa document read model, index lại text search,
+        invalidate response cache Tier-3 của tenant (câu trả lời có thể chứa giá / thuộc tính cũ).
+        """
+        if not tenant_id:
+            stmt = select(OfferingModel.tenant_id).where(OfferingModel.id == offering_id)
+            tenant_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        response_cache = get_response_cache()
+        if response_cache and tenant_id:
+            response_cache.invalidate(tenant_id)
+        await OfferingReadModelRepository(self.db).invalidate([offering_id])
+        await self.sync_text_index(offering_id, tenant_id)
+
+    async def sync_text_index(self, offering_id: str, tenant_id: Optional[str] = None) -> None:
+        """Index lại document của một offering (chỉ khi index của tenant đã được build)."""
+        registry = get_text_index_registry()
+        if not registry:
+            return
+        if not tenant_id:
+            stmt = select(OfferingModel.tenant_id).where(OfferingModel.id == offering_id)
+            tenant_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if not tenant_id or registry.get(CATALOG_NAMESPACE, tenant_id) is None:
+            return
+        # Session không autoflush: đẩy thay đổi đang chờ (VD: publish_version) trước khi đọc lại
+        await self.db.flush()
+        documents = await self._search_documents(tenant_id, offering_ids=[offering_id])
+        if documents:
+            registry.upsert(CATALOG_NAMESPACE, tenant_id, *documents[0])
+        else:
+            registry.remove(CATALOG_NAMESPACE, tenant_id, offering_id)
+
+    async def _text_index(self, tenant_id: str) -> Optional[TextIndex]:
+        """Lấy (hoặc build lazily từ DB) text index catalog của tenant"""
+        registry = get_text_index_registry()
+        if not registry:
+            return None
+        index = registry.get(CATALOG_NAMESPACE, tenant_id)
+        if index is None:
+            index = registry.build(CATALOG_NAMESPACE, tenant_id, await self._search_documents(tenant_id))
+        return index
+
+    async def _search_documents(
+        self, tenant_id: str, offering_ids: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, Dict[str, Optional[str]]]]:
+        """Document (code, name, description, searchable attributes) của offering active - 2 query."""
+        rows = await self.search_catalog(tenant_id, offering_ids=offering_ids)
+        if not rows:
+            return []
+
+        stmt = select(
+            VersionModel.offering_id, AttributeValueModel.value_text, AttributeValueModel.value_number
+        ).join(
+            VersionModel, AttributeValueModel.offering_version_id == VersionModel.id
+        ).join(
+            OfferingModel, VersionModel.offering_id == OfferingModel.id
+        ).join(
+            AttributeConfigModel, and_(
+                AttributeConfigModel.attribute_def_id == AttributeValueModel.attribute_def_id,
+                AttributeConfigModel.tenant_id == OfferingModel.tenant_id
+            )
+        ).where(
+            OfferingModel.tenant_id == tenant_id,
+            OfferingModel.status == OfferingStatus.ACTIVE,
+            VersionModel.status == OfferingStatus.ACTIVE,
+            AttributeConfigModel.is_searchable == True
+        )
+        if offering_ids is not None:
+            stmt = stmt.where(OfferingModel.id.in_(list(offering_ids)))
+        attributes: Dict[str, List[str]] = {}
+        for offering_id, value_text, value_number in (await self.db.execute(stmt)).all():
+            text = _attribute_text(value_text, value_number)
+            if text:
+                attributes.setdefault(offering_id, []).append(text)
+
+        return [
+            (r["id"], {
+                "code": r["code"],
+                "name": r["name"],
+                "description": r["description"],
+                "attributes": " ".join(attributes.get(r["id"], []))
+            })
+            for r in rows
+        ]
 
 
 class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRepository):
@@ -71,6 +305,72 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
     
     def __init__(self, db: AsyncSession):
         super().__init__(VersionModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None) -> domain.TenantOfferingVersion:
+        """Create version và cập nhật vector index + text index (incremental)"""
+        embedding = obj_in.get("embedding")
+        version = await super().create(obj_in, tenant_id=tenant_id)
+        if embedding is not None:
+            await self.sync_vector_index(version.offering_id)
+        await OfferingRepository(self.db).notify_changed(version.offering_id)
+        return version
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None) -> domain.TenantOfferingVersion:
+        """Update version và đồng bộ vector index + text index"""
+        version = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        if "embedding" in obj_in or "status" in obj_in:
+            await self.sync_vector_index(version.offering_id)
+        await OfferingRepository(self.db).notify_changed(version.offering_id)
+        return version
+
+    async def sync_vector_index(self, offering_id: str, tenant_id: Optional[str] = None) -> None:
+        """
+        Index lại entry của một offering = embedding của version active (chỉ khi index của tenant
+        đã được build). Không còn version active có embedding -> xóa entry.
+        """
+        registry = get_vector_index_registry()
+        if not registry:
+            return
+        if not tenant_id:
+            stmt = select(OfferingModel.tenant_id).where(OfferingModel.id == offering_id)
+            tenant_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if not tenant_id or registry.get(OFFERING_VERSION_NAMESPACE, tenant_id) is None:
+            return
+        # Session không autoflush: đẩy thay đổi đang chờ (VD: publish_version) trước khi đọc lại
+        await self.db.flush()
+        stmt = select(VersionModel.embedding).where(
+            VersionModel.offering_id == offering_id,
+            VersionModel.status == OfferingStatus.ACTIVE,
+            VersionModel.embedding != None
+        ).order_by(VersionModel.version.desc()).limit(1)
+        embedding = (await self.db.execute(stmt)).scalar_one_or_none()
+        if embedding is None:
+            registry.remove(OFFERING_VERSION_NAMESPACE, tenant_id, offering_id)
+        else:
+            registry.upsert(OFFERING_VERSION_NAMESPACE, tenant_id, offering_id, embedding)
+
+    async def _vector_index(self, tenant_id: str) -> Optional[VectorIndex]:
+        """
+        Lấy (hoặc build lazily từ DB) vector index offering của tenant: mỗi offering một entry
+        (id = offering_id) mang embedding của version active - không index draft / archived.
+        """
+        registry = get_vector_index_registry()
+        if not registry:
+            return None
+        index = registry.get(OFFERING_VERSION_NAMESPACE, tenant_id)
+        if index is None:
+            stmt = select(VersionModel.offering_id, VersionModel.embedding).join(OfferingModel).where(
+                OfferingModel.tenant_id == tenant_id,
+                VersionModel.status == OfferingStatus.ACTIVE,
+                VersionModel.embedding != None
+            ).order_by(VersionModel.version)
+            rows = (await self.db.execute(stmt)).all()
+            # Nhiều version active (dữ liệu lỗi): version cao nhất thắng như get_active_version
+            index = registry.build(
+                OFFERING_VERSION_NAMESPACE, tenant_id,
+                list({r.offering_id: (r.offering_id, r.embedding, None) for r in rows}.values())
+            )
+        return index
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantOfferingVersion]:
         """Get version with mandatory tenant isolation (via join)"""
@@ -83,18 +383,34 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantOfferingVersion.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOfferingVersion, db_obj) if db_obj else None
 
     async def get_active_version(self, offering_id: str, tenant_id: str) -> Optional[domain.TenantOfferingVersion]:
         """Lấy phiên bản đang hoạt động của offering với tenant isolation check"""
-        stmt = select(VersionModel).join(OfferingModel).where(
+        # Projection: chỉ cột domain cần (không kéo embedding)
+        stmt = select(*domain_columns(VersionModel, domain.TenantOfferingVersion)).join(OfferingModel).where(
             VersionModel.offering_id == offering_id,
             VersionModel.status == OfferingStatus.ACTIVE,
             OfferingModel.tenant_id == tenant_id
         ).order_by(VersionModel.version.desc())
         result = await self.db.execute(stmt)
-        db_obj = result.scalar_one_or_none()
-        return domain.TenantOfferingVersion.model_validate(db_obj) if db_obj else None
+        return row_to_domain(domain.TenantOfferingVersion, result.one_or_none())
+
+    async def get_active_versions(self, offering_ids: Sequence[str], tenant_id: str) -> Dict[str, domain.TenantOfferingVersion]:
+        """Phiên bản active của nhiều offering trong một query: {offering_id: version}"""
+        if not offering_ids:
+            return {}
+        stmt = select(*domain_columns(VersionModel, domain.TenantOfferingVersion)).join(OfferingModel).where(
+            VersionModel.offering_id.in_(list(offering_ids)),
+            VersionModel.status == OfferingStatus.ACTIVE,
+            OfferingModel.tenant_id == tenant_id
+        ).order_by(VersionModel.version.desc())
+        versions: Dict[str, domain.TenantOfferingVersion] = {}
+        for row in (await self.db.execute(stmt)).all():
+            # Version cao nhất thắng nếu có nhiều version active
+            if row.offering_id not in versions:
+                versions[row.offering_id] = row_to_domain(domain.TenantOfferingVersion, row)
+        return versions
 
     async def get_latest_version(self, offering_id: str, tenant_id: str) -> Optional[domain.TenantOfferingVersion]:
         """Lấy phiên bản mới nhất (bất kể status) của offering với tenant isolation check"""
@@ -104,7 +420,7 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
         ).order_by(VersionModel.version.desc())
         result = await self.db.execute(stmt)
         db_obj = result.scalars().first()
-        return domain.TenantOfferingVersion.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOfferingVersion, db_obj) if db_obj else None
 
     async def semantic_search(
         self,
@@ -115,8 +431,25 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
     ) -> List[tuple[domain.TenantOfferingVersion, float]]:
         """
         Tìm kiếm Offering semantically qua phiên bản Active.
+        Ưu tiên in-process vector index; status Active được kiểm tra lại khi hydrate từ DB.
         """
         distance_limit = 1.0 - threshold
+
+        index = await self._vector_index(tenant_id)
+        if index is not None:
+            # Index chỉ chứa version active (mỗi offering một entry) -> k = limit là đủ
+            hits = index.search(query_vector, k=limit, threshold=threshold)
+            if not hits:
+                return []
+            scores = dict(hits)
+            stmt = select(VersionModel).join(OfferingModel).where(
+                VersionModel.offering_id.in_(list(scores)),
+                OfferingModel.tenant_id == tenant_id,
+                VersionModel.status == OfferingStatus.ACTIVE
+            ).order_by(VersionModel.version)
+            active = {v.offering_id: v for v in (await self.db.execute(stmt)).scalars().all()}
+            versions = sorted(active.values(), key=lambda v: scores[v.offering_id], reverse=True)
+            return [(to_domain(domain.TenantOfferingVersion, v), scores[v.offering_id]) for v in versions]
         
         if self.db.bind.dialect.name == "postgresql":
             stmt = select(
@@ -129,9 +462,8 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
             ).order_by(VersionModel.embedding.cosine_distance(query_vector)).limit(limit)
             
             result = await self.db.execute(stmt)
-            return [(domain.TenantOfferingVersion.model_validate(r[0]), float(r[1])) for r in result.all()]
+            return [(to_domain(domain.TenantOfferingVersion, r[0]), float(r[1])) for r in result.all()]
         else:
-            from app.core.shared.math_utils import cosine_similarity
             stmt = select(VersionModel).join(OfferingModel).where(
                 OfferingModel.tenant_id == tenant_id,
                 VersionModel.status == OfferingStatus.ACTIVE,
@@ -139,15 +471,12 @@ class OfferingVersionRepository(BaseRepository[VersionModel], IOfferingVersionRe
             )
             result = await self.db.execute(stmt)
             versions = result.scalars().all()
-            
-            scored = []
-            for v in versions:
-                sim = cosine_similarity(query_vector, v.embedding)
-                if sim >= threshold:
-                    scored.append((domain.TenantOfferingVersion.model_validate(v), sim))
-            
-            scored.sort(key=lambda x: x[1], reverse=True)
-            return scored[:limit]
+
+            matrix = SimilarityMatrix([v.embedding for v in versions])
+            return [
+                (to_domain(domain.TenantOfferingVersion, versions[pos]), score)
+                for pos, score in matrix.top_k(query_vector, k=limit, threshold=threshold)
+            ]
 
 
 class OfferingAttributeRepository(BaseRepository[AttributeValueModel]):
@@ -155,6 +484,31 @@ class OfferingAttributeRepository(BaseRepository[AttributeValueModel]):
     
     def __init__(self, db: AsyncSession):
         super().__init__(AttributeValueModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None):
+        """Create attribute value và báo offering thay đổi (read model, text index)"""
+        attr = await super().create(obj_in, tenant_id=tenant_id)
+        await self._notify_changed(attr.offering_version_id)
+        return attr
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None):
+        attr = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        await self._notify_changed(attr.offering_version_id)
+        return attr
+
+    async def delete(self, id: str, tenant_id: Optional[str] = None):
+        stmt = select(AttributeValueModel.offering_version_id).where(AttributeValueModel.id == id)
+        version_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        attr = await super().delete(id, tenant_id=tenant_id)
+        if attr and version_id:
+            await self._notify_changed(version_id)
+        return attr
+
+    async def _notify_changed(self, version_id: str) -> None:
+        stmt = select(VersionModel.offering_id).where(VersionModel.id == version_id)
+        offering_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if offering_id:
+            await OfferingRepository(self.db).notify_changed(offering_id)
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantOfferingAttributeValue]:
         """Get attribute value with mandatory tenant isolation (via complex join)"""
@@ -174,7 +528,7 @@ class OfferingAttributeRepository(BaseRepository[AttributeValueModel]):
         
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantOfferingAttributeValue.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOfferingAttributeValue, db_obj) if db_obj else None
 
     async def get_by_version(self, version_id: str, tenant_id: str) -> List[domain.TenantOfferingAttributeValue]:
         """Lấy tất cả thuộc tính của một phiên bản offering với tenant isolation check"""
@@ -188,7 +542,30 @@ class OfferingAttributeRepository(BaseRepository[AttributeValueModel]):
         ).options(joinedload(AttributeValueModel.definition))
         
         result = await self.db.execute(stmt)
-        return [domain.TenantOfferingAttributeValue.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.TenantOfferingAttributeValue, obj) for obj in result.scalars().all()]
+
+
+    async def get_by_versions(
+        self, version_ids: Sequence[str], tenant_id: str
+    ) -> Dict[str, List[domain.TenantOfferingAttributeValue]]:
+        """Thuộc tính của nhiều version trong một query: {version_id: [attribute_value]}"""
+        if not version_ids:
+            return {}
+        stmt = select(AttributeValueModel).join(
+            VersionModel, AttributeValueModel.offering_version_id == VersionModel.id
+        ).join(
+            OfferingModel, VersionModel.offering_id == OfferingModel.id
+        ).where(
+            AttributeValueModel.offering_version_id.in_(list(version_ids)),
+            OfferingModel.tenant_id == tenant_id
+        ).options(joinedload(AttributeValueModel.definition))
+
+        attributes: Dict[str, List[domain.TenantOfferingAttributeValue]] = {}
+        for db_obj in (await self.db.execute(stmt)).scalars().all():
+            attributes.setdefault(db_obj.offering_version_id, []).append(
+                to_domain(domain.TenantOfferingAttributeValue, db_obj)
+            )
+        return attributes
 
 
 class OfferingVariantRepository(BaseRepository[VariantModel]):
@@ -199,7 +576,7 @@ class OfferingVariantRepository(BaseRepository[VariantModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantOfferingVariant]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantOfferingVariant.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOfferingVariant, db_obj) if db_obj else None
 
     async def get_by_sku(self, sku: str, tenant_id: str) -> Optional[domain.TenantOfferingVariant]:
         """Lấy variant theo SKU"""
@@ -209,4 +586,125 @@ class OfferingVariantRepository(BaseRepository[VariantModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantOfferingVariant.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantOfferingVariant, db_obj) if db_obj else None
+
+
+class OfferingReadModelRepository(BaseRepository[ReadModel]):
+    """
+    Read model (offering x channel -> document JSON) cho get_offering_for_bot / catalog list / compare.
+    Document do CatalogService build; repository chỉ đọc/ghi/xóa theo lô.
+    Dòng đã quá expires_at (hoặc đã bị invalidate) được coi như không có.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(ReadModel, db)
+
+    async def get_by_codes(
+        self, tenant_id: str, channel_code: str, codes: Sequence[str], domain_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """{offering_code: document}"""
+        if not codes:
+            return {}
+        stmt = select(ReadModel).where(
+            ReadModel.tenant_id == tenant_id,
+            ReadModel.channel_code == channel_code,
+            ReadModel.offering_code.in_(list(codes)),
+            self._fresh()
+        )
+        if domain_id:
+            stmt = stmt.where(ReadModel.domain_id == domain_id)
+        result = await self.db.execute(stmt)
+        return {row.offering_code: row.document for row in result.scalars().all()}
+
+    async def get_by_offering_ids(
+        self, tenant_id: str, channel_code: str, offering_ids: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """{offering_id: document}"""
+        if not offering_ids:
+            return {}
+        stmt = select(ReadModel).where(
+            ReadModel.tenant_id == tenant_id,
+            ReadModel.channel_code == channel_code,
+            ReadModel.offering_id.in_(list(offering_ids)),
+            self._fresh()
+        )
+        result = await self.db.execute(stmt)
+        return {row.offering_id: row.document for row in result.scalars().all()}
+
+    @staticmethod
+    def _fresh():
+        """Điều kiện document còn hiệu lực (cùng quy ước giờ với price_repo: datetime.now())."""
+        return (ReadModel.expires_at == None) | (ReadModel.expires_at > datetime.now())
+
+    async def get_channels(self, offering_ids: Sequence[str]) -> List[str]:
+        """Các channel đang có document của những offering này (để build lại đúng phần đã materialize)."""
+        if not offering_ids:
+            return []
+        stmt = select(ReadModel.channel_code).where(ReadModel.offering_id.in_(list(offering_ids))).distinct()
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def save(
+        self,
+        tenant_id: str,
+        channel_code: str,
+        documents: Sequence[Dict[str, Any]],
+        built_at: Optional[datetime] = None,
+        expires_at: Optional[Dict[str, datetime]] = None
+    ) -> None:
+        """
+        Ghi (thay thế) document của các offering cho một channel.
+        INSERT ... ON CONFLICT (tenant_id, offering_id, channel_code) DO UPDATE: hai request build
+        cùng offering đồng thời không vi phạm unique constraint (delete + insert thì có thể).
+        Chỉ ghi đè khi `built_at` (lúc bắt đầu đọc dữ liệu nguồn) không cũ hơn dòng đang có - request
+        đọc chậm không thay được document vừa refresh / invalidate. `expires_at`: {offering_id: mốc hết hạn}.
+        """
+        if not documents:
+            return
+        built_at = built_at or datetime.now()
+        expires_at = expires_at or {}
+        upsert = pg_insert if self.db.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = upsert(ReadModel).values([
+            {
+                "tenant_id": tenant_id,
+                "offering_id": d["id"],
+                "channel_code": channel_code,
+                "offering_code": d["code"],
+                "domain_id": d.get("domain_id"),
+                "document": d,
+                "built_at": built_at,
+                "expires_at": expires_at.get(d["id"])
+            }
+            for d in documents
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReadModel.tenant_id, ReadModel.offering_id, ReadModel.channel_code],
+            set_={
+                "offering_code": stmt.excluded.offering_code,
+                "domain_id": stmt.excluded.domain_id,
+                "document": stmt.excluded.document,
+                "built_at": stmt.excluded.built_at,
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": func.now(),
+            },
+            where=(ReadModel.built_at == None) | (ReadModel.built_at <= stmt.excluded.built_at)
+        )
+        async with transaction_scope(self.db):
+            await self.db.execute(stmt)
+
+    async def invalidate(self, offering_ids: Sequence[str]) -> None:
+        """
+        Đánh dấu hết hạn document của offering (mọi channel) - lần đọc sau build lại.
+        Giữ dòng (thay vì xóa) với built_at = lúc invalidate: document build từ dữ liệu đọc trước
+        thời điểm này không ghi đè được (xem save).
+        """
+        if offering_ids:
+            await self._expire(ReadModel.offering_id.in_(list(offering_ids)))
+
+    async def invalidate_tenant(self, tenant_id: str) -> None:
+        await self._expire(ReadModel.tenant_id == tenant_id)
+
+    async def _expire(self, condition) -> None:
+        now = datetime.now()
+        await self.db.execute(
+            update(ReadModel).where(condition).values(built_at=now, expires_at=now)
+        )
@@ -1,9 +1,10 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.knowledge import (
@@ -13,6 +14,8 @@ from app.infrastructure.database.models.knowledge import (
 
 # Domain Entities
 from app.core import domain
+from app.infrastructure.cache.attribute_config_cache import get_attribute_config_cache
+from app.infrastructure.search import get_text_index_registry, CATALOG_NAMESPACE
 
 
 class DomainAttributeDefinitionRepository(BaseRepository[AttributeDefModel]):
@@ -23,12 +26,12 @@ class DomainAttributeDefinitionRepository(BaseRepository[AttributeDefModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.DomainAttributeDefinition]:
         db_obj = await super().get(id, tenant_id)
-        return domain.DomainAttributeDefinition.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.DomainAttributeDefinition, db_obj) if db_obj else None
 
     async def get_by_domain(self, domain_id: str) -> List[domain.DomainAttributeDefinition]:
         stmt = select(AttributeDefModel).where(AttributeDefModel.domain_id == domain_id)
         result = await self.db.execute(stmt)
-        return [domain.DomainAttributeDefinition.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.DomainAttributeDefinition, obj) for obj in result.scalars().all()]
 
     async def get_by_key(self, key: str, domain_id: Optional[str] = None) -> Optional[domain.DomainAttributeDefinition]:
         stmt = select(AttributeDefModel).where(AttributeDefModel.key == key)
@@ -36,7 +39,7 @@ class DomainAttributeDefinitionRepository(BaseRepository[AttributeDefModel]):
             stmt = stmt.where(AttributeDefModel.domain_id == domain_id)
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.DomainAttributeDefinition.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.DomainAttributeDefinition, db_obj) if db_obj else None
 
 
 class TenantAttributeConfigRepository(BaseRepository[AttributeConfigModel]):
@@ -44,6 +47,27 @@ class TenantAttributeConfigRepository(BaseRepository[AttributeConfigModel]):
     
     def __init__(self, db: AsyncSession):
         super().__init__(AttributeConfigModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None):
+        config = await super().create(obj_in, tenant_id=tenant_id)
+        await self._invalidate_derived(config.tenant_id, searchable_changed=True)
+        return config
+
+    async def update(self, db_obj, obj_in: dict, tenant_id: Optional[str] = None):
+        config = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        await self._invalidate_derived(config.tenant_id, searchable_changed="is_searchable" in obj_in)
+        return config
+
+    async def _invalidate_derived(self, tenant_id: str, searchable_changed: bool) -> None:
+        """Config (label, is_display, is_searchable...) ảnh hưởng mọi offering của tenant"""
+        from app.infrastructure.database.repositories.offering_repo import OfferingReadModelRepository
+        await OfferingReadModelRepository(self.db).invalidate_tenant(tenant_id)
+        config_cache = get_attribute_config_cache()
+        if config_cache:
+            config_cache.invalidate(tenant_id)
+        registry = get_text_index_registry()
+        if registry and searchable_changed:
+            registry.invalidate(CATALOG_NAMESPACE, tenant_id)
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantAttributeConfig]:
         stmt = select(AttributeConfigModel).options(selectinload(AttributeConfigModel.definition)).where(AttributeConfigModel.id == id)
@@ -51,7 +75,7 @@ class TenantAttributeConfigRepository(BaseRepository[AttributeConfigModel]):
             stmt = stmt.where(AttributeConfigModel.tenant_id == tenant_id)
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantAttributeConfig.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantAttributeConfig, db_obj) if db_obj else None
 
     async def get_config(self, tenant_id: str, attribute_def_id: str) -> Optional[domain.TenantAttributeConfig]:
         stmt = select(AttributeConfigModel).options(selectinload(AttributeConfigModel.definition)).where(
@@ -60,7 +84,21 @@ class TenantAttributeConfigRepository(BaseRepository[AttributeConfigModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantAttributeConfig.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantAttributeConfig, db_obj) if db_obj else None
+
+    async def get_configs(self, tenant_id: str, attribute_def_ids: List[str]) -> Dict[str, domain.TenantAttributeConfig]:
+        """Lấy config của nhiều attribute definition trong một query: {attribute_def_id: config}"""
+        if not attribute_def_ids:
+            return {}
+        stmt = select(AttributeConfigModel).options(selectinload(AttributeConfigModel.definition)).where(
+            AttributeConfigModel.tenant_id == tenant_id,
+            AttributeConfigModel.attribute_def_id.in_(list(set(attribute_def_ids)))
+        )
+        result = await self.db.execute(stmt)
+        return {
+            obj.attribute_def_id: to_domain(domain.TenantAttributeConfig, obj)
+            for obj in result.scalars().all()
+        }
 
     async def get_all_for_tenant(self, tenant_id: str, domain_id: Optional[str] = None) -> List[domain.TenantAttributeConfig]:
         stmt = select(AttributeConfigModel).options(selectinload(AttributeConfigModel.definition)).where(AttributeConfigModel.tenant_id == tenant_id)
@@ -69,4 +107,4 @@ class TenantAttributeConfigRepository(BaseRepository[AttributeConfigModel]):
             stmt = stmt.join(AttributeConfigModel.definition).where(AttributeDefModel.domain_id == domain_id)
         
         result = await self.db.execute(stmt)
-        return [domain.TenantAttributeConfig.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.TenantAttributeConfig, obj) for obj in result.scalars().all()]
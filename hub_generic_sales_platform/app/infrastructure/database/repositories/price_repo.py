@@ -1,8 +1,9 @@
-from typing import Optional, List, Any
-from sqlalchemy import select, and_
+from typing import Optional, List, Any, Dict
+from sqlalchemy import select, and_, case, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.offering import (
@@ -27,7 +28,7 @@ class TenantSalesChannelRepository(BaseRepository[SalesChannelModel], ISalesChan
         db_obj = await super().get(id, tenant_id)
         # Note: SalesChannel entity should be defined in domain, if not I'll use generic
         # For now assume it is in domain.Knowledge
-        return domain.TenantSalesChannel.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantSalesChannel, db_obj) if db_obj else None
 
     async def get_by_code(self, code: str, tenant_id: str) -> Optional[domain.TenantSalesChannel]:
         stmt = select(SalesChannelModel).where(
@@ -36,7 +37,7 @@ class TenantSalesChannelRepository(BaseRepository[SalesChannelModel], ISalesChan
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.TenantSalesChannel.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantSalesChannel, db_obj) if db_obj else None
 
 
 class TenantPriceListRepository(BaseRepository[PriceListModel], IPriceListRepository):
@@ -47,7 +48,7 @@ class TenantPriceListRepository(BaseRepository[PriceListModel], IPriceListReposi
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantPriceList]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantPriceList.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantPriceList, db_obj) if db_obj else None
 
     async def get_prices_for_offering(self, tenant_id: str, channel_code: str, offering_id: str) -> List[domain.TenantVariantPrice]:
         """Lấy giá của variants thuộc một offering cho channel cụ thể
@@ -84,7 +85,67 @@ class TenantPriceListRepository(BaseRepository[PriceListModel], IPriceListReposi
         ).order_by(VariantPriceModel.amount.asc())
         
         result = await self.db.execute(price_stmt)
-        return [domain.TenantVariantPrice.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.TenantVariantPrice, obj) for obj in result.scalars().all()]
+
+    async def get_prices_for_offerings(
+        self, tenant_id: str, channel_code: str, offering_ids: List[str]
+    ) -> Dict[str, List[domain.TenantVariantPrice]]:
+        """Giá theo channel cho nhiều offering trong MỘT query: {offering_id: [price]} (amount ASC)"""
+        if not offering_ids:
+            return {}
+        now = datetime.now()
+        stmt = select(VariantPriceModel, OfferingVariantModel.offering_id).join(
+            OfferingVariantModel, VariantPriceModel.variant_id == OfferingVariantModel.id
+        ).join(
+            PriceListModel, VariantPriceModel.price_list_id == PriceListModel.id
+        ).join(
+            SalesChannelModel, PriceListModel.channel_id == SalesChannelModel.id
+        ).where(
+            PriceListModel.tenant_id == tenant_id,
+            SalesChannelModel.tenant_id == tenant_id,
+            SalesChannelModel.code == channel_code,
+            (PriceListModel.valid_from == None) | (PriceListModel.valid_from <= now),
+            (PriceListModel.valid_to == None) | (PriceListModel.valid_to >= now),
+            OfferingVariantModel.offering_id.in_(list(offering_ids))
+        ).order_by(VariantPriceModel.amount.asc())
+
+        prices: Dict[str, List[domain.TenantVariantPrice]] = {}
+        for price, offering_id in (await self.db.execute(stmt)).all():
+            prices.setdefault(offering_id, []).append(to_domain(domain.TenantVariantPrice, price))
+        return prices
+
+    async def get_next_price_boundaries(
+        self, tenant_id: str, channel_code: str, offering_ids: List[str]
+    ) -> Dict[str, datetime]:
+        """
+        Mốc valid_from / valid_to sắp tới gần nhất của các price list (theo channel) chứa giá của
+        offering: {offering_id: mốc}. Từ mốc đó kết quả get_prices_for_offerings có thể đổi;
+        offering không có mốc nào trong tương lai không có trong kết quả.
+        """
+        if not offering_ids:
+            return {}
+        now = datetime.now()
+        next_start = func.min(case((PriceListModel.valid_from > now, PriceListModel.valid_from)))
+        next_end = func.min(case((PriceListModel.valid_to >= now, PriceListModel.valid_to)))
+        stmt = select(OfferingVariantModel.offering_id, next_start, next_end).join(
+            VariantPriceModel, VariantPriceModel.variant_id == OfferingVariantModel.id
+        ).join(
+            PriceListModel, VariantPriceModel.price_list_id == PriceListModel.id
+        ).join(
+            SalesChannelModel, PriceListModel.channel_id == SalesChannelModel.id
+        ).where(
+            PriceListModel.tenant_id == tenant_id,
+            SalesChannelModel.tenant_id == tenant_id,
+            SalesChannelModel.code == channel_code,
+            OfferingVariantModel.offering_id.in_(list(offering_ids))
+        ).group_by(OfferingVariantModel.offering_id)
+
+        boundaries: Dict[str, datetime] = {}
+        for offering_id, start, end in (await self.db.execute(stmt)).all():
+            upcoming = [b for b in (start, end) if b is not None]
+            if upcoming:
+                boundaries[offering_id] = min(upcoming)
+        return boundaries
 
 class VariantPriceRepository(BaseRepository[VariantPriceModel]):
     def __init__(self, db: AsyncSession):
@@ -92,4 +153,4 @@ class VariantPriceRepository(BaseRepository[VariantPriceModel]):
 
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.TenantVariantPrice]:
         db_obj = await super().get(id, tenant_id)
-        return domain.TenantVariantPrice.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.TenantVariantPrice, db_obj) if db_obj else None
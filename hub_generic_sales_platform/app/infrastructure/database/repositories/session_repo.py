@@ -1,7 +1,9 @@
-from typing import Optional, List, Any
-from sqlalchemy import select, update as sa_update
+from typing import Optional, List, Any, Dict
+from sqlalchemy import event, select, update as sa_update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import domain_columns, rows_to_domain
+from app.infrastructure.cache.session_state_cache import get_session_state_cache
 from app.core.shared.exceptions import ConcurrentUpdateError
 
 # Infrastructure Models
@@ -18,8 +20,79 @@ class SessionRepository(BaseRepository[SessionModel], ISessionRepository):
     """Conversation session repository (Async Implementation) with Domain Mapping"""
     domain_container = domain.RuntimeSession
 
+    # db.info key: session_id -> snapshot đã ghi trong transaction hiện tại (chưa commit)
+    _PENDING_KEY = "session_state_cache_pending"
+
     def __init__(self, db: AsyncSession):
         super().__init__(SessionModel, db)
+        self.state_cache = get_session_state_cache()
+
+    async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.RuntimeSession]:
+        """Get session, ưu tiên hot-state cache (bỏ qua cache nếu transaction này vừa ghi session)"""
+        if not tenant_id:
+            raise ValueError(f"tenant_id is required for {self.model.__name__}")
+        use_cache = self.state_cache is not None and id not in self._pending()
+        if use_cache:
+            cached = await self.state_cache.get(id, tenant_id)
+            if cached is not None:
+                return cached
+        session = await super().get(id, tenant_id)
+        if use_cache and session is not None:
+            await self.state_cache.set(session)
+        return session
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None) -> domain.RuntimeSession:
+        session = await super().create(obj_in, tenant_id=tenant_id)
+        self._write_through(session)
+        return session
+
+    async def delete(self, id: str, tenant_id: Optional[str] = None) -> Optional[Any]:
+        deleted = await super().delete(id, tenant_id=tenant_id)
+        if self.state_cache:
+            await self.state_cache.invalidate(id)
+        return deleted
+
+    def _pending(self) -> Dict[str, Any]:
+        info = getattr(self.db, "info", None)
+        if not isinstance(info, dict):
+            return {}
+        return info.setdefault(self._PENDING_KEY, {})
+
+    def _write_through(self, session: domain.RuntimeSession) -> None:
+        """
+        Ghi snapshot vào cache khi transaction commit; rollback thì bỏ (hook after_soft_rollback -
+        chạy cho cả rollback savepoint). Rollback savepoint bỏ snapshot nhưng giữ id trong pending để
+        get() tiếp tục đọc DB tới hết transaction, không ghi bản chưa commit vào cache.
+        """
+        if self.state_cache is None:
+            return
+        pending = self._pending()
+        sync_session = getattr(self.db, "sync_session", None)
+        info = getattr(self.db, "info", None)
+        if not isinstance(info, dict) or sync_session is None:
+            return
+        pending[session.id] = session
+        if not info.get("session_state_cache_hooked"):
+            info["session_state_cache_hooked"] = True
+            cache = self.state_cache
+
+            def _after_commit(_session):
+                for snapshot in info.pop(SessionRepository._PENDING_KEY, {}).values():
+                    if snapshot is not None:
+                        cache.set_local(snapshot)
+
+            def _after_soft_rollback(_session, previous_transaction):
+                if previous_transaction.parent is None:
+                    info.pop(SessionRepository._PENDING_KEY, None)
+                    return
+                # Savepoint / transaction con: chưa biết transaction ngoài có commit không
+                pending_snapshots = info.get(SessionRepository._PENDING_KEY)
+                if pending_snapshots:
+                    for session_id in pending_snapshots:
+                        pending_snapshots[session_id] = None
+
+            event.listen(sync_session, "after_commit", _after_commit)
+            event.listen(sync_session, "after_soft_rollback", _after_soft_rollback)
     
     async def get_by_bot_and_channel(
         self,
@@ -64,6 +137,10 @@ class SessionRepository(BaseRepository[SessionModel], ISessionRepository):
         if tenant_id:
             stmt = stmt.where(SessionModel.tenant_id == tenant_id)
 
+        # Version thay đổi -> snapshot cũ trong cache không còn hợp lệ
+        if self.state_cache:
+            await self.state_cache.invalidate(id_val)
+
         result = await self.db.execute(stmt)
         if result.rowcount == 0:
             raise ConcurrentUpdateError("RuntimeSession", id_val)
@@ -72,7 +149,9 @@ class SessionRepository(BaseRepository[SessionModel], ISessionRepository):
         res = await self.db.execute(select(SessionModel).where(SessionModel.id == id_val))
         updated_db_obj = res.scalar_one()
         await self.db.refresh(updated_db_obj)
-        return self._to_domain(updated_db_obj)
+        updated = self._to_domain(updated_db_obj)
+        self._write_through(updated)
+        return updated
     
     async def get_active_sessions(
         self,
@@ -129,30 +208,59 @@ class ConversationTurnRepository(BaseRepository[TurnModel], IConversationTurnRep
         limit: int = 50
     ) -> List[domain.RuntimeTurn]:
         """Get all turns for a session with tenant isolation check"""
-        stmt = select(TurnModel).join(SessionModel).where(
+        stmt = select(*domain_columns(TurnModel, domain.RuntimeTurn)).join(SessionModel).where(
             TurnModel.session_id == session_id,
             SessionModel.tenant_id == tenant_id
         ).order_by(TurnModel.created_at.asc()).limit(limit)
         result = await self.db.execute(stmt)
-        return [self._to_domain(obj) for obj in result.scalars().all()]
+        return rows_to_domain(domain.RuntimeTurn, result.all())
 
 
 class ContextSlotRepository(BaseRepository[SlotModel], IContextSlotRepository):
     """Context slot repository (Async Implementation) with Domain Mapping"""
     domain_container = domain.RuntimeContextSlot
 
+    # db.info key: các session_id có slot bị ghi (create / update / deactivate) trên AsyncSession này
+    _WRITES_KEY = "context_slot_writes"
+
     def __init__(self, db: AsyncSession):
         super().__init__(SlotModel, db)
+
+    async def create(self, obj_in: dict, tenant_id: Optional[str] = None) -> Any:
+        slot = await super().create(obj_in, tenant_id=tenant_id)
+        self._mark_written(obj_in.get("session_id"))
+        return slot
+
+    async def update(self, db_obj: Any, obj_in: dict, tenant_id: Optional[str] = None) -> Any:
+        slot = await super().update(db_obj, obj_in, tenant_id=tenant_id)
+        self._mark_written(getattr(db_obj, "session_id", None))
+        return slot
+
+    def pop_written(self, session_id: str) -> bool:
+        """Slot của session có bị ghi kể từ lần gọi trước không (đọc xong thì xóa dấu)."""
+        info = getattr(self.db, "info", None)
+        if not isinstance(info, dict):
+            return True  # không theo dõi được -> coi như đã đổi
+        written = info.get(self._WRITES_KEY, set())
+        if session_id not in written:
+            return False
+        written.discard(session_id)
+        return True
+
+    def _mark_written(self, session_id: Optional[str]) -> None:
+        info = getattr(self.db, "info", None)
+        if session_id and isinstance(info, dict):
+            info.setdefault(self._WRITES_KEY, set()).add(session_id)
     
     async def get_by_session(self, session_id: str, tenant_id: str) -> List[domain.RuntimeContextSlot]:
         """Get all active context slots for a session with tenant isolation check"""
-        stmt = select(SlotModel).join(SessionModel).where(
+        stmt = select(*domain_columns(SlotModel, domain.RuntimeContextSlot)).join(SessionModel).where(
             SlotModel.session_id == session_id,
             SlotModel.status == "active",
             SessionModel.tenant_id == tenant_id
         )
         result = await self.db.execute(stmt)
-        return [self._to_domain(obj) for obj in result.scalars().all()]
+        return rows_to_domain(domain.RuntimeContextSlot, result.all())
     
     async def get_by_key(
         self, session_id: str, key: str, tenant_id: str
@@ -191,4 +299,6 @@ class ContextSlotRepository(BaseRepository[SlotModel], IContextSlotRepository):
             .values(status="overridden")
         )
         result = await self.db.execute(stmt)
+        if result.rowcount:
+            self._mark_written(session_id)
         return result.rowcount
@@ -3,6 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.tenant import Tenant as TenantModel
@@ -19,13 +20,13 @@ class TenantRepository(BaseRepository[TenantModel]):
     
     async def get(self, id: str, tenant_id: str) -> Optional[domain.Tenant]:
         db_obj = await super().get(id, tenant_id)
-        return domain.Tenant.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.Tenant, db_obj) if db_obj else None
     
     async def get_active_tenants(self) -> List[domain.Tenant]:
         """Get all active tenants"""
         stmt = select(TenantModel).where(TenantModel.status == "active")
         result = await self.db.execute(stmt)
-        return [domain.Tenant.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.Tenant, obj) for obj in result.scalars().all()]
 
 
 class UserAccountRepository(BaseRepository[UserModel]):
@@ -42,7 +43,7 @@ class UserAccountRepository(BaseRepository[UserModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalar_one_or_none()
-        return domain.UserAccount.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.UserAccount, db_obj) if db_obj else None
     
     async def get_by_email(self, email: str, tenant_id: str) -> Optional[domain.UserAccount]:
         """Get user by email with mandatory tenant isolation"""
@@ -52,17 +53,17 @@ class UserAccountRepository(BaseRepository[UserModel]):
         )
         result = await self.db.execute(stmt)
         db_obj = result.scalars().first()
-        return domain.UserAccount.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.UserAccount, db_obj) if db_obj else None
 
     async def get_by_email_system(self, email: str) -> Optional[domain.UserAccount]:
         """SYSTEM-LEVEL: Get user by email across all tenants (specifically for login)"""
         stmt = select(UserModel).options(selectinload(UserModel.tenant)).where(UserModel.email == email)
         result = await self.db.execute(stmt)
         db_obj = result.scalars().first()
-        return domain.UserAccount.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.UserAccount, db_obj) if db_obj else None
     
     async def get_by_tenant(self, tenant_id: str) -> List[domain.UserAccount]:
         """Get all users for a tenant"""
         stmt = select(UserModel).where(UserModel.tenant_id == tenant_id)
         result = await self.db.execute(stmt)
-        return [domain.UserAccount.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.UserAccount, obj) for obj in result.scalars().all()]
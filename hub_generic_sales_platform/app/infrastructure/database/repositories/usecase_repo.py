@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database.base import BaseRepository
+from app.infrastructure.database.mapping import to_domain
 
 # Infrastructure Models
 from app.infrastructure.database.models.knowledge import BotUseCase as UseCaseModel
@@ -18,7 +19,7 @@ class UseCaseRepository(BaseRepository[UseCaseModel]):
     
     async def get(self, id: str, tenant_id: Optional[str] = None) -> Optional[domain.BotUseCase]:
         db_obj = await super().get(id, tenant_id)
-        return domain.BotUseCase.model_validate(db_obj) if db_obj else None
+        return to_domain(domain.BotUseCase, db_obj) if db_obj else None
 
     async def get_by_offering(self, offering_id: str, tenant_id: str) -> List[domain.BotUseCase]:
         """Get all use cases for an offering"""
@@ -28,7 +29,7 @@ class UseCaseRepository(BaseRepository[UseCaseModel]):
             UseCaseModel.is_active == True
         ).order_by(UseCaseModel.priority.desc())
         result = await self.db.execute(stmt)
-        return [domain.BotUseCase.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotUseCase, obj) for obj in result.scalars().all()]
     
     async def get_active(self, tenant_id: str, bot_id: Optional[str] = None) -> List[domain.BotUseCase]:
         """Get all active use cases for a tenant/bot"""
@@ -40,4 +41,4 @@ class UseCaseRepository(BaseRepository[UseCaseModel]):
             stmt = stmt.where(UseCaseModel.bot_id == bot_id)
         stmt = stmt.order_by(UseCaseModel.priority.desc())
         result = await self.db.execute(stmt)
-        return [domain.BotUseCase.model_validate(obj) for obj in result.scalars().all()]
+        return [to_domain(domain.BotUseCase, obj) for obj in result.scalars().all()]
@@ -0,0 +1,214 @@
+"""
+Write-behind Journal cho log runtime (turns, decision events, cache hit counters)
+
+Mỗi message trước đây tạo nhiều INSERT + flush + refresh riêng lẻ. Journal gom các bản ghi
+vào queue có giới hạn (backpressure: producer chờ khi queue đầy), worker flush theo
+size hoặc thời gian bằng multi-row INSERT (executemany -> insertmanyvalues) và gộp
+hit counter thành một UPDATE cho mỗi cache entry.
+
+- id / created_at được sinh phía client khi enqueue: caller dùng id ngay (input_turn_id),
+  thứ tự turn giữ đúng dù nhiều turn nằm chung một batch.
+- Batch lỗi (VD: FK tới session chưa commit) -> ghi lại từng bản ghi để cô lập row lỗi.
+- close(): flush toàn bộ queue (gọi từ lifespan shutdown).
+"""
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.settings import get_settings
+from app.core.shared.db_utils import transaction_scope
+from app.infrastructure.database.models.cache import TenantSemanticCache as CacheModel
+from app.infrastructure.database.models.decision import RuntimeDecisionEvent as DecisionModel
+from app.infrastructure.database.models.runtime import RuntimeTurn as TurnModel
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+TURN = "turn"
+DECISION = "decision"
+CACHE_HIT = "cache_hit"
+
+
+def _plain(value: Any) -> Any:
+    """Enum -> value (Speaker, DecisionType, ...)."""
+    return value.value if hasattr(value, "value") else value
+
+
+class WriteBehindJournal:
+    """Bounded async queue + background flusher cho các bảng log append-only."""
+
+    def __init__(
+        self,
+        session_factory: Optional[SessionFactory] = None,
+        max_queue: int = 10000,
+        flush_size: int = 200,
+        flush_interval_ms: float = 50.0,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max(1, max_queue)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.written = 0
+        self.dropped = 0
+
+    # ---------- Producers ----------
+
+    async def log_turn(self, data: Dict[str, Any]) -> str:
+        """Enqueue một runtime_turn. Trả id đã sinh."""
+        row = {key: _plain(value) for key, value in data.items()}
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        await self._put((TURN, row))
+        return row["id"]
+
+    async def log_decision(self, data: Dict[str, Any]) -> str:
+        """Enqueue một runtime_decision_event. Trả id đã sinh."""
+        row = {key: _plain(value) for key, value in data.items()}
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        await self._put((DECISION, row))
+        return row["id"]
+
+    async def track_hit(self, cache_id: str) -> None:
+        """Enqueue +1 hit_count cho semantic cache entry."""
+        if cache_id:
+            await self._put((CACHE_HIT, cache_id))
+
+    # ---------- Lifecycle ----------
+
+    async def flush(self) -> None:
+        """Chờ tới khi mọi bản ghi đã enqueue được ghi xuống DB."""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Graceful shutdown: flush phần còn lại rồi dừng worker."""
+        await self.flush()
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    # ---------- Internals ----------
+
+    async def _put(self, item: Tuple[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = loop.create_task(self._run(self._queue))
+        # Backpressure: chờ khi queue đầy
+        await self._queue.put(item)
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            except Exception as e:
+                logger.error(f"WriteBehindJournal: flush of {len(batch)} items failed: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _sessions(self) -> AsyncContextManager[AsyncSession]:
+        if self.session_factory is not None:
+            return self.session_factory()
+        from app.infrastructure.database.engine import get_session_maker
+        return get_session_maker()()
+
+    async def _write(self, batch: List[Tuple[str, Any]]) -> None:
+        turns = [payload for kind, payload in batch if kind == TURN]
+        decisions = [payload for kind, payload in batch if kind == DECISION]
+        hits = Counter(payload for kind, payload in batch if kind == CACHE_HIT)
+        try:
+            async with self._sessions() as db, transaction_scope(db):
+                await self._execute(db, turns, decisions, hits)
+            self.written += len(batch)
+        except Exception as e:
+            logger.warning(f"WriteBehindJournal: batch insert failed ({e}), retrying row by row")
+            await self._write_rows(turns, decisions, hits)
+
+    async def _write_rows(self, turns: List[dict], decisions: List[dict], hits: Counter) -> None:
+        items = [([t], [], Counter()) for t in turns] + [([], [d], Counter()) for d in decisions]
+        items += [([], [], Counter({cache_id: n})) for cache_id, n in hits.items()]
+        for row_turns, row_decisions, row_hits in items:
+            try:
+                async with self._sessions() as db, transaction_scope(db):
+                    await self._execute(db, row_turns, row_decisions, row_hits)
+                self.written += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.error(f"WriteBehindJournal: dropped row: {e}")
+
+    @staticmethod
+    async def _execute(db: AsyncSession, turns: List[dict], decisions: List[dict], hits: Counter) -> None:
+        # Turn trước decision (decision.input_turn_id FK -> runtime_turn)
+        for model, rows in ((TurnModel, turns), (DecisionModel, decisions)):
+            # Gom theo tập cột để executemany dùng chung một câu INSERT
+            by_columns: Dict[Tuple[str, ...], List[dict]] = {}
+            for row in rows:
+                by_columns.setdefault(tuple(sorted(row)), []).append(row)
+            for group in by_columns.values():
+                await db.execute(insert(model), group)
+        if hits:
+            stmt = (
+                update(CacheModel.__table__)
+                .where(CacheModel.__table__.c.id == bindparam("b_id"))
+                .values(
+                    hit_count=func.coalesce(CacheModel.__table__.c.hit_count, 0) + bindparam("b_n"),
+                    last_hit_at=func.now()
+                )
+            )
+            await db.execute(stmt, [{"b_id": cache_id, "b_n": n} for cache_id, n in hits.items()])
+
+
+_journal: Optional[WriteBehindJournal] = None
+
+
+def get_write_behind_journal() -> Optional[WriteBehindJournal]:
+    """Singleton. None khi tắt (WRITE_BEHIND_ENABLED=false) -> caller ghi đồng bộ như cũ."""
+    global _journal
+    settings = get_settings()
+    if not settings.write_behind_enabled:
+        return None
+    if _journal is None:
+        _journal = WriteBehindJournal(
+            max_queue=settings.write_behind_max_queue,
+            flush_size=settings.write_behind_flush_size,
+            flush_interval_ms=settings.write_behind_flush_interval_ms,
+        )
+    return _journal
+
+
+async def close_write_behind_journal() -> None:
+    if _journal is not None:
+        await _journal.close()
@@ -9,5 +9,13 @@ class LLMCircuitBreaker(CircuitBreaker):
     
     def __init__(self):
         super().__init__(name="LLMCircuitBreaker")
+
+    def record_failure(self, error: Exception) -> None:
+        """
+        Tính một lỗi vào breaker ngoài decorator (VD: lỗi giữa chừng stream).
+        Không dùng `with llm_circuit:` quanh generator: GeneratorExit khi client ngắt stream
+        đi vào nhánh thành công của __exit__ và reset bộ đếm lỗi.
+        """
+        self.__exit__(type(error), error, error.__traceback__)
         
 llm_circuit = LLMCircuitBreaker()
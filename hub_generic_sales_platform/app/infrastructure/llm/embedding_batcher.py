@@ -0,0 +1,119 @@
+"""
+Micro-batcher cho Embedding API
+
+Gom các request embedding đơn lẻ đồng thời trong vài ms rồi gửi một lần lên upstream
+(embeddings endpoint nhận mảng input). Mỗi item có Future riêng nên caller vẫn dùng
+như API đơn lẻ.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchDispatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    Background worker: lấy item đầu tiên trong queue, chờ tối đa `max_wait_ms`
+    (hoặc đủ `max_batch_size`) rồi dispatch cả batch trong một task riêng.
+    """
+
+    def __init__(self, dispatch: BatchDispatch, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.dispatch = dispatch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatching: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> List[float]:
+        """Đưa một text vào batch kế tiếp và chờ kết quả của riêng nó."""
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def close(self) -> None:
+        """Dừng worker, chờ các batch đang gửi hoàn tất."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        if self._dispatching:
+            await asyncio.gather(*self._dispatching, return_exceptions=True)
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Provider là singleton, có thể được dùng từ event loop khác (tests, scripts)
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._dispatch_batch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Text rỗng: upstream từ chối cả batch -> trả [] ngay, không gửi
+        for text, future in batch:
+            if not text.strip() and not future.done():
+                future.set_result([])
+        batch = [(text, future) for text, future in batch if text.strip()]
+        if not batch:
+            return
+        # Dedup text trùng trong cùng batch
+        positions: Dict[str, int] = {}
+        for text, _ in batch:
+            positions.setdefault(text, len(positions))
+        texts = list(positions)
+        try:
+            vectors = await self.dispatch(texts)
+        except Exception as e:
+            if len(texts) == 1:
+                logger.warning(f"EmbeddingBatcher: request failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            # Một input lỗi không được làm hỏng cả batch: gửi lại từng text riêng
+            logger.warning(f"EmbeddingBatcher: batch of {len(texts)} failed, retrying per item: {e}")
+            results = await asyncio.gather(*[self.dispatch([text]) for text in texts], return_exceptions=True)
+            for text, future in batch:
+                result = results[positions[text]]
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result[0] if result else [])
+            return
+        for text, future in batch:
+            if not future.done():
+                idx = positions[text]
+                future.set_result(vectors[idx] if idx < len(vectors) else [])
+
@@ -0,0 +1,181 @@
+"""
+Embedding Cache cho LLM provider layer
+
+- Key = model + text đã chuẩn hóa (NFC, lowercase, gộp khoảng trắng).
+- L1: LRU trong RAM (có TTL). L2: Redis (tùy chọn, cùng TTL) để chia sẻ giữa các worker.
+- Single-flight: các request đồng thời cùng key chỉ gọi upstream một lần.
+Kết quả rỗng (lỗi upstream) không được cache.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config.settings import get_settings
+from app.core.shared.unicode_normalizer import normalize_unicode
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "embedding"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_embedding_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", normalize_unicode(text or "") or "").strip().lower()
+
+
+def _cache_key(model: str, text: str) -> str:
+    h = hashlib.sha256(normalize_embedding_text(text).encode()).hexdigest()
+    return f"{PREFIX}:{model}:{h[:32]}"
+
+
+class EmbeddingCache:
+    """LRU + Redis cache cho embedding, kèm request coalescing (single-flight)."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None, redis_url: Optional[str] = None):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.embedding_cache_size
+        self.ttl = ttl if ttl is not None else settings.embedding_cache_ttl
+        self._memory: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.redis = None
+        redis_url = redis_url if redis_url is not None else settings.redis_url
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self.redis = redis.from_url(redis_url)
+                logger.info("EmbeddingCache: Connected to Redis")
+            except Exception as e:
+                logger.warning(f"EmbeddingCache: Redis unavailable: {e}")
+
+    async def get_or_compute(
+        self,
+        model: str,
+        text: str,
+        compute: Callable[[str], Awaitable[List[float]]],
+    ) -> List[float]:
+        """
+        Trả embedding từ cache, hoặc gọi `compute(text)` (một lần cho mỗi key đang in-flight).
+        Waiter không kế thừa việc owner bị cancel (client ngắt kết nối...): thấy future bị hủy thì tự tính lại.
+        """
+        key = _cache_key(model, text)
+
+        while True:
+            cached = self._get_memory(key)
+            if cached is not None:
+                self.hits += 1
+                return list(cached)
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                vector = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if pending.cancelled() and not (task and task.cancelling()):
+                    continue
+                raise
+            self.hits += 1
+            return list(vector)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            vector = await self._get_redis(key)
+            if vector is None:
+                self.misses += 1
+                vector = await compute(text)
+                if vector:
+                    await self._set(key, vector)
+            else:
+                self.hits += 1
+                self._set_memory(key, vector)
+            future.set_result(vector or [])
+            return list(vector or [])
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Tránh "exception was never retrieved" khi không có waiter
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Tra cache cho nhiều text (memory rồi Redis). None = miss."""
+        results: List[Optional[List[float]]] = []
+        for text in texts:
+            key = _cache_key(model, text)
+            vector = self._get_memory(key)
+            if vector is None:
+                vector = await self._get_redis(key)
+                if vector is not None:
+                    self._set_memory(key, vector)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            results.append(list(vector) if vector is not None else None)
+        return results
+
+    async def put(self, model: str, text: str, vector: List[float]) -> None:
+        """Ghi embedding đã tính sẵn (VD: từ batch API) vào cache."""
+        if vector:
+            await self._set(_cache_key(model, text), vector)
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def _get_memory(self, key: str) -> Optional[List[float]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if self.ttl and time.monotonic() > expires_at:
+            self._memory.pop(key, None)
+            return None
+        self._memory.move_to_end(key)
+        return vector
+
+    def _set_memory(self, key: str, vector: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (time.monotonic() + self.ttl if self.ttl else float("inf"), list(vector))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[List[float]]:
+        if not self.redis:
+            return None
+        try:
+            raw = await self.redis.get(key)
+            if raw:
+                return np.frombuffer(raw, dtype=np.float32).tolist()
+        except Exception as e:
+            logger.debug(f"Redis get error: {e}")
+        return None
+
+    async def _set(self, key: str, vector: List[float]) -> None:
+        self._set_memory(key, vector)
+        if not self.redis:
+            return
+        try:
+            payload = np.asarray(vector, dtype=np.float32).tobytes()
+            if self.ttl:
+                await self.redis.setex(key, self.ttl, payload)
+            else:
+                await self.redis.set(key, payload)
+        except Exception as e:
+            logger.debug(f"Redis set error: {e}")
@@ -29,3 +29,11 @@ class LLMProviderFactory:
 def get_llm_provider(name: Optional[str] = None) -> ILLMProvider:
     """Helper function to get the current LLM provider"""
     return LLMProviderFactory.get_provider(name)
+
+
+async def close_llm_providers() -> None:
+    """Graceful shutdown: đóng các provider đã tạo (dừng embedding batcher)."""
+    for provider in LLMProviderFactory._providers.values():
+        close = getattr(provider, "close", None)
+        if close:
+            await close()
@@ -1,12 +1,32 @@
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import json
+import logging
+from types import SimpleNamespace
 from openai import AsyncOpenAI
 
 from app.core.interfaces.llm_provider import ILLMProvider
 from app.core.config.settings import get_settings
 from app.infrastructure.llm.circuit_breaker import llm_circuit
+from app.infrastructure.llm.embedding_cache import EmbeddingCache
+from app.infrastructure.llm.embedding_batcher import EmbeddingBatcher
 from circuitbreaker import CircuitBreakerError
 
+logger = logging.getLogger(__name__)
+
+
+def _usage(usage: Any) -> Optional[Dict[str, int]]:
+    """usage của OpenAI -> dict; cached_tokens = số prompt token trúng prompt cache phía provider."""
+    if not usage:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0
+    }
+
+
 class OpenAIProvider(ILLMProvider):
     """
     Adapter: OpenAI implementation of ILLMProvider.
@@ -33,61 +53,85 @@ class OpenAIProvider(ILLMProvider):
             base_url=self.api_base if is_litellm else None,
             timeout=settings.llm_timeout
         ) if self.api_key else None
+        self.embedding_cache = EmbeddingCache() if settings.embedding_cache_enabled else None
+        self.embedding_batch_size = settings.embedding_bulk_chunk_size
+        self.embedding_batcher = EmbeddingBatcher(
+            self._fetch_embeddings,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms
+        ) if settings.embedding_batch_enabled else None
 
     async def get_embedding(self, text: str) -> List[float]:
+        """Embedding một text. Lỗi upstream -> [] (caller bỏ qua tier dùng vector)."""
         if not self.client: return []
         try:
-            resp = await self.client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
-            return resp.data[0].embedding
-        except Exception:
+            if self.embedding_cache:
+                return await self.embedding_cache.get_or_compute(self.embedding_model, text, self._fetch_embedding)
+            return await self._fetch_embedding(text)
+        except Exception as e:
+            logger.warning(f"Embedding request failed: {e}")
             return []
 
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Batch embedding: tra cache trước, phần còn thiếu gửi theo chunk (mỗi chunk 1 request)."""
+        if not self.client: return [[] for _ in texts]
+        results: List[Optional[List[float]]] = (
+            await self.embedding_cache.get_many(self.embedding_model, texts)
+            if self.embedding_cache else [None] * len(texts)
+        )
+        # Text rỗng bị upstream từ chối (làm hỏng cả chunk) -> [] và không gửi
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None and t.strip()))
+        fetched: Dict[str, List[float]] = {}
+        for start in range(0, len(missing), self.embedding_batch_size):
+            chunk = missing[start:start + self.embedding_batch_size]
+            try:
+                vectors = await self._fetch_embeddings(chunk)
+            except Exception as e:
+                # Chunk lỗi -> [] cho các text của chunk, các chunk khác vẫn dùng được
+                logger.warning(f"Embedding batch of {len(chunk)} failed: {e}")
+                continue
+            for text, vector in zip(chunk, vectors):
+                fetched[text] = vector
+                if self.embedding_cache:
+                    await self.embedding_cache.put(self.embedding_model, text, vector)
+        return [r if r is not None else fetched.get(t, []) for t, r in zip(texts, results)]
+
+    async def close(self) -> None:
+        """Dừng embedding batcher (gọi khi shutdown)."""
+        if self.embedding_batcher:
+            await self.embedding_batcher.close()
+
+    async def _fetch_embedding(self, text: str) -> List[float]:
+        if self.embedding_batcher:
+            return await self.embedding_batcher.submit(text)
+        return (await self._fetch_embeddings([text]))[0]
+
+    async def _fetch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Một request upstream cho nhiều input. Lỗi được raise (không trả list rỗng) để batcher /
+        single-flight báo lỗi cho mọi waiter; get_embedding / get_embeddings quy đổi thành [] ở biên.
+        """
+        resp = await self.client.embeddings.create(
+            model=self.embedding_model,
+            input=texts
+        )
+        vectors = [[] for _ in texts]
+        for item in resp.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
     async def generate_response(
         self, 
         system_prompt: str, 
-        user_message: str,
+        user_message: Optional[str],
         tools: Optional[List[Dict[str, Any]]] = None,
-        messages_history: Optional[List[Dict[str, str]]] = None
+        messages_history: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         if not self.client: 
             return {"response": "LLM client not configured."}
         
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Inject history if available
-        if messages_history:
-            # Validate and filter history to ensure correct format
-            valid_roles = {"user", "assistant", "system"}
-            for msg in messages_history:
-                if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                    if msg["role"] in valid_roles:
-                         messages.append(msg)
-        
-        messages.append({"role": "user", "content": user_message})
-        
         try:
-            kwargs = {
-                "model": self.chat_model,
-                "messages": messages,
-            }
-            if tools:
-                openai_tools = [
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": t["name"],
-                            "description": t["description"],
-                            "parameters": t["parameters"]
-                        }
-                    }
-                    for t in tools
-                ]
-                kwargs["tools"] = openai_tools
-                kwargs["tool_choice"] = "auto"
-
+            kwargs = self._build_chat_kwargs(system_prompt, user_message, tools, messages_history)
             resp = await self._call_api(**kwargs)
             message = resp.choices[0].message
             
@@ -95,11 +139,7 @@ class OpenAIProvider(ILLMProvider):
                 "response": message.content or "",
                 "tool_calls": message.tool_calls or [],
                 "id": resp.id,
-                "usage": {
-                    "prompt_tokens": resp.usage.prompt_tokens,
-                    "completion_tokens": resp.usage.completion_tokens,
-                    "total_tokens": resp.usage.total_tokens
-                } if hasattr(resp, 'usage') else None,
+                "usage": _usage(getattr(resp, "usage", None)),
                 "model": resp.model
             }
         except CircuitBreakerError:
@@ -116,6 +156,133 @@ class OpenAIProvider(ILLMProvider):
                 "usage": None
             }
 
+    async def stream_response(
+        self,
+        system_prompt: str,
+        user_message: Optional[str],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        messages_history: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming (OpenAI stream API): yield {"type": "delta", "content"} cho từng token,
+        cuối cùng yield {"type": "final", ...} cùng format với generate_response.
+        Tool-call deltas được ghép dần theo index.
+        """
+        if not self.client:
+            yield {"type": "final", "response": "LLM client not configured.", "tool_calls": [], "usage": None}
+            return
+
+        content_parts: List[str] = []
+        tool_parts: Dict[int, Dict[str, Any]] = {}
+        usage = None
+        resp_id = None
+        model = None
+        try:
+            kwargs = self._build_chat_kwargs(system_prompt, user_message, tools, messages_history)
+            kwargs["stream"] = True
+            kwargs["stream_options"] = {"include_usage": True}
+            stream = await self._call_api(**kwargs)
+            # _call_api chỉ bao lời gọi mở stream; lỗi giữa chừng stream cũng phải tính vào circuit breaker
+            try:
+                async for chunk in stream:
+                    resp_id = resp_id or getattr(chunk, "id", None)
+                    model = model or getattr(chunk, "model", None)
+                    if getattr(chunk, "usage", None):
+                        usage = _usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield {"type": "delta", "content": delta.content}
+                    for tc in delta.tool_calls or []:
+                        part = tool_parts.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+                        if tc.id:
+                            part["id"] = tc.id
+                        if tc.function and tc.function.name:
+                            part["name"] += tc.function.name
+                        if tc.function and tc.function.arguments:
+                            part["arguments"] += tc.function.arguments
+            except Exception as e:
+                llm_circuit.record_failure(e)
+                raise
+        except CircuitBreakerError:
+            yield {
+                "type": "final",
+                "response": "Hệ thống đang quá tải, vui lòng thử lại sau giây lát. (Circuit Breaker Open)",
+                "tool_calls": [],
+                "usage": None
+            }
+            return
+        except Exception as e:
+            logger.error(f"LLM stream failed: {e}", exc_info=True)
+            yield {
+                "type": "final",
+                "response": "Xin lỗi, tôi đang gặp chút sự cố kết nối. Bạn vui lòng thử lại câu hỏi nhé.",
+                "tool_calls": [],
+                "usage": None
+            }
+            return
+
+        tool_calls = [
+            SimpleNamespace(
+                id=part["id"],
+                type="function",
+                function=SimpleNamespace(name=part["name"], arguments=part["arguments"] or "{}")
+            )
+            for _, part in sorted(tool_parts.items())
+        ]
+        yield {
+            "type": "final",
+            "response": "".join(content_parts),
+            "tool_calls": tool_calls,
+            "id": resp_id,
+            "usage": usage,
+            "model": model
+        }
+
+    def _build_chat_kwargs(
+        self,
+        system_prompt: str,
+        user_message: Optional[str],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        messages_history: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Inject history if available (bao gồm assistant tool_calls + tool message của vòng reasoning)
+        if messages_history:
+            # Validate and filter history to ensure correct format
+            valid_roles = {"user", "assistant", "system", "tool"}
+            for msg in messages_history:
+                if isinstance(msg, dict) and "role" in msg and ("content" in msg or "tool_calls" in msg):
+                    if msg["role"] in valid_roles:
+                         messages.append(msg)
+        
+        # user_message rỗng: tiếp tục hội thoại sau tool message (không thêm lượt user)
+        if user_message:
+            messages.append({"role": "user", "content": user_message})
+
+        kwargs = {
+            "model": self.chat_model,
+            "messages": messages,
+        }
+        if tools:
+            openai_tools = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": t["name"],
+                        "description": t["description"],
+                        "parameters": t["parameters"]
+                    }
+                }
+                for t in tools
+            ]
+            kwargs["tools"] = openai_tools
+            kwargs["tool_choice"] = "auto"
+        return kwargs
+
     @llm_circuit
     async def _call_api(self, **kwargs):
         return await self.client.chat.completions.create(**kwargs)
@@ -1,12 +1,12 @@
 """
 Prometheus metrics for IRIS Hub.
-Exposes: request count, latency, tier distribution (decision counts).
+Exposes: request count, latency, tier distribution (decision counts), in-process cache tiers.
 """
 import time
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 try:
-    from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
     PROMETHEUS_AVAILABLE = True
 except ImportError:
     PROMETHEUS_AVAILABLE = False
@@ -15,11 +15,17 @@ except ImportError:
 _http_requests_total: Optional["Counter"] = None
 _http_request_duration_seconds: Optional["Histogram"] = None
 _iris_decisions_total: Optional["Counter"] = None
+_iris_agent_stage_seconds: Optional["Histogram"] = None
+_iris_llm_tokens_total: Optional["Counter"] = None
+_iris_cache_memory_bytes: Optional["Gauge"] = None
+_iris_cache_entries: Optional["Gauge"] = None
+_iris_cache_events: Optional["Gauge"] = None
 
 
 def _ensure_metrics():
     """Initialize metrics on first use."""
-    global _http_requests_total, _http_request_duration_seconds, _iris_decisions_total
+    global _http_requests_total, _http_request_duration_seconds, _iris_decisions_total, _iris_agent_stage_seconds
+    global _iris_llm_tokens_total, _iris_cache_memory_bytes, _iris_cache_entries, _iris_cache_events
     if not PROMETHEUS_AVAILABLE:
         return
     if _http_requests_total is not None:
@@ -40,6 +46,32 @@ def _ensure_metrics():
         "Total routing decisions by tier",
         ["tier"]
     )
+    _iris_agent_stage_seconds = Histogram(
+        "iris_agent_stage_seconds",
+        "Agentic path latency per stage (context assembly, intent, llm, tools)",
+        ["stage"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    )
+    _iris_llm_tokens_total = Counter(
+        "iris_llm_tokens_total",
+        "LLM tokens of the agentic path by kind (prompt, cached, completion)",
+        ["kind"]
+    )
+    _iris_cache_memory_bytes = Gauge(
+        "iris_cache_memory_bytes",
+        "Estimated memory of bounded in-process cache tiers",
+        ["cache"]
+    )
+    _iris_cache_entries = Gauge(
+        "iris_cache_entries",
+        "Entries in bounded in-process cache tiers",
+        ["cache"]
+    )
+    _iris_cache_events = Gauge(
+        "iris_cache_events",
+        "Cumulative hit / miss / eviction / expiration counts of bounded in-process cache tiers",
+        ["cache", "event"]
+    )
 
 
 def record_request(method: str, path_template: str, status: int, duration_seconds: float) -> None:
@@ -69,10 +101,43 @@ def record_decision_tier(tier: str) -> None:
     _iris_decisions_total.labels(tier=t).inc()
 
 
+def record_agent_stage(stage: str, duration_seconds: float) -> None:
+    """Record latency of one AgentOrchestrator stage."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    _ensure_metrics()
+    _iris_agent_stage_seconds.labels(stage=stage).observe(duration_seconds)
+
+
+def record_llm_tokens(usage: Dict[str, Any]) -> None:
+    """Record token usage of one LLM call (cached = prompt tokens served from provider prompt cache)."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    _ensure_metrics()
+    for kind, key in (("prompt", "prompt_tokens"), ("cached", "cached_tokens"), ("completion", "completion_tokens")):
+        value = usage.get(key) or 0
+        if value:
+            _iris_llm_tokens_total.labels(kind=kind).inc(value)
+
+
+def record_cache_stats() -> None:
+    """Snapshot stats của các BoundedTTLCache vào gauges (gọi khi scrape /metrics)."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    _ensure_metrics()
+    from app.infrastructure.cache.bounded_cache import get_cache_stats
+    for name, stats in get_cache_stats().items():
+        _iris_cache_memory_bytes.labels(cache=name).set(stats["memory_bytes"])
+        _iris_cache_entries.labels(cache=name).set(stats["entries"])
+        for event in ("hits", "misses", "evictions", "expirations"):
+            _iris_cache_events.labels(cache=name, event=event).set(stats[event])
+
+
 def get_prometheus_output() -> Tuple[bytes, str]:
     """Return (body, content_type) for /metrics endpoint."""
     if not PROMETHEUS_AVAILABLE:
         return b"# prometheus_client not installed\n", "text/plain; charset=utf-8"
+    record_cache_stats()
     return generate_latest(), CONTENT_TYPE_LATEST
 
 
@@ -0,0 +1,31 @@
+"""Search infrastructure - In-process vector index & full-text (BM25) index"""
+
+from app.infrastructure.search.vector_index import (
+    VectorIndex,
+    VectorIndexRegistry,
+    get_vector_index_registry,
+    FAQ_NAMESPACE,
+    SEMANTIC_CACHE_NAMESPACE,
+    OFFERING_VERSION_NAMESPACE,
+)
+from app.infrastructure.search.text_index import (
+    TextIndex,
+    TextIndexRegistry,
+    get_text_index_registry,
+    tokenize,
+    CATALOG_NAMESPACE,
+)
+
+__all__ = [
+    "VectorIndex",
+    "VectorIndexRegistry",
+    "get_vector_index_registry",
+    "FAQ_NAMESPACE",
+    "SEMANTIC_CACHE_NAMESPACE",
+    "OFFERING_VERSION_NAMESPACE",
+    "TextIndex",
+    "TextIndexRegistry",
+    "get_text_index_registry",
+    "tokenize",
+    "CATALOG_NAMESPACE",
+]
@@ -0,0 +1,222 @@
+"""
+In-process Full-text Index (BM25) cho catalog search
+
+Mỗi (namespace, tenant) có một inverted index trong RAM:
+- Tokenize: bỏ dấu tiếng Việt + lowercase (fold_diacritics) rồi tách theo \\w+,
+  nên "dien thoai", "Điện Thoại" cùng về một term.
+- Ranking: BM25 với trọng số theo field (name > code > attributes > description).
+- Prefix matching: token của query khớp các term bắt đầu bằng nó ("ip" -> "iphone"),
+  điểm nhân `prefix_weight` để match chính xác luôn xếp trên.
+
+Giống VectorIndex: index chỉ trả (id, score) ứng viên, repository hydrate lại từ DB
+và kiểm tra status nên entry cũ không gây sai kết quả. Index build lazily từ DB,
+cập nhật incremental khi version/attribute thay đổi, hết hạn theo TTL.
+"""
+import bisect
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.config.settings import get_settings
+from app.core.shared.unicode_normalizer import fold_diacritics
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAMESPACE = "catalog"
+
+DEFAULT_FIELD_WEIGHTS: Dict[str, float] = {
+    "name": 3.0,
+    "code": 2.0,
+    "attributes": 1.5,
+    "description": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokenize không dấu: 'Điện thoại iPhone-15' -> ['dien', 'thoai', 'iphone', '15']."""
+    return _TOKEN_RE.findall(fold_diacritics(text))
+
+
+class TextIndex:
+    """Inverted index BM25 cho một tenant, cập nhật incremental (upsert/remove)."""
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Optional[Mapping[str, float]] = None,
+        prefix_weight: float = 0.5,
+        max_prefix_expansions: int = 32,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self.prefix_weight = prefix_weight
+        self.max_prefix_expansions = max_prefix_expansions
+        # term -> {doc_id: tf có trọng số field}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        # Vocabulary đã sắp xếp cho prefix lookup (bisect)
+        self._vocab: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+    def upsert(self, doc_id: str, fields: Mapping[str, Optional[str]]) -> bool:
+        """Index (lại) document. Document không có token nào sẽ bị xóa."""
+        self.remove(doc_id)
+        terms: Counter = Counter()
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            for token in tokenize(text):
+                terms[token] += weight
+        if not terms:
+            return False
+
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocab, term)
+            postings[doc_id] = tf
+        length = float(sum(terms.values()))
+        self._doc_terms[doc_id] = dict(terms)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        return True
+
+    def remove(self, doc_id: str) -> bool:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                pos = bisect.bisect_left(self._vocab, term)
+                if pos < len(self._vocab) and self._vocab[pos] == term:
+                    self._vocab.pop(pos)
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+        return True
+
+    def search(self, query: str, k: int = 10, prefix: bool = True) -> List[Tuple[str, float]]:
+        """
+        Trả tối đa k cặp (doc_id, bm25_score) giảm dần.
+        Mỗi token của query lấy điểm cao nhất giữa term khớp chính xác và các term khớp prefix.
+        """
+        n = len(self._doc_len)
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if n == 0 or k <= 0 or not tokens:
+            return []
+        avg_len = self._total_len / n if n else 1.0
+
+        scores: Dict[str, float] = {}
+        for token in tokens:
+            best: Dict[str, float] = {}
+            candidates = [(token, 1.0)] if token in self._postings else []
+            if prefix:
+                candidates += [(term, self.prefix_weight) for term in self._expand_prefix(token) if term != token]
+            for term, boost in candidates:
+                postings = self._postings[term]
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    score = boost * idf * tf * (self.k1 + 1.0) / (tf + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+    def _expand_prefix(self, token: str) -> List[str]:
+        if len(token) < 2:
+            return []
+        start = bisect.bisect_left(self._vocab, token)
+        terms: List[str] = []
+        for term in self._vocab[start:start + self.max_prefix_expansions + 1]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+
+class TextIndexRegistry:
+    """
+    Quản lý index theo (namespace, tenant_id).
+    Index hết hạn sau `ttl_seconds` để đồng bộ lại với DB (ghi từ worker khác).
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._indexes: Dict[Tuple[str, str], Tuple[TextIndex, float]] = {}
+
+    def get(self, namespace: str, tenant_id: str) -> Optional[TextIndex]:
+        """Lấy index còn hạn, None nếu chưa build hoặc đã hết hạn."""
+        entry = self._indexes.get((namespace, tenant_id))
+        if not entry:
+            return None
+        index, built_at = entry
+        if self.ttl_seconds and time.monotonic() - built_at > self.ttl_seconds:
+            self._indexes.pop((namespace, tenant_id), None)
+            return None
+        return index
+
+    def build(
+        self,
+        namespace: str,
+        tenant_id: str,
+        documents: Sequence[Tuple[str, Mapping[str, Optional[str]]]],
+    ) -> TextIndex:
+        """Build index từ danh sách (id, fields) và đăng ký."""
+        index = TextIndex()
+        for doc_id, fields in documents:
+            index.upsert(doc_id, fields)
+        self._indexes[(namespace, tenant_id)] = (index, time.monotonic())
+        logger.debug(f"TextIndex: built {namespace}/{tenant_id} with {len(index)} documents")
+        return index
+
+    def upsert(self, namespace: str, tenant_id: str, doc_id: str, fields: Mapping[str, Optional[str]]) -> None:
+        """Cập nhật incremental. Bỏ qua nếu index chưa build (lần build sau sẽ load từ DB)."""
+        index = self.get(namespace, tenant_id)
+        if index is not None:
+            index.upsert(doc_id, fields)
+
+    def remove(self, namespace: str, tenant_id: str, doc_id: str) -> None:
+        index = self.get(namespace, tenant_id)
+        if index is not None:
+            index.remove(doc_id)
+
+    def invalidate(self, namespace: Optional[str] = None, tenant_id: Optional[str] = None) -> None:
+        """Xóa index theo namespace/tenant (None = tất cả)."""
+        for key in list(self._indexes):
+            if (namespace is None or key[0] == namespace) and (tenant_id is None or key[1] == tenant_id):
+                self._indexes.pop(key, None)
+
+
+_registry: Optional[TextIndexRegistry] = None
+
+
+def get_text_index_registry() -> Optional[TextIndexRegistry]:
+    """Singleton registry. Trả None khi tắt qua TEXT_INDEX_ENABLED=false."""
+    global _registry
+    settings = get_settings()
+    if not settings.text_index_enabled:
+        return None
+    if _registry is None:
+        _registry = TextIndexRegistry(ttl_seconds=settings.text_index_ttl_seconds)
+    return _registry
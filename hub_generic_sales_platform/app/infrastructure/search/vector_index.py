@@ -0,0 +1,288 @@
+"""
+In-process Vector Index cho Tier 2 (FAQ, Semantic Cache, Offering search)
+
+Mỗi (namespace, tenant) có một index riêng trong RAM:
+- Tenant nhỏ: ma trận NumPy đã chuẩn hóa (flat, exact search bằng 1 phép nhân ma trận).
+- Tenant lớn: IVF (k-means coarse quantizer), chỉ quét `nprobe` cụm gần nhất.
+
+Index chỉ trả về (id, score) ứng viên; repository vẫn hydrate từ DB và kiểm tra lại
+các điều kiện (is_active, status, ...) nên entry cũ/phantom không gây sai kết quả.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config.settings import get_settings
+from app.core.shared.vector_similarity import cosine_top_k
+
+logger = logging.getLogger(__name__)
+
+FAQ_NAMESPACE = "faq"
+SEMANTIC_CACHE_NAMESPACE = "semantic_cache"
+OFFERING_VERSION_NAMESPACE = "offering_version"  # id = offering_id, vector của version active
+
+
+def _as_unit_vector(vector: Any, dim: Optional[int] = None) -> Optional[np.ndarray]:
+    """Chuyển vector sang float32 đã chuẩn hóa. Trả None nếu rỗng/sai chiều/zero."""
+    if vector is None:
+        return None
+    arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if arr.size == 0 or (dim is not None and arr.size != dim):
+        return None
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return arr / norm
+
+
+class VectorIndex:
+    """
+    Index cosine similarity cho một tenant, cập nhật incremental (upsert/remove).
+    Tự chuyển sang IVF khi số vector >= `ivf_min_size`.
+    """
+
+    def __init__(self, ivf_min_size: int = 5000, nprobe: int = 8):
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.dim: Optional[int] = None
+        # Ma trận, cụm IVF và norm được cấp phát theo capacity (tăng gấp đôi), chỉ n dòng đầu có nghĩa
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._norms = np.ones(0, dtype=np.float32)
+        self._ids: List[str] = []
+        self._attrs: List[Dict[str, Any]] = []
+        self._pos: Dict[str, int] = {}
+        # IVF state
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._pos
+
+    @property
+    def is_ivf(self) -> bool:
+        return self._centroids is not None
+
+    def upsert(self, item_id: str, vector: Any, attrs: Optional[Dict[str, Any]] = None) -> bool:
+        """Thêm hoặc cập nhật vector. Vector không hợp lệ sẽ xóa entry cũ (nếu có)."""
+        unit = _as_unit_vector(vector, self.dim)
+        if unit is None:
+            self.remove(item_id)
+            return False
+        if self.dim is None:
+            self.dim = unit.size
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+        row = self._pos.get(item_id)
+        if row is None:
+            row = len(self._ids)
+            if row >= self._matrix.shape[0]:
+                self._grow(max(16, self._matrix.shape[0] * 2))
+            self._ids.append(item_id)
+            self._attrs.append(attrs or {})
+            self._pos[item_id] = row
+            self._assign[row] = 0
+        else:
+            self._attrs[row] = attrs or {}
+
+        self._matrix[row] = unit
+        if self._centroids is not None:
+            self._assign[row] = int(np.argmax(self._centroids @ unit))
+        self._maybe_train()
+        return True
+
+    def remove(self, item_id: str) -> bool:
+        """Xóa entry (swap với phần tử cuối để giữ ma trận liên tục)."""
+        row = self._pos.pop(item_id, None)
+        if row is None:
+            return False
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._attrs[row] = self._attrs[last]
+            self._matrix[row] = self._matrix[last]
+            self._assign[row] = self._assign[last]
+            self._pos[moved_id] = row
+        self._ids.pop()
+        self._attrs.pop()
+        if self._centroids is not None and len(self._ids) < self.ivf_min_size // 2:
+            self._centroids = None
+            self._trained_size = 0
+        return True
+
+    def search(
+        self,
+        query_vector: Any,
+        k: int = 5,
+        threshold: float = 0.0,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Trả về tối đa k cặp (id, similarity) có similarity >= threshold, giảm dần.
+        `where`: lọc theo attrs (bằng nhau), bỏ qua key có value None.
+        """
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return []
+        query = _as_unit_vector(query_vector, self.dim)
+        if query is None:
+            return []
+
+        conditions = {key: value for key, value in (where or {}).items() if value is not None}
+        if self._centroids is None and not conditions:
+            # Flat: quét toàn bộ ma trận (view liên tục, không copy)
+            rows, scores = cosine_top_k(query, self._matrix[:n], k, threshold=threshold, norms=self._unit_norms(n))
+            return [(self._ids[r], float(s)) for r, s in zip(rows, scores)]
+
+        if self._centroids is not None:
+            centroid_scores = self._centroids @ query
+            nprobe = min(self.nprobe, centroid_scores.size)
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            candidates = np.nonzero(np.isin(self._assign[:n], probe))[0]
+        else:
+            candidates = np.arange(n)
+
+        if conditions:
+            candidates = np.array(
+                [r for r in candidates if all(self._attrs[r].get(key) == value for key, value in conditions.items())],
+                dtype=np.int64,
+            )
+        if candidates.size == 0:
+            return []
+
+        rows, scores = cosine_top_k(
+            query, self._matrix[candidates], k, threshold=threshold, norms=self._unit_norms(candidates.size)
+        )
+        return [(self._ids[candidates[r]], float(s)) for r, s in zip(rows, scores)]
+
+    def _unit_norms(self, size: int) -> np.ndarray:
+        """Các dòng đã chuẩn hóa khi upsert nên norm luôn là 1: view của mảng dựng sẵn, không cấp phát."""
+        return self._norms[:size]
+
+    def _grow(self, capacity: int) -> None:
+        n = len(self._ids)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:n] = self._matrix[:n]
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[:n] = self._assign[:n]
+        self._matrix = matrix
+        self._assign = assign
+        self._norms = np.ones(capacity, dtype=np.float32)
+
+    def _maybe_train(self) -> None:
+        """(Re)train IVF khi đủ lớn hoặc kích thước đã tăng gấp đôi kể từ lần train trước."""
+        n = len(self._ids)
+        if n < self.ivf_min_size:
+            return
+        if self._centroids is not None and n < self._trained_size * 2:
+            return
+        self._train_ivf()
+
+    def _train_ivf(self, iterations: int = 8) -> None:
+        n = len(self._ids)
+        data = self._matrix[:n]
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(n, size=nlist, replace=False)].copy()
+        assign = np.zeros(n, dtype=np.int32)
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+            for c in range(nlist):
+                members = data[assign == c]
+                if len(members):
+                    mean = members.mean(axis=0)
+                    norm = np.linalg.norm(mean)
+                    if norm > 0:
+                        centroids[c] = mean / norm
+        self._centroids = centroids
+        self._assign[:n] = np.argmax(data @ centroids.T, axis=1)
+        self._trained_size = n
+        logger.debug(f"VectorIndex: trained IVF with {nlist} lists over {n} vectors")
+
+
+class VectorIndexRegistry:
+    """
+    Quản lý index theo (namespace, tenant_id).
+    Index hết hạn sau `ttl_seconds` để đồng bộ lại với DB (ghi từ worker khác).
+    """
+
+    def __init__(self, ttl_seconds: int = 300, ivf_min_size: int = 5000, nprobe: int = 8):
+        self.ttl_seconds = ttl_seconds
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self._indexes: Dict[Tuple[str, str], Tuple[VectorIndex, float]] = {}
+
+    def new_index(self) -> VectorIndex:
+        return VectorIndex(ivf_min_size=self.ivf_min_size, nprobe=self.nprobe)
+
+    def get(self, namespace: str, tenant_id: str) -> Optional[VectorIndex]:
+        """Lấy index còn hạn, None nếu chưa build hoặc đã hết hạn."""
+        entry = self._indexes.get((namespace, tenant_id))
+        if not entry:
+            return None
+        index, built_at = entry
+        if self.ttl_seconds and time.monotonic() - built_at > self.ttl_seconds:
+            self._indexes.pop((namespace, tenant_id), None)
+            return None
+        return index
+
+    def build(
+        self,
+        namespace: str,
+        tenant_id: str,
+        items: Sequence[Tuple[str, Any, Optional[Dict[str, Any]]]],
+    ) -> VectorIndex:
+        """Build index từ danh sách (id, vector, attrs) và đăng ký."""
+        index = self.new_index()
+        for item_id, vector, attrs in items:
+            index.upsert(item_id, vector, attrs)
+        self._indexes[(namespace, tenant_id)] = (index, time.monotonic())
+        return index
+
+    def upsert(
+        self,
+        namespace: str,
+        tenant_id: str,
+        item_id: str,
+        vector: Any,
+        attrs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Cập nhật incremental. Bỏ qua nếu index chưa build (lần build sau sẽ load từ DB)."""
+        index = self.get(namespace, tenant_id)
+        if index is not None:
+            index.upsert(item_id, vector, attrs)
+
+    def remove(self, namespace: str, tenant_id: str, item_id: str) -> None:
+        index = self.get(namespace, tenant_id)
+        if index is not None:
+            index.remove(item_id)
+
+    def invalidate(self, namespace: Optional[str] = None, tenant_id: Optional[str] = None) -> None:
+        """Xóa index theo namespace/tenant (None = tất cả)."""
+        for key in list(self._indexes):
+            if (namespace is None or key[0] == namespace) and (tenant_id is None or key[1] == tenant_id):
+                self._indexes.pop(key, None)
+
+
+_registry: Optional[VectorIndexRegistry] = None
+
+
+def get_vector_index_registry() -> Optional[VectorIndexRegistry]:
+    """Singleton registry. Trả None khi tắt qua VECTOR_INDEX_ENABLED=false."""
+    global _registry
+    settings = get_settings()
+    if not settings.vector_index_enabled:
+        return None
+    if _registry is None:
+        _registry = VectorIndexRegistry(
+            ttl_seconds=settings.vector_index_ttl_seconds,
+            ivf_min_size=settings.vector_index_ivf_min_size,
+            nprobe=settings.vector_index_nprobe,
+        )
+    return _registry
@@ -190,17 +190,9 @@ async def list_offerings(
             resolved_domain_id = bot.domain_id
         
     service = CatalogService(db)
-    offerings = await service.offering_repo.get_active_offerings(tenant_id, domain_id=resolved_domain_id)
-    
-    result = []
-    for o in offerings:
-        summary = await service.get_offering_for_bot(
-            tenant_id, o.code, channel, domain_id=o.domain_id, enabled_capabilities=["inventory"]
-        )
-        if summary:
-            result.append(summary)
-            
-    return result
+    return await service.get_offerings_for_bot_bulk(
+        tenant_id, channel_code=channel, domain_id=resolved_domain_id, enabled_capabilities=["inventory"]
+    )
 
 @catalog_router.get("/offerings/{code}", response_model=OfferingSummaryResponse)
 async def get_offering_detail(
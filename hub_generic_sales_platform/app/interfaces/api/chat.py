@@ -1,12 +1,14 @@
 """
 Runtime Chat API
 """
+import json
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional
 from pydantic import BaseModel, Field
 
-from app.infrastructure.database.engine import get_session
+from app.infrastructure.database.engine import get_session, get_session_maker
 from app.application.orchestrators.hybrid_orchestrator import HybridOrchestrator
 from app.interfaces.api.dependencies import get_current_tenant_id
 from app.core.shared.exceptions import EntityNotFoundError
@@ -81,3 +83,75 @@ async def widget_chat_message(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ========== Streaming (SSE) ==========
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def stream_chat_events(
+    tenant_id: str,
+    bot_id: str,
+    message: str,
+    session_id: Optional[str] = None,
+    channel_code: str = "webchat"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Chạy HybridOrchestrator ở chế độ streaming với DB session riêng
+    (dependency session có thể đóng trước khi StreamingResponse kết thúc).
+    Log turn/decision ghi inline rồi commit cuối stream.
+    """
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        orchestrator = HybridOrchestrator(db)
+        try:
+            async for event in orchestrator.handle_message_stream(
+                tenant_id=tenant_id,
+                bot_id=bot_id,
+                message=message,
+                session_id=session_id,
+                background_tasks=None,
+                channel_code=channel_code
+            ):
+                if event["type"] == "final":
+                    await db.commit()
+                elif event["type"] == "error":
+                    await db.rollback()
+                yield event
+        finally:
+            await orchestrator.agent_orchestrator.close()
+
+
+async def _sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for event in events:
+        if event["type"] == "token":
+            yield _sse_event("token", {"content": event["content"]})
+        elif event["type"] == "final":
+            yield _sse_event("final", event["data"])
+        else:
+            yield _sse_event("error", {"detail": event.get("message")})
+
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@chat_router.post("/chat/message/stream")
+async def chat_message_stream(
+    request: ChatMessageRequest,
+    tenant_id: str = Depends(get_current_tenant_id)
+):
+    """
+    Streaming chat (Server-Sent Events).
+    Events: `token` ({"content"}) khi Agent đang sinh câu trả lời, `final` (payload như /chat/message), `error`.
+    """
+    events = stream_chat_events(tenant_id, request.bot_id, request.message, request.session_id)
+    return StreamingResponse(_sse_stream(events), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@chat_router.post("/chat/widget-message/stream")
+async def widget_chat_message_stream(request: WidgetChatRequest):
+    """Streaming chat cho Web Widget (public, SSE). Cùng format event với /chat/message/stream."""
+    events = stream_chat_events(request.tenant_id, request.bot_id, request.message, request.session_id)
+    return StreamingResponse(_sse_stream(events), media_type="text/event-stream", headers=_SSE_HEADERS)
@@ -4,12 +4,11 @@ Logs & Conversation History API (Read-only + Handover)
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update as sa_update
 from typing import Optional, List
 
 from app.infrastructure.database.engine import get_session
 from app.infrastructure.database.repositories import SessionRepository, ConversationTurnRepository, ContextSlotRepository
-from app.infrastructure.database.models.runtime import RuntimeSession
+from app.core.shared.exceptions import ConcurrentUpdateError
 from app.interfaces.api.dependencies import get_current_tenant_id
 from app.infrastructure.websocket import get_monitor_ws_manager
 
@@ -147,16 +146,19 @@ async def handover_session(
     # Gửi thông báo khách (Zalo/Web) trước khi cập nhật DB
     await _notify_customer_handover(db, session, tenant_id)
 
-    stmt = (
-        sa_update(RuntimeSession)
-        .where(RuntimeSession.id == session_id, RuntimeSession.tenant_id == tenant_id)
-        .values(
-            lifecycle_state="handover",
-            flow_context={"handover_at": datetime.now(timezone.utc).isoformat(), "human_controlled": True},
-            state_updated_at=datetime.now(timezone.utc),
-        )
-    )
-    await db.execute(stmt)
+    # Qua SessionRepository.update: tăng version + invalidate/write-through hot-state cache,
+    # để read_session_state (HybridOrchestrator) thấy HANDOVER ngay
+    handover_values = {
+        "lifecycle_state": "handover",
+        "flow_context": {"handover_at": datetime.now(timezone.utc).isoformat(), "human_controlled": True},
+        "state_updated_at": datetime.now(timezone.utc),
+    }
+    try:
+        await session_repo.update(session, dict(handover_values), tenant_id=tenant_id)
+    except ConcurrentUpdateError:
+        # Snapshot (từ cache) lệch version: update đã invalidate cache -> đọc lại từ DB và thử lại
+        session = await session_repo.get(session_id, tenant_id=tenant_id)
+        await session_repo.update(session, dict(handover_values), tenant_id=tenant_id)
     await db.commit()
 
     # Gửi thông báo WebSocket cho Monitor (client cập nhật UI real-time)
@@ -1,11 +1,13 @@
 """
-WebSocket API - Monitor real-time updates (Handover notifications)
+WebSocket API - Monitor real-time updates (Handover notifications) + Widget streaming chat
 
 Client kết nối để nhận thông báo khi session chuyển sang handover.
 Browser WebSocket API không gửi được custom headers → dùng token trong query.
 """
+import json
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from pydantic import ValidationError
 
 from app.infrastructure.websocket import get_monitor_ws_manager
 from app.core.services.auth_service import AuthService
@@ -51,3 +53,44 @@ async def monitor_websocket(
         pass
     finally:
         await manager.disconnect(websocket, tenant_id)
+
+
+@ws_router.websocket("/ws/widget-chat")
+async def widget_chat_websocket(websocket: WebSocket):
+    """
+    WebSocket streaming chat cho Web Widget (public, như /chat/widget-message).
+    Client gửi: {"tenant_id", "bot_id", "message", "session_id"?} (hoặc {"type": "ping"}).
+    Server trả: {"type": "token", "content"}..., rồi {"type": "final", "data"} hoặc {"type": "error", "detail"}.
+    """
+    # Import muộn để tránh vòng import api.chat <-> orchestrators khi load router
+    from app.interfaces.api.chat import WidgetChatRequest, stream_chat_events
+
+    await websocket.accept()
+    try:
+        while True:
+            # Endpoint public: frame không phải JSON object -> báo lỗi, giữ kết nối
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await websocket.send_json({"type": "error", "detail": "Payload phải là JSON object."})
+                continue
+            if data.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            try:
+                request = WidgetChatRequest(**data)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": e.errors(include_url=False)})
+                continue
+
+            async for event in stream_chat_events(
+                request.tenant_id, request.bot_id, request.message, request.session_id
+            ):
+                if event["type"] == "error":
+                    await websocket.send_json({"type": "error", "detail": event.get("message")})
+                else:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
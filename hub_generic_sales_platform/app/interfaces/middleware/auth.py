@@ -76,6 +76,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
             "/api/v1/auth/login",
             # /api/v1/tenants REMOVED - Admin API requires JWT
             "/api/v1/chat/widget-message",  # Public widget chat
+            "/api/v1/chat/widget-message/stream",  # Public widget chat (SSE)
             "/webhooks/zalo/message",
             "/webhooks/facebook/message",
         ]
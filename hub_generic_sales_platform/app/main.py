@@ -1,5 +1,6 @@
 """FastAPI application"""
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import sys
@@ -31,12 +32,34 @@ from app.interfaces.webhooks.zalo import zalo_router
 from app.interfaces.webhooks.facebook import fb_router
 
 settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    governance_task = None
+    if settings.semantic_cache_governance_interval > 0:
+        from app.application.services.semantic_cache_governance import run_semantic_cache_governance_loop
+        governance_task = asyncio.create_task(
+            run_semantic_cache_governance_loop(settings.semantic_cache_governance_interval)
+        )
+    yield
+    if governance_task:
+        governance_task.cancel()
+    # Graceful shutdown: flush log runtime còn trong write-behind journal
+    from app.infrastructure.database.write_behind import close_write_behind_journal
+    await close_write_behind_journal()
+    # Dừng embedding micro-batcher, chờ các batch đang gửi
+    from app.infrastructure.llm.factory import close_llm_providers
+    await close_llm_providers()
+
+
 # print(settings.database_url)
 app = FastAPI(
     title=settings.title,
     description=settings.description,
     version=settings.app_version,
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # CORS middleware - MUST be added first to handle preflight requests
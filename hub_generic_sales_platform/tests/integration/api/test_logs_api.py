@@ -85,6 +85,38 @@ async def test_handover_session(client, tenant_1, bot_1, db):
     )
 
 
+@pytest.mark.asyncio
+async def test_handover_visible_through_session_state_cache(client, tenant_1, bot_1, db):
+    """get (nạp hot-state cache) -> handover -> read_session_state trả HANDOVER, không phải snapshot cũ"""
+    from app.infrastructure.database.repositories import SessionRepository
+    from app.application.services.session_state import SessionStateHandler
+
+    bv = await BotVersionRepository(db).create({"bot_id": bot_1.id, "version": 1, "is_active": True})
+    session_repo = SessionRepository(db)
+    created = await session_repo.create(
+        {"bot_id": bot_1.id, "bot_version_id": str(bv.id), "channel_code": "webchat", "lifecycle_state": "browsing"},
+        tenant_id=tenant_1.id,
+    )
+    await db.commit()
+    cached = await session_repo.get(created.id, tenant_id=tenant_1.id)
+    assert cached.lifecycle_state == "browsing"
+
+    with patch("app.core.services.auth_service.AuthService.get_user_from_token", new_callable=AsyncMock) as m:
+        m.return_value = _mock_user(tenant_1.id)
+        with patch("app.interfaces.api.logs.get_monitor_ws_manager", return_value=AsyncMock()), \
+                patch("app.interfaces.api.logs._notify_customer_handover", new_callable=AsyncMock):
+            resp = await client.post(
+                f"/api/v1/sessions/{created.id}/handover",
+                headers={"Authorization": "Bearer test_token"},
+            )
+    assert resp.status_code == 200
+
+    state = await SessionStateHandler(db).read_session_state(created.id, tenant_1.id)
+    assert state.lifecycle_state == "handover"
+    assert state.version == created.version + 1
+    assert state.is_handover_mode()
+
+
 @pytest.mark.asyncio
 async def test_handover_session_404(client, tenant_1):
     """Test handover returns 404 for non-existent session"""
@@ -25,3 +25,354 @@ async def test_get_offering_for_bot_v4(db, offering_v4, channel_web):
     assert "price" in data
     assert "inventory" in data
     assert data["name"] == "Standard Offering Name"  # Lấy từ active version
+
+
+@pytest.mark.integration
+async def test_get_offerings_for_bot_bulk_matches_single_lookup(db, tenant_1, bot_1, offering_v4, channel_web):
+    """Bản bulk trả đúng dữ liệu như get_offering_for_bot cho từng offering (giá, tồn kho, thuộc tính, config)"""
+    import uuid
+    from app.infrastructure.database.models.offering import (
+        TenantOffering, TenantOfferingVersion, TenantOfferingVariant, TenantPriceList,
+        TenantVariantPrice, TenantInventoryLocation, TenantInventoryItem, TenantOfferingAttributeValue
+    )
+    from app.infrastructure.database.models.knowledge import DomainAttributeDefinition, TenantAttributeConfig
+
+    color = DomainAttributeDefinition(domain_id=bot_1.domain_id, key=f"color-{uuid.uuid4().hex[:4]}", value_type="text")
+    db.add(color)
+    await db.flush()
+    db.add(TenantAttributeConfig(tenant_id=tenant_1.id, attribute_def_id=color.id, label="Màu", display_order=2))
+    price_list = TenantPriceList(tenant_id=tenant_1.id, channel_id=channel_web.id, code="WEB-PL")
+    location = TenantInventoryLocation(tenant_id=tenant_1.id, code="WH1")
+    db.add_all([price_list, location])
+    await db.flush()
+
+    second = TenantOffering(tenant_id=tenant_1.id, domain_id=bot_1.domain_id, code=f"off-{uuid.uuid4().hex[:8]}", status=OfferingStatus.ACTIVE)
+    archived = TenantOffering(tenant_id=tenant_1.id, domain_id=bot_1.domain_id, code=f"off-{uuid.uuid4().hex[:8]}", status=OfferingStatus.ARCHIVED)
+    db.add_all([second, archived])
+    await db.flush()
+    second_version = TenantOfferingVersion(offering_id=second.id, version=1, name="Second", status=OfferingStatus.ACTIVE)
+    cheap = TenantOfferingVariant(tenant_id=tenant_1.id, offering_id=second.id, sku=f"{second.code}-A", name="A")
+    pricey = TenantOfferingVariant(tenant_id=tenant_1.id, offering_id=second.id, sku=f"{second.code}-B", name="B")
+    db.add_all([second_version, cheap, pricey,
+                TenantOfferingVersion(offering_id=archived.id, version=1, name="Old", status=OfferingStatus.ACTIVE)])
+    await db.flush()
+    db.add_all([
+        TenantVariantPrice(price_list_id=price_list.id, variant_id=pricey.id, amount=200),
+        TenantVariantPrice(price_list_id=price_list.id, variant_id=cheap.id, amount=150, compare_at=180),
+        TenantInventoryItem(tenant_id=tenant_1.id, variant_id=cheap.id, location_id=location.id, stock_qty=5, safety_stock=1),
+        TenantOfferingAttributeValue(offering_version_id=second_version.id, attribute_def_id=color.id, value_text="Đỏ"),
+    ])
+    await db.flush()
+
+    service = CatalogService(db)
+    bulk = await service.get_offerings_for_bot_bulk(
+        tenant_1.id, channel_code="WEB", domain_id=bot_1.domain_id, enabled_capabilities=["inventory"]
+    )
+    assert {o["code"] for o in bulk} == {offering_v4.code, second.code}
+
+    for item in bulk:
+        single = await service.get_offering_for_bot(
+            tenant_1.id, item["code"], "WEB", domain_id=bot_1.domain_id, enabled_capabilities=["inventory"]
+        )
+        assert item == single
+
+    by_code = {o["code"]: o for o in bulk}
+    assert by_code[second.code]["price"] == {"amount": 150.0, "currency": "VND", "compare_at": 180.0}
+    assert by_code[second.code]["attributes"] == {color.key: "Đỏ"}
+    assert by_code[second.code]["attributes_metadata"][color.key]["label"] == "Màu"
+
+    # Theo codes: giữ thứ tự, bỏ offering không active / không tồn tại
+    ordered = await service.get_offerings_for_bot_bulk(
+        tenant_1.id, codes=[second.code, archived.code, "missing", offering_v4.code]
+    )
+    assert [o["code"] for o in ordered] == [second.code, offering_v4.code]
+    assert await service.get_offerings_for_bot_bulk(tenant_1.id, codes=[]) == []
+
+
+@pytest.mark.integration
+async def test_offering_read_model_read_through_and_refresh(db, tenant_1, bot_1, offering_v4, channel_web):
+    """Document được lưu ở lần đọc đầu, build lại khi đổi giá / publish, hết hạn khi sửa thuộc tính"""
+    import uuid
+    from datetime import datetime
+    from sqlalchemy import select
+    from app.infrastructure.database.models.offering import TenantPriceList, TenantOfferingVersion, TenantOfferingReadModel
+    from app.infrastructure.database.models.knowledge import DomainAttributeDefinition
+    from app.infrastructure.database.repositories import OfferingAttributeRepository, OfferingVariantRepository
+
+    async def stored():
+        rows = (await db.execute(select(TenantOfferingReadModel).where(
+            TenantOfferingReadModel.offering_id == offering_v4.id
+        ))).scalars().all()
+        now = datetime.now()
+        return {
+            row.channel_code: row.document for row in rows
+            if row.expires_at is None or row.expires_at > now
+        }
+
+    price_list = TenantPriceList(tenant_id=tenant_1.id, channel_id=channel_web.id, code="WEB-PL")
+    db.add(price_list)
+    await db.flush()
+    service = CatalogService(db)
+
+    first = await service.get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB")
+    assert first["price"] is None and first["inventory"] == []
+    assert set(await stored()) == {"WEB"}
+    # Document lưu kèm tồn kho, chỉ trả ra khi có capability
+    with_stock = await service.get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB", enabled_capabilities=["inventory"])
+    assert [row["sku"] for row in with_stock["inventory"]] == [f"{offering_v4.code}-STD"]
+
+    # Đổi giá -> build lại ngay cho channel đã materialize
+    variant = await OfferingVariantRepository(db).get_by_sku(f"{offering_v4.code}-STD", tenant_1.id)
+    await service.set_variant_price(variant.id, price_list.id, tenant_1.id, amount=990000)
+    assert (await stored())["WEB"]["price"]["amount"] == 990000
+    assert (await service.get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB"))["price"]["amount"] == 990000
+
+    # Publish version mới -> tên mới
+    db.add(TenantOfferingVersion(offering_id=offering_v4.id, version=2, name="Renamed", status=OfferingStatus.DRAFT))
+    await db.flush()
+    assert await service.publish_version(offering_v4.id, 2, tenant_1.id)
+    assert (await stored())["WEB"]["name"] == "Renamed"
+    listed = await service.get_offerings_for_bot_by_ids(tenant_1.id, [offering_v4.id, "missing"])
+    assert [o["name"] for o in listed] == ["Renamed"]
+
+    # Sửa thuộc tính -> document hết hạn, lần đọc sau build lại
+    size = DomainAttributeDefinition(domain_id=bot_1.domain_id, key=f"size-{uuid.uuid4().hex[:4]}", value_type="text")
+    db.add(size)
+    await db.flush()
+    await OfferingAttributeRepository(db).create({
+        "offering_version_id": listed[0]["version_id"], "attribute_def_id": size.id, "value_text": "XL"
+    })
+    assert await stored() == {}
+    bulk = await service.get_offerings_for_bot_bulk(tenant_1.id, codes=[offering_v4.code])
+    assert bulk[0]["attributes"] == {size.key: "XL"}
+    assert set(await stored()) == {"WEB"}
+
+
+@pytest.mark.integration
+async def test_offering_read_model_save_upserts(db, tenant_1, offering_v4):
+    """save ghi đè document đã có theo (tenant, offering, channel) thay vì tạo dòng trùng"""
+    from sqlalchemy import select
+    from app.infrastructure.database.models.offering import TenantOfferingReadModel
+    from app.infrastructure.database.repositories import OfferingReadModelRepository
+
+    repo = OfferingReadModelRepository(db)
+    document = {"id": offering_v4.id, "code": offering_v4.code, "domain_id": offering_v4.domain_id, "name": "Old"}
+    await repo.save(tenant_1.id, "WEB", [document])
+    await repo.save(tenant_1.id, "WEB", [{**document, "name": "New"}])
+    await repo.save(tenant_1.id, "APP", [document])
+
+    rows = (await db.execute(select(TenantOfferingReadModel).where(
+        TenantOfferingReadModel.offering_id == offering_v4.id
+    ).execution_options(populate_existing=True))).scalars().all()
+    assert {row.channel_code: row.document["name"] for row in rows} == {"WEB": "New", "APP": "Old"}
+
+
+@pytest.mark.integration
+async def test_offering_read_model_save_skips_stale_documents(db, tenant_1, offering_v4):
+    """Document build từ dữ liệu đọc trước lần ghi / invalidate gần nhất không ghi đè được"""
+    from datetime import datetime, timedelta
+    from app.infrastructure.database.repositories import OfferingReadModelRepository
+
+    repo = OfferingReadModelRepository(db)
+    document = {"id": offering_v4.id, "code": offering_v4.code, "domain_id": offering_v4.domain_id, "name": "Fresh"}
+    started = datetime.now()
+    await repo.save(tenant_1.id, "WEB", [document], built_at=started)
+    await repo.save(tenant_1.id, "WEB", [{**document, "name": "Stale"}], built_at=started - timedelta(seconds=5))
+    assert (await repo.get_by_offering_ids(tenant_1.id, "WEB", [offering_v4.id]))[offering_v4.id]["name"] == "Fresh"
+
+    await repo.invalidate([offering_v4.id])
+    assert await repo.get_by_offering_ids(tenant_1.id, "WEB", [offering_v4.id]) == {}
+    # Request đọc dữ liệu trước khi invalidate rồi mới ghi -> bỏ qua
+    await repo.save(tenant_1.id, "WEB", [{**document, "name": "Stale"}], built_at=started)
+    assert await repo.get_by_offering_ids(tenant_1.id, "WEB", [offering_v4.id]) == {}
+    await repo.save(tenant_1.id, "WEB", [{**document, "name": "Rebuilt"}])
+    assert (await repo.get_by_offering_ids(tenant_1.id, "WEB", [offering_v4.id]))[offering_v4.id]["name"] == "Rebuilt"
+
+
+@pytest.mark.integration
+async def test_offering_read_model_expires_at_next_price_boundary(db, tenant_1, offering_v4, channel_web):
+    """Document hết hạn ở mốc valid_from / valid_to kế tiếp; quá mốc thì build lại với giá mới"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import select, update
+    from app.infrastructure.database.models.offering import (
+        TenantPriceList, TenantVariantPrice, TenantOfferingVariant, TenantOfferingReadModel
+    )
+
+    now = datetime.now()
+    current = TenantPriceList(
+        tenant_id=tenant_1.id, channel_id=channel_web.id, code="WEB-NOW", valid_to=now + timedelta(hours=2)
+    )
+    sale = TenantPriceList(
+        tenant_id=tenant_1.id, channel_id=channel_web.id, code="WEB-SALE",
+        valid_from=now + timedelta(hours=1), valid_to=now + timedelta(days=1)
+    )
+    db.add_all([current, sale])
+    await db.flush()
+    variant = (await db.execute(select(TenantOfferingVariant).where(
+        TenantOfferingVariant.offering_id == offering_v4.id
+    ))).scalar_one()
+    db.add_all([
+        TenantVariantPrice(price_list_id=current.id, variant_id=variant.id, amount=1000),
+        TenantVariantPrice(price_list_id=sale.id, variant_id=variant.id, amount=800),
+    ])
+    await db.flush()
+
+    service = CatalogService(db)
+    assert (await service.get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB"))["price"]["amount"] == 1000
+    row = (await db.execute(select(TenantOfferingReadModel).where(
+        TenantOfferingReadModel.offering_id == offering_v4.id
+    ))).scalar_one()
+    assert row.expires_at == sale.valid_from
+
+    # Giả lập đã qua mốc: khuyến mãi bắt đầu, document cũ bị coi là miss
+    sale.valid_from = now - timedelta(minutes=1)
+    await db.flush()
+    await db.execute(update(TenantOfferingReadModel).where(
+        TenantOfferingReadModel.offering_id == offering_v4.id
+    ).values(expires_at=now - timedelta(minutes=1)))
+    assert (await service.get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB"))["price"]["amount"] == 800
+    row = (await db.execute(select(TenantOfferingReadModel).where(
+        TenantOfferingReadModel.offering_id == offering_v4.id
+    ).execution_options(populate_existing=True))).scalar_one()
+    assert row.expires_at == current.valid_to
+
+
+@pytest.mark.integration
+async def test_read_model_documents_bypass_attribute_config_cache(db, tenant_1, bot_1, offering_v4):
+    """Document lưu vào read model lấy config thuộc tính từ DB, không từ bản cũ trong cache"""
+    import uuid
+    from unittest.mock import patch
+    from sqlalchemy import select
+    from app.infrastructure.cache.attribute_config_cache import AttributeConfigCache
+    from app.infrastructure.database.models.knowledge import DomainAttributeDefinition, TenantAttributeConfig
+    from app.infrastructure.database.models.offering import TenantOfferingVersion, TenantOfferingAttributeValue
+
+    size = DomainAttributeDefinition(domain_id=bot_1.domain_id, key=f"size-{uuid.uuid4().hex[:4]}", value_type="text")
+    db.add(size)
+    await db.flush()
+    version = (await db.execute(select(TenantOfferingVersion).where(
+        TenantOfferingVersion.offering_id == offering_v4.id
+    ))).scalar_one()
+    db.add_all([
+        TenantOfferingAttributeValue(offering_version_id=version.id, attribute_def_id=size.id, value_text="XL"),
+        TenantAttributeConfig(tenant_id=tenant_1.id, attribute_def_id=size.id, label="Kích cỡ"),
+    ])
+    await db.flush()
+
+    cache = AttributeConfigCache(max_tenants=10, ttl=60)
+    cache.set(tenant_1.id, {})  # bản cache cũ: chưa có config
+
+    with patch("app.core.services.attribute_resolver.get_attribute_config_cache", return_value=cache):
+        data = await CatalogService(db).get_offering_for_bot(tenant_1.id, offering_v4.code, "WEB")
+        listed = await CatalogService(db).get_offerings_for_bot_by_ids(tenant_1.id, [offering_v4.id], channel_code="APP")
+
+    assert data["attributes_metadata"][size.key]["label"] == "Kích cỡ"
+    assert listed[0]["attributes_metadata"][size.key]["label"] == "Kích cỡ"
+    # Cache được làm mới bằng dữ liệu vừa đọc
+    assert cache.get(tenant_1.id, [size.id])[size.id].label == "Kích cỡ"
+
+
+@pytest.mark.integration
+async def test_offerings_inventory_single_query_and_cache_invalidation(db, tenant_1, offering_v4):
+    """Tồn kho nhiều offering trong một query, khớp get_stock_status theo SKU; update_inventory invalidate cache"""
+    from sqlalchemy import event
+    from app.core.services.inventory_extension import InventoryExtension
+    from app.infrastructure.database.models.offering import TenantOfferingVariant, TenantInventoryLocation, TenantInventoryItem
+    from app.infrastructure.database.repositories import InventoryRepository
+
+    location = TenantInventoryLocation(tenant_id=tenant_1.id, code="WH1")
+    variants = [
+        TenantOfferingVariant(tenant_id=tenant_1.id, offering_id=offering_v4.id, sku=f"{offering_v4.code}-{i}", name=f"V{i}")
+        for i in range(3)
+    ]
+    db.add_all([location, *variants])
+    await db.flush()
+    db.add_all([
+        TenantInventoryItem(tenant_id=tenant_1.id, variant_id=variants[0].id, location_id=location.id, stock_qty=7, safety_stock=2),
+        TenantInventoryItem(tenant_id=tenant_1.id, variant_id=variants[1].id, location_id=location.id, stock_qty=1, safety_stock=2),
+    ])
+    await db.flush()
+
+    statements = []
+    engine = db.bind.sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        ext = InventoryExtension(db)
+        stock = await ext.get_offerings_inventory(tenant_1.id, [offering_v4.id, "no-variants"])
+        assert len(statements) == 1
+        again = await ext.get_offering_inventory(tenant_1.id, offering_v4.id)
+        assert len(statements) == 1  # phục vụ từ cache
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert stock["no-variants"] == []
+    repo = InventoryRepository(db)
+    expected = [await repo.get_stock_status(tenant_1.id, v.sku) for v in sorted(variants, key=lambda v: v.sku)]
+    by_sku = {row["sku"]: row for row in stock[offering_v4.id]}
+    assert [by_sku[row["sku"]] for row in expected] == expected
+    assert [by_sku[v.sku]["stock_status"] for v in variants] == ["in_stock", "low_stock", "out_of_stock"]
+    assert again == stock[offering_v4.id]
+
+    service = CatalogService(db)
+    assert await service.update_inventory(tenant_1.id, variants[2].sku, "WH1", 4)
+    refreshed = {row["sku"]: row for row in await ext.get_offering_inventory(tenant_1.id, offering_v4.id)}
+    assert refreshed[variants[2].sku]["aggregate_qty"] == 4
+
+
+@pytest.mark.integration
+async def test_read_model_documents_bypass_inventory_cache(db, tenant_1, offering_v4):
+    """Document lưu vào read model lấy tồn kho từ DB, không materialize bản cũ trong inventory cache"""
+    from unittest.mock import patch
+    from sqlalchemy import select
+    from app.infrastructure.cache.inventory_cache import InventoryCache
+    from app.infrastructure.database.models.offering import TenantOfferingReadModel
+
+    cache = InventoryCache(max_entries=10, ttl=60)
+    cache.set_many(tenant_1.id, {offering_v4.id: [{"sku": "STALE", "aggregate_qty": 99}]})
+
+    with patch("app.core.services.inventory_extension.get_inventory_cache", return_value=cache):
+        data = await CatalogService(db).get_offering_for_bot(
+            tenant_1.id, offering_v4.code, "WEB", enabled_capabilities=["inventory"]
+        )
+
+    expected = [f"{offering_v4.code}-STD"]
+    assert [row["sku"] for row in data["inventory"]] == expected
+    stored = (await db.execute(select(TenantOfferingReadModel.document).where(
+        TenantOfferingReadModel.offering_id == offering_v4.id
+    ))).scalar_one()
+    assert [row["sku"] for row in stored["inventory"]] == expected
+    # Cache được làm mới bằng dữ liệu vừa đọc
+    assert [row["sku"] for row in cache.get_many(tenant_1.id, [offering_v4.id])[offering_v4.id]] == expected
+
+
+@pytest.mark.integration
+async def test_offering_and_stock_changes_invalidate_response_cache(db, tenant_1, offering_v4):
+    """notify_changed (sửa offering / version / thuộc tính) và update_stock invalidate response cache Tier-3"""
+    from unittest.mock import patch
+    from app.core.services.inventory_extension import InventoryExtension
+    from app.infrastructure.cache.response_cache import ResponseCache
+    from app.infrastructure.database.models.offering import TenantOfferingVariant, TenantInventoryLocation
+    from app.infrastructure.database.repositories import OfferingRepository
+
+    variant = TenantOfferingVariant(tenant_id=tenant_1.id, offering_id=offering_v4.id, sku=f"{offering_v4.code}-rc", name="RC")
+    db.add_all([variant, TenantInventoryLocation(tenant_id=tenant_1.id, code="WH-RC")])
+    await db.flush()
+
+    cache = ResponseCache(max_entries=10, ttl=60)
+
+    def _key():
+        return cache.make_key(tenant_1.id, "v1", "viewing", "giá bao nhiêu", {"offering_id": offering_v4.id})
+
+    with patch("app.infrastructure.database.repositories.offering_repo.get_response_cache", return_value=cache), \
+            patch("app.core.services.inventory_extension.get_response_cache", return_value=cache):
+        cache.set(_key(), {"response": "500k"})
+        await OfferingRepository(db).notify_changed(offering_v4.id)
+        assert cache.get(_key()) is None
+
+        cache.set(_key(), {"response": "500k"})
+        assert await InventoryExtension(db).update_stock(tenant_1.id, variant.sku, "WH-RC", 3)
+        assert cache.get(_key()) is None
@@ -4,7 +4,7 @@ import pytest
 import uuid
 from app.infrastructure.database.repositories import OfferingRepository, OfferingVersionRepository, OfferingVariantRepository
 from app.infrastructure.database.repositories import FAQRepository
-from app.infrastructure.database.repositories import SessionRepository
+from app.infrastructure.database.repositories import SessionRepository, ContextSlotRepository
 from app.infrastructure.database.repositories import DecisionRepository
 from app.infrastructure.database.repositories import BotRepository, BotVersionRepository
 from app.infrastructure.database.repositories import GuardrailRepository
@@ -219,3 +219,355 @@ async def test_cache_repository(db, tenant_1):
     found = await repo.get_multi(tenant_id=tenant_1.id)
     assert len(found) >= 1
     assert found[0].query_text == "hello world"
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_exact_match_by_query_hash(db, tenant_1):
+    """Exact match qua query_hash (normalize), không trả entry dài hơn chỉ chứa câu hỏi; create không tạo bản trùng"""
+    repo = SemanticCacheRepository(db)
+    await repo.create({"query_text": "giờ mở cửa", "response_text": "8h-22h"}, tenant_id=tenant_1.id)
+    await repo.create({"query_text": "giờ mở cửa chi nhánh quận 1", "response_text": "9h-21h"}, tenant_id=tenant_1.id)
+
+    found = await repo.get_by_message(tenant_1.id, "  Giờ   mở cửa ")
+    assert found.response_text == "8h-22h"
+    assert await repo.get_by_message(tenant_1.id, "mở cửa") is None
+
+    updated = await repo.create({"query_text": "GIỜ MỞ CỬA", "response_text": "7h-23h"}, tenant_id=tenant_1.id)
+    assert updated.id == found.id
+    assert (await repo.get_by_message(tenant_1.id, "giờ mở cửa")).response_text == "7h-23h"
+    assert len(await repo.get_multi(tenant_id=tenant_1.id)) == 2
+
+
+@pytest.mark.asyncio
+async def test_faq_semantic_search_index_and_fallback(db, tenant_1):
+    """FAQ semantic search: in-process index và fallback vectorized (không pgvector) cho cùng kết quả"""
+    from unittest.mock import patch
+    from app.infrastructure.database.models.knowledge import KnowledgeDomain
+    domain_db = KnowledgeDomain(code=f"vec-{uuid.uuid4().hex[:4]}", name="Vector Domain")
+    db.add(domain_db)
+    await db.flush()
+
+    faq_repo = FAQRepository(db)
+    near = await faq_repo.create({
+        "domain_id": domain_db.id, "question": "Giờ mở cửa?", "answer": "8h-22h",
+        "embedding": [1.0, 0.1] + [0.0] * 1534
+    }, tenant_id=tenant_1.id)
+    await faq_repo.create({
+        "domain_id": domain_db.id, "question": "Phí ship?", "answer": "Miễn phí",
+        "embedding": [0.0, 1.0] + [0.0] * 1534
+    }, tenant_id=tenant_1.id)
+    query = [1.0] + [0.0] * 1535
+
+    indexed = await faq_repo.semantic_search(tenant_1.id, query, threshold=0.9)
+    with patch("app.infrastructure.database.repositories.faq_repo.get_vector_index_registry", return_value=None):
+        fallback = await faq_repo.semantic_search(tenant_1.id, query, threshold=0.9)
+
+    assert [f.id for f, _ in indexed] == [near.id]
+    assert [f.id for f, _ in fallback] == [near.id]
+    assert indexed[0][1] == pytest.approx(fallback[0][1], rel=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_offering_semantic_search_indexes_only_active_versions(db, tenant_1, bot_1):
+    """Vector index offering: một entry / offering (version active); publish version mới cập nhật entry"""
+    from app.core.services.catalog_service import CatalogService
+    from app.infrastructure.database.models.offering import TenantOffering
+    from app.infrastructure.search import get_vector_index_registry, OFFERING_VERSION_NAMESPACE
+
+    offerings = [
+        TenantOffering(tenant_id=tenant_1.id, domain_id=bot_1.domain_id, bot_id=bot_1.id,
+                       code=f"vec-{i}-{uuid.uuid4().hex[:4]}", status=domain.OfferingStatus.ACTIVE)
+        for i in range(2)
+    ]
+    db.add_all(offerings)
+    await db.flush()
+    ver_repo = OfferingVersionRepository(db)
+    v1 = await ver_repo.create({"offering_id": offerings[0].id, "version": 1, "name": "A v1",
+                                "status": domain.OfferingStatus.ACTIVE, "embedding": [1.0, 0.5] + [0.0] * 1534})
+    await ver_repo.create({"offering_id": offerings[1].id, "version": 1, "name": "B v1",
+                           "status": domain.OfferingStatus.ACTIVE, "embedding": [0.0, 1.0] + [0.0] * 1534})
+    query = [1.0] + [0.0] * 1535
+
+    hits = await ver_repo.semantic_search(tenant_1.id, query, threshold=0.5, limit=1)
+    assert [(v.id, v.name) for v, _ in hits] == [(v1.id, "A v1")]
+
+    # Draft (dù gần query hơn) không vào index
+    await ver_repo.create({"offering_id": offerings[0].id, "version": 2, "name": "A v2",
+                           "status": domain.OfferingStatus.DRAFT, "embedding": query})
+    index = get_vector_index_registry().get(OFFERING_VERSION_NAMESPACE, tenant_1.id)
+    assert len(index) == 2 and offerings[0].id in index
+    assert (await ver_repo.semantic_search(tenant_1.id, query, threshold=0.5))[0][1] < 0.95
+
+    assert await CatalogService(db).publish_version(offerings[0].id, 2, tenant_1.id)
+    hits = await ver_repo.semantic_search(tenant_1.id, query, threshold=0.5, limit=1)
+    assert hits[0][0].name == "A v2" and hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert len(index) == 2
+
+
+@pytest.mark.asyncio
+async def test_decision_intent_training_examples(db, tenant_1):
+    """intent_code trên decision event + input turn -> dữ liệu train intent classifier"""
+    from app.infrastructure.database.repositories import ConversationTurnRepository
+
+    bot = await BotRepository(db).create({"code": "intent-bot", "name": "Intent Bot"}, tenant_id=tenant_1.id)
+    version = await BotVersionRepository(db).create({"bot_id": bot.id, "version": 1, "is_active": True})
+    session = await SessionRepository(db).create({
+        "bot_id": bot.id,
+        "bot_version_id": version.id,
+        "channel_code": "webchat",
+        "lifecycle_state": "idle"
+    }, tenant_id=tenant_1.id)
+
+    turn_repo = ConversationTurnRepository(db)
+    decision_repo = DecisionRepository(db)
+    for message, intent_code, intent_source in [
+        ("giá iphone bao nhiêu", "INQUIRY_PRICE", "llm"),
+        ("hihi", "UNKNOWN", "llm"),
+        ("tìm laptop", None, None),
+        # Nhãn do classifier local gán -> không quay lại làm dữ liệu train
+        ("giá ipad", "INQUIRY_PRICE", "local"),
+    ]:
+        turn = await turn_repo.create({
+            "session_id": session.id,
+            "speaker": domain.Speaker.USER,
+            "message": message
+        }, tenant_id=tenant_1.id)
+        await decision_repo.create({
+            "session_id": session.id,
+            "bot_version_id": version.id,
+            "decision_type": domain.DecisionType.PROCEED,
+            "tier_code": "agentic_path",
+            "input_turn_id": turn.id,
+            "intent_code": intent_code,
+            "intent_source": intent_source
+        }, tenant_id=tenant_1.id)
+
+    examples = await decision_repo.get_intent_training_examples(tenant_1.id)
+    assert examples == [("giá iphone bao nhiêu", "INQUIRY_PRICE")]
+    assert await decision_repo.get_intent_training_examples("other-tenant") == []
+
+
+@pytest.mark.asyncio
+async def test_bot_version_fast_path_rules(db, tenant_1):
+    """flow_config["fast_path_rules"] của bot version"""
+    bot = await BotRepository(db).create({"code": "fp-bot", "name": "FP Bot"}, tenant_id=tenant_1.id)
+    ver_repo = BotVersionRepository(db)
+    plain = await ver_repo.create({"bot_id": bot.id, "version": 1, "is_active": False})
+    configured = await ver_repo.create({
+        "bot_id": bot.id,
+        "version": 2,
+        "is_active": True,
+        "flow_config": {"fast_path_rules": {r"^alo": "Dạ shop nghe!", "": "skip"}}
+    })
+
+    assert await ver_repo.get_fast_path_rules(plain.id) == {}
+    assert await ver_repo.get_fast_path_rules(configured.id) == {r"^alo": "Dạ shop nghe!"}
+    assert await ver_repo.get_fast_path_rules("missing") == {}
+
+
+@pytest.mark.asyncio
+async def test_session_repository_hot_state_cache(db, tenant_1):
+    """SessionRepository.get đọc từ cache; update write-through sau commit, bỏ qua khi rollback"""
+    from app.infrastructure.cache.session_state_cache import SessionStateCache
+
+    tenant_id = tenant_1.id
+    bot = await BotRepository(db).create({"code": "cache-bot", "name": "Cache Bot"}, tenant_id=tenant_id)
+    version = await BotVersionRepository(db).create({"bot_id": bot.id, "version": 1, "is_active": True})
+    repo = SessionRepository(db)
+    repo.state_cache = SessionStateCache(max_entries=100, ttl=60, redis_url="")
+
+    session = await repo.create({
+        "bot_id": bot.id,
+        "bot_version_id": version.id,
+        "channel_code": "webchat",
+        "lifecycle_state": "idle"
+    }, tenant_id=tenant_id)
+    await db.commit()
+    assert (await repo.state_cache.get(session.id, tenant_id)).version == session.version
+
+    # Trong transaction đang ghi: đọc DB (thấy state mới), cache chưa đổi
+    updated = await repo.update(session, {"lifecycle_state": "browsing"}, tenant_id=tenant_id)
+    assert (await repo.get(session.id, tenant_id=tenant_id)).lifecycle_state == "browsing"
+    assert await repo.state_cache.get(session.id, tenant_id) is None
+    await db.commit()
+    cached = await repo.state_cache.get(session.id, tenant_id)
+    assert cached.lifecycle_state == "browsing" and cached.version == updated.version
+
+    # Cache hit, tenant khác không thấy
+    assert (await repo.get(session.id, tenant_id=tenant_id)).lifecycle_state == "browsing"
+    assert await repo.get(session.id, tenant_id="other-tenant") is None
+
+    # Rollback savepoint sau khi ghi: snapshot đang chờ bị bỏ, commit sau đó không ghi cache
+    viewing = await repo.update(updated, {"lifecycle_state": "viewing"}, tenant_id=tenant_id)
+    savepoint = await db.begin_nested()
+    await savepoint.rollback()
+    assert (await repo.get(session.id, tenant_id=tenant_id)).lifecycle_state == "viewing"
+    await db.commit()
+    assert await repo.state_cache.get(session.id, tenant_id) is None
+
+    # Rollback: snapshot chưa commit không vào cache
+    await repo.update(viewing, {"lifecycle_state": "closed"}, tenant_id=tenant_id)
+    await db.rollback()
+    assert await repo.state_cache.get(session.id, tenant_id) is None
+
+
+@pytest.mark.asyncio
+async def test_context_slot_repository_tracks_writes_per_session(db, tenant_1):
+    """create / deactivate_by_keys đánh dấu session có slot bị ghi; pop_written đọc rồi xóa dấu"""
+    tenant_id = tenant_1.id
+    bot = await BotRepository(db).create({"code": "slot-bot", "name": "Slot Bot"}, tenant_id=tenant_id)
+    version = await BotVersionRepository(db).create({"bot_id": bot.id, "version": 1, "is_active": True})
+    session = await SessionRepository(db).create({
+        "bot_id": bot.id, "bot_version_id": version.id, "channel_code": "webchat", "lifecycle_state": "idle"
+    }, tenant_id=tenant_id)
+    repo = ContextSlotRepository(db)
+    other = ContextSlotRepository(db)  # handler khác, cùng AsyncSession
+
+    assert repo.pop_written(session.id) is False
+    await other.create({"session_id": session.id, "key": "offering_id", "value": "o1", "status": "active"})
+    assert repo.pop_written(session.id) is True
+    assert repo.pop_written(session.id) is False
+
+    assert await other.deactivate_by_keys(session.id, ["missing"], tenant_id) == 0
+    assert repo.pop_written(session.id) is False
+    assert await other.deactivate_by_keys(session.id, ["offering_id"], tenant_id) == 1
+    assert repo.pop_written(session.id) is True
+
+
+@pytest.mark.asyncio
+async def test_offering_search_catalog_projection(db, tenant_1):
+    """search_catalog: một query join, lọc ILIKE trong SQL, bỏ offering/version không active"""
+    from app.infrastructure.database.models.knowledge import KnowledgeDomain
+    domain_db = KnowledgeDomain(code=f"dom-{uuid.uuid4().hex[:4]}", name="Cars")
+    db.add(domain_db)
+    await db.flush()
+
+    off_repo = OfferingRepository(db)
+    ver_repo = OfferingVersionRepository(db)
+    specs = [
+        ("mazda-3", "Mazda 3", "Sedan 100% chính hãng", domain.OfferingStatus.ACTIVE, domain.OfferingStatus.ACTIVE),
+        ("cx_5", "Mazda CX-5", None, domain.OfferingStatus.ACTIVE, domain.OfferingStatus.ACTIVE),
+        ("old-car", "Mazda 626", "Ngừng bán", domain.OfferingStatus.ARCHIVED, domain.OfferingStatus.ACTIVE),
+        ("draft-car", "Mazda 2", "Bản nháp", domain.OfferingStatus.ACTIVE, domain.OfferingStatus.DRAFT),
+    ]
+    ids = {}
+    for code, name, description, off_status, ver_status in specs:
+        offering = await off_repo.create({
+            "domain_id": domain_db.id, "code": code, "status": off_status
+        }, tenant_id=tenant_1.id)
+        await ver_repo.create({
+            "offering_id": offering.id, "version": 1, "name": name,
+            "description": description, "status": ver_status
+        })
+        ids[code] = offering.id
+
+    everything = await off_repo.search_catalog(tenant_1.id)
+    assert [r["code"] for r in everything] == ["cx_5", "mazda-3"]
+    assert set(everything[0]) == {"id", "code", "type", "name", "description"}
+
+    assert [r["code"] for r in await off_repo.search_catalog(tenant_1.id, query="MAZDA")] == ["cx_5", "mazda-3"]
+    assert [r["code"] for r in await off_repo.search_catalog(tenant_1.id, query="sedan")] == ["mazda-3"]
+    # Ký tự wildcard được escape
+    assert [r["code"] for r in await off_repo.search_catalog(tenant_1.id, query="100%")] == ["mazda-3"]
+    assert [r["code"] for r in await off_repo.search_catalog(tenant_1.id, query="a_d")] == []
+    assert [r["code"] for r in await off_repo.search_catalog(tenant_1.id, query="cx_")] == ["cx_5"]
+
+    by_ids = await off_repo.search_catalog(tenant_1.id, offering_ids=[ids["mazda-3"], ids["old-car"]])
+    assert [r["code"] for r in by_ids] == ["mazda-3"]
+    assert await off_repo.search_catalog(tenant_1.id, offering_ids=[]) == []
+    assert await off_repo.search_catalog("other-tenant") == []
+
+
+@pytest.mark.asyncio
+async def test_offering_text_search_index_and_incremental_sync(db, tenant_1):
+    """text_search: BM25 không dấu trên name/description + attribute is_searchable, sync khi sửa version/attribute"""
+    from app.infrastructure.database.models.knowledge import KnowledgeDomain, TenantAttributeConfig
+    from app.infrastructure.database.repositories import OfferingAttributeRepository
+    domain_db = KnowledgeDomain(code=f"dom-{uuid.uuid4().hex[:4]}", name="Phones")
+    db.add(domain_db)
+    await db.flush()
+    def_repo = DomainAttributeDefinitionRepository(db)
+    color = await def_repo.create({"domain_id": domain_db.id, "key": "color", "value_type": "text"})
+    secret = await def_repo.create({"domain_id": domain_db.id, "key": "supplier", "value_type": "text"})
+    db.add(TenantAttributeConfig(tenant_id=tenant_1.id, attribute_def_id=color.id, is_searchable=True))
+    await db.flush()
+
+    off_repo = OfferingRepository(db)
+    ver_repo = OfferingVersionRepository(db)
+    attr_repo = OfferingAttributeRepository(db)
+    phone = await off_repo.create({"domain_id": domain_db.id, "code": "ip15", "status": "active"}, tenant_id=tenant_1.id)
+    phone_ver = await ver_repo.create({
+        "offering_id": phone.id, "version": 1, "name": "Điện thoại iPhone 15",
+        "description": "Chính hãng", "status": domain.OfferingStatus.ACTIVE
+    })
+    await attr_repo.create({"offering_version_id": phone_ver.id, "attribute_def_id": color.id, "value_text": "Xanh dương"})
+    await attr_repo.create({"offering_version_id": phone_ver.id, "attribute_def_id": secret.id, "value_text": "Foxconn"})
+
+    assert [h[0] for h in await off_repo.text_search(tenant_1.id, "dien thoai")] == [phone.id]
+    assert [h[0] for h in await off_repo.text_search(tenant_1.id, "xanh duong")] == [phone.id]
+    # Attribute không is_searchable không được index
+    assert await off_repo.text_search(tenant_1.id, "foxconn") == []
+
+    # Index đã build -> offering/version mới được thêm incremental
+    laptop = await off_repo.create({"domain_id": domain_db.id, "code": "xps", "status": "active"}, tenant_id=tenant_1.id)
+    await ver_repo.create({
+        "offering_id": laptop.id, "version": 1, "name": "Laptop Dell XPS", "status": domain.OfferingStatus.ACTIVE
+    })
+    assert [h[0] for h in await off_repo.text_search(tenant_1.id, "lap")] == [laptop.id]
+
+    await ver_repo.update(phone_ver, {"name": "Máy tính bảng iPad"})
+    assert await off_repo.text_search(tenant_1.id, "iphone") == []
+    assert [h[0] for h in await off_repo.text_search(tenant_1.id, "ipad")] == [phone.id]
+
+    await off_repo.update(laptop, {"status": "archived"}, tenant_id=tenant_1.id)
+    assert await off_repo.text_search(tenant_1.id, "dell") == []
+
+
+@pytest.mark.asyncio
+async def test_attribute_resolver_config_cache_invalidated_on_config_write(db, tenant_1):
+    """resolve_attributes lấy config theo lô (cache theo tenant); ghi config qua repository thì invalidate"""
+    from app.infrastructure.database.models.knowledge import KnowledgeDomain, DomainAttributeDefinition
+    from app.infrastructure.database.models.offering import TenantOffering, TenantOfferingVersion, TenantOfferingAttributeValue
+    from app.infrastructure.database.repositories import OfferingAttributeRepository, TenantAttributeConfigRepository
+    from app.core.services.attribute_resolver import AttributeResolverService
+
+    domain_db = KnowledgeDomain(code=f"dom-{uuid.uuid4().hex[:6]}", name="Domain")
+    db.add(domain_db)
+    await db.flush()
+    color = DomainAttributeDefinition(domain_id=domain_db.id, key="color", value_type="text")
+    size = DomainAttributeDefinition(domain_id=domain_db.id, key="size", value_type="text")
+    offering = TenantOffering(tenant_id=tenant_1.id, domain_id=domain_db.id, code=f"off-{uuid.uuid4().hex[:6]}")
+    db.add_all([color, size, offering])
+    await db.flush()
+    version = TenantOfferingVersion(offering_id=offering.id, version=1, name="Áo")
+    db.add(version)
+    await db.flush()
+    db.add_all([
+        TenantOfferingAttributeValue(offering_version_id=version.id, attribute_def_id=color.id, value_text="Đỏ"),
+        TenantOfferingAttributeValue(offering_version_id=version.id, attribute_def_id=size.id, value_text="XL"),
+    ])
+    await db.flush()
+
+    config_repo = TenantAttributeConfigRepository(db)
+    await config_repo.create({"attribute_def_id": color.id, "label": "Màu", "display_order": 2}, tenant_id=tenant_1.id)
+    resolver = AttributeResolverService(db)
+    values = await OfferingAttributeRepository(db).get_by_version(version.id, tenant_id=tenant_1.id)
+
+    resolved = await resolver.resolve_attributes(tenant_1.id, values, filter_display_only=False)
+    assert [(a["key"], a["label"]) for a in resolved] == [("size", "size"), ("color", "Màu")]
+
+    # Lần sau phục vụ từ cache, không query config
+    async def no_query(*args, **kwargs):
+        raise AssertionError("config should come from cache")
+    resolver.config_repo.get_all_for_tenant = no_query
+    resolver.config_repo.get_configs = no_query
+    assert await resolver.resolve_attributes(tenant_1.id, values, filter_display_only=False) == resolved
+
+    # Ghi config (như API /attribute-definitions/{id}/config) -> cache của tenant bị xóa
+    config = await config_repo.get_config(tenant_1.id, color.id)
+    await config_repo.update(config, {"label": "Màu sắc", "is_display": False})
+    fresh = AttributeResolverService(db)
+    resolved = await fresh.resolve_attributes(tenant_1.id, values)
+    assert [a["key"] for a in resolved] == ["size"]
+    resolved = await fresh.resolve_attributes(tenant_1.id, values, filter_display_only=False)
+    assert {a["key"]: a["label"] for a in resolved}["color"] == "Màu sắc"
@@ -0,0 +1,85 @@
+"""Integration tests for WriteBehindJournal (multi-row flush vào SQLite test DB)"""
+
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from sqlalchemy import select
+
+from app.core import domain
+from app.infrastructure.database.models.cache import TenantSemanticCache as CacheModel
+from app.infrastructure.database.models.decision import RuntimeDecisionEvent as DecisionModel
+from app.infrastructure.database.models.runtime import RuntimeTurn as TurnModel
+from app.infrastructure.database.repositories import (
+    BotRepository, BotVersionRepository, SessionRepository, SemanticCacheRepository
+)
+from app.infrastructure.database.write_behind import WriteBehindJournal
+
+
+async def _runtime_session(db, tenant_id):
+    bot = await BotRepository(db).create({"code": "wb-bot", "name": "WB Bot"}, tenant_id=tenant_id)
+    version = await BotVersionRepository(db).create({"bot_id": bot.id, "version": 1, "is_active": True})
+    session = await SessionRepository(db).create({
+        "bot_id": bot.id,
+        "bot_version_id": version.id,
+        "channel_code": "webchat",
+        "lifecycle_state": "idle"
+    }, tenant_id=tenant_id)
+    return session
+
+
+def _journal(db, **kwargs):
+    @asynccontextmanager
+    async def _factory():
+        yield db
+    return WriteBehindJournal(session_factory=_factory, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_journal_flushes_turns_decisions_and_hits_in_batch(db, tenant_1):
+    tenant_id = tenant_1.id
+    session = await _runtime_session(db, tenant_id)
+    cache = await SemanticCacheRepository(db).create(
+        {"query_text": "q", "response_text": "r", "hit_count": 0}, tenant_id=tenant_id
+    )
+    await db.commit()
+
+    journal = _journal(db, flush_size=50, flush_interval_ms=20)
+    user_turn_id = await journal.log_turn({"session_id": session.id, "speaker": domain.Speaker.USER, "message": "hi"})
+    await journal.log_turn({"session_id": session.id, "speaker": "bot", "message": "hello"})
+    await journal.log_decision({
+        "session_id": session.id,
+        "bot_version_id": session.bot_version_id,
+        "decision_type": domain.DecisionType.PROCEED,
+        "tier_code": "fast_path",
+        "input_turn_id": user_turn_id
+    })
+    await asyncio.gather(*[journal.track_hit(cache.id) for _ in range(3)])
+    await journal.close()
+
+    turns = (await db.execute(
+        select(TurnModel).where(TurnModel.session_id == session.id).order_by(TurnModel.created_at)
+    )).scalars().all()
+    assert [(t.speaker, t.message) for t in turns] == [("user", "hi"), ("bot", "hello")]
+    assert turns[0].id == user_turn_id
+
+    decision = (await db.execute(select(DecisionModel).where(DecisionModel.session_id == session.id))).scalar_one()
+    assert decision.decision_type == "PROCEED" and decision.input_turn_id == user_turn_id
+
+    await db.refresh(await db.get(CacheModel, cache.id))
+    assert (await db.get(CacheModel, cache.id)).hit_count == 3
+    assert journal.written == 6 and journal.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_journal_isolates_bad_rows(db, tenant_1):
+    session = await _runtime_session(db, tenant_1.id)
+    await db.commit()
+
+    journal = _journal(db, flush_size=10, flush_interval_ms=10)
+    await journal.log_turn({"session_id": session.id, "speaker": "user", "message": "ok"})
+    await journal.log_turn({"session_id": session.id, "speaker": "user"})  # thiếu message (NOT NULL)
+    await journal.close()
+
+    turns = (await db.execute(select(TurnModel).where(TurnModel.session_id == session.id))).scalars().all()
+    assert [t.message for t in turns] == ["ok"]
+    assert journal.dropped == 1
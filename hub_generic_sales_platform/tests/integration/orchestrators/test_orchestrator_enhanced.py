@@ -98,8 +98,8 @@ async def test_orchestrator_usage_and_cost(db, tenant_1):
     with patch.object(orchestrator.semantic_cache_service, "find_match", new_callable=AsyncMock) as mock_find:
         mock_find.return_value = None  # No cache match
         
-        with patch.object(orchestrator.faq_repo, "semantic_search", new_callable=AsyncMock) as mock_faq:
-            mock_faq.return_value = []  # No FAQ match
+        with patch.object(orchestrator.knowledge_lookup, "lookup", new_callable=AsyncMock) as mock_lookup:
+            mock_lookup.return_value = None  # No cache / FAQ match
             
             # Mock LLM service at both levels: hybrid_orchestrator (for embedding) and agent_orchestrator (for generate_response)
             with patch("app.application.orchestrators.hybrid_orchestrator.get_llm_provider") as mock_get_llm_hybrid:
@@ -4,6 +4,7 @@ import uuid
 from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi import BackgroundTasks
 from app.application.orchestrators.hybrid_orchestrator import HybridOrchestrator
+from app.application.services.knowledge_lookup_service import KnowledgeMatch
 from app.core import domain
 from app.infrastructure.database.repositories import BotRepository, BotVersionRepository
 from app.infrastructure.database.models.knowledge import KnowledgeDomain
@@ -60,10 +61,10 @@ async def test_hybrid_flow_with_background_tasks(db, tenant_1, setup_bot_with_ve
         mock_llm.get_embedding = AsyncMock(return_value=mock_vector)
         mock_get_llm.return_value = mock_llm
         
-        # Mocking cache hit qua semantic_cache_service.find_match
-        mock_cached = MagicMock(id="cache_id", response_text="Cached answer")
-        with patch.object(orchestrator.semantic_cache_service, 'find_match', new_callable=AsyncMock) as mock_find:
-            mock_find.return_value = mock_cached
+        # Mocking cache hit qua knowledge_lookup (Tier 2 hợp nhất cache + FAQ)
+        mock_cached = KnowledgeMatch("semantic_cache", "cache_id", "Cached answer", "exact")
+        with patch.object(orchestrator.knowledge_lookup, 'lookup', new_callable=AsyncMock) as mock_lookup:
+            mock_lookup.return_value = mock_cached
             
             resp = await orchestrator.handle_message(
                 tenant_1.id, bot.id, "test message", 
@@ -93,7 +94,7 @@ async def test_agent_path_state_transition(db, tenant_1, setup_bot_with_version)
         # We need to bypass Cache and FAQ hits to reach Agentic Path
         with patch.object(orchestrator, '_check_social_patterns', return_value=None):
             with patch.object(orchestrator.semantic_cache_service, 'find_match', new_callable=AsyncMock, return_value=None):
-                with patch.object(orchestrator.faq_repo, 'semantic_search', new_callable=AsyncMock, return_value=[]):
+                with patch.object(orchestrator.knowledge_lookup, 'lookup', new_callable=AsyncMock, return_value=None):
                     # We also need to mock get_embedding for Knowledge Path check
                     with patch("app.application.orchestrators.hybrid_orchestrator.get_llm_provider") as mock_get_llm:
                         mock_llm = AsyncMock()
@@ -123,6 +124,9 @@ async def test_social_patterns_edge_cases(db):
         assert orchestrator._check_social_patterns("Chào bạn") == "Xin chào!"
         assert orchestrator._check_social_patterns("Thôi tạm biệt nhá") == "Hẹn gặp lại!"
         assert orchestrator._check_social_patterns("Hỏi cái này tí") is None
+        # Khác dấu là khác từ: không coi là lời chào; pattern không dấu của bot khớp input có dấu
+        assert orchestrator._check_social_patterns("cháo gà còn không") is None
+        assert orchestrator._check_social_patterns("giờ mở cửa?", {r"gio mo cua": "8h-22h"}, "v1") == "8h-22h"
 
 @pytest.mark.asyncio
 async def test_finalize_response_formatting(db):
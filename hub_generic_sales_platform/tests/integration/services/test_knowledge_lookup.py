@@ -0,0 +1,72 @@
+"""KnowledgeLookupService: Tier-2 lookup hợp nhất semantic cache + FAQ trong một round-trip"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.application.services.knowledge_lookup_service import KnowledgeLookupService
+from app.infrastructure.database.models.knowledge import KnowledgeDomain
+from app.infrastructure.database.repositories import FAQRepository, SemanticCacheRepository
+
+
+def _vector(*head):
+    return list(head) + [0.0] * (1536 - len(head))
+
+
+@pytest.fixture
+async def knowledge(db, tenant_1):
+    domain_db = KnowledgeDomain(code=f"lookup-{uuid.uuid4().hex[:4]}", name="Lookup Domain")
+    db.add(domain_db)
+    await db.flush()
+    faq_repo = FAQRepository(db)
+    faq = await faq_repo.create({
+        "domain_id": domain_db.id, "question": "Bạn ở đâu?", "answer": "Tôi ở trong mây!",
+        "embedding": _vector(1.0, 0.0), "is_active": True,
+    }, tenant_id=tenant_1.id)
+    await faq_repo.create({
+        "domain_id": domain_db.id, "question": "FAQ cũ", "answer": "Đã tắt",
+        "embedding": _vector(0.0, 1.0), "is_active": False,
+    }, tenant_id=tenant_1.id)
+    cache = await SemanticCacheRepository(db).create({
+        "query_text": "giá sản phẩm x", "response_text": "Giá sản phẩm X là 500k.", "embedding": _vector(0.0, 0.0, 1.0),
+    }, tenant_id=tenant_1.id)
+    return faq, cache
+
+
+@pytest.mark.asyncio
+async def test_lookup_ranks_sources_in_one_query_with_provenance(db, tenant_1, knowledge):
+    faq, cache = knowledge
+    service = KnowledgeLookupService(db)
+    # Warm vector index (build lazily từ DB ở lần đầu)
+    await service.lookup(tenant_1.id, "warm up", _vector(1.0))
+
+    with patch.object(service.cache_service.redis_cache, "get", return_value=None) as redis_get, \
+            patch.object(db, "execute", wraps=db.execute) as execute:
+        # FAQ và cache vector cùng match -> ưu tiên exact match của cache như luồng cũ
+        exact = await service.lookup(tenant_1.id, "Giá sản phẩm  X", _vector(1.0, 0.0))
+    assert execute.await_count == 1
+    redis_get.assert_awaited_once()
+    assert exact.provenance() == {"source": "semantic_cache", "id": cache.id, "match": "exact", "score": 1.0}
+
+    with patch.object(service.cache_service.redis_cache, "get", return_value=None):
+        faq_match = await service.lookup(tenant_1.id, "Địa chỉ của bạn?", _vector(1.0, 0.05))
+        assert faq_match.source == "faq" and faq_match.entry_id == faq.id
+        assert faq_match.score == pytest.approx(0.9988, abs=1e-3)
+        # FAQ inactive không được trả dù vector khớp; FAQ bị bỏ qua khi include_faq=False
+        assert await service.lookup(tenant_1.id, "faq cũ?", _vector(0.0, 1.0)) is None
+        assert await service.lookup(tenant_1.id, "Địa chỉ?", _vector(1.0, 0.05), include_faq=False) is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_without_vector_index_falls_back_to_sequential_path(db, tenant_1, knowledge):
+    faq, cache = knowledge
+    service = KnowledgeLookupService(db)
+    with patch("app.infrastructure.database.repositories.cache_repo.get_vector_index_registry", return_value=None), \
+            patch("app.infrastructure.database.repositories.faq_repo.get_vector_index_registry", return_value=None), \
+            patch.object(service.cache_service.redis_cache, "get", return_value=None):
+        faq_match = await service.lookup(tenant_1.id, "Địa chỉ của bạn?", _vector(1.0, 0.05))
+        cache_match = await service.lookup(tenant_1.id, "giá sản phẩm x", _vector(1.0, 0.05))
+
+    assert (faq_match.source, faq_match.entry_id) == ("faq", faq.id)
+    assert (cache_match.source, cache_match.entry_id) == ("semantic_cache", cache.id)
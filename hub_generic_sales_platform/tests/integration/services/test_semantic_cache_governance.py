@@ -0,0 +1,172 @@
+"""Semantic cache governance: admission filter, merge near-duplicate, quota eviction, expire theo offering"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.application.services.semantic_cache_governance import (
+    GOVERNANCE_LOCK_KEY, CacheAdmissionFilter, SemanticCacheGovernor, governance_lock,
+)
+from app.infrastructure.cache.redis_semantic_cache import RedisSemanticCache
+from app.infrastructure.database.repositories import OfferingRepository, SemanticCacheRepository
+from app.infrastructure.database.models.knowledge import KnowledgeDomain
+from app.core import domain
+
+
+def _vector(*head):
+    return list(head) + [0.0] * (1536 - len(head))
+
+
+class _FakeRedis:
+    """Redis tối thiểu (INCR/EXPIRE/SET NX/GET/DELETE) dùng chung giữa các 'worker' trong test"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        return 1 if self.data.pop(key, None) is not None else 0
+
+
+@pytest.mark.asyncio
+async def test_admission_filter_admits_after_repeated_misses():
+    admission = CacheAdmissionFilter(admit_after=2, window=60, max_entries=10, redis_url="")
+    assert await admission.record_miss("t1", "Giờ mở cửa?") is False
+    assert await admission.record_miss("t2", "giờ mở cửa?") is False
+    assert await admission.record_miss("t1", "  GIỜ mở cửa? ") is True
+    # Đã admit -> đếm lại từ đầu
+    assert await admission.record_miss("t1", "giờ mở cửa?") is False
+    assert await CacheAdmissionFilter(admit_after=1, redis_url="").record_miss("t1", "bất kỳ") is True
+
+
+@pytest.mark.asyncio
+async def test_admission_filter_shares_counts_across_workers_via_redis():
+    redis = _FakeRedis()
+    workers = [CacheAdmissionFilter(admit_after=2, window=60, redis_url="") for _ in range(2)]
+    for worker in workers:
+        worker.redis = redis
+    assert await workers[0].record_miss("t1", "phí ship?") is False
+    # Worker khác thấy miss thứ hai -> admit (bộ đếm RAM riêng thì sẽ là False)
+    assert await workers[1].record_miss("t1", "phí ship?") is True
+    assert redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_governance_lock_allows_one_worker_per_run():
+    redis = _FakeRedis()
+    with patch(
+        "app.application.services.semantic_cache_governance.get_redis_semantic_cache",
+        return_value=SimpleNamespace(redis=redis),
+    ):
+        async with governance_lock(60) as first:
+            async with governance_lock(60) as second:
+                assert (first, second) == (True, False)
+            assert GOVERNANCE_LOCK_KEY in redis.data
+        assert GOVERNANCE_LOCK_KEY not in redis.data
+        async with governance_lock(60) as again:
+            assert again is True
+
+
+@pytest.mark.asyncio
+async def test_governance_merges_evicts_and_expires_changed_offerings(db, tenant_1):
+    repo = SemanticCacheRepository(db)
+    keeper = await repo.create({
+        "query_text": "giờ mở cửa", "response_text": "8h-22h", "hit_count": 5, "embedding": _vector(1.0, 0.0),
+    }, tenant_id=tenant_1.id)
+    duplicate = await repo.create({
+        "query_text": "mấy giờ mở cửa", "response_text": "8h-22h", "hit_count": 2, "embedding": _vector(1.0, 0.01),
+    }, tenant_id=tenant_1.id)
+    popular = await repo.create({
+        "query_text": "phí ship", "response_text": "Miễn phí", "hit_count": 9, "embedding": _vector(0.0, 1.0),
+    }, tenant_id=tenant_1.id)
+    cold = await repo.create({
+        "query_text": "đổi trả", "response_text": "Trong 7 ngày", "hit_count": 0, "embedding": _vector(0.0, 0.0, 1.0),
+    }, tenant_id=tenant_1.id)
+    stale = await repo.create({
+        "query_text": "giá nhẫn RING-GOV-1", "response_text": "Nhẫn giá 5 triệu", "hit_count": 20,
+    }, tenant_id=tenant_1.id)
+
+    since = datetime.now(timezone.utc) - timedelta(minutes=1)
+    domain_db = KnowledgeDomain(code=f"gov-{uuid.uuid4().hex[:4]}", name="Governance Domain")
+    db.add(domain_db)
+    await db.flush()
+    await OfferingRepository(db).create({
+        "domain_id": domain_db.id, "code": "ring-gov-1", "status": domain.OfferingStatus.ACTIVE,
+    }, tenant_id=tenant_1.id)
+
+    settings = SimpleNamespace(
+        semantic_cache_max_idle_days=30, semantic_cache_merge_threshold=0.98,
+        semantic_cache_tenant_quota=2, semantic_cache_hit_half_life_days=7,
+        semantic_cache_embedding_backfill_batch=0,
+    )
+    governor = SemanticCacheGovernor(db)
+    governor.settings = settings
+    l1 = RedisSemanticCache()
+    l1.redis = None
+    governor.redis_cache = l1
+    for entry in (keeper, duplicate, cold, stale):
+        await l1.set(tenant_1.id, entry.query_text, entry.response_text, cache_id=entry.id)
+
+    stats = await governor.run(tenant_id=tenant_1.id, changed_since=since)
+    # L1 chỉ được dọn sau commit của caller
+    assert await l1.get(tenant_1.id, cold.query_text) is not None
+    await governor.flush_l1_deletes()
+
+    assert stats == {"embedded": 0, "expired": 1, "merged": 1, "evicted": 1}
+    assert await l1.get(tenant_1.id, keeper.query_text) is not None
+    for entry in (duplicate, cold, stale):
+        assert await l1.get(tenant_1.id, entry.query_text) is None
+    remaining = {e.id: e for e in await repo.get_multi(tenant_id=tenant_1.id)}
+    assert set(remaining) == {keeper.id, popular.id}
+    assert remaining[keeper.id].hit_count == 7
+    assert duplicate.id not in remaining and cold.id not in remaining and stale.id not in remaining
+
+
+@pytest.mark.asyncio
+async def test_governance_backfills_missing_embeddings(db, tenant_1):
+    repo = SemanticCacheRepository(db)
+    missing = await repo.create({"query_text": "phí ship", "response_text": "Miễn phí"}, tenant_id=tenant_1.id)
+    await repo.create({
+        "query_text": "giờ mở cửa", "response_text": "8h-22h", "embedding": _vector(1.0),
+    }, tenant_id=tenant_1.id)
+
+    provider = MagicMock()
+    provider.get_embeddings = AsyncMock(return_value=[_vector(0.0, 1.0)])
+    governor = SemanticCacheGovernor(db)
+    with patch("app.application.services.semantic_cache_governance.get_llm_provider", return_value=provider):
+        stats = await governor.run(tenant_id=tenant_1.id)
+
+    assert stats["embedded"] == 1
+    provider.get_embeddings.assert_awaited_once_with(["phí ship"])
+    assert await repo.get_missing_embeddings(tenant_1.id, limit=10) == []
+    found = await repo.get_by_message(tenant_1.id, "ship bao nhiêu", query_vector=_vector(0.0, 1.0), threshold=0.95)
+    assert found.id == missing.id
+
+
+@pytest.mark.asyncio
+async def test_flush_l1_deletes_swallows_redis_errors(db):
+    governor = SemanticCacheGovernor(db)
+    governor.redis_cache = MagicMock()
+    governor.redis_cache.delete = AsyncMock(side_effect=[ConnectionError("down"), None])
+    governor._l1_deletes = [("t1", "a"), ("t1", "b")]
+    await governor.flush_l1_deletes()
+    assert governor.redis_cache.delete.await_count == 2
+    assert governor._l1_deletes == []
@@ -47,6 +47,7 @@ async def test_multi_turn_state_progression():
     # Mock Semantic Cache & FAQ (Miss)
     orchestrator.semantic_cache_service.find_match = AsyncMock(return_value=None)
     orchestrator.faq_repo.semantic_search = AsyncMock(return_value=[])
+    orchestrator.knowledge_lookup.lookup = AsyncMock(return_value=None)
     
     # Turn 1: User asks to search -> Agent recommends BROWSING
     orchestrator.agent_orchestrator.run = AsyncMock(return_value={
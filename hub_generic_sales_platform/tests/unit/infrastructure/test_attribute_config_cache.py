@@ -0,0 +1,56 @@
+"""Unit tests for AttributeConfigCache"""
+
+import time
+
+import pytest
+
+from app.core import domain
+from app.infrastructure.cache.attribute_config_cache import AttributeConfigCache
+from app.infrastructure.cache.bounded_cache import get_cache_stats
+
+pytestmark = pytest.mark.unit
+
+
+def _config(def_id, label=None):
+    return domain.TenantAttributeConfig(id=f"cfg-{def_id}", tenant_id="t1", attribute_def_id=def_id, label=label)
+
+
+def test_get_returns_subset_of_tenant_configs():
+    cache = AttributeConfigCache(max_tenants=10, ttl=60)
+    assert cache.get("t1", ["a"]) is None
+
+    cache.set("t1", {"a": _config("a", "Màu"), "b": _config("b")})
+    configs = cache.get("t1", ["a", "missing"])
+    assert list(configs) == ["a"] and configs["a"].label == "Màu"
+    # Tenant đã cache nhưng attribute không có config -> {} (không phải miss)
+    assert cache.get("t1", ["missing"]) == {}
+    assert cache.hits == 2 and cache.misses == 1
+
+    cache.invalidate("t1")
+    assert cache.get("t1", ["a"]) is None
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = AttributeConfigCache(max_tenants=2, ttl=10)
+    cache.set("t1", {"a": _config("a")})
+    cache.set("t2", {})
+    cache.get("t1", [])  # t1 mới dùng -> t2 bị evict
+    cache.set("t3", {})
+    assert cache.get("t2", []) is None
+    assert cache.get("t1", ["a"]) is not None
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("t1", ["a"]) is None
+
+
+def test_byte_bound_and_registered_stats():
+    cache = AttributeConfigCache(max_tenants=10, ttl=60, max_bytes=600)
+    cache.set("t1", {f"a{i}": _config(f"a{i}", "x" * 50) for i in range(2)})
+    cache.set("t2", {f"a{i}": _config(f"a{i}", "y" * 50) for i in range(2)})
+    # Vượt max_bytes -> tenant cũ nhất bị đẩy ra dù chưa đủ max_tenants
+    assert cache.get("t1", ["a0"]) is None
+    assert cache.get("t2", ["a0"]) is not None
+
+    stats = get_cache_stats()["attribute_config_cache"]
+    assert stats["entries"] == 1 and 0 < stats["memory_bytes"] <= 600
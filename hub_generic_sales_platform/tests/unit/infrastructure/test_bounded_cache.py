@@ -0,0 +1,90 @@
+"""Unit tests for BoundedTTLCache và các tier in-process dùng nó"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.services.idempotency import IdempotencyService
+from app.infrastructure.cache.bounded_cache import BoundedTTLCache, get_cache_stats
+from app.infrastructure.cache.redis_semantic_cache import RedisSemanticCache
+
+pytestmark = pytest.mark.unit
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    cache = BoundedTTLCache(max_entries=2, max_bytes=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+    sized = BoundedTTLCache(max_entries=100, max_bytes=25)
+    sized.set("a", "x" * 10)  # 12 bytes JSON
+    sized.set("b", "y" * 10)
+    sized.set("c", "z" * 10)
+    assert len(sized) == 2 and sized.memory_bytes == 24
+    sized.set("big", "w" * 100)  # lớn hơn cả tier -> bỏ qua
+    assert sized.get("big") is None and len(sized) == 2
+    sized.pop("b")
+    assert sized.memory_bytes == 12
+    assert sized.pop("missing", "default") == "default"
+
+
+def test_per_entry_ttl_and_registered_stats(monkeypatch):
+    cache = BoundedTTLCache(max_entries=10, default_ttl=60, name="test_tier")
+    cache.set("short", "v", ttl=1)
+    cache.set("long", "v")
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 5)
+    assert cache.get("short") is None
+    assert cache.get("long") == "v"
+    assert get_cache_stats()["test_tier"] == {
+        "entries": 1, "memory_bytes": 3, "hits": 1, "misses": 1, "evictions": 0, "expirations": 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_does_not_serve_memory_when_redis_is_up():
+    cache = RedisSemanticCache()
+    cache.redis = MagicMock()
+    cache.redis.setex = AsyncMock()
+    cache.redis.get = AsyncMock(return_value=None)  # Redis đã hết hạn entry
+
+    await cache.set("t1", "hello", "Hi", cache_id="c1")
+    assert len(cache._memory) == 0
+    assert await cache.get("t1", "hello") is None
+
+    cache.redis.setex = AsyncMock(side_effect=ConnectionError("down"))
+    cache.redis.get = AsyncMock(side_effect=ConnectionError("down"))
+    await cache.set("t1", "hello", "Hi", cache_id="c1", ttl=60)
+    assert await cache.get("t1", "hello") == {"response_text": "Hi", "cache_id": "c1"}
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_delete_removes_entry_with_and_without_redis():
+    cache = RedisSemanticCache()
+    cache.redis = None
+    await cache.set("t1", "hello", "Hi", cache_id="c1")
+    await cache.delete("t1", "hello")
+    assert await cache.get("t1", "hello") is None
+    await cache.delete("t1", "không có")  # key không tồn tại: không lỗi
+
+    cache.redis = MagicMock()
+    cache.redis.delete = AsyncMock()
+    await cache.delete("t1", "hello")
+    cache.redis.delete.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_idempotency_memory_fallback_expires(monkeypatch):
+    service = IdempotencyService()
+    service.redis = None
+    await service.cache_result("k", {"ok": True}, ttl=10)
+    assert await service.get_cached_result("k") == {"ok": True}
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert await service.get_cached_result("k") is None
@@ -0,0 +1,70 @@
+"""Unit tests cho trusted domain mapping (model_construct) so với model_validate"""
+
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel, field_validator
+
+from app.core import domain
+from app.core.domain.runtime import Speaker
+from app.infrastructure.database.mapping import domain_columns, get_mapper, row_to_domain, to_domain, to_domain_list
+from app.infrastructure.database.models.knowledge import DomainAttributeDefinition as AttributeDefModel
+from app.infrastructure.database.models.offering import (
+    TenantOfferingAttributeValue as AttributeValueModel,
+    TenantOfferingVersion as VersionModel,
+)
+from app.infrastructure.database.models.runtime import RuntimeTurn as TurnModel
+
+pytestmark = pytest.mark.unit
+
+
+def test_trusted_mapping_matches_model_validate():
+    turn = TurnModel(id="t1", session_id="s1", speaker="user", message="xin chào", ui_metadata={"a": 1})
+    mapped = to_domain(domain.RuntimeTurn, turn)
+
+    assert mapped.speaker is Speaker.USER  # str -> Enum như model_validate
+    assert mapped.model_dump() == domain.RuntimeTurn.model_validate(turn).model_dump()
+    assert to_domain(domain.RuntimeTurn, None) is None
+
+
+def test_nested_relationship_and_decimal_are_converted():
+    definition = AttributeDefModel(
+        id="d1", domain_id="dom", key="ram", value_type="number", semantic_type="physical",
+        value_constraint=None, scope="offering"
+    )
+    value = AttributeValueModel(
+        id="v1", offering_version_id="ver", attribute_def_id="d1", value_number=16, definition=definition
+    )
+    mapped, = to_domain_list(domain.TenantOfferingAttributeValue, [value])
+
+    assert isinstance(mapped.definition, domain.DomainAttributeDefinition)
+    assert mapped.definition.value_type == "number"
+    assert mapped.value_number == Decimal("16")
+    assert mapped.model_dump() == domain.TenantOfferingAttributeValue.model_validate(value).model_dump()
+
+
+def test_unloaded_relationship_is_skipped():
+    # Relationship chưa load -> default None, không lazy load
+    value = AttributeValueModel(id="v1", offering_version_id="ver", attribute_def_id="d1", value_text="x")
+    assert to_domain(domain.TenantOfferingAttributeValue, value).definition is None
+
+
+def test_models_with_validators_fall_back_to_model_validate():
+    class Tagged(BaseModel):
+        id: str
+        name: Optional[str] = None
+
+        @field_validator("name")
+        @classmethod
+        def _strip(cls, value):
+            return value.strip() if value else value
+
+    assert get_mapper(Tagged).trusted is False
+    assert row_to_domain(Tagged, {"id": "1", "name": "  Mazda  "}).name == "Mazda"
+
+
+def test_domain_columns_projection_skips_unused_columns():
+    names = [column.key for column in domain_columns(VersionModel, domain.TenantOfferingVersion)]
+    assert "embedding" not in names
+    assert {"id", "offering_id", "version", "name", "status"} <= set(names)
@@ -0,0 +1,141 @@
+"""Unit tests for EmbeddingBatcher & OpenAIProvider.get_embeddings"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.infrastructure.llm.embedding_batcher import EmbeddingBatcher
+from app.infrastructure.llm.openai_provider import OpenAIProvider
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.asyncio
+async def test_batcher_groups_concurrent_requests():
+    """Request đồng thời được gom thành 1 lần dispatch, mỗi caller nhận đúng vector"""
+    batches = []
+
+    async def dispatch(texts):
+        batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(dispatch, max_batch_size=10, max_wait_ms=20)
+    results = await asyncio.gather(*[batcher.submit(t) for t in ["a", "bb", "a", "ccc"]])
+    await batcher.close()
+
+    assert results == [[1.0], [2.0], [1.0], [3.0]]
+    assert batches == [["a", "bb", "ccc"]]  # Dedup trong batch
+
+
+@pytest.mark.asyncio
+async def test_batcher_respects_max_batch_size_and_propagates_errors():
+    batches = []
+
+    async def dispatch(texts):
+        batches.append(len(texts))
+        if "boom" in texts:
+            raise RuntimeError("upstream down")
+        return [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(dispatch, max_batch_size=2, max_wait_ms=20)
+    await asyncio.gather(*[batcher.submit(str(i)) for i in range(5)])
+    assert max(batches) <= 2
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit("boom")
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batcher_retries_items_separately_and_skips_empty_texts():
+    """Batch lỗi -> gửi lại từng text: chỉ text lỗi nhận exception; text rỗng không được gửi"""
+    batches = []
+
+    async def dispatch(texts):
+        batches.append(list(texts))
+        if "" in texts or "   " in texts:
+            raise ValueError("empty input")
+        if "bad" in texts:
+            raise RuntimeError("invalid input")
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(dispatch, max_batch_size=10, max_wait_ms=20)
+    results = await asyncio.gather(
+        *[batcher.submit(t) for t in ["a", "bad", "", "bb", "   ", "bad"]], return_exceptions=True
+    )
+    await batcher.close()
+
+    assert results[0] == [1.0] and results[3] == [2.0]
+    assert results[2] == [] and results[4] == []
+    assert isinstance(results[1], RuntimeError) and isinstance(results[5], RuntimeError)
+    assert batches[0] == ["a", "bad", "bb"]
+    assert sorted(map(tuple, batches[1:])) == [("a",), ("bad",), ("bb",)]
+
+
+@pytest.mark.asyncio
+async def test_close_llm_providers_stops_embedding_batcher():
+    from unittest.mock import patch
+    from app.infrastructure.llm.factory import LLMProviderFactory, close_llm_providers
+
+    provider = OpenAIProvider(is_litellm=False)
+    provider.embedding_batcher = EmbeddingBatcher(AsyncMock(return_value=[[1.0]]), max_wait_ms=1)
+    assert await provider.embedding_batcher.submit("a") == [1.0]
+    worker = provider.embedding_batcher._worker
+
+    with patch.dict(LLMProviderFactory._providers, {"test": provider}):
+        await close_llm_providers()
+    assert worker.done() and provider.embedding_batcher._worker is None
+
+
+@pytest.mark.asyncio
+async def test_provider_get_embeddings_uses_cache_and_single_request_per_chunk():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.embedding_cache.clear()
+    provider.embedding_batch_size = 2
+
+    def _create(model, input):
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)
+        ])
+
+    provider.client = MagicMock()
+    provider.client.embeddings.create = AsyncMock(side_effect=_create)
+
+    vectors = await provider.get_embeddings(["a", "bb", "a", "ccc"])
+    assert vectors == [[1.0], [2.0], [1.0], [3.0]]
+    assert provider.client.embeddings.create.call_count == 2  # 3 text duy nhất / chunk 2
+
+    # Lần 2: lấy hoàn toàn từ cache
+    assert await provider.get_embeddings(["bb", "ccc"]) == [[2.0], [3.0]]
+    assert provider.client.embeddings.create.call_count == 2
+
+    # Text rỗng không được gửi lên upstream
+    assert await provider.get_embeddings(["", "dddd", " "]) == [[], [4.0], []]
+    assert provider.client.embeddings.create.call_args.kwargs["input"] == ["dddd"]
+    await provider.embedding_batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_provider_embedding_errors_surface_as_empty_vectors_at_the_boundary():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.embedding_cache.clear()
+    provider.embedding_batch_size = 2
+    provider.client = MagicMock()
+
+    provider.client.embeddings.create = AsyncMock(side_effect=RuntimeError("upstream down"))
+    with pytest.raises(RuntimeError):
+        await provider._fetch_embeddings(["a"])
+    # Đồng thời cùng text: owner + waiter đều nhận [] (không cache lỗi)
+    assert await asyncio.gather(provider.get_embedding("lỗi"), provider.get_embedding("lỗi")) == [[], []]
+
+    def _create(model, input):
+        if "bad" in input:
+            raise RuntimeError("chunk failed")
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)])
+
+    provider.client.embeddings.create = AsyncMock(side_effect=_create)
+    # Chunk lỗi chỉ ảnh hưởng text của chunk đó
+    assert await provider.get_embeddings(["bad", "x", "yy", "zzz"]) == [[], [], [2.0], [3.0]]
+    assert await provider.get_embedding("lỗi") == [3.0]
+    await provider.embedding_batcher.close()
@@ -0,0 +1,83 @@
+"""Unit tests for EmbeddingCache (LRU + single-flight)"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.infrastructure.llm.embedding_cache import EmbeddingCache
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_hit_uses_normalized_text():
+    cache = EmbeddingCache(max_entries=10, ttl=60, redis_url="")
+    compute = AsyncMock(return_value=[0.1, 0.2])
+
+    first = await cache.get_or_compute("m", "Giá  xe  này?", compute)
+    second = await cache.get_or_compute("m", "  giá xe này? ", compute)
+
+    assert first == second == [0.1, 0.2]
+    compute.assert_called_once()
+    # Model khác -> key khác
+    await cache.get_or_compute("other-model", "giá xe này?", compute)
+    assert compute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_coalesces_concurrent_requests():
+    """Các request đồng thời cùng key chỉ gọi upstream một lần"""
+    cache = EmbeddingCache(max_entries=10, ttl=60, redis_url="")
+    calls = 0
+
+    async def compute(text):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [1.0]
+
+    results = await asyncio.gather(*[cache.get_or_compute("m", "xin chào", compute) for _ in range(5)])
+    assert calls == 1
+    assert all(r == [1.0] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_skips_empty_and_evicts_lru():
+    cache = EmbeddingCache(max_entries=2, ttl=60, redis_url="")
+    failing = AsyncMock(return_value=[])
+    assert await cache.get_or_compute("m", "a", failing) == []
+    assert await cache.get_or_compute("m", "a", failing) == []
+    assert failing.call_count == 2  # Lỗi upstream không được cache
+
+    compute = AsyncMock(side_effect=lambda t: [float(len(t))])
+    for text in ["a", "bb", "ccc"]:
+        await cache.get_or_compute("m", text, compute)
+    await cache.get_or_compute("m", "a", compute)  # "a" đã bị evict
+    assert compute.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_waiter_retries_when_owner_cancelled():
+    """Owner bị cancel (client ngắt) -> waiter tự gọi compute thay vì nhận CancelledError"""
+    cache = EmbeddingCache(max_entries=10, ttl=60, redis_url="")
+    started = asyncio.Event()
+    calls = 0
+
+    async def compute(text):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.sleep(10)
+        return [2.0]
+
+    owner = asyncio.create_task(cache.get_or_compute("m", "xin chào", compute))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_compute("m", "xin chào", compute))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == [2.0]
+    assert calls == 2
+    with pytest.raises(asyncio.CancelledError):
+        await owner
@@ -0,0 +1,48 @@
+"""Unit tests for InventoryCache"""
+
+import time
+
+import pytest
+
+from app.infrastructure.cache.bounded_cache import get_cache_stats
+from app.infrastructure.cache.inventory_cache import InventoryCache
+
+pytestmark = pytest.mark.unit
+
+
+def test_get_many_returns_copies_and_reports_misses():
+    cache = InventoryCache(max_entries=10, ttl=5)
+    cache.set_many("t1", {"o1": [{"sku": "A", "aggregate_qty": 3}], "o2": []})
+
+    found = cache.get_many("t1", ["o1", "o2", "o3"])
+    assert found == {"o1": [{"sku": "A", "aggregate_qty": 3}], "o2": []}
+    found["o1"][0]["aggregate_qty"] = 0  # caller sửa bản copy
+    assert cache.get_many("t1", ["o1"])["o1"][0]["aggregate_qty"] == 3
+    assert cache.get_many("other-tenant", ["o1"]) == {}
+    assert cache.hits == 3 and cache.misses == 2
+
+    cache.invalidate("t1", ["o1"])
+    assert cache.get_many("t1", ["o1", "o2"]) == {"o2": []}
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    cache = InventoryCache(max_entries=2, ttl=5)
+    cache.set_many("t1", {"o1": [], "o2": []})
+    cache.get_many("t1", ["o1"])
+    cache.set_many("t1", {"o3": []})
+    assert set(cache.get_many("t1", ["o1", "o2", "o3"])) == {"o1", "o3"}
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get_many("t1", ["o1", "o3"]) == {}
+
+
+def test_byte_bound_and_registered_stats():
+    rows = [{"sku": "A" * 40, "aggregate_qty": 3}]
+    cache = InventoryCache(max_entries=10, ttl=5, max_bytes=100)
+    cache.set_many("t1", {"o1": rows, "o2": rows})
+    # Vượt max_bytes -> offering cũ nhất bị đẩy ra dù chưa đủ max_entries
+    assert set(cache.get_many("t1", ["o1", "o2"])) == {"o2"}
+
+    stats = get_cache_stats()["inventory_cache"]
+    assert stats["entries"] == 1 and 0 < stats["memory_bytes"] <= 100
@@ -0,0 +1,221 @@
+"""Unit tests cho streaming: OpenAIProvider.stream_response & HybridOrchestrator.handle_message_stream"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.infrastructure.llm.openai_provider import OpenAIProvider
+from app.application.orchestrators.hybrid_orchestrator import HybridOrchestrator
+
+pytestmark = pytest.mark.unit
+
+
+def _chunk(content=None, tool_calls=None, usage=None):
+    choices = [] if content is None and tool_calls is None else [
+        SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))
+    ]
+    return SimpleNamespace(id="chatcmpl-1", model="gpt-test", choices=choices, usage=usage)
+
+
+def _tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class _Stream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.pop(0)
+
+
+async def _collect(provider, **kwargs):
+    return [event async for event in provider.stream_response("sys", "hi", **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_deltas_and_usage():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = AsyncMock(return_value=_Stream([
+        _chunk("Xin "),
+        _chunk("chào"),
+        _chunk(usage=SimpleNamespace(prompt_tokens=5, completion_tokens=2, total_tokens=7)),
+    ]))
+
+    events = await _collect(provider)
+
+    assert [e["content"] for e in events if e["type"] == "delta"] == ["Xin ", "chào"]
+    final = events[-1]
+    assert final["type"] == "final"
+    assert final["response"] == "Xin chào"
+    assert final["tool_calls"] == []
+    assert final["usage"]["total_tokens"] == 7
+    kwargs = provider.client.chat.completions.create.call_args.kwargs
+    assert kwargs["stream"] is True
+    assert kwargs["stream_options"] == {"include_usage": True}
+
+
+@pytest.mark.asyncio
+async def test_stream_response_assembles_tool_call_deltas():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = AsyncMock(return_value=_Stream([
+        _chunk(tool_calls=[_tool_delta(0, id="call_1", name="search_offerings", arguments='{"que')]),
+        _chunk(tool_calls=[_tool_delta(0, arguments='ry": "iphone"}')]),
+    ]))
+
+    events = await _collect(provider, tools=[{"name": "search_offerings", "description": "d", "parameters": {}}])
+
+    assert [e["type"] for e in events] == ["final"]
+    tool_call = events[0]["tool_calls"][0]
+    assert tool_call.id == "call_1"
+    assert tool_call.function.name == "search_offerings"
+    assert tool_call.function.arguments == '{"query": "iphone"}'
+
+
+@pytest.mark.asyncio
+async def test_stream_response_error_returns_fallback_final():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("boom"))
+
+    events = await _collect(provider)
+
+    assert len(events) == 1 and events[0]["type"] == "final"
+    assert events[0]["tool_calls"] == []
+
+
+@pytest.mark.asyncio
+async def test_stream_response_mid_stream_error_counts_as_circuit_failure():
+    from app.infrastructure.llm.circuit_breaker import llm_circuit
+
+    class _BrokenStream(_Stream):
+        async def __anext__(self):
+            if not self._chunks:
+                raise ConnectionError("stream reset")
+            return self._chunks.pop(0)
+
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = AsyncMock(return_value=_BrokenStream([_chunk("Xin ")]))
+
+    llm_circuit.reset()
+    try:
+        events = await _collect(provider)
+        assert [e["type"] for e in events] == ["delta", "final"]
+        assert llm_circuit.failure_count == 1
+    finally:
+        llm_circuit.reset()
+
+
+@pytest.mark.asyncio
+async def test_stream_response_client_disconnect_does_not_reset_circuit():
+    """Client ngắt stream (GeneratorExit) không được xóa bộ đếm lỗi của breaker"""
+    from app.infrastructure.llm.circuit_breaker import llm_circuit
+
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = AsyncMock(return_value=_Stream([_chunk("Xin "), _chunk("chào")]))
+
+    llm_circuit.reset()
+    try:
+        stream = provider.stream_response("sys", "hi")
+        assert (await stream.__anext__())["content"] == "Xin "
+        # Lỗi của request khác trong lúc stream này đang chạy
+        llm_circuit.record_failure(ConnectionError("other request failed"))
+        await stream.aclose()
+        assert llm_circuit.failure_count == 1
+    finally:
+        llm_circuit.reset()
+
+
+@pytest.mark.asyncio
+async def test_agent_call_llm_forwards_tokens_only_for_turns_without_tool_calls():
+    """Delta của lượt trung gian (kết thúc bằng tool_calls) không được gửi ra client"""
+    from app.application.orchestrators.agent_orchestrator import AgentOrchestrator
+
+    turns = [
+        [{"type": "delta", "content": "Để tôi tìm..."},
+         {"type": "final", "response": "Để tôi tìm...", "tool_calls": [MagicMock(id="call-1")]}],
+        [{"type": "delta", "content": "Có "}, {"type": "delta", "content": "xe X."},
+         {"type": "final", "response": "Có xe X.", "tool_calls": []}],
+    ]
+
+    async def _stream_response(*args, **kwargs):
+        for event in turns.pop(0):
+            yield event
+
+    orchestrator = AgentOrchestrator(MagicMock())
+    orchestrator.llm_service = MagicMock()
+    orchestrator.llm_service.stream_response = _stream_response
+    tokens = []
+
+    async def on_token(content):
+        tokens.append(content)
+
+    tools = [{"name": "search_offerings", "description": "d", "parameters": {}}]
+    first = await orchestrator._call_llm("sys", "tìm xe", tools, [], on_token=on_token)
+    assert first["tool_calls"] and tokens == []
+    second = await orchestrator._call_llm("sys", None, tools, [], on_token=on_token)
+    assert second["response"] == "Có xe X." and tokens == ["Có ", "xe X."]
+
+
+@pytest.mark.asyncio
+async def test_handle_message_stream_forwards_tokens_then_final():
+    orchestrator = HybridOrchestrator(MagicMock())
+
+    async def _handle_message(*args, on_token=None, **kwargs):
+        await on_token("Xin ")
+        await on_token("chào")
+        return {"response": "Xin chào", "session_id": "sid", "metadata": {"tier": "agentic_path"}}
+
+    orchestrator.handle_message = _handle_message
+
+    events = [e async for e in orchestrator.handle_message_stream("tid", "bot", "hello")]
+
+    assert events[:2] == [{"type": "token", "content": "Xin "}, {"type": "token", "content": "chào"}]
+    assert events[2]["type"] == "final"
+    assert events[2]["data"]["response"] == "Xin chào"
+
+
+@pytest.mark.asyncio
+async def test_handle_message_stream_reports_error():
+    orchestrator = HybridOrchestrator(MagicMock())
+    orchestrator.handle_message = AsyncMock(side_effect=ValueError("bad"))
+
+    events = [e async for e in orchestrator.handle_message_stream("tid", "bot", "hello")]
+
+    assert events == [{"type": "error", "message": "bad"}]
+
+
+@pytest.mark.asyncio
+async def test_generate_response_reports_cached_tokens_and_keeps_tool_messages():
+    provider = OpenAIProvider(is_litellm=False)
+    provider.client = MagicMock()
+    usage = SimpleNamespace(
+        prompt_tokens=1200, completion_tokens=20, total_tokens=1220,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1024)
+    )
+    provider.client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+        id="chatcmpl-2", model="gpt-test", usage=usage,
+        choices=[SimpleNamespace(message=SimpleNamespace(content="ok", tool_calls=None))]
+    ))
+    history = [
+        {"role": "user", "content": "tìm xe"},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call-1", "type": "function", "function": {"name": "search_offerings", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": "call-1", "content": "{}"},
+    ]
+
+    result = await provider.generate_response("sys", None, messages_history=history)
+
+    assert result["usage"]["cached_tokens"] == 1024
+    messages = provider.client.chat.completions.create.call_args.kwargs["messages"]
+    assert messages == [{"role": "system", "content": "sys"}] + history
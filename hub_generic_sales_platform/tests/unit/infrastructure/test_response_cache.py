@@ -0,0 +1,150 @@
+"""Unit tests for ResponseCache (Tier-3) và response cache path của HybridOrchestrator"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.application.orchestrators.hybrid_orchestrator import HybridOrchestrator
+from app.infrastructure.cache.bounded_cache import get_cache_stats
+from app.infrastructure.cache.response_cache import ResponseCache, is_cacheable
+
+pytestmark = pytest.mark.unit
+
+
+def test_key_depends_on_state_and_tool_slots_only():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    slots = {"offering_id": "o1", "customer_name": "Lan"}
+    key = cache.make_key("t1", "v1", "viewing", "Giá xe  này bao nhiêu", slots)
+
+    # Message được normalize (lowercase, gộp khoảng trắng), slot ngoài subset không ảnh hưởng key
+    assert key == cache.make_key("t1", "v1", "viewing", "giá xe này  bao nhiêu", {"offering_id": "o1"})
+    assert key != cache.make_key("t1", "v1", "browsing", "giá xe này bao nhiêu", {"offering_id": "o1"})
+    assert key != cache.make_key("t1", "v1", "viewing", "giá xe này bao nhiêu", {"offering_id": "o2"})
+    assert key != cache.make_key("t1", "v2", "viewing", "giá xe này bao nhiêu", {"offering_id": "o1"})
+    # Giữ dấu: câu hỏi chỉ khác dấu là câu hỏi khác
+    assert cache.make_key("t1", "v1", "viewing", "giá bàn", {}) != cache.make_key("t1", "v1", "viewing", "giá bán", {})
+    assert cache.make_key("t1", "v1", "viewing", "cháo", {}) != cache.make_key("t1", "v1", "viewing", "chào", {})
+
+
+def test_invalidate_tenant_ttl_and_lru(monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl=5)
+    k1 = cache.make_key("t1", "v1", "viewing", "a", {})
+    k2 = cache.make_key("t2", "v1", "viewing", "a", {})
+    cache.set(k1, {"response": "r1"})
+    cache.set(k2, {"response": "r2"})
+    assert cache.get(k1) == {"response": "r1"}
+
+    cache.invalidate("t1")
+    assert cache.get(cache.make_key("t1", "v1", "viewing", "a", {})) is None
+    # Entry tạo từ key trước khi invalidate không được ghi (agent chạy trong lúc catalog đổi)
+    cache.set(k1, {"response": "stale"})
+    assert cache.get(cache.make_key("t1", "v1", "viewing", "a", {})) is None
+    assert cache.get(k2) == {"response": "r2"}
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get(k2) is None
+
+
+def test_byte_bound_and_registered_stats():
+    cache = ResponseCache(max_entries=10, ttl=60, max_bytes=150)
+    k1 = cache.make_key("t1", "v1", "viewing", "a", {})
+    k2 = cache.make_key("t1", "v1", "viewing", "b", {})
+    cache.set(k1, {"response": "x" * 80})
+    cache.set(k2, {"response": "y" * 80})
+    # Vượt max_bytes -> response cũ nhất bị đẩy ra dù chưa đủ max_entries
+    assert cache.get(k1) is None
+    assert cache.get(k2) == {"response": "y" * 80}
+
+    stats = get_cache_stats()["response_cache"]
+    assert stats["entries"] == 1 and 0 < stats["memory_bytes"] <= 150
+
+
+def test_is_cacheable_requires_read_only_tools_and_no_personal_slots():
+    slots = {"offering_id": "o1", "customer_name": "Nguyễn Lan"}
+    ok = {"response": "Xe này giá 500 triệu.", "tools_used": ["get_offering_details"]}
+    assert is_cacheable(ok, slots)
+    assert not is_cacheable({**ok, "tools_used": ["trigger_web_hook"]}, slots)
+    assert not is_cacheable({"response": ok["response"]}, slots)
+    assert not is_cacheable({**ok, "response": "Chào chị Nguyen Lan, xe giá 500 triệu."}, slots)
+
+
+def _orchestrator(agent_result):
+    orchestrator = HybridOrchestrator(MagicMock())
+    orchestrator.session_service = MagicMock()
+    orchestrator.session_service.get_or_create_session = AsyncMock(
+        return_value={"session_id": "sid", "bot_version_id": "v1"}
+    )
+    orchestrator.session_service.log_user_message = AsyncMock()
+    orchestrator.session_service.log_bot_response = AsyncMock()
+    session_obj = MagicMock(lifecycle_state="viewing")
+    session_obj.is_handover_mode.return_value = False
+    orchestrator.session_state_handler = MagicMock()
+    orchestrator.session_state_handler.read_session_state = AsyncMock(return_value=session_obj)
+    orchestrator.fast_path_matcher = MagicMock()
+    orchestrator.fast_path_matcher.get_bot_rules = AsyncMock(return_value={})
+    orchestrator.fast_path_matcher.match.return_value = None
+    slot = MagicMock(key="offering_id", value="o1")
+    slot.is_active.return_value = True
+    orchestrator.slots_repo.get_by_session = AsyncMock(return_value=[slot])
+    orchestrator.decision_repo.create = AsyncMock()
+    orchestrator.agent_orchestrator.run = AsyncMock(return_value=agent_result)
+    return orchestrator
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_skips_agentic_loop():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    orchestrator = _orchestrator({
+        "response": "Xe này đang có giá 500 triệu đồng.",
+        "g_ui_data": {"type": "offering_detail"},
+        "intent": "INQUIRY_PRICE",
+        "tools_used": ["get_offering_details"],
+        "context_slots": {"offering_id": "o1"},
+    })
+    with patch("app.application.orchestrators.hybrid_orchestrator.get_response_cache", return_value=cache), \
+            patch.object(orchestrator, "_cache_agentic_response", AsyncMock()):
+        first = await orchestrator.handle_message("t1", "bot", "giá xe này bao nhiêu")
+        second = await orchestrator.handle_message("t1", "bot", "Giá  xe này bao nhiêu")
+
+    assert first["metadata"]["tier"] == "agentic_path"
+    assert second["metadata"]["tier"] == "response_cache"
+    assert second["response"] == first["response"]
+    assert second["metadata"]["g_ui"] == {"type": "offering_detail"}
+    assert orchestrator.agent_orchestrator.run.await_count == 1
+    orchestrator.session_service.log_user_message.assert_awaited_once_with("sid", "Giá  xe này bao nhiêu")
+    # Một query slot mỗi message: Agent dùng lại slot đã load, slot sau lượt do Agent trả về
+    assert orchestrator.slots_repo.get_by_session.await_count == 2
+    assert orchestrator.agent_orchestrator.run.call_args.kwargs["slots"] == [orchestrator.slots_repo.get_by_session.return_value[0]]
+
+
+@pytest.mark.asyncio
+async def test_agent_result_that_changed_key_slots_is_not_stored():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    orchestrator = _orchestrator({
+        "response": "Tìm thấy xe Y phù hợp.",
+        "tools_used": ["search_offerings"],
+        "context_slots": {"offering_id": "o2"},
+    })
+    with patch("app.application.orchestrators.hybrid_orchestrator.get_response_cache", return_value=cache), \
+            patch.object(orchestrator, "_cache_agentic_response", AsyncMock()):
+        await orchestrator.handle_message("t1", "bot", "tìm xe khác")
+        await orchestrator.handle_message("t1", "bot", "tìm xe khác")
+
+    assert orchestrator.agent_orchestrator.run.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_non_cacheable_agent_result_is_not_stored():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    orchestrator = _orchestrator({
+        "response": "Đã gửi yêu cầu tư vấn tới nhân viên của cửa hàng.",
+        "tools_used": ["trigger_web_hook"],
+    })
+    with patch("app.application.orchestrators.hybrid_orchestrator.get_response_cache", return_value=cache), \
+            patch.object(orchestrator, "_cache_agentic_response", AsyncMock()):
+        await orchestrator.handle_message("t1", "bot", "tư vấn giúp tôi")
+        await orchestrator.handle_message("t1", "bot", "tư vấn giúp tôi")
+
+    assert orchestrator.agent_orchestrator.run.await_count == 2
@@ -0,0 +1,101 @@
+"""Unit tests for SessionStateCache"""
+
+import pytest
+
+from app.core import domain
+from app.infrastructure.cache.session_state_cache import SessionStateCache
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeRedis:
+    """Redis tối thiểu (GET/SETEX/DELETE) dùng chung giữa các 'worker' trong test"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    async def get(self, key):
+        if self.down:
+            raise ConnectionError("down")
+        value = self.data.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+
+def _session(version=0, state="idle", tenant_id="t1"):
+    return domain.RuntimeSession(
+        id="s1", tenant_id=tenant_id, bot_id="b1", bot_version_id="v1",
+        channel_code="webchat", lifecycle_state=state, version=version
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_returns_copy_and_checks_tenant():
+    cache = SessionStateCache(max_entries=10, ttl=60, redis_url="")
+    await cache.set(_session())
+
+    hit = await cache.get("s1", "t1")
+    assert hit.lifecycle_state == "idle"
+    hit.lifecycle_state = "browsing"  # caller sửa bản copy
+    assert (await cache.get("s1", "t1")).lifecycle_state == "idle"
+
+    assert await cache.get("s1", "other-tenant") is None
+    assert await cache.get("missing", "t1") is None
+    assert cache.hits == 2 and cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_older_version_does_not_overwrite_and_invalidate():
+    cache = SessionStateCache(max_entries=10, ttl=60, redis_url="")
+    await cache.set(_session(version=2, state="viewing"))
+    await cache.set(_session(version=1, state="idle"))
+    assert (await cache.get("s1", "t1")).lifecycle_state == "viewing"
+
+    await cache.invalidate("s1")
+    assert await cache.get("s1", "t1") is None
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    cache = SessionStateCache(max_entries=1, ttl=60, redis_url="")
+    first = _session()
+    second = first.model_copy(update={"id": "s2"})
+    await cache.set(first)
+    await cache.set(second)
+    assert await cache.get("s1", "t1") is None
+    assert await cache.get("s2", "t1") is not None
+
+    expired = SessionStateCache(max_entries=10, ttl=-1, redis_url="")
+    await expired.set(first)
+    assert await expired.get("s1", "t1") is None
+
+
+@pytest.mark.asyncio
+async def test_l1_is_dropped_when_another_worker_wrote_newer_version():
+    redis = _FakeRedis()
+    workers = [SessionStateCache(max_entries=10, ttl=60, redis_url="") for _ in range(2)]
+    for worker in workers:
+        worker.redis = redis
+    writer, reader = workers
+
+    await writer.set(_session(version=1, state="idle"))
+    assert (await reader.get("s1", "t1")).lifecycle_state == "idle"  # L1 của reader được nạp từ Redis
+
+    await writer.set(_session(version=2, state="browsing"))
+    assert (await reader.get("s1", "t1")).lifecycle_state == "browsing"
+
+    # Worker khác invalidate -> L1 không còn được tin
+    await writer.invalidate("s1")
+    assert await reader.get("s1", "t1") is None
+
+    # Redis lỗi -> L1 vẫn phục vụ (giới hạn bởi TTL)
+    await writer.set(_session(version=3, state="viewing"))
+    assert (await reader.get("s1", "t1")).version == 3
+    redis.down = True
+    assert (await reader.get("s1", "t1")).version == 3
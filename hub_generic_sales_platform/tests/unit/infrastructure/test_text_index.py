@@ -0,0 +1,77 @@
+"""Unit tests for in-process full-text (BM25) index"""
+
+import pytest
+from app.infrastructure.search.text_index import TextIndex, TextIndexRegistry, tokenize
+
+pytestmark = pytest.mark.unit
+
+
+def test_tokenize_folds_vietnamese_diacritics():
+    assert tokenize("Điện Thoại iPhone-15 Pro") == ["dien", "thoai", "iphone", "15", "pro"]
+    assert tokenize(None) == []
+
+
+def test_text_index_bm25_ranking_and_field_weights():
+    index = TextIndex()
+    index.upsert("phone", {"name": "Điện thoại iPhone 15", "description": "Màn hình 6.1 inch"})
+    index.upsert("case", {"name": "Ốp lưng", "description": "Ốp lưng dành cho điện thoại iPhone"})
+    index.upsert("laptop", {"name": "Laptop Dell", "description": "Máy tính xách tay"})
+
+    hits = index.search("dien thoai iphone")
+    # Match ở name (trọng số cao) xếp trên match ở description
+    assert [h[0] for h in hits] == ["phone", "case"]
+    assert hits[0][1] > hits[1][1] > 0
+
+    # Query có dấu / không dấu cho cùng kết quả
+    assert index.search("Điện Thoại") == index.search("dien thoai")
+    assert index.search("tai nghe") == []
+
+
+def test_text_index_prefix_matching_ranks_below_exact():
+    index = TextIndex()
+    index.upsert("ip", {"name": "IP camera"})
+    index.upsert("iphone", {"name": "iPhone 15"})
+
+    assert {h[0] for h in index.search("iph")} == {"iphone"}
+    hits = index.search("ip")
+    assert [h[0] for h in hits] == ["ip", "iphone"]
+    assert index.search("iph", prefix=False) == []
+
+
+def test_text_index_upsert_replaces_and_remove_cleans_vocabulary():
+    index = TextIndex()
+    index.upsert("a", {"name": "Mazda 3"})
+    index.upsert("b", {"name": "Mazda CX-5"})
+    assert len(index) == 2
+
+    index.upsert("a", {"name": "Toyota Vios"})
+    assert [h[0] for h in index.search("mazda")] == ["b"]
+    assert [h[0] for h in index.search("vios")] == ["a"]
+
+    assert index.remove("b") is True
+    assert "b" not in index
+    assert index.search("cx") == []
+    assert index.search("maz") == []
+    # Document rỗng không được index
+    assert index.upsert("c", {"name": "", "description": None}) is False
+    assert "c" not in index
+
+
+def test_text_index_registry_upsert_only_when_built_and_ttl_expiry():
+    registry = TextIndexRegistry(ttl_seconds=300)
+    registry.upsert("catalog", "t1", "a", {"name": "Mazda"})
+    assert registry.get("catalog", "t1") is None
+
+    index = registry.build("catalog", "t1", [("a", {"name": "Mazda"})])
+    registry.upsert("catalog", "t1", "b", {"name": "Mazda CX-5"})
+    assert len(index) == 2
+    registry.remove("catalog", "t1", "a")
+    assert [h[0] for h in index.search("mazda")] == ["b"]
+
+    registry.invalidate(tenant_id="t1")
+    assert registry.get("catalog", "t1") is None
+
+    expired = TextIndexRegistry(ttl_seconds=1)
+    expired.build("catalog", "t1", [])
+    expired._indexes[("catalog", "t1")] = (expired._indexes[("catalog", "t1")][0], 0.0)
+    assert expired.get("catalog", "t1") is None
@@ -0,0 +1,97 @@
+"""Unit tests for in-process Vector Index"""
+
+import numpy as np
+import pytest
+from app.infrastructure.search.vector_index import VectorIndex, VectorIndexRegistry
+
+pytestmark = pytest.mark.unit
+
+
+def test_vector_index_flat_search_orders_by_similarity():
+    index = VectorIndex()
+    index.upsert("a", [1.0, 0.0, 0.0])
+    index.upsert("b", [0.9, 0.1, 0.0])
+    index.upsert("c", [0.0, 1.0, 0.0])
+
+    hits = index.search([1.0, 0.0, 0.0], k=2)
+    assert [h[0] for h in hits] == ["a", "b"]
+    assert hits[0][1] == pytest.approx(1.0)
+
+    # Threshold cắt bớt kết quả
+    assert [h[0] for h in index.search([1.0, 0.0, 0.0], k=5, threshold=0.999)] == ["a"]
+
+
+def test_vector_index_upsert_remove_and_filters():
+    index = VectorIndex()
+    index.upsert("a", [1.0, 0.0], {"bot_id": "bot-1"})
+    index.upsert("b", [1.0, 0.0], {"bot_id": "bot-2"})
+    assert [h[0] for h in index.search([1.0, 0.0], k=5, where={"bot_id": "bot-2"})] == ["b"]
+    # None filter value = không lọc
+    assert len(index.search([1.0, 0.0], k=5, where={"bot_id": None})) == 2
+
+    # Update vector của "a" -> không còn match
+    index.upsert("a", [0.0, 1.0], {"bot_id": "bot-1"})
+    assert [h[0] for h in index.search([1.0, 0.0], k=5, threshold=0.5)] == ["b"]
+
+    assert index.remove("b") is True
+    assert "b" not in index
+    assert len(index) == 1
+    assert index.search([1.0, 0.0], k=5, threshold=0.5) == []
+
+
+def test_vector_index_rejects_invalid_vectors():
+    index = VectorIndex()
+    assert index.upsert("a", []) is False
+    assert index.upsert("z", [0.0, 0.0]) is False
+    index.upsert("b", [1.0, 0.0])
+    assert index.upsert("c", [1.0, 0.0, 0.0]) is False  # Sai chiều
+    assert index.search([], k=1) == []
+    assert index.search([1.0, 0.0, 0.0], k=1) == []
+
+
+def test_vector_index_switches_to_ivf_for_large_tenants():
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(400, 16)).astype(np.float32)
+    index = VectorIndex(ivf_min_size=200, nprobe=20)
+    for i, vec in enumerate(data):
+        index.upsert(f"id-{i}", vec)
+
+    assert index.is_ivf
+    hits = index.search(data[123], k=1)
+    assert hits[0][0] == "id-123"
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_vector_index_grows_capacity_geometrically_and_reuses_norms():
+    index = VectorIndex()
+    capacities = set()
+    for i in range(100):
+        index.upsert(f"id-{i}", [1.0, float(i)])
+        capacities.add(index._matrix.shape[0])
+    assert capacities == {16, 32, 64, 128}
+    assert index._assign.shape[0] == index._norms.shape[0] == 128
+
+    # Norm là view của mảng dựng sẵn (không cấp phát mỗi lần search)
+    assert np.shares_memory(index._unit_norms(len(index)), index._norms)
+
+    # Xóa rồi thêm lại: vẫn tìm đúng, không tăng capacity
+    for i in range(0, 100, 2):
+        index.remove(f"id-{i}")
+    index.upsert("new", [0.0, 1.0])
+    assert index._matrix.shape[0] == 128 and len(index) == 51
+    assert index.search([0.0, 1.0], k=1)[0][0] == "new"
+    assert "id-0" not in index and "id-1" in index
+
+
+def test_registry_upsert_only_when_built_and_ttl_expiry():
+    registry = VectorIndexRegistry(ttl_seconds=0)
+    registry.upsert("faq", "t1", "a", [1.0, 0.0])
+    assert registry.get("faq", "t1") is None
+
+    index = registry.build("faq", "t1", [("a", [1.0, 0.0], None)])
+    registry.upsert("faq", "t1", "b", [0.0, 1.0])
+    assert "b" in index
+    assert registry.get("faq", "t2") is None
+
+    registry.invalidate("faq", "t1")
+    assert registry.get("faq", "t1") is None
@@ -0,0 +1,21 @@
+"""
+Unit tests for Widget chat WebSocket – payload không hợp lệ không làm đóng kết nối
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.interfaces.api.ws import ws_router
+
+
+def test_widget_chat_ws_rejects_non_object_payloads():
+    app = FastAPI()
+    app.include_router(ws_router)
+
+    with TestClient(app).websocket_connect("/ws/widget-chat") as ws:
+        ws.send_text("không phải json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json(["tenant", "bot"])
+        assert ws.receive_json()["type"] == "error"
+        # Kết nối vẫn sống sau payload lỗi
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
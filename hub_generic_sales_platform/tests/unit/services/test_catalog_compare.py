@@ -0,0 +1,63 @@
+"""Unit tests cho CatalogStateHandler.handle_compare_action (loader theo lô, memo theo request)"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.application.services.catalog_state_handler import CatalogStateHandler
+from app.core.domain.runtime import SlotKey
+
+pytestmark = pytest.mark.unit
+
+
+def _doc(offering_id, name, attributes, amount=None):
+    return {
+        "id": offering_id, "code": offering_id, "name": name, "description": None,
+        "price": {"amount": amount, "currency": "VND", "compare_at": None} if amount else None,
+        "attributes": attributes,
+    }
+
+
+def _handler(comparisons=()):
+    handler = CatalogStateHandler(MagicMock())
+    handler.catalog_service.get_offerings_for_bot_by_ids = AsyncMock(return_value=[
+        _doc("a", "Mazda 3", {"engine": 1.5, "color": "Đỏ", "price": 700}, amount=690),
+        _doc("b", "Mazda CX-5", {"engine": 2.0, "color": "Đỏ", "price": 900}),
+    ])
+    handler.comparison_repo.get_by_offerings = AsyncMock(return_value=list(comparisons))
+    return handler
+
+
+def _slots():
+    return [SimpleNamespace(key=SlotKey.OFFERING_ID, value="a"), SimpleNamespace(key=f"{SlotKey.OFFERING_ID}_2", value="b")]
+
+
+@pytest.mark.asyncio
+async def test_compare_builds_diff_and_bento_grid_from_one_load():
+    handler = _handler()
+    session = SimpleNamespace(tenant_id="t1", ext_metadata={"channel": "APP"})
+
+    result = await handler.handle_compare_action("so sánh", session, _slots())
+    await handler.handle_compare_action("so sánh lại", session, _slots())
+
+    handler.catalog_service.get_offerings_for_bot_by_ids.assert_awaited_once_with("t1", ["a", "b"], "APP")
+    assert result["success"] is True
+    assert "- engine: 1.5 vs 2.0" in result["response"]
+    assert "color" not in result["response"]
+    products = result["g_ui_data"]["data"]["products"]
+    # Giá theo channel, fallback thuộc tính 'price'
+    assert [(p["id"], p["price"]) for p in products] == [("a", "690"), ("b", "900")]
+    assert products[0]["tags"] == ["engine", "color"]
+
+
+@pytest.mark.asyncio
+async def test_compare_uses_stored_comparison_with_same_loaded_data():
+    handler = _handler([SimpleNamespace(title="Mazda 3 vs CX-5", description="CX-5 rộng hơn")])
+    session = SimpleNamespace(tenant_id="t1", ext_metadata=None)
+
+    result = await handler.handle_compare_action("so sánh", session, _slots())
+
+    assert result["response"] == "CX-5 rộng hơn"
+    assert result["g_ui_data"]["data"]["title"] == "Mazda 3 vs CX-5"
+    assert [p["name"] for p in result["g_ui_data"]["data"]["products"]] == ["Mazda 3", "Mazda CX-5"]
+    handler.catalog_service.get_offerings_for_bot_by_ids.assert_awaited_once_with("t1", ["a", "b"], "WEB")
@@ -0,0 +1,68 @@
+"""Unit tests cho CatalogStateHandler.handle_search_offerings (BM25 + vector blending)"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.application.services.catalog_state_handler import CatalogStateHandler
+
+pytestmark = pytest.mark.unit
+
+
+def _row(offering_id, name):
+    return {"id": offering_id, "code": offering_id, "type": "physical", "name": name, "description": None}
+
+
+def _handler(keyword_hits, semantic_hits=()):
+    handler = CatalogStateHandler(MagicMock())
+    rows = {"a": _row("a", "Mazda 3"), "b": _row("b", "Mazda CX-5"), "c": _row("c", "Toyota Vios")}
+    repo = handler.catalog_service.offering_repo = MagicMock()
+    repo.text_search = AsyncMock(return_value=keyword_hits)
+    repo.search_catalog = AsyncMock(
+        side_effect=lambda tenant_id, offering_ids=None, **kw: [rows[i] for i in offering_ids or [] if i in rows]
+    )
+    handler.catalog_service.version_repo = MagicMock()
+    handler.catalog_service.version_repo.semantic_search = AsyncMock(return_value=[
+        (SimpleNamespace(offering_id=offering_id), score) for offering_id, score in semantic_hits
+    ])
+    handler._upsert_search_slots = AsyncMock()
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_search_offerings_ranks_by_bm25_and_hydrates_once():
+    handler = _handler([("b", 4.0), ("a", 2.0)])
+    session = SimpleNamespace(id="s1", tenant_id="t1")
+
+    result = await handler.handle_search_offerings(query="mazda", session=session)
+
+    assert [o["id"] for o in result["offerings"]] == ["b", "a"]
+    handler.catalog_service.version_repo.semantic_search.assert_not_awaited()
+    handler.catalog_service.offering_repo.search_catalog.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_search_offerings_blends_vector_scores_for_multi_word_queries():
+    handler = _handler([("a", 3.0), ("b", 2.9)], semantic_hits=[("b", 0.95), ("c", 0.9)])
+    session = SimpleNamespace(id="s1", tenant_id="t1")
+    llm = MagicMock()
+    llm.get_embedding = AsyncMock(return_value=[0.1, 0.2])
+
+    with patch("app.application.services.catalog_state_handler.get_llm_provider", return_value=llm):
+        result = await handler.handle_search_offerings(query="xe mazda gầm cao", session=session)
+
+    # b: keyword gần bằng a nhưng có vector score cao -> lên đầu; c chỉ có vector vẫn được trả về
+    assert [o["id"] for o in result["offerings"]] == ["b", "a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_search_offerings_falls_back_to_sql_when_text_index_disabled():
+    handler = _handler(None)
+    repo = handler.catalog_service.offering_repo
+    repo.search_catalog = AsyncMock(return_value=[_row("a", "Mazda 3")])
+    session = SimpleNamespace(id="s1", tenant_id="t1")
+
+    result = await handler.handle_search_offerings(query="mazda", session=session)
+
+    assert [o["id"] for o in result["offerings"]] == ["a"]
+    assert repo.search_catalog.await_args_list[0].kwargs["query"] == "mazda"
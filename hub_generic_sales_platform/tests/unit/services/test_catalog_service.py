@@ -66,6 +66,7 @@ async def test_get_offering_for_bot_inactive():
     mock_offering.status = "inactive"  # Inactive
     
     service.offering_repo.get_by_code = AsyncMock(return_value=mock_offering)
+    service.read_model_repo.get_by_codes = AsyncMock(return_value={})
     
     result = await service.get_offering_for_bot(
         tenant_id="tenant_1",
@@ -113,6 +114,7 @@ async def test_publish_version():
     mock_db.execute = AsyncMock()
     mock_db.execute.side_effect = [target_result, active_result]
     mock_db.commit = AsyncMock()
+    service.refresh_read_model = AsyncMock()
     
     # Execute
     result = await service.publish_version(
@@ -125,6 +127,7 @@ async def test_publish_version():
     assert result is True
     assert mock_target_version.status == "active"
     assert mock_old_active.status == "archived"
+    service.refresh_read_model.assert_awaited_once_with("tenant_1", ["off_123"])
 
 
 @pytest.mark.unit
@@ -0,0 +1,80 @@
+"""Unit tests for compiled Tier 1 FastPathMatcher"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.application.services.fast_path_matcher import CompiledPatternSet, FastPathMatcher, normalize_message
+
+pytestmark = pytest.mark.unit
+
+GLOBAL = {
+    r"^(chào|hi|hello)": "Chào bạn!",
+    r"^(cám ơn|cảm ơn|thanks)": "Không có gì!",
+}
+
+
+def test_matches_nfd_input_and_unaccented_patterns():
+    patterns = CompiledPatternSet(list(GLOBAL.items()), fold_all=False)
+    assert patterns.match(normalize_message("Chào shop")) == "Chào bạn!"
+    assert patterns.match(normalize_message("Cảm ơn nhé")) == "Không có gì!"  # NFD
+    assert patterns.match(normalize_message("Hỏi giá iphone")) is None
+    # Pattern viết không dấu khớp cả input có dấu / không dấu
+    unaccented = CompiledPatternSet([(r"gio mo cua", "8h-22h")], fold_all=False)
+    assert unaccented.match(normalize_message("Giờ mở cửa thế nào")) == "8h-22h"
+    assert unaccented.match(normalize_message("gio mo cua the nao")) == "8h-22h"
+
+
+def test_words_differing_only_in_diacritics_do_not_collide():
+    patterns = CompiledPatternSet(list(GLOBAL.items()), fold_all=False)
+    assert patterns.match(normalize_message("Chảo chống dính giá bao nhiêu?")) is None
+    assert patterns.match(normalize_message("cháo gà còn không")) is None
+    assert patterns.match(normalize_message("Cấm ơn")) is None
+    # Opt-in FAST_PATH_FOLD_DIACRITICS: bỏ dấu mọi pattern
+    assert CompiledPatternSet(list(GLOBAL.items()), fold_all=True).match(normalize_message("chao shop")) == "Chào bạn!"
+
+
+def test_first_declared_rule_wins_regardless_of_match_position():
+    patterns = CompiledPatternSet([(r"giá", "Hỏi giá"), (r"^chào", "Chào bạn!")], fold_all=False)
+    assert patterns.match(normalize_message("chào shop, giá bao nhiêu")) == "Hỏi giá"
+    patterns = CompiledPatternSet([(r"(ha)\1", "😄"), (r"ha", "Hi!")], fold_all=False)
+    assert patterns.match("hi ha haha") == "😄"
+
+
+def test_bot_rules_take_priority_and_invalid_patterns_are_skipped():
+    matcher = FastPathMatcher()
+    bot_rules = {r"^chào": "Chào mừng đến Shop A!", r"gio mo cua": "Shop mở cửa 8h-22h.", r"([": "broken"}
+    assert matcher.match("Chào bạn", GLOBAL, bot_rules, key="v1") == "Chào mừng đến Shop A!"
+    assert matcher.match("shop giờ mở cửa thế nào", GLOBAL, bot_rules, key="v1") == "Shop mở cửa 8h-22h."
+    assert matcher.match("hello", GLOBAL, bot_rules, key="v1") == "Chào bạn!"
+    assert matcher.match("Chào bạn", GLOBAL, key="v2") == "Chào bạn!"
+
+
+def test_recompiles_when_rules_change():
+    matcher = FastPathMatcher()
+    assert matcher.match("ship không", GLOBAL, {r"ship": "Freeship!"}, key="v1") == "Freeship!"
+    assert matcher.match("ship không", GLOBAL, {r"ship": "Phí ship 30k"}, key="v1") == "Phí ship 30k"
+    assert matcher.match("ship không", GLOBAL, {}, key="v1") is None
+
+
+def test_backreference_patterns_fall_back_to_individual_match():
+    patterns = CompiledPatternSet([(r"(ha)\1", "😄"), (r"^hi", "Hi!")])
+    assert patterns.match("haha") == "😄"
+    assert patterns.match("hi") == "Hi!"
+
+
+@pytest.mark.asyncio
+async def test_bot_rules_cached_until_ttl_or_invalidate():
+    matcher = FastPathMatcher(rules_ttl_seconds=60)
+    loader = AsyncMock(return_value={r"^alo": "Dạ shop nghe!"})
+
+    assert await matcher.get_bot_rules("v1", loader) == {r"^alo": "Dạ shop nghe!"}
+    await matcher.get_bot_rules("v1", loader)
+    assert loader.await_count == 1
+
+    matcher.invalidate("v1")
+    await matcher.get_bot_rules("v1", loader)
+    assert loader.await_count == 2
+
+    assert await matcher.get_bot_rules(None, loader) == {}
+    failing = AsyncMock(side_effect=RuntimeError("db down"))
+    assert await matcher.get_bot_rules("v2", failing) == {}
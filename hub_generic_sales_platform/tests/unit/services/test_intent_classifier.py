@@ -0,0 +1,117 @@
+"""Unit tests for local IntentClassifier & IntentClassifierRegistry"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.application.services.intent_classifier import IntentClassifier, IntentClassifierRegistry
+from app.application.services.intent_handler import IntentHandler
+from app.core.domain.runtime import Intent, IntentSource, LifecycleState
+
+pytestmark = pytest.mark.unit
+
+EXAMPLES = [
+    ("giá iphone 15 bao nhiêu", "INQUIRY_PRICE"),
+    ("cái này giá bao nhiêu vậy", "INQUIRY_PRICE"),
+    ("bao nhiêu tiền một chiếc", "INQUIRY_PRICE"),
+    ("giá bán hiện tại là bao nhiêu", "INQUIRY_PRICE"),
+    ("tìm cho tôi laptop gaming", "SEARCH_PRODUCT"),
+    ("tôi muốn tìm điện thoại samsung", "SEARCH_PRODUCT"),
+    ("có mẫu tai nghe nào không", "SEARCH_PRODUCT"),
+    ("tìm xe máy honda", "SEARCH_PRODUCT"),
+    ("ok chốt đơn cho tôi", "CONFIRM"),
+    ("đồng ý mua luôn", "CONFIRM"),
+    ("chốt luôn nhé", "CONFIRM"),
+    ("xác nhận đặt hàng", "CONFIRM"),
+    ("thôi hủy đơn", "CANCEL"),
+    ("không mua nữa, hủy giúp", "CANCEL"),
+]
+
+
+def test_classifier_predicts_with_accent_folding():
+    model = IntentClassifier()
+    model.add_examples(EXAMPLES + [("???", "UNKNOWN"), ("x", "NOT_AN_INTENT")])
+    assert len(model) == len(EXAMPLES)
+    assert model.predict("gia bao nhieu") is None  # predict không tự train
+    model.fit()
+
+    # Không dấu vẫn nhận được
+    intent, score, margin = model.predict("gia bao nhieu")
+    assert intent == Intent.INQUIRY_PRICE
+    assert score > 0 and margin > 0
+    assert model.predict("huy don")[0] == Intent.CANCEL
+    assert model.predict("tim laptop")[0] == Intent.SEARCH_PRODUCT
+
+
+def test_classifier_empty_returns_none():
+    assert IntentClassifier().predict("xin chào") is None
+
+
+@pytest.mark.asyncio
+async def test_registry_loads_in_background_and_applies_thresholds():
+    loader = AsyncMock(return_value=EXAMPLES)
+    registry = IntentClassifierRegistry(loader=loader, min_examples=5, min_score=0.2, min_margin=0.05)
+
+    # Lần đầu: chưa có model -> None (fallback LLM), load chạy nền
+    assert registry.classify("t1", "gia bao nhieu") is None
+    await asyncio.sleep(0)
+    await asyncio.gather(*registry._loading.values())
+    loader.assert_awaited_once_with("t1")
+
+    assert registry.classify("t1", "giá bao nhiêu") == Intent.INQUIRY_PRICE
+    # Câu lạ -> score thấp -> None
+    assert registry.classify("t1", "zzzz qqqq") is None
+
+    strict = IntentClassifierRegistry(loader=loader, min_examples=100)
+    strict._models["t1"] = registry._models["t1"]
+    assert strict.classify("t1", "giá bao nhiêu") is None  # chưa đủ dữ liệu
+
+
+@pytest.mark.asyncio
+async def test_registry_learn_refits_in_background_without_blocking_predict():
+    registry = IntentClassifierRegistry(
+        loader=AsyncMock(return_value=EXAMPLES), min_examples=5, min_score=0.2, min_margin=0.05, refit_delay=0
+    )
+    registry.classify("t1", "giá bao nhiêu")
+    await asyncio.gather(*registry._loading.values())
+    model = registry._models["t1"][0]
+    before = model._model
+
+    for _ in range(3):
+        registry.learn("t1", "cho xem bảo hành", Intent.PROVIDE_INFO)
+    # Nhãn mới chưa train: predict vẫn dùng model cũ, chỉ một refit được lên lịch
+    assert model._model is before and model.dirty
+    assert len(registry._refitting) == 1
+    assert registry.classify("t1", "cho xem bảo hành") != Intent.PROVIDE_INFO
+
+    await asyncio.gather(*registry._refitting.values())
+    assert model._model is not before and not model.dirty
+    assert model.predict("cho xem bảo hành")[0] == Intent.PROVIDE_INFO
+
+
+@pytest.mark.asyncio
+async def test_intent_handler_uses_local_classifier_before_llm():
+    handler = IntentHandler()
+    handler.llm_provider = AsyncMock()
+    handler.llm_provider.generate_response.return_value = {"response": "CONFIRM"}
+    registry = IntentClassifierRegistry(loader=AsyncMock(return_value=EXAMPLES), min_examples=5, min_score=0.2, min_margin=0.05)
+    handler.classifier = registry
+
+    # Chưa load -> gọi LLM
+    assert await handler.extract_intent("chốt đơn", LifecycleState.IDLE, tenant_id="t1") == Intent.CONFIRM
+    assert handler.llm_provider.generate_response.await_count == 1
+    await asyncio.gather(*registry._loading.values())
+
+    # Đã có model -> không gọi LLM
+    assert await handler.extract_intent("giá bao nhiêu", LifecycleState.IDLE, tenant_id="t1") == Intent.INQUIRY_PRICE
+    assert handler.llm_provider.generate_response.await_count == 1
+
+    # Không có tenant -> luôn LLM
+    await handler.extract_intent("giá bao nhiêu", LifecycleState.IDLE)
+    assert handler.llm_provider.generate_response.await_count == 2
+
+    # Nguồn của nhãn: local classifier vs LLM
+    assert await handler.extract_intent_with_source("giá bao nhiêu", LifecycleState.IDLE, tenant_id="t1") == (
+        Intent.INQUIRY_PRICE, IntentSource.LOCAL
+    )
+    assert await handler.extract_intent_with_source("chốt đơn", LifecycleState.IDLE) == (Intent.CONFIRM, IntentSource.LLM)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from app.core.shared.vector_similarity import SimilarityMatrix, cosine_top_k
+
+pytestmark = pytest.mark.unit
+
+
+def test_cosine_top_k_matches_pairwise_similarity():
+    """Batched top-k phải khớp với cosine từng cặp"""
+    rng = np.random.default_rng(7)
+    matrix = rng.normal(size=(50, 8)).astype(np.float32)
+    query = rng.normal(size=8).astype(np.float32)
+
+    rows, scores = cosine_top_k(query, matrix, k=5)
+    expected = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    assert list(rows) == list(np.argsort(-expected)[:5])
+    assert scores == pytest.approx(np.sort(expected)[::-1][:5], rel=1e-5)
+
+
+def test_cosine_top_k_threshold_and_edge_cases():
+    matrix = np.array([[1, 0], [0, 1], [0, 0]], dtype=np.float32)
+    rows, scores = cosine_top_k([1, 0], matrix, k=3, threshold=0.5)
+    assert list(rows) == [0]
+    assert scores[0] == pytest.approx(1.0)
+
+    # Query rỗng / zero / sai chiều
+    assert cosine_top_k([], matrix, k=1)[0].size == 0
+    assert cosine_top_k([0, 0], matrix, k=1)[0].size == 0
+    assert cosine_top_k([1, 0, 0], matrix, k=1)[0].size == 0
+
+
+def test_similarity_matrix_skips_invalid_rows_and_maps_positions():
+    """Vector None / sai chiều bị bỏ qua, vị trí trả về theo danh sách gốc"""
+    sm = SimilarityMatrix([None, [0.0, 1.0], [1.0, 0.0, 0.0], [1.0, 0.1]])
+    assert len(sm) == 2
+    assert sm.matrix.dtype == np.float32 and sm.matrix.flags["C_CONTIGUOUS"]
+
+    hits = sm.top_k([1.0, 0.0], k=1)
+    assert hits[0][0] == 3
+    assert SimilarityMatrix([]).top_k([1.0], k=1) == []
@@ -101,3 +101,128 @@ async def test_agent_orchestrator_empty_response():
         
         result = await orchestrator.run("test", "sid", "idle", "tid")
         assert "Tôi không thể xử lý yêu cầu này" in result["response"]
+
+
+@pytest.mark.asyncio
+async def test_agent_orchestrator_intent_overlaps_context_reads():
+    """Intent extraction (LLM) chạy song song với việc đọc turns/session/bot"""
+    import asyncio
+
+    db = MagicMock()
+    orchestrator = AgentOrchestrator(db)
+    bot_loaded = asyncio.Event()
+
+    async def _extract_intent(**kwargs):
+        # Chỉ hoàn tất khi bước đọc bot đã chạy -> deadlock nếu pipeline tuần tự
+        await asyncio.wait_for(bot_loaded.wait(), timeout=1)
+        return None, None
+
+    async def _get_bot(*args, **kwargs):
+        bot_loaded.set()
+        mock_bot = MagicMock()
+        mock_bot.name = "Test Bot"
+        mock_bot.capabilities = ["core"]
+        mock_bot.domain.name = "Test Domain"
+        return mock_bot
+
+    orchestrator.turn_repo.get_by_session = AsyncMock(return_value=[])
+    orchestrator.slots_repo.get_by_session = AsyncMock(return_value=[])
+    orchestrator.session_repo.get = AsyncMock(return_value=MagicMock(bot_id="bot-1"))
+    orchestrator.intent_handler.extract_intent_with_source = _extract_intent
+    orchestrator.llm_service = AsyncMock()
+    orchestrator.llm_service.generate_response.return_value = {"response": "ok", "usage": {"total_tokens": 1}}
+
+    with patch("app.infrastructure.database.repositories.BotRepository.get", new=_get_bot), \
+         patch.object(orchestrator, "_record_timings") as mock_record:
+        result = await orchestrator._execute_orchestration("hello", "sid", "idle", "tid")
+
+    assert result["response"] == "ok"
+    timings = mock_record.call_args.args[0]
+    assert {"slots", "turns", "session", "bot", "intent"} <= set(timings)
+
+
+@pytest.mark.asyncio
+async def test_agent_orchestrator_intent_overlaps_main_llm_call():
+    """Intent còn chờ LLM không chặn main reasoning call; kết quả vẫn mang intent + nguồn"""
+    import asyncio
+    from app.core.domain.runtime import Intent, IntentSource
+
+    orchestrator = AgentOrchestrator(MagicMock())
+    llm_started = asyncio.Event()
+
+    async def _extract_intent(**kwargs):
+        # Chỉ hoàn tất khi main LLM call đã bắt đầu -> deadlock nếu main call chờ intent
+        await asyncio.wait_for(llm_started.wait(), timeout=1)
+        return Intent.SEARCH_PRODUCT, IntentSource.LLM
+
+    async def _generate_response(system_prompt, *args, **kwargs):
+        llm_started.set()
+        return {"response": "ok", "usage": {"total_tokens": 1}}
+
+    mock_bot = MagicMock()
+    mock_bot.name = "Test Bot"
+    mock_bot.capabilities = ["core"]
+    mock_bot.domain.name = "Test Domain"
+
+    orchestrator.turn_repo.get_by_session = AsyncMock(return_value=[])
+    orchestrator.slots_repo.get_by_session = AsyncMock(return_value=[])
+    orchestrator.session_repo.get = AsyncMock(return_value=MagicMock(bot_id="bot-1"))
+    orchestrator.intent_handler.extract_intent_with_source = _extract_intent
+    orchestrator.llm_service = AsyncMock()
+    orchestrator.llm_service.generate_response.side_effect = _generate_response
+
+    with patch("app.infrastructure.database.repositories.BotRepository.get", new_callable=AsyncMock) as mock_bot_get:
+        mock_bot_get.return_value = mock_bot
+        result = await orchestrator._execute_orchestration("tìm xe", "sid", "idle", "tid")
+
+    assert result["response"] == "ok"
+    assert result["intent"] == "SEARCH_PRODUCT"
+    assert result["intent_source"] == IntentSource.LLM
+    # Intent chưa có lúc build prompt -> không đưa vào system prompt
+    assert "Detected Intent" not in orchestrator.llm_service.generate_response.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_agent_orchestrator_keeps_prompt_prefix_stable_across_tool_turns():
+    """System prompt không đổi giữa các vòng reasoning; observation đi vào dưới dạng tool message"""
+    from app.core.services.tool_executor import ToolResult
+
+    orchestrator = AgentOrchestrator(MagicMock())
+    slot = MagicMock(key="offering_id", value="o1")
+    slot.is_active.return_value = True
+    orchestrator.turn_repo.get_by_session = AsyncMock(return_value=[])
+    orchestrator.slots_repo.get_by_session = AsyncMock(return_value=[slot])
+    orchestrator.session_repo.get = AsyncMock(return_value=MagicMock(bot_id="bot-1"))
+    orchestrator.intent_handler.extract_intent_with_source = AsyncMock(return_value=(None, None))
+    orchestrator.tool_executor.execute = AsyncMock(return_value=ToolResult(success=True, data={"items": ["X"]}))
+
+    mock_bot = MagicMock()
+    mock_bot.name = "Test Bot"
+    mock_bot.capabilities = ["core"]
+    mock_bot.domain.name = "Test Domain"
+
+    tool_call = MagicMock(id="call-1")
+    tool_call.function.name = "search_offerings"
+    tool_call.function.arguments = '{"query": "xe"}'
+    orchestrator.llm_service = AsyncMock()
+    orchestrator.llm_service.generate_response.side_effect = [
+        {"response": "", "tool_calls": [tool_call],
+         "usage": {"prompt_tokens": 900, "completion_tokens": 10, "total_tokens": 910, "cached_tokens": 0}},
+        {"response": "Có xe X.", "tool_calls": [],
+         "usage": {"prompt_tokens": 950, "completion_tokens": 5, "total_tokens": 955, "cached_tokens": 896}},
+    ]
+
+    with patch("app.infrastructure.database.repositories.BotRepository.get", new_callable=AsyncMock) as mock_bot_get:
+        mock_bot_get.return_value = mock_bot
+        result = await orchestrator._execute_orchestration("tìm xe", "sid", "browsing", "tid")
+
+    assert result["response"] == "Có xe X."
+    assert result["usage"] == {"prompt_tokens": 1850, "completion_tokens": 15, "total_tokens": 1865, "cached_tokens": 896}
+    first, second = orchestrator.llm_service.generate_response.call_args_list
+    assert first.args[0] == second.args[0]
+    # Phần ổn định đứng trước phần thay đổi theo lượt (slots, state, intent)
+    assert first.args[0].index("Công cụ ĐƯỢC PHÉP") < first.args[0].index("- offering_id: o1")
+    history = second.kwargs["messages_history"]
+    assert history[0] == {"role": "user", "content": "tìm xe"}
+    assert history[1]["tool_calls"][0]["id"] == "call-1"
+    assert history[2] == {"role": "tool", "tool_call_id": "call-1", "content": '{"items": ["X"]}'}
@@ -124,3 +124,26 @@ async def test_semantic_cache_create_entry_writes_redis():
     service.redis_cache.set.assert_called_once_with(
         "t1", "q", "r", cache_id="new-id"
     )
+
+
+@pytest.mark.asyncio
+async def test_agentic_auto_cache_reuses_tier2_query_vector():
+    """Response Agentic được auto-cache kèm embedding Tier 2 của request (không gọi embedding lại)"""
+    from app.application.orchestrators.hybrid_orchestrator import HybridOrchestrator
+
+    orchestrator = HybridOrchestrator(MagicMock())
+    orchestrator.decision_repo.create = AsyncMock()
+    admission = MagicMock()
+    admission.record_miss = AsyncMock(return_value=True)
+    vector = [0.1, 0.2, 0.3]
+    response = "Cửa hàng mở cửa từ 8h đến 22h tất cả các ngày trong tuần."
+    with patch("app.application.orchestrators.hybrid_orchestrator.get_write_behind_journal", return_value=None), \
+            patch("app.application.orchestrators.hybrid_orchestrator.get_cache_admission_filter", return_value=admission), \
+            patch.object(orchestrator, "_cache_agentic_response", AsyncMock()) as cache_write:
+        await orchestrator._finalize_response(
+            "sid", "v1", response, "agentic_path",
+            decision_type=domain.DecisionType.PROCEED, cost=0.0, start_time=0.0,
+            skip_turns=True, tenant_id="t1", user_message="giờ mở cửa", query_vector=vector,
+        )
+
+    cache_write.assert_awaited_once_with("t1", "giờ mở cửa", response, vector)